@@ -48,17 +48,26 @@ logger.info("="*80)
 logger.info("✅ Logging root configuré - Toutes les erreurs seront capturées")
 logger.info("="*80)
 
+import os
+import anyio.to_thread
 from fastapi import FastAPI, Request, status
 from fastapi.middleware.cors import CORSMiddleware
 from fastapi.responses import JSONResponse
 from fastapi.exceptions import RequestValidationError
 from starlette.exceptions import HTTPException as StarletteHTTPException
 from backend.database.connection import init_database
+from backend.api.services.job_service import get_job_runner, shutdown_job_runner
 import traceback
 import time
 
 # Import routes
-from backend.api.routes import transactions, mappings, enrichment, analytics, pivot_configs, amortization, amortization_types, loan_payments, loan_configs, compte_resultat, bilan, properties, logs
+from backend.api.routes import transactions, mappings, enrichment, analytics, pivot_configs, amortization, amortization_types, loan_payments, loan_configs, compte_resultat, bilan, properties, logs, jobs
+
+# Les routes sont des fonctions synchrones (Session SQLAlchemy synchrone) : FastAPI les exécute
+# dans le pool de threads d'AnyIO, et non sur la boucle d'événements. Taille du pool bornée par
+# LMNP_API_THREADS (défaut : 20, soit le pool de lecture avec son débordement) pour ne pas
+# créer plus de threads que de connexions disponibles.
+API_THREADS = int(os.getenv("LMNP_API_THREADS", "20"))
 
 # Import middleware de logging
 from backend.api.middleware.logging_middleware import LoggingMiddleware
@@ -206,12 +215,23 @@ app.include_router(loan_configs.router, prefix="/api", tags=["loan-configs"])
 app.include_router(compte_resultat.router, prefix="/api", tags=["compte-resultat"])
 app.include_router(bilan.router, prefix="/api", tags=["bilan"])
 app.include_router(logs.router, prefix="/api", tags=["logs"])
+app.include_router(jobs.router, prefix="/api", tags=["jobs"])
 
 
 @app.on_event("startup")
 async def startup_event():
     """Initialize database on application startup."""
+    anyio.to_thread.current_default_thread_limiter().total_tokens = API_THREADS
     init_database()
+    # Démarrer le pool de tâches de fond (reprise des tâches en attente)
+    get_job_runner()
+
+
+@app.on_event("shutdown")
+async def shutdown_event():
+    """Stop background job workers on application shutdown."""
+    # Les tâches en attente restent pending et seront reprises au prochain démarrage
+    shutdown_job_runner()
 
 
 @app.get("/")
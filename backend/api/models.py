@@ -54,9 +54,10 @@ class TransactionResponse(TransactionBase):
 class TransactionListResponse(BaseModel):
     """Model for list of transactions response."""
     transactions: List[TransactionResponse]
-    total: int
+    total: Optional[int] = None  # None si le total n'a pas été demandé (pagination par curseur)
     page: int = 1
     page_size: int = 100
+    next_cursor: Optional[str] = None  # Curseur de la page suivante (pagination par curseur)
 
 
 # Health check models
@@ -236,7 +237,7 @@ class MappingError(BaseModel):
 class DuplicateMapping(BaseModel):
     """Model for duplicate mapping."""
     nom: str
-    existing_id: int = Field(..., description="ID du mapping existant en BDD")
+    existing_id: Optional[int] = Field(None, description="ID du mapping existant en BDD (None si doublon dans le fichier)")
 
 
 class MappingImportResponse(BaseModel):
@@ -418,6 +419,21 @@ class AmortizationTypeTransactionCountResponse(BaseModel):
     transaction_count: int = Field(..., description="Nombre de transactions correspondant au type")
 
 
+class AmortizationTypeSummaryItem(BaseModel):
+    """Model for the amount, cumulated amount and transaction count of one amortization type."""
+    type_id: int
+    type_name: str
+    amount: float = Field(..., description="Montant total d'immobilisation (somme des transactions)")
+    cumulated_amount: float = Field(..., description="Montant cumulé d'amortissement jusqu'à l'année en cours (somme des AmortizationResult)")
+    transaction_count: int = Field(..., description="Nombre de transactions correspondant au type")
+
+
+class AmortizationTypeSummaryResponse(BaseModel):
+    """Model for the summary of all amortization types of a property."""
+    items: List[AmortizationTypeSummaryItem]
+    total: int
+
+
 # Loan Payment models
 
 class LoanPaymentBase(BaseModel):
@@ -829,3 +845,91 @@ class PropertyListResponse(BaseModel):
     """Model for list of properties response."""
     items: List[PropertyResponse]
     total: int
+
+
+class FacetValue(BaseModel):
+    """Model for a distinct value and its count."""
+    value: str
+    count: int
+
+
+class TransactionFacets(BaseModel):
+    """Model for the transaction facets of a property."""
+    total: int = Field(..., description="Nombre de transactions")
+    enriched: int = Field(..., description="Nombre de transactions enrichies")
+    unassigned: int = Field(..., description="Nombre de transactions enrichies sans level_1")
+    facets: Dict[str, List[FacetValue]] = Field(..., description="Valeurs distinctes par colonne (nom, level_1, level_2, level_3, annee, mois)")
+
+
+class MappingCombinationCount(BaseModel):
+    """Model for a mapping combination and its number of mappings."""
+    level_1: Optional[str] = None
+    level_2: Optional[str] = None
+    level_3: Optional[str] = None
+    count: int
+
+
+class MappingFacets(BaseModel):
+    """Model for the mapping facets of a property."""
+    total: int = Field(..., description="Nombre de mappings")
+    combinations: List[MappingCombinationCount]
+
+
+class AllowedCombination(BaseModel):
+    """Model for an allowed (level_1, level_2, level_3) combination."""
+    level_1: str
+    level_2: str
+    level_3: Optional[str] = None
+
+
+class AllowedFacets(BaseModel):
+    """Model for the allowed mapping facets of a property."""
+    level_1: List[str]
+    level_2: List[str]
+    combinations: List[AllowedCombination]
+
+
+class PropertyFacetsResponse(BaseModel):
+    """Model for the bundled facets of a property (classification UI)."""
+    property_id: int
+    transactions: TransactionFacets
+    mappings: MappingFacets
+    allowed: AllowedFacets
+
+
+# Job models
+
+class JobSubmitRequest(BaseModel):
+    """Model for submitting a background job."""
+    kind: str = Field(..., description="Type de tâche (re_enrich, amortization_recalculate, allowed_mappings_reset)")
+    property_id: int = Field(..., description="ID de la propriété (obligatoire)")
+    params: Dict[str, Any] = Field(default_factory=dict, description="Paramètres de la tâche")
+
+
+class JobResponse(BaseModel):
+    """Model for background job response."""
+    id: int
+    property_id: int
+    kind: str
+    status: str
+    progress: float
+    message: Optional[str] = None
+    result: Optional[Dict[str, Any]] = None
+    error: Optional[str] = None
+    created_at: datetime
+    started_at: Optional[datetime] = None
+    finished_at: Optional[datetime] = None
+
+
+class JobProgressResponse(BaseModel):
+    """Model for background job progress response."""
+    id: int
+    status: str
+    progress: float
+    message: Optional[str] = None
+
+
+class JobListResponse(BaseModel):
+    """Model for list of background jobs response."""
+    items: List[JobResponse]
+    total: int
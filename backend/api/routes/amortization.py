@@ -6,6 +6,8 @@ API routes for amortization calculations and results.
 
 import logging
 from fastapi import APIRouter, Depends, HTTPException, Query, Body
+from fastapi.encoders import jsonable_encoder
+from fastapi.responses import JSONResponse
 from sqlalchemy.orm import Session
 from sqlalchemy import func, and_, or_
 from typing import Dict, List, Optional
@@ -21,7 +23,9 @@ from backend.api.models import (
     AmortizationRecalculateRequest,
     AmortizationRecalculateResponse
 )
-from backend.api.services.amortization_service import recalculate_all_amortizations
+from backend.api.services.amortization_service import sync_property_amortizations
+from backend.api.services.job_service import property_lock
+from backend.api.utils.job_utils import submit_job_or_400
 from backend.api.utils.validation import validate_property_id
 
 logger = logging.getLogger(__name__)
@@ -30,7 +34,7 @@ router = APIRouter()
 
 
 @router.get("/amortization/results", response_model=AmortizationResultsResponse)
-async def get_amortization_results(
+def get_amortization_results(
     property_id: int = Query(..., description="ID de la propriété (obligatoire)"),
     db: Session = Depends(get_db)
 ):
@@ -86,7 +90,7 @@ async def get_amortization_results(
 
 
 @router.get("/amortization/results/aggregated", response_model=AmortizationAggregatedResponse)
-async def get_amortization_results_aggregated(
+def get_amortization_results_aggregated(
     property_id: int = Query(..., description="ID de la propriété (obligatoire)"),
     db: Session = Depends(get_db)
 ):
@@ -105,12 +109,20 @@ async def get_amortization_results_aggregated(
     # Valider property_id
     validate_property_id(db, property_id, "Amortizations")
     
-    # Récupérer tous les résultats filtrés par property_id via Transaction
-    results = db.query(AmortizationResult).join(
-        Transaction, AmortizationResult.transaction_id == Transaction.id
-    ).filter(Transaction.property_id == property_id).all()
-    
-    if not results:
+    # Agréger en SQL : une ligne par (catégorie, année), via property_id dénormalisé
+    # (index idx_amortization_result_property_category_year)
+    grouped = db.query(
+        AmortizationResult.category,
+        AmortizationResult.year,
+        func.sum(AmortizationResult.amount).label("amount")
+    ).filter(
+        AmortizationResult.property_id == property_id
+    ).group_by(
+        AmortizationResult.category,
+        AmortizationResult.year
+    ).all()
+    
+    if not grouped:
         return AmortizationAggregatedResponse(
             categories=[],
             years=[],
@@ -121,21 +133,13 @@ async def get_amortization_results_aggregated(
         )
     
     # Collecter toutes les catégories et années uniques
-    categories_set = set()
-    years_set = set()
-    
-    for result in results:
-        categories_set.add(result.category)
-        years_set.add(result.year)
-    
-    categories = sorted(list(categories_set))
-    years = sorted(list(years_set))
+    categories = sorted({row.category for row in grouped})
+    years = sorted({row.year for row in grouped})
     
     # Créer un dictionnaire pour accès rapide
-    data_dict = defaultdict(lambda: defaultdict(float))
-    
-    for result in results:
-        data_dict[result.category][result.year] += result.amount
+    data_dict = defaultdict(dict)
+    for row in grouped:
+        data_dict[row.category][row.year] = row.amount
     
     # Créer la matrice de données
     data = []
@@ -169,7 +173,7 @@ async def get_amortization_results_aggregated(
 
 
 @router.get("/amortization/results/details", response_model=AmortizationDetailsResponse)
-async def get_amortization_results_details(
+def get_amortization_results_details(
     property_id: int = Query(..., description="ID de la propriété (obligatoire)"),
     year: Optional[int] = Query(None, description="Filtrer par année"),
     category: Optional[str] = Query(None, description="Filtrer par catégorie"),
@@ -238,8 +242,9 @@ async def get_amortization_results_details(
 
 
 @router.post("/amortization/recalculate", response_model=AmortizationRecalculateResponse)
-async def recalculate_amortizations(
+def recalculate_amortizations(
     request: AmortizationRecalculateRequest,
+    background: bool = Query(False, description="Exécuter en tâche de fond (retourne la tâche, 202)"),
     db: Session = Depends(get_db)
 ):
     """
@@ -249,10 +254,11 @@ async def recalculate_amortizations(
     
     Args:
         request: Requête contenant property_id
+        background: Si True, soumet une tâche "amortization_recalculate" et retourne la tâche (statut 202)
         db: Session de base de données
     
     Returns:
-        Message de confirmation avec nombre de résultats créés
+        Message de confirmation avec nombre de résultats créés (ou la tâche soumise si background=True)
     """
     property_id = request.property_id
     logger.info(f"[Amortizations] POST recalculate - property_id={property_id}")
@@ -260,19 +266,27 @@ async def recalculate_amortizations(
     # Valider property_id
     validate_property_id(db, property_id, "Amortizations")
     
+    if background:
+        job = submit_job_or_400(db, "amortization_recalculate", property_id)
+        return JSONResponse(status_code=202, content=jsonable_encoder(job))
+    
     try:
-        results_created = recalculate_all_amortizations(db, property_id=property_id)
-        
-        logger.info(f"[Amortizations] Recalcul terminé pour property_id={property_id}: {results_created} résultats créés")
-        
-        # Invalider tous les comptes de résultat (les amortissements ont changé)
-        try:
-            from backend.api.services.compte_resultat_service import invalidate_all_compte_resultat
-            invalidate_all_compte_resultat(db)
-        except Exception as e:
-            import traceback
-            error_details = traceback.format_exc()
-            print(f"⚠️ [recalculate_amortizations] Erreur lors de l'invalidation des comptes de résultat: {error_details}")
+        # Verrou de la propriété : pas de recalcul en parallèle d'une tâche de fond
+        with property_lock(property_id):
+            stats = sync_property_amortizations(db, property_id=property_id)
+            results_created = stats["results"]
+            
+            logger.info(f"[Amortizations] Recalcul terminé pour property_id={property_id}: {results_created} résultats, {stats['touched']} lignes modifiées")
+            
+            # Invalider tous les comptes de résultat si des amortissements ont changé
+            if stats["touched"]:
+                try:
+                    from backend.api.services.compte_resultat_service import invalidate_all_compte_resultat
+                    invalidate_all_compte_resultat(db, property_id)
+                except Exception as e:
+                    import traceback
+                    error_details = traceback.format_exc()
+                    print(f"⚠️ [recalculate_amortizations] Erreur lors de l'invalidation des comptes de résultat: {error_details}")
         
         return AmortizationRecalculateResponse(
             message="Recalcul des amortissements terminé avec succès",
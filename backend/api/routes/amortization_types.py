@@ -6,6 +6,7 @@ API routes for amortization types management.
 
 import json
 import logging
+import numpy as np
 from fastapi import APIRouter, Depends, HTTPException, Query
 from sqlalchemy.orm import Session
 from sqlalchemy import and_, or_, func
@@ -26,9 +27,11 @@ from backend.api.models import (
     AmortizationTypeListResponse,
     AmortizationTypeAmountResponse,
     AmortizationTypeCumulatedResponse,
-    AmortizationTypeTransactionCountResponse
+    AmortizationTypeTransactionCountResponse,
+    AmortizationTypeSummaryItem,
+    AmortizationTypeSummaryResponse
 )
-from backend.api.services.amortization_service import calculate_yearly_amounts
+from backend.api.services.amortization_service import calculate_yearly_amounts_batch
 from backend.api.utils.validation import validate_property_id
 
 logger = logging.getLogger(__name__)
@@ -37,7 +40,7 @@ router = APIRouter()
 
 
 @router.get("/amortization/types", response_model=AmortizationTypeListResponse)
-async def get_amortization_types(
+def get_amortization_types(
     property_id: int = Query(..., description="ID de la propriété (obligatoire)"),
     level_2_value: Optional[str] = Query(None, description="Filtrer par level_2_value"),
     db: Session = Depends(get_db)
@@ -90,7 +93,7 @@ async def get_amortization_types(
 
 
 @router.post("/amortization/types", response_model=AmortizationTypeResponse, status_code=201)
-async def create_amortization_type(
+def create_amortization_type(
     type_data: AmortizationTypeCreate,
     db: Session = Depends(get_db)
 ):
@@ -140,8 +143,109 @@ async def create_amortization_type(
     )
 
 
+@router.get("/amortization/types/summary", response_model=AmortizationTypeSummaryResponse)
+def get_amortization_types_summary(
+    property_id: int = Query(..., description="ID de la propriété (obligatoire)"),
+    db: Session = Depends(get_db)
+):
+    """
+    Récupère montant, montant cumulé et nombre de transactions de tous les types d'une propriété.
+    
+    Remplace les appels /amount, /cumulated et /transaction-count par type, avec les mêmes règles :
+    - Une requête pour toutes les transactions des types, regroupées par (level_2, level_1)
+    - Chaque type est calculé à partir de ses propres transactions (par ID de type, pas par nom) :
+      une transaction qui correspond à deux types compte pour chacun des deux
+    - Montant cumulé : échéanciers de tous les couples (type, transaction) en une passe
+    
+    Args:
+        property_id: ID de la propriété (obligatoire)
+        db: Session de base de données
+    
+    Returns:
+        Résumé de chaque type (dans l'ordre des types)
+    """
+    logger.info(f"[Amortizations] GET types/summary - property_id={property_id}")
+    
+    # Valider property_id
+    validate_property_id(db, property_id, "Amortizations")
+    
+    amortization_types = db.query(AmortizationType).filter(
+        AmortizationType.property_id == property_id
+    ).order_by(AmortizationType.id).all()
+    
+    if not amortization_types:
+        return AmortizationTypeSummaryResponse(items=[], total=0)
+    
+    # Transactions (date, montant) par (level_2, level_1)
+    transactions_by_levels = {}
+    for level_2, level_1, transaction_date, quantite in db.query(
+        EnrichedTransaction.level_2,
+        EnrichedTransaction.level_1,
+        Transaction.date,
+        Transaction.quantite
+    ).join(
+        EnrichedTransaction, Transaction.id == EnrichedTransaction.transaction_id
+    ).filter(
+        Transaction.property_id == property_id,
+        EnrichedTransaction.level_2.in_({atype.level_2_value for atype in amortization_types})
+    ).all():
+        transactions_by_levels.setdefault((level_2, level_1), []).append((transaction_date, quantite))
+    
+    today = date.today()
+    type_transactions = []
+    # Échéanciers à calculer : index du type, date de début, montant, durée, annuité
+    owners, start_dates, total_amounts, durations, annual_amounts = [], [], [], [], []
+    for index, atype in enumerate(amortization_types):
+        transactions = [
+            transaction
+            for level_1 in set(json.loads(atype.level_1_values or "[]"))
+            for transaction in transactions_by_levels.get((atype.level_2_value, level_1), ())
+        ]
+        type_transactions.append(transactions)
+        if atype.duration <= 0:
+            continue
+        annual_amount = atype.annual_amount if atype.annual_amount is not None and atype.annual_amount != 0 else None
+        for transaction_date, quantite in transactions:
+            # Si start_date est renseignée dans le type, elle remplace la date de la transaction
+            start_date = atype.start_date if atype.start_date else transaction_date
+            # Date de début dans le futur : montant cumulé = 0
+            if start_date > today:
+                continue
+            owners.append(index)
+            start_dates.append(start_date)
+            total_amounts.append(-abs(quantite))  # Négatif car convention
+            durations.append(atype.duration)
+            annual_amounts.append(annual_amount)
+    
+    # Montant amorti jusqu'à l'année en cours (incluse), par type
+    cumulated_by_type = np.zeros(len(amortization_types))
+    if owners:
+        schedule = calculate_yearly_amounts_batch(
+            start_dates=start_dates,
+            total_amounts=total_amounts,
+            durations=durations,
+            annual_amounts=annual_amounts
+        )
+        elapsed = np.abs(schedule.amounts[:, schedule.years <= today.year])
+        np.add.at(cumulated_by_type, owners, elapsed.sum(axis=1))
+    
+    items = []
+    for index, atype in enumerate(amortization_types):
+        transactions = type_transactions[index]
+        amount_total = sum(quantite for _, quantite in transactions)
+        items.append(AmortizationTypeSummaryItem(
+            type_id=atype.id,
+            type_name=atype.name,
+            amount=abs(amount_total) if amount_total else 0.0,
+            cumulated_amount=float(cumulated_by_type[index]),
+            transaction_count=len(transactions)
+        ))
+    
+    return AmortizationTypeSummaryResponse(items=items, total=len(items))
+
+
 @router.get("/amortization/types/{type_id}", response_model=AmortizationTypeResponse)
-async def get_amortization_type(
+def get_amortization_type(
     type_id: int,
     property_id: int = Query(..., description="ID de la propriété (obligatoire)"),
     db: Session = Depends(get_db)
@@ -189,7 +293,7 @@ async def get_amortization_type(
 
 
 @router.put("/amortization/types/{type_id}", response_model=AmortizationTypeResponse)
-async def update_amortization_type(
+def update_amortization_type(
     type_id: int,
     type_data: AmortizationTypeUpdate,
     property_id: int = Query(..., description="ID de la propriété (obligatoire)"),
@@ -280,7 +384,7 @@ async def update_amortization_type(
 
 
 @router.delete("/amortization/types/all", status_code=200)
-async def delete_all_amortization_types(
+def delete_all_amortization_types(
     property_id: int = Query(..., description="ID de la propriété (obligatoire)"),
     db: Session = Depends(get_db)
 ):
@@ -321,7 +425,7 @@ async def delete_all_amortization_types(
 
 
 @router.delete("/amortization/types/{type_id}", status_code=204)
-async def delete_amortization_type(
+def delete_amortization_type(
     type_id: int,
     property_id: int = Query(..., description="ID de la propriété (obligatoire)"),
     db: Session = Depends(get_db)
@@ -389,7 +493,7 @@ async def delete_amortization_type(
 
 
 @router.get("/amortization/types/{type_id}/amount", response_model=AmortizationTypeAmountResponse)
-async def get_amortization_type_amount(
+def get_amortization_type_amount(
     type_id: int,
     property_id: int = Query(..., description="ID de la propriété (obligatoire)"),
     db: Session = Depends(get_db)
@@ -456,7 +560,7 @@ async def get_amortization_type_amount(
 
 
 @router.get("/amortization/types/{type_id}/cumulated", response_model=AmortizationTypeCumulatedResponse)
-async def get_amortization_type_cumulated(
+def get_amortization_type_cumulated(
     type_id: int,
     property_id: int = Query(..., description="ID de la propriété (obligatoire)"),
     db: Session = Depends(get_db)
@@ -538,51 +642,33 @@ async def get_amortization_type_cumulated(
     # Calculer l'annuité du type (si définie, sinon sera calculée par transaction)
     annual_amount = atype.annual_amount if atype.annual_amount is not None and atype.annual_amount != 0 else None
     
-    # Calculer le montant cumulé pour chaque transaction
+    # Les transactions dont la date de début est dans le futur ont un montant cumulé = 0
+    # Si start_date est renseignée dans le type, utiliser cette date (override)
+    # Sinon, utiliser la date de la transaction
+    started = [
+        transaction for transaction in transactions
+        if (atype.start_date if atype.start_date else transaction.date) <= today
+    ]
+
+    # Calculer les échéanciers de toutes les transactions en une passe
+    # Annuité : annual_amount du type si définie, sinon abs(Montant transaction) / duration
+    schedule = calculate_yearly_amounts_batch(
+        start_dates=[atype.start_date if atype.start_date else transaction.date for transaction in started],
+        total_amounts=[-abs(transaction.quantite) for transaction in started],  # Négatif car convention
+        durations=[atype.duration] * len(started),
+        annual_amounts=[annual_amount] * len(started)
+    )
+
+    # Sommer les montants jusqu'à l'année en cours (incluse)
+    # Logique :
+    # - Année d'achat : prorata (déjà calculé par l'échéancier)
+    # - Années complètes suivantes : annuité complète
+    # - Année en cours : annuité complète (pas de prorata jusqu'à aujourd'hui)
+    elapsed = np.abs(schedule.amounts[:, schedule.years <= today.year])
     total_cumulated = 0.0
-    
-    for transaction in transactions:
-        # Déterminer la date de début
-        # Si start_date est renseignée dans le type, utiliser cette date (override)
-        # Sinon, utiliser la date de la transaction
-        start_date = atype.start_date if atype.start_date else transaction.date
-        
-        # Vérifier si la date de début est dans le futur
-        if start_date > today:
-            continue  # Montant cumulé = 0 pour cette transaction
-        
-        # Montant de la transaction
-        transaction_amount = abs(transaction.quantite)
-        
-        # Calculer l'annuité pour cette transaction
-        # Si annual_amount est définie dans le type, l'utiliser
-        # Sinon, calculer : abs(Montant transaction) / duration
-        if annual_amount is None:
-            transaction_annual_amount = transaction_amount / atype.duration
-        else:
-            transaction_annual_amount = annual_amount
-        
-        # Calculer les montants par année avec calculate_yearly_amounts
-        yearly_amounts = calculate_yearly_amounts(
-            start_date=start_date,
-            total_amount=-transaction_amount,  # Négatif car convention
-            duration=atype.duration,
-            annual_amount=transaction_annual_amount
-        )
-        
-        # Sommer les montants jusqu'à l'année en cours (incluse)
-        # Logique :
-        # - Année d'achat : prorata (déjà calculé par calculate_yearly_amounts)
-        # - Années complètes suivantes : annuité complète
-        # - Année en cours : annuité complète (pas de prorata jusqu'à aujourd'hui)
-        transaction_cumulated = 0.0
-        
-        for year, amount in yearly_amounts.items():
-            if year <= today.year:
-                # Prendre le montant complet de l'année (pas de prorata pour l'année en cours)
-                transaction_cumulated += abs(amount)
-        
-        total_cumulated += transaction_cumulated
+    if elapsed.size:
+        for transaction_cumulated in np.cumsum(elapsed, axis=1)[:, -1].tolist():
+            total_cumulated += transaction_cumulated
     
     return AmortizationTypeCumulatedResponse(
         type_id=atype.id,
@@ -592,7 +678,7 @@ async def get_amortization_type_cumulated(
 
 
 @router.get("/amortization/types/{type_id}/transaction-count", response_model=AmortizationTypeTransactionCountResponse)
-async def get_amortization_type_transaction_count(
+def get_amortization_type_transaction_count(
     type_id: int,
     property_id: int = Query(..., description="ID de la propriété (obligatoire)"),
     db: Session = Depends(get_db)
@@ -11,10 +11,11 @@ from typing import List, Optional, Dict, Any
 from datetime import date
 import logging
 
-from backend.database import get_db
+from backend.database import get_read_db
 from backend.database.models import Transaction, EnrichedTransaction
-from backend.api.models import TransactionResponse, TransactionListResponse
+from backend.api.models import TransactionListResponse
 from backend.api.utils.validation import validate_property_id
+from backend.api.utils.transaction_query_utils import query_transactions_with_classification, rows_to_transaction_responses
 
 # Configure logger
 logger = logging.getLogger(__name__)
@@ -122,14 +123,14 @@ def apply_filters(query, filters: Dict[str, Any], property_id: int, transaction_
 
 
 @router.get("/analytics/pivot")
-async def get_pivot_data(
+def get_pivot_data(
     property_id: int = Query(..., description="ID de la propriété (obligatoire)"),
     rows: Optional[str] = Query(None, description="Champs pour les lignes (séparés par virgule, ex: 'level_1,level_2')"),
     columns: Optional[str] = Query(None, description="Champs pour les colonnes (séparés par virgule, ex: 'mois')"),
     data_field: str = Query("quantite", description="Champ pour les données (quantite uniquement pour l'instant)"),
     data_operation: str = Query("sum", description="Opération sur les données (sum uniquement pour l'instant)"),
     filters: Optional[str] = Query(None, description="Filtres au format JSON (ex: '{\"level_1\": \"CHARGES\"}')"),
-    db: Session = Depends(get_db)
+    db: Session = Depends(get_read_db)
 ):
     """
     Calcule les données pour un tableau croisé dynamique.
@@ -330,7 +331,7 @@ async def get_pivot_data(
 
 
 @router.get("/analytics/pivot/details", response_model=TransactionListResponse)
-async def get_pivot_details(
+def get_pivot_details(
     property_id: int = Query(..., description="ID de la propriété (obligatoire)"),
     rows: Optional[str] = Query(None, description="Champs pour les lignes (séparés par virgule, ex: 'level_1,level_2')"),
     columns: Optional[str] = Query(None, description="Champs pour les colonnes (séparés par virgule, ex: 'mois')"),
@@ -339,7 +340,7 @@ async def get_pivot_details(
     filters: Optional[str] = Query(None, description="Filtres au format JSON (ex: '{\"level_1\": \"CHARGES\"}')"),
     skip: int = Query(0, ge=0, description="Nombre d'éléments à sauter"),
     limit: int = Query(100, ge=1, le=1000, description="Nombre d'éléments à retourner"),
-    db: Session = Depends(get_db)
+    db: Session = Depends(get_read_db)
 ):
     """
     Récupère les transactions détaillées correspondant à une cellule du tableau croisé.
@@ -409,9 +410,7 @@ async def get_pivot_details(
         )
     
     # Construire la requête de base avec jointure EnrichedTransaction
-    query = db.query(Transaction).outerjoin(
-        EnrichedTransaction, Transaction.id == EnrichedTransaction.transaction_id
-    )
+    query = query_transactions_with_classification(db)
     
     # Appliquer les filtres globaux (includes property_id filtering)
     query = apply_filters(query, filter_dict, property_id)
@@ -444,31 +443,7 @@ async def get_pivot_details(
     total = query.count()
     
     # Appliquer la pagination
-    transactions = query.offset(skip).limit(limit).all()
-    
-    # Récupérer les données enrichies pour chaque transaction
-    transaction_responses = []
-    for t in transactions:
-        # Récupérer les données enrichies
-        enriched = db.query(EnrichedTransaction).filter(
-            EnrichedTransaction.transaction_id == t.id
-        ).first()
-        
-        # Créer la réponse avec les données enrichies
-        transaction_dict = {
-            "id": t.id,
-            "date": t.date,
-            "quantite": t.quantite,
-            "nom": t.nom,
-            "solde": t.solde,
-            "source_file": t.source_file,
-            "created_at": t.created_at,
-            "updated_at": t.updated_at,
-            "level_1": enriched.level_1 if enriched else None,
-            "level_2": enriched.level_2 if enriched else None,
-            "level_3": enriched.level_3 if enriched else None,
-        }
-        transaction_responses.append(TransactionResponse(**transaction_dict))
+    transaction_responses = rows_to_transaction_responses(query.offset(skip).limit(limit).all())
     
     logger.info(f"[Pivot] Pivot details retournés pour property_id={property_id} - {len(transaction_responses)} transactions")
     
@@ -35,6 +35,7 @@ from backend.api.services.bilan_service import (
     get_mappings,
     get_level_3_values,
     calculate_bilan,
+    BilanEvaluationPlan,
     get_bilan_data,
     invalidate_all_bilan,
     invalidate_bilan_for_year
@@ -148,7 +149,7 @@ def build_hierarchical_structure(
 # ========== Mappings Endpoints ==========
 
 @router.get("/bilan/mappings", response_model=BilanMappingListResponse)
-async def get_bilan_mappings(
+def get_bilan_mappings(
     property_id: int = Query(..., description="ID de la propriété (obligatoire)"),
     skip: int = Query(0, ge=0, description="Nombre d'éléments à sauter"),
     limit: int = Query(100, ge=1, le=1000, description="Nombre d'éléments à retourner"),
@@ -193,7 +194,7 @@ async def get_bilan_mappings(
 
 
 @router.get("/bilan/mappings/{mapping_id}", response_model=BilanMappingResponse)
-async def get_bilan_mapping(
+def get_bilan_mapping(
     mapping_id: int,
     property_id: int = Query(..., description="ID de la propriété (obligatoire)"),
     db: Session = Depends(get_db)
@@ -231,7 +232,7 @@ async def get_bilan_mapping(
 
 
 @router.post("/bilan/mappings", response_model=BilanMappingResponse, status_code=201)
-async def create_bilan_mapping(
+def create_bilan_mapping(
     mapping: BilanMappingCreate,
     db: Session = Depends(get_db)
 ):
@@ -290,7 +291,7 @@ async def create_bilan_mapping(
 
 
 @router.put("/bilan/mappings/{mapping_id}", response_model=BilanMappingResponse)
-async def update_bilan_mapping(
+def update_bilan_mapping(
     mapping_id: int,
     mapping_update: BilanMappingUpdate,
     property_id: int = Query(..., description="ID de la propriété (obligatoire)"),
@@ -355,7 +356,7 @@ async def update_bilan_mapping(
 
 
 @router.delete("/bilan/mappings/{mapping_id}", status_code=204)
-async def delete_bilan_mapping(
+def delete_bilan_mapping(
     mapping_id: int,
     property_id: int = Query(..., description="ID de la propriété (obligatoire)"),
     db: Session = Depends(get_db)
@@ -394,7 +395,7 @@ async def delete_bilan_mapping(
 # ========== Calculate Endpoint ==========
 
 @router.get("/bilan/calculate")
-async def calculate_bilan_multiple_years_endpoint(
+def calculate_bilan_multiple_years_endpoint(
     property_id: int = Query(..., description="ID de la propriété (obligatoire)"),
     years: str = Query(..., description="Années à calculer (séparées par des virgules, ex: '2021,2022,2023')"),
     db: Session = Depends(get_db)
@@ -425,17 +426,15 @@ async def calculate_bilan_multiple_years_endpoint(
     # Récupérer les mappings une seule fois pour cette propriété
     mappings = get_mappings(db, property_id)
     
-    # OPTIMISATION: Pré-calculer tous les résultats de compte de résultat en une fois
-    from backend.api.services.compte_resultat_service import calculate_compte_resultat
-    compte_resultat_cache = {}
-    for year in year_list:
-        compte_resultat_cache[year] = calculate_compte_resultat(db, year, property_id=property_id)
+    # OPTIMISATION: Entrées de toutes les années collectées en quelques requêtes groupées
+    # (cumuls par level_1, soldes, amortissements, crédits, résultats annuels)
+    plan = BilanEvaluationPlan(db, property_id, year_list, mappings, level_3_values)
     
-    # Calculer le bilan pour chaque année (en utilisant le cache pour report_a_nouveau)
+    # Calculer le bilan pour chaque année (évalué en mémoire depuis le plan)
     results = {}
     for year in year_list:
         # Calculer le bilan
-        result = calculate_bilan(db, year, property_id, mappings, level_3_values)
+        result = calculate_bilan(db, year, property_id, mappings, level_3_values, plan=plan)
         
         # Construire la structure hiérarchique
         bilan_response = build_hierarchical_structure(
@@ -455,7 +454,7 @@ async def calculate_bilan_multiple_years_endpoint(
 
 
 @router.post("/bilan/calculate", response_model=BilanResponse)
-async def calculate_bilan_endpoint(
+def calculate_bilan_endpoint(
     request: BilanCalculateRequest,
     db: Session = Depends(get_db)
 ):
@@ -494,7 +493,7 @@ async def calculate_bilan_endpoint(
 # ========== Data Endpoints ==========
 
 @router.get("/bilan", response_model=BilanDataListResponse)
-async def get_bilan(
+def get_bilan(
     property_id: int = Query(..., description="ID de la propriété (obligatoire)"),
     year: Optional[int] = Query(None, description="Année spécifique"),
     start_year: Optional[int] = Query(None, description="Année de début (pour plusieurs années)"),
@@ -546,7 +545,7 @@ async def get_bilan(
 # ========== Config Endpoints ==========
 
 @router.get("/bilan/config", response_model=BilanConfigResponse)
-async def get_bilan_config(
+def get_bilan_config(
     property_id: int = Query(..., description="ID de la propriété (obligatoire)"),
     db: Session = Depends(get_db)
 ):
@@ -576,7 +575,7 @@ async def get_bilan_config(
 
 
 @router.put("/bilan/config", response_model=BilanConfigResponse)
-async def update_bilan_config(
+def update_bilan_config(
     config_update: BilanConfigUpdate,
     db: Session = Depends(get_db)
 ):
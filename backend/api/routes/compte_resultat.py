@@ -38,6 +38,10 @@ from backend.api.services.compte_resultat_service import (
     get_level_3_values,
     calculate_compte_resultat
 )
+from backend.api.services.compte_resultat_cache_service import (
+    get_compte_resultat_cached,
+    get_compte_resultat_cache_stats
+)
 from backend.api.utils.validation import validate_property_id
 
 # Logger configuration
@@ -49,7 +53,7 @@ router = APIRouter()
 # ========== Mappings Endpoints ==========
 
 @router.get("/compte-resultat/mappings", response_model=CompteResultatMappingListResponse)
-async def get_compte_resultat_mappings(
+def get_compte_resultat_mappings(
     property_id: int = Query(..., description="ID de la propriété (obligatoire)"),
     skip: int = Query(0, ge=0, description="Nombre d'éléments à sauter"),
     limit: int = Query(100, ge=1, le=1000, description="Nombre d'éléments à retourner"),
@@ -95,7 +99,7 @@ async def get_compte_resultat_mappings(
 
 
 @router.post("/compte-resultat/mappings", response_model=CompteResultatMappingResponse, status_code=201)
-async def create_compte_resultat_mapping(
+def create_compte_resultat_mapping(
     mapping: CompteResultatMappingCreate,
     db: Session = Depends(get_db)
 ):
@@ -161,7 +165,7 @@ async def create_compte_resultat_mapping(
 
 
 @router.put("/compte-resultat/mappings/{mapping_id}", response_model=CompteResultatMappingResponse)
-async def update_compte_resultat_mapping(
+def update_compte_resultat_mapping(
     mapping_id: int,
     mapping: CompteResultatMappingUpdate,
     property_id: int = Query(..., description="ID de la propriété (obligatoire)"),
@@ -241,7 +245,7 @@ async def update_compte_resultat_mapping(
 
 
 @router.delete("/compte-resultat/mappings/{mapping_id}", status_code=204)
-async def delete_compte_resultat_mapping(
+def delete_compte_resultat_mapping(
     mapping_id: int,
     property_id: int = Query(..., description="ID de la propriété (obligatoire)"),
     db: Session = Depends(get_db)
@@ -293,7 +297,7 @@ async def delete_compte_resultat_mapping(
 # ========== Calculate Endpoints ==========
 
 @router.get("/compte-resultat/calculate")
-async def calculate_compte_resultat_endpoint(
+def calculate_compte_resultat_endpoint(
     property_id: int = Query(..., description="ID de la propriété (obligatoire)"),
     years: str = Query(..., description="Années à calculer (séparées par des virgules, ex: '2021,2022,2023')"),
     db: Session = Depends(get_db)
@@ -317,24 +321,31 @@ async def calculate_compte_resultat_endpoint(
     except ValueError:
         raise HTTPException(status_code=400, detail="Format d'années invalide. Utilisez des nombres séparés par des virgules.")
     
-    results = {}
-    mappings = get_mappings(db, property_id)
-    level_3_values = get_level_3_values(db, property_id)
+    # Années servies depuis le cache si la configuration n'a pas changé, sinon calculées en lot
+    results, cache_stats = get_compte_resultat_cached(db, year_list, property_id)
     
-    for year in year_list:
-        result = calculate_compte_resultat(db, year, property_id, mappings, level_3_values)
-        results[year] = result
-    
-    logger.info(f"[CompteResultat] Calcul terminé pour {len(year_list)} années, property_id={property_id}")
+    logger.info(f"[CompteResultat] Calcul terminé pour {len(year_list)} années, property_id={property_id} (cache: {cache_stats})")
     
     return {
         "years": year_list,
-        "results": results
+        "results": results,
+        "cache": cache_stats
     }
 
 
+@router.get("/compte-resultat/cache/stats")
+def get_compte_resultat_cache_stats_endpoint():
+    """
+    Compteurs du cache des comptes de résultat depuis le démarrage du serveur.
+    
+    Returns:
+        Dictionnaire avec hits, misses et invalidated
+    """
+    return get_compte_resultat_cache_stats()
+
+
 @router.post("/compte-resultat/generate")
-async def generate_compte_resultat(
+def generate_compte_resultat(
     property_id: int = Query(..., description="ID de la propriété (obligatoire)"),
     year: int = Query(..., description="Année pour laquelle générer le compte de résultat"),
     db: Session = Depends(get_db)
@@ -409,7 +420,7 @@ async def generate_compte_resultat(
 # ========== Data Endpoints ==========
 
 @router.get("/compte-resultat", response_model=CompteResultatDataListResponse)
-async def get_compte_resultat(
+def get_compte_resultat(
     property_id: int = Query(..., description="ID de la propriété (obligatoire)"),
     year: Optional[int] = Query(None, description="Année spécifique"),
     start_year: Optional[int] = Query(None, description="Année de début (pour plusieurs années)"),
@@ -479,7 +490,7 @@ async def get_compte_resultat(
 
 
 @router.get("/compte-resultat/data", response_model=CompteResultatDataListResponse)
-async def get_compte_resultat_data(
+def get_compte_resultat_data(
     property_id: int = Query(..., description="ID de la propriété (obligatoire)"),
     skip: int = Query(0, ge=0, description="Nombre d'éléments à sauter"),
     limit: int = Query(100, ge=1, le=1000, description="Nombre d'éléments à retourner"),
@@ -524,7 +535,7 @@ async def get_compte_resultat_data(
 
 
 @router.delete("/compte-resultat/data/{data_id}", status_code=204)
-async def delete_compte_resultat_data(
+def delete_compte_resultat_data(
     data_id: int,
     property_id: int = Query(..., description="ID de la propriété (obligatoire)"),
     db: Session = Depends(get_db)
@@ -555,7 +566,7 @@ async def delete_compte_resultat_data(
 
 
 @router.delete("/compte-resultat/year/{year}", status_code=204)
-async def delete_compte_resultat_by_year(
+def delete_compte_resultat_by_year(
     year: int,
     property_id: int = Query(..., description="ID de la propriété (obligatoire)"),
     db: Session = Depends(get_db)
@@ -586,7 +597,7 @@ async def delete_compte_resultat_by_year(
 # ========== Config Endpoints ==========
 
 @router.get("/compte-resultat/config", response_model=CompteResultatConfigResponse)
-async def get_compte_resultat_config(
+def get_compte_resultat_config(
     property_id: int = Query(..., description="ID de la propriété (obligatoire)"),
     db: Session = Depends(get_db)
 ):
@@ -627,7 +638,7 @@ async def get_compte_resultat_config(
 
 
 @router.put("/compte-resultat/config", response_model=CompteResultatConfigResponse)
-async def update_compte_resultat_config(
+def update_compte_resultat_config(
     config_update: CompteResultatConfigUpdate,
     property_id: int = Query(..., description="ID de la propriété (obligatoire)"),
     db: Session = Depends(get_db)
@@ -697,7 +708,7 @@ async def update_compte_resultat_config(
 # ========== Override Endpoints ==========
 
 @router.get("/compte-resultat/override", response_model=List[CompteResultatOverrideResponse])
-async def get_all_overrides(
+def get_all_overrides(
     property_id: int = Query(..., description="ID de la propriété (obligatoire)"),
     db: Session = Depends(get_db)
 ):
@@ -733,7 +744,7 @@ async def get_all_overrides(
 
 
 @router.get("/compte-resultat/override/{year}", response_model=CompteResultatOverrideResponse)
-async def get_override_by_year(
+def get_override_by_year(
     year: int,
     property_id: int = Query(..., description="ID de la propriété (obligatoire)"),
     db: Session = Depends(get_db)
@@ -774,7 +785,7 @@ async def get_override_by_year(
 
 
 @router.post("/compte-resultat/override", response_model=CompteResultatOverrideResponse, status_code=201)
-async def create_or_update_override(
+def create_or_update_override(
     override: CompteResultatOverrideCreate,
     db: Session = Depends(get_db)
 ):
@@ -860,7 +871,7 @@ async def create_or_update_override(
 
 
 @router.delete("/compte-resultat/override/{year}", status_code=204)
-async def delete_override(
+def delete_override(
     year: int,
     property_id: int = Query(..., description="ID de la propriété (obligatoire)"),
     db: Session = Depends(get_db)
@@ -5,6 +5,8 @@ API routes for transaction enrichment.
 """
 
 from fastapi import APIRouter, Depends, HTTPException, Query
+from fastapi.encoders import jsonable_encoder
+from fastapi.responses import JSONResponse
 from sqlalchemy.orm import Session
 
 from backend.database import get_db
@@ -13,20 +15,21 @@ from backend.api.models import TransactionResponse
 from backend.api.services.enrichment_service import (
     update_transaction_classification,
     create_or_update_mapping_from_classification,
-    enrich_transaction,
     transaction_matches_mapping_name,
-    enrich_all_transactions
+    bulk_enrich_transactions
 )
 from backend.api.services.mapping_obligatoire_service import (
     validate_mapping,
     validate_level3_value
 )
+from backend.api.services.job_service import property_lock
+from backend.api.utils.job_utils import submit_job_or_400
 
 router = APIRouter()
 
 
 @router.put("/enrichment/transactions/{transaction_id}", response_model=TransactionResponse)
-async def update_transaction_classifications(
+def update_transaction_classifications(
     transaction_id: int,
     level_1: str | None = Query(None, description="Nouvelle valeur pour level_1"),
     level_2: str | None = Query(None, description="Nouvelle valeur pour level_2"),
@@ -114,19 +117,16 @@ async def update_transaction_classifications(
         # avec le même nom (correspondance exacte) pour qu'elles utilisent le nouveau mapping
         # Step 5.3 : Utiliser correspondance exacte du nom au lieu de matching par préfixe
         # IMPORTANT: Filtrer par property_id pour l'isolation multi-propriétés
-        all_transactions = db.query(Transaction).filter(
+        other_transaction_ids = [row.id for row in db.query(Transaction.id).filter(
             Transaction.nom == transaction.nom,
-            Transaction.property_id == transaction.property_id
-        ).all()
+            Transaction.property_id == transaction.property_id,
+            Transaction.id != transaction.id  # Ne pas re-enrichir la transaction qu'on vient de modifier
+        )]
+        # Le nom est classifié une seule fois, seules les lignes modifiées sont écrites
+        bulk_enrich_transactions(db, property_id=transaction.property_id, transaction_ids=other_transaction_ids)
         
         # Liste des IDs de transactions à recalculer (incluant la transaction modifiée)
-        transaction_ids_to_recalculate = [transaction_id]
-        
-        for other_transaction in all_transactions:
-            if other_transaction.id != transaction.id:  # Ne pas re-enrichir la transaction qu'on vient de modifier
-                enrich_transaction(other_transaction, db)
-                # Ajouter cette transaction à la liste des transactions à recalculer
-                transaction_ids_to_recalculate.append(other_transaction.id)
+        transaction_ids_to_recalculate = [transaction_id] + other_transaction_ids
         
         db.commit()
     
@@ -182,8 +182,9 @@ async def update_transaction_classifications(
 
 
 @router.post("/enrichment/re-enrich")
-async def re_enrich_all_transactions(
+def re_enrich_all_transactions(
     property_id: int = Query(..., description="ID de la propriété (obligatoire)"),
+    background: bool = Query(False, description="Exécuter en tâche de fond (retourne la tâche, 202)"),
     db: Session = Depends(get_db)
 ):
     """
@@ -194,10 +195,13 @@ async def re_enrich_all_transactions(
     
     Args:
         property_id: ID de la propriété (obligatoire)
+        background: Si True, soumet une tâche "re_enrich" et retourne la tâche (statut 202)
         db: Session de base de données
     
     Returns:
-        Dict avec le nombre de transactions enrichies et déjà enrichies pour cette propriété
+        Dict avec le nombre de transactions enrichies et déjà enrichies pour cette propriété,
+        ainsi que les compteurs created/updated/unchanged du moteur en masse
+        (ou la tâche soumise si background=True)
     """
     from backend.api.utils.validation import validate_property_id
     import logging
@@ -209,16 +213,25 @@ async def re_enrich_all_transactions(
     # Valider property_id
     validate_property_id(db, property_id, "Enrichment")
     
-    # Re-enrichir uniquement les transactions de cette propriété
-    enriched_count, already_enriched_count = enrich_all_transactions(db, property_id=property_id)
-    db.commit()
+    if background:
+        job = submit_job_or_400(db, "re_enrich", property_id)
+        return JSONResponse(status_code=202, content=jsonable_encoder(job))
+    
+    # Re-enrichir uniquement les transactions de cette propriété (moteur en masse, une seule transaction)
+    # Verrou de la propriété : pas de recalcul en parallèle d'une tâche de fond
+    with property_lock(property_id):
+        counts = bulk_enrich_transactions(db, property_id=property_id)
+    enriched_count = counts["created"]
+    already_enriched_count = counts["updated"] + counts["unchanged"]
     
-    logger.info(f"[Enrichment] Re-enrichissement terminé pour property_id={property_id}: {enriched_count} nouvelles, {already_enriched_count} re-enrichies")
+    logger.info(f"[Enrichment] Re-enrichissement terminé pour property_id={property_id}: {counts['created']} créées, {counts['updated']} mises à jour, {counts['unchanged']} inchangées")
     
     return {
         "enriched_count": enriched_count,
         "already_enriched_count": already_enriched_count,
+        "created_count": counts["created"],
+        "updated_count": counts["updated"],
+        "unchanged_count": counts["unchanged"],
         "total_processed": enriched_count + already_enriched_count,
-        "message": f"Re-enrichissement terminé: {enriched_count} nouvelles enrichies, {already_enriched_count} re-enrichies"
+        "message": f"Re-enrichissement terminé: {enriched_count} nouvelles enrichies, {already_enriched_count} re-enrichies ({counts['updated']} modifiées)"
     }
-
@@ -15,7 +15,7 @@ router = APIRouter()
 
 
 @router.get("/examples", response_model=List[ExampleResponse])
-async def get_examples():
+def get_examples():
     """
     Get all examples.
     
@@ -27,7 +27,7 @@ async def get_examples():
 
 
 @router.get("/examples/{example_id}", response_model=ExampleResponse)
-async def get_example(example_id: int):
+def get_example(example_id: int):
     """
     Get a single example by ID.
     
@@ -45,7 +45,7 @@ async def get_example(example_id: int):
 
 
 @router.post("/examples", response_model=ExampleResponse, status_code=201)
-async def create_example(example: ExampleCreate):
+def create_example(example: ExampleCreate):
     """
     Create a new example.
     
@@ -60,7 +60,7 @@ async def create_example(example: ExampleCreate):
 
 
 @router.put("/examples/{example_id}", response_model=ExampleResponse)
-async def update_example(example_id: int, example: ExampleUpdate):
+def update_example(example_id: int, example: ExampleUpdate):
     """
     Update an example.
     
@@ -79,7 +79,7 @@ async def update_example(example_id: int, example: ExampleUpdate):
 
 
 @router.delete("/examples/{example_id}", status_code=204)
-async def delete_example(example_id: int):
+def delete_example(example_id: int):
     """
     Delete an example.
     
@@ -0,0 +1,100 @@
+"""
+API routes for background jobs.
+
+⚠️ Before making changes, read: ../../docs/workflow/BEST_PRACTICES.md
+"""
+
+import logging
+from fastapi import APIRouter, Depends, HTTPException, Query
+from sqlalchemy.orm import Session
+from typing import Optional
+
+from backend.database import get_db
+from backend.database.models import Job
+from backend.api.models import (
+    JobSubmitRequest,
+    JobResponse,
+    JobProgressResponse,
+    JobListResponse
+)
+from backend.api.utils.job_utils import job_to_response, submit_job_or_400
+from backend.api.utils.validation import validate_property_id
+
+logger = logging.getLogger(__name__)
+
+router = APIRouter()
+
+
+@router.post("/jobs", response_model=JobResponse, status_code=202)
+def create_job(
+    request: JobSubmitRequest,
+    db: Session = Depends(get_db)
+):
+    """
+    Soumettre une tâche de fond (exécutée après les tâches en cours de la même propriété).
+
+    - **kind**: Type de tâche (re_enrich, amortization_recalculate, allowed_mappings_reset)
+    - **property_id**: ID de la propriété (obligatoire)
+    - **params**: Paramètres de la tâche
+
+    Returns:
+        Tâche créée (statut pending) ; suivre son avancement avec GET /jobs/{job_id}/progress
+    """
+    logger.info(f"[Jobs] POST /api/jobs - kind={request.kind}, property_id={request.property_id}")
+    validate_property_id(db, request.property_id, "Jobs")
+    return submit_job_or_400(db, request.kind, request.property_id, request.params)
+
+
+@router.get("/jobs", response_model=JobListResponse)
+def list_jobs(
+    property_id: int = Query(..., description="ID de la propriété (obligatoire)"),
+    status: Optional[str] = Query(None, description="Filtre sur le statut (pending, running, succeeded, failed)"),
+    limit: int = Query(50, ge=1, le=500, description="Nombre de tâches à retourner (les plus récentes)"),
+    db: Session = Depends(get_db)
+):
+    """
+    Lister les tâches de fond d'une propriété, les plus récentes en premier.
+
+    - **property_id**: ID de la propriété (obligatoire)
+    - **status**: Filtre sur le statut (optionnel)
+    - **limit**: Nombre de tâches à retourner (max 500)
+    """
+    validate_property_id(db, property_id, "Jobs")
+    query = db.query(Job).filter(Job.property_id == property_id)
+    if status:
+        query = query.filter(Job.status == status)
+    total = query.count()
+    jobs = query.order_by(Job.id.desc()).limit(limit).all()
+    return JobListResponse(items=[job_to_response(job) for job in jobs], total=total)
+
+
+@router.get("/jobs/{job_id}", response_model=JobResponse)
+def get_job(
+    job_id: int,
+    db: Session = Depends(get_db)
+):
+    """
+    Récupérer le statut complet d'une tâche de fond (résultat ou erreur une fois terminée).
+
+    - **job_id**: ID de la tâche
+    """
+    job = db.query(Job).filter(Job.id == job_id).first()
+    if not job:
+        raise HTTPException(status_code=404, detail=f"Tâche {job_id} non trouvée")
+    return job_to_response(job)
+
+
+@router.get("/jobs/{job_id}/progress", response_model=JobProgressResponse)
+def get_job_progress(
+    job_id: int,
+    db: Session = Depends(get_db)
+):
+    """
+    Récupérer l'avancement d'une tâche de fond (réponse légère pour le polling).
+
+    - **job_id**: ID de la tâche
+    """
+    row = db.query(Job.id, Job.status, Job.progress, Job.message).filter(Job.id == job_id).first()
+    if not row:
+        raise HTTPException(status_code=404, detail=f"Tâche {job_id} non trouvée")
+    return JobProgressResponse(id=row.id, status=row.status, progress=row.progress, message=row.message)
@@ -27,7 +27,7 @@ logger = logging.getLogger(__name__)
 
 
 @router.get("/loan-configs", response_model=LoanConfigListResponse)
-async def get_loan_configs(
+def get_loan_configs(
     property_id: int = Query(..., description="ID de la propriété (obligatoire)"),
     skip: int = Query(0, ge=0, description="Nombre d'éléments à sauter"),
     limit: int = Query(100, ge=1, le=1000, description="Nombre d'éléments à retourner"),
@@ -110,7 +110,7 @@ async def get_loan_configs(
 
 
 @router.post("/loan-configs", response_model=LoanConfigResponse, status_code=201)
-async def create_loan_config(
+def create_loan_config(
     config: LoanConfigCreate,
     db: Session = Depends(get_db)
 ):
@@ -164,7 +164,7 @@ async def create_loan_config(
 
 
 @router.get("/loan-configs/{config_id}", response_model=LoanConfigResponse)
-async def get_loan_config(
+def get_loan_config(
     config_id: int,
     property_id: int = Query(..., description="ID de la propriété (obligatoire)"),
     db: Session = Depends(get_db)
@@ -204,7 +204,7 @@ async def get_loan_config(
 
 
 @router.put("/loan-configs/{config_id}", response_model=LoanConfigResponse)
-async def update_loan_config(
+def update_loan_config(
     config_id: int,
     property_id: int = Query(..., description="ID de la propriété (obligatoire)"),
     config_update: LoanConfigUpdate = ...,
@@ -276,7 +276,7 @@ async def update_loan_config(
 
 
 @router.delete("/loan-configs/{config_id}", status_code=204)
-async def delete_loan_config(
+def delete_loan_config(
     config_id: int,
     property_id: int = Query(..., description="ID de la propriété (obligatoire)"),
     db: Session = Depends(get_db)
@@ -69,7 +69,7 @@ def update_loan_config_credit_amount(db: Session, loan_name: str, property_id: i
 
 
 @router.get("/loan-payments", response_model=LoanPaymentListResponse)
-async def get_loan_payments(
+def get_loan_payments(
     property_id: int = Query(..., description="ID de la propriété (obligatoire)"),
     skip: int = Query(0, ge=0, description="Nombre d'éléments à sauter"),
     limit: int = Query(100, ge=1, le=1000, description="Nombre d'éléments à retourner"),
@@ -163,7 +163,7 @@ async def get_loan_payments(
 
 
 @router.post("/loan-payments", response_model=LoanPaymentResponse, status_code=201)
-async def create_loan_payment(
+def create_loan_payment(
     payment: LoanPaymentCreate,
     db: Session = Depends(get_db)
 ):
@@ -225,7 +225,7 @@ async def create_loan_payment(
 
 
 @router.get("/loan-payments/{payment_id}", response_model=LoanPaymentResponse)
-async def get_loan_payment(
+def get_loan_payment(
     payment_id: int,
     property_id: int = Query(..., description="ID de la propriété (obligatoire)"),
     db: Session = Depends(get_db)
@@ -262,7 +262,7 @@ async def get_loan_payment(
 
 
 @router.put("/loan-payments/{payment_id}", response_model=LoanPaymentResponse)
-async def update_loan_payment(
+def update_loan_payment(
     payment_id: int,
     property_id: int = Query(..., description="ID de la propriété (obligatoire)"),
     payment_update: LoanPaymentUpdate = ...,
@@ -342,7 +342,7 @@ async def update_loan_payment(
 
 
 @router.delete("/loan-payments/{payment_id}", status_code=204)
-async def delete_loan_payment(
+def delete_loan_payment(
     payment_id: int,
     property_id: int = Query(..., description="ID de la propriété (obligatoire)"),
     db: Session = Depends(get_db)
@@ -402,7 +402,7 @@ async def delete_loan_payment(
 
 
 @router.post("/loan-payments/preview")
-async def preview_loan_payment_file(
+def preview_loan_payment_file(
     property_id: int = Form(..., description="ID de la propriété (obligatoire)"),
     file: UploadFile = File(...),
     db: Session = Depends(get_db)
@@ -434,7 +434,7 @@ async def preview_loan_payment_file(
         )
     
     # Lire le fichier
-    file_content = await file.read()
+    file_content = file.file.read()
     
     try:
         # Lire le fichier selon son type
@@ -602,7 +602,7 @@ async def preview_loan_payment_file(
 
 
 @router.post("/loan-payments/import")
-async def import_loan_payment_file(
+def import_loan_payment_file(
     property_id: int = Form(..., description="ID de la propriété (obligatoire)"),
     file: UploadFile = File(...),
     loan_name: str = Form("Prêt principal", description="Nom du prêt"),
@@ -636,7 +636,7 @@ async def import_loan_payment_file(
         )
     
     # Lire le fichier
-    file_content = await file.read()
+    file_content = file.file.read()
     
     try:
         # Lire le fichier selon son type
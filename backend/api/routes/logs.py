@@ -21,7 +21,7 @@ logs_dir.mkdir(exist_ok=True)
 
 
 @router.post("/logs/frontend")
-async def receive_frontend_log(log_entry: Dict[str, Any]):
+def receive_frontend_log(log_entry: Dict[str, Any]):
     """
     Recevoir un log du frontend et l'écrire dans le fichier de logs frontend.
     
@@ -76,7 +76,7 @@ async def receive_frontend_log(log_entry: Dict[str, Any]):
 
 
 @router.get("/logs/frontend")
-async def get_frontend_logs(limit: int = 100):
+def get_frontend_logs(limit: int = 100):
     """
     Récupérer les logs frontend récents.
     """
@@ -4,11 +4,13 @@ API routes for mappings.
 ⚠️ Before making changes, read: ../../docs/workflow/BEST_PRACTICES.md
 """
 
-from fastapi import APIRouter, Depends, HTTPException, Query, UploadFile, File, Form
-from fastapi.responses import Response
+from fastapi import APIRouter, Depends, HTTPException, Query, Request, UploadFile, File, Form
+from fastapi.encoders import jsonable_encoder
+from fastapi.responses import JSONResponse, Response
 from sqlalchemy.orm import Session
-from sqlalchemy import distinct, desc, asc, func, or_
+from sqlalchemy import distinct, desc, asc, func, or_, insert
 from typing import List, Optional, Dict
+import numpy as np
 import pandas as pd
 import io
 import json
@@ -17,7 +19,9 @@ from pathlib import Path
 from datetime import datetime
 
 from backend.database import get_db
-from backend.database.models import Mapping, Transaction, EnrichedTransaction, MappingImport, AllowedMapping
+from backend.database.models import Mapping, MappingImport, AllowedMapping
+from backend.api.utils.http_cache import etag_response
+from backend.api.utils.job_utils import submit_job_or_400
 from backend.api.utils.validation import validate_property_id
 from backend.api.models import (
     MappingCreate,
@@ -33,7 +37,10 @@ from backend.api.models import (
     AllowedMappingResponse,
     AllowedMappingListResponse
 )
-from backend.api.services.enrichment_service import enrich_transaction, transaction_matches_mapping_name
+from backend.api.services.enrichment_service import re_enrich_for_mapping_names
+from backend.api.services.facets_service import invalidate_property_facets_on_commit
+from backend.api.services.job_service import property_lock
+from backend.api.services.mapping_matcher_service import invalidate_mapping_matcher_on_commit
 from backend.api.services.mapping_obligatoire_service import (
     get_allowed_level1_values,
     get_allowed_level2_values,
@@ -43,8 +50,9 @@ from backend.api.services.mapping_obligatoire_service import (
     get_allowed_level1_for_level2,
     get_allowed_level1_for_level2_and_level3,
     get_allowed_level3_for_level2,
-    validate_mapping,
-    validate_level3_value,
+    get_allowed_combinations,
+    get_allowed_hierarchy,
+    ALLOWED_LEVEL_3_VALUES,
     get_all_allowed_mappings,
     create_allowed_mapping,
     delete_allowed_mapping,
@@ -116,8 +124,23 @@ def detect_mapping_columns(df: pd.DataFrame) -> Dict[str, str]:
     return mapping
 
 
+def _clean_excel_column(df: pd.DataFrame, column: str) -> pd.Series:
+    """
+    Valeurs d'une colonne Excel converties en texte sans espaces autour ('' pour une cellule vide).
+    
+    Args:
+        df: DataFrame lu depuis le fichier Excel
+        column: Nom de la colonne
+    
+    Returns:
+        Série de chaînes, indexée comme df
+    """
+    values = df[column]
+    return values.astype(str).str.strip().where(values.notna(), '')
+
+
 @router.post("/mappings/preview", response_model=MappingPreviewResponse)
-async def preview_mapping_file(
+def preview_mapping_file(
     file: UploadFile = File(...),
     property_id: int = Form(..., description="ID de la propriété (obligatoire)"),
     db: Session = Depends(get_db)
@@ -143,7 +166,7 @@ async def preview_mapping_file(
         )
     
     # Lire le fichier
-    file_content = await file.read()
+    file_content = file.file.read()
     
     try:
         # Lire Excel avec pandas
@@ -215,7 +238,7 @@ async def preview_mapping_file(
 
 
 @router.post("/mappings/import", response_model=MappingImportResponse)
-async def import_mapping_file(
+def import_mapping_file(
     property_id: int = Form(..., description="ID de la propriété (obligatoire)"),
     file: UploadFile = File(...),
     mapping: str = Form(..., description="Mapping JSON string"),
@@ -263,7 +286,7 @@ async def import_mapping_file(
             db.add(mapping_import)
         
         # Lire le fichier
-        file_content = await file.read()
+        file_content = file.file.read()
         
         # Sauvegarder le fichier dans data/input/trades/ (archive)
         trades_dir = Path(__file__).parent.parent.parent / "data" / "input" / "trades"
@@ -302,204 +325,94 @@ async def import_mapping_file(
                 detail="Mapping incomplet: nom, level_1 et level_2 requis"
             )
         
-        # Valider et importer
-        imported_count = 0
-        duplicates_count = 0
-        duplicates_list = []
-        errors_count = 0
+        # Valider et importer (validation vectorisée sur le DataFrame, une seule lecture
+        # des combinaisons autorisées et des noms existants de la propriété)
+        noms = _clean_excel_column(df, nom_col)
+        levels_1 = _clean_excel_column(df, level_1_col)
+        levels_2 = _clean_excel_column(df, level_2_col)
+        levels_3 = _clean_excel_column(df, level_3_col) if level_3_col else pd.Series('', index=df.index)
+        
+        allowed_combinations = get_allowed_combinations(db, property_id)
+        is_allowed = pd.Series(
+            [(level_1, level_2, level_3 or None) in allowed_combinations
+             for level_1, level_2, level_3 in zip(levels_1, levels_2, levels_3)],
+            index=df.index
+        )
+        
+        # Première erreur de chaque ligne, dans l'ordre des contrôles
+        unknown_mapping = "erreur - mapping inconnu"
+        row_errors = pd.Series(
+            np.select(
+                [
+                    noms == '',
+                    levels_1 == '',
+                    levels_2 == '',
+                    (levels_3 != '') & ~levels_3.isin(ALLOWED_LEVEL_3_VALUES),
+                    ~is_allowed
+                ],
+                [
+                    "Le champ 'nom' est obligatoire et ne peut pas être vide",
+                    "Le champ 'level_1' est obligatoire et ne peut pas être vide",
+                    "Le champ 'level_2' est obligatoire et ne peut pas être vide",
+                    unknown_mapping,
+                    unknown_mapping
+                ],
+                default=''
+            ),
+            index=df.index
+        )
+        
         errors_list = []
+        for position in np.flatnonzero((row_errors != '').to_numpy()):
+            idx = df.index[position]
+            errors_list.append(MappingError(
+                line_number=position + 2,  # +2 car 0-based + en-tête
+                nom=noms[idx] or None,
+                level_1=levels_1[idx] or None,
+                level_2=levels_2[idx] or None,
+                level_3=levels_3[idx] or None,
+                error_message=row_errors[idx]
+            ))
+        errors_count = len(errors_list)
+        if errors_count:
+            logger.warning(f"[Mappings] Import {filename}: {errors_count} ligne(s) en erreur")
         
-        # Liste en mémoire des noms déjà traités dans cette session (pour détecter doublons dans le fichier)
-        processed_noms_in_session = set()
+        # Doublons : nom déjà en base pour cette propriété, ou déjà présent plus haut dans le fichier
+        existing_ids = dict(db.query(Mapping.nom, Mapping.id).filter(Mapping.property_id == property_id).all())
+        valid = row_errors == ''
+        in_database = valid & noms.isin(existing_ids.keys())
+        candidates = valid & ~in_database
+        in_file = candidates & noms.where(candidates).duplicated(keep='first')
+        accepted = candidates & ~in_file
         
-        for idx, row in df.iterrows():
-            try:
-                line_number = idx + 2  # +2 car 0-based + en-tête
-                
-                # Récupérer les valeurs
-                nom_value = str(row[nom_col]).strip() if pd.notna(row[nom_col]) else ''
-                level_1_value = str(row[level_1_col]).strip() if pd.notna(row[level_1_col]) else ''
-                level_2_value = str(row[level_2_col]).strip() if pd.notna(row[level_2_col]) else ''
-                level_3_value = str(row[level_3_col]).strip() if pd.notna(row[level_3_col]) else '' if level_3_col else None
-                
-                # Validation
-                if not nom_value:
-                    errors_count += 1
-                    errors_list.append(MappingError(
-                        line_number=line_number,
-                        nom=None,
-                        level_1=level_1_value if level_1_value else None,
-                        level_2=level_2_value if level_2_value else None,
-                        level_3=level_3_value if level_3_value else None,
-                        error_message="Le champ 'nom' est obligatoire et ne peut pas être vide"
-                    ))
-                    continue
-                
-                if not level_1_value:
-                    errors_count += 1
-                    errors_list.append(MappingError(
-                        line_number=line_number,
-                        nom=nom_value,
-                        level_1=None,
-                        level_2=level_2_value if level_2_value else None,
-                        level_3=level_3_value if level_3_value else None,
-                        error_message="Le champ 'level_1' est obligatoire et ne peut pas être vide"
-                    ))
-                    continue
-                
-                if not level_2_value:
-                    errors_count += 1
-                    errors_list.append(MappingError(
-                        line_number=line_number,
-                        nom=nom_value,
-                        level_1=level_1_value,
-                        level_2=None,
-                        level_3=level_3_value if level_3_value else None,
-                        error_message="Le champ 'level_2' est obligatoire et ne peut pas être vide"
-                    ))
-                    continue
-                
-                # Validation contre allowed_mappings (Step 5.3)
-                # Valider que level_3 est dans la liste fixe si fourni
-                if level_3_value and not validate_level3_value(level_3_value):
-                    errors_count += 1
-                    errors_list.append(MappingError(
-                        line_number=line_number,
-                        nom=nom_value,
-                        level_1=level_1_value,
-                        level_2=level_2_value,
-                        level_3=level_3_value,
-                        error_message="erreur - mapping inconnu"
-                    ))
-                    # Logger l'erreur
-                    logger.warning(f"Ligne {line_number}: erreur - mapping inconnu (level_3 invalide: '{level_3_value}')")
-                    continue
-                
-                # Valider que la combinaison (level_1, level_2, level_3) existe dans allowed_mappings
-                if not validate_mapping(db, level_1_value, level_2_value, level_3_value if level_3_value else None, property_id):
-                    errors_count += 1
-                    errors_list.append(MappingError(
-                        line_number=line_number,
-                        nom=nom_value,
-                        level_1=level_1_value,
-                        level_2=level_2_value,
-                        level_3=level_3_value if level_3_value else None,
-                        error_message="erreur - mapping inconnu"
-                    ))
-                    # Logger l'erreur
-                    logger.warning(f"Ligne {line_number}: erreur - mapping inconnu (combinaison non autorisée: level_1='{level_1_value}', level_2='{level_2_value}', level_3='{level_3_value}')")
-                    continue
-                
-                # Vérifier doublon dans le fichier (déjà traité dans cette session)
-                if nom_value in processed_noms_in_session:
-                    duplicates_count += 1
-                    duplicates_list.append(DuplicateMapping(
-                        nom=nom_value,
-                        existing_id=None  # Pas encore en BDD, juste dans cette session
-                    ))
-                    continue
-                
-                # Vérifier doublon dans la base de données pour cette propriété
-                existing = db.query(Mapping).filter(
-                    Mapping.nom == nom_value,
-                    Mapping.property_id == property_id
-                ).first()
-                
-                if existing:
-                    duplicates_count += 1
-                    duplicates_list.append(DuplicateMapping(
-                        nom=nom_value,
-                        existing_id=existing.id
-                    ))
-                    continue
-                
-                # Ajouter à la liste des noms traités dans cette session
-                processed_noms_in_session.add(nom_value)
-                
-                # Créer le mapping avec property_id
-                db_mapping = Mapping(
-                    property_id=property_id,
-                    nom=nom_value,
-                    level_1=level_1_value,
-                    level_2=level_2_value,
-                    level_3=level_3_value if level_3_value else None,
-                    is_prefix_match=True,  # Par défaut
-                    priority=0  # Par défaut
-                )
-                
-                db.add(db_mapping)
-                imported_count += 1
-                
-                # Flush périodique pour que les objets soient visibles dans les requêtes suivantes
-                # et éviter les erreurs UNIQUE constraint au commit final
-                if imported_count % 50 == 0:
-                    try:
-                        db.flush()
-                    except Exception as flush_error:
-                        # Si flush échoue, c'est probablement une contrainte UNIQUE
-                        # Vérifier à nouveau si le mapping existe (peut avoir été créé entre-temps)
-                        db.rollback()
-                        existing_check = db.query(Mapping).filter(
-                            Mapping.nom == nom_value,
-                            Mapping.property_id == property_id
-                        ).first()
-                        
-                        if existing_check:
-                            # C'est un doublon qui n'a pas été détecté précédemment
-                            duplicates_count += 1
-                            duplicates_list.append(DuplicateMapping(
-                                nom=nom_value,
-                                existing_id=existing_check.id
-                            ))
-                            imported_count -= 1  # Annuler l'incrémentation
-                            continue
-                        else:
-                            # Erreur inattendue, la propager
-                            raise
-                
-            except Exception as e:
-                errors_count += 1
-                # Gérer les erreurs de contrainte UNIQUE de manière plus claire
-                error_str = str(e)
-                error_message = f"Erreur lors du traitement: {error_str}"
-                
-                if "UNIQUE constraint failed" in error_str or "IntegrityError" in error_str or "UNIQUE constraint" in error_str:
-                    # Si c'est une erreur de contrainte UNIQUE, c'est probablement un doublon
-                    # qui n'a pas été détecté par la vérification précédente
-                    error_message = f"Un mapping avec le nom '{nom_value}' existe déjà dans la base de données pour cette propriété. Les doublons ont été détectés et ignorés, mais cette erreur indique qu'un doublon n'a pas été correctement détecté. Veuillez vérifier votre fichier."
-                    # Essayer de rollback et vérifier si c'est vraiment un doublon
-                    try:
-                        db.rollback()
-                        existing_check = db.query(Mapping).filter(
-                            Mapping.nom == nom_value,
-                            Mapping.property_id == property_id
-                        ).first()
-                        if existing_check:
-                            # C'est un doublon, le traiter comme tel
-                            duplicates_count += 1
-                            errors_count -= 1  # Annuler l'incrémentation d'erreur
-                            duplicates_list.append(DuplicateMapping(
-                                nom=nom_value,
-                                existing_id=existing_check.id
-                            ))
-                            continue
-                    except:
-                        pass
-                
-                errors_list.append(MappingError(
-                    line_number=idx + 2,
-                    nom=nom_value if 'nom_value' in locals() else None,
-                    level_1=level_1_value if 'level_1_value' in locals() else None,
-                    level_2=level_2_value if 'level_2_value' in locals() else None,
-                    level_3=level_3_value if 'level_3_value' in locals() else None,
-                    error_message=error_message
-                ))
-                # Rollback de la transaction pour cette ligne en cas d'erreur
-                try:
-                    db.rollback()
-                except:
-                    pass
-                continue
+        duplicates_list = [
+            DuplicateMapping(nom=noms[idx], existing_id=existing_ids.get(noms[idx]))
+            for idx in df.index[in_database | in_file]
+        ]
+        duplicates_count = len(duplicates_list)
+        
+        # Insertion en masse des lignes acceptées
+        now = datetime.utcnow()
+        rows_to_insert = [
+            {
+                "property_id": property_id,
+                "nom": noms[idx],
+                "level_1": levels_1[idx],
+                "level_2": levels_2[idx],
+                "level_3": levels_3[idx] or None,
+                "is_prefix_match": True,  # Par défaut
+                "priority": 0,  # Par défaut
+                "created_at": now,
+                "updated_at": now
+            }
+            for idx in df.index[accepted]
+        ]
+        if rows_to_insert:
+            db.execute(insert(Mapping.__table__), rows_to_insert)
+            # Écriture Core : invalider explicitement l'index compilé des mappings et les facettes de la propriété
+            invalidate_mapping_matcher_on_commit(db, property_id)
+            invalidate_property_facets_on_commit(db, property_id)
+        imported_count = len(rows_to_insert)
         
         # Mettre à jour l'enregistrement MappingImport
         mapping_import.imported_count = imported_count
@@ -554,7 +467,7 @@ async def import_mapping_file(
 
 
 @router.get("/mappings/imports", response_model=List[MappingImportHistory])
-async def get_mapping_imports_history(
+def get_mapping_imports_history(
     property_id: int = Query(..., description="ID de la propriété (obligatoire)"),
     db: Session = Depends(get_db)
 ):
@@ -583,7 +496,7 @@ async def get_mapping_imports_history(
 
 
 @router.delete("/mappings/imports", status_code=204)
-async def delete_all_mapping_imports(
+def delete_all_mapping_imports(
     property_id: int = Query(..., description="ID de la propriété (obligatoire)"),
     db: Session = Depends(get_db)
 ):
@@ -611,7 +524,7 @@ async def delete_all_mapping_imports(
 
 
 @router.delete("/mappings/imports/{import_id}", status_code=204)
-async def delete_mapping_import(
+def delete_mapping_import(
     import_id: int,
     property_id: int = Query(..., description="ID de la propriété (obligatoire)"),
     db: Session = Depends(get_db)
@@ -654,7 +567,7 @@ async def delete_mapping_import(
 
 
 @router.get("/mappings/count")
-async def get_mappings_count(
+def get_mappings_count(
     property_id: int = Query(..., description="ID de la propriété (obligatoire)"),
     db: Session = Depends(get_db)
 ):
@@ -681,7 +594,7 @@ async def get_mappings_count(
 
 
 @router.get("/mappings", response_model=MappingListResponse)
-async def get_mappings(
+def get_mappings(
     property_id: int = Query(..., description="ID de la propriété (obligatoire)"),
     skip: int = Query(0, ge=0, description="Nombre d'éléments à sauter"),
     limit: int = Query(100, ge=1, le=1000, description="Nombre d'éléments à retourner"),
@@ -830,7 +743,7 @@ async def get_mappings(
 
 
 @router.get("/mappings/unique-values")
-async def get_mapping_unique_values(
+def get_mapping_unique_values(
     property_id: int = Query(..., description="ID de la propriété (obligatoire)"),
     column: str = Query(..., description="Nom de la colonne (nom, level_1, level_2, level_3)"),
     db: Session = Depends(get_db)
@@ -877,7 +790,7 @@ async def get_mapping_unique_values(
 
 
 @router.post("/mappings", response_model=MappingResponse, status_code=201)
-async def create_mapping(
+def create_mapping(
     mapping: MappingCreate,
     db: Session = Depends(get_db)
 ):
@@ -927,42 +840,15 @@ async def create_mapping(
     
     logger.info(f"[Mappings] Mapping créé: id={db_mapping.id}, property_id={mapping.property_id}")
     
-    # Re-enrichir toutes les transactions de cette propriété qui correspondent au nouveau mapping
-    # Trouver toutes les transactions de cette propriété dont le nom correspond au mapping
-    all_transactions = db.query(Transaction).filter(
-        Transaction.property_id == mapping.property_id,
-        Transaction.nom.like(f"%{mapping.nom}%")  # Pré-filtre SQL
-    ).all()
-    
-    transactions_to_re_enrich = []
-    for transaction in all_transactions:
-        # Utiliser la fonction utilitaire pour vérifier si la transaction correspond au mapping
-        if transaction_matches_mapping_name(transaction.nom, mapping.nom, mapping.is_prefix_match):
-            transactions_to_re_enrich.append(transaction)
-    
-    if transactions_to_re_enrich:
-        # Charger les mappings de cette propriété une seule fois
-        property_mappings = db.query(Mapping).filter(Mapping.property_id == mapping.property_id).all()
-        
-        logger.info(f"[Mappings] Re-enrichissement de {len(transactions_to_re_enrich)} transaction(s) après création du mapping pour property_id={mapping.property_id}")
-        
-        # OPTIMISATION: Faire le flush par batch
-        batch_size = 50
-        for i, transaction in enumerate(transactions_to_re_enrich):
-            enrich_transaction(transaction, db, property_mappings)
-            # Flush par batch pour améliorer les performances
-            if (i + 1) % batch_size == 0:
-                db.flush()
-                logger.debug(f"[Mappings] Flush batch: {i + 1}/{len(transactions_to_re_enrich)} transactions traitées")
-        
-        db.commit()
-        logger.info(f"[Mappings] Re-enrichissement terminé après création du mapping pour property_id={mapping.property_id}")
+    # Re-enrichir les transactions dont le nom contient celui du nouveau mapping
+    # (chaque nom distinct est reclassifié une fois, seules les lignes modifiées sont écrites)
+    re_enrich_for_mapping_names(db, mapping.property_id, [mapping.nom])
     
     return MappingResponse.model_validate(db_mapping)
 
 
 @router.put("/mappings/{mapping_id}", response_model=MappingResponse)
-async def update_mapping(
+def update_mapping(
     mapping_id: int,
     property_id: int = Query(..., description="ID de la propriété (obligatoire)"),
     mapping_update: MappingUpdate = ...,
@@ -972,9 +858,9 @@ async def update_mapping(
     Modifier un mapping existant et re-enrichir les transactions qui l'utilisaient.
     
     Lors de la modification d'un mapping :
-    1. Trouve toutes les transactions dont le nom correspond au mapping (avant modification)
-    2. Met à jour le mapping
-    3. Re-enrichit ces transactions (elles utiliseront le nouveau mapping si elles correspondent toujours)
+    1. Met à jour le mapping
+    2. Re-enrichit les transactions dont le nom contient l'ancien ou le nouveau nom du mapping
+       (elles utiliseront le nouveau mapping si elles correspondent toujours)
     
     Args:
         mapping_id: ID du mapping à modifier
@@ -1013,27 +899,9 @@ async def update_mapping(
                 detail=f"Un mapping avec le nom '{mapping_update.nom}' existe déjà pour cette propriété"
             )
     
-    # Sauvegarder le nom et is_prefix_match du mapping AVANT la mise à jour
-    # pour trouver toutes les transactions qui correspondent à ce nom
+    # Sauvegarder le nom du mapping AVANT la mise à jour : les transactions qui lui
+    # correspondaient doivent être reclassifiées, comme celles qui correspondent au nouveau nom
     old_mapping_nom = mapping.nom
-    old_is_prefix_match = mapping.is_prefix_match
-    
-    # Trouver TOUTES les transactions de cette propriété dont le nom correspond au mapping
-    # (peu importe leurs level_1/2/3 actuels)
-    # Cela permet de re-enrichir toutes les transactions avec le même nom
-    # même si elles n'avaient pas encore été enrichies ou avaient des valeurs différentes
-    # OPTIMISATION: Ne charger que les transactions qui correspondent potentiellement au mapping
-    # (celles qui commencent par le nom du mapping ou le contiennent)
-    all_transactions = db.query(Transaction).filter(
-        Transaction.property_id == property_id,
-        Transaction.nom.like(f"%{old_mapping_nom}%")  # Filtre SQL pour réduire le nombre de transactions
-    ).all()
-    
-    transactions_to_re_enrich = []
-    for transaction in all_transactions:
-        # Utiliser la fonction utilitaire pour vérifier si la transaction correspond au mapping
-        if transaction_matches_mapping_name(transaction.nom, old_mapping_nom, old_is_prefix_match):
-            transactions_to_re_enrich.append(transaction)
     
     # Mettre à jour les champs
     update_data = mapping_update.model_dump(exclude_unset=True)
@@ -1043,29 +911,16 @@ async def update_mapping(
     db.commit()
     db.refresh(mapping)
     
-    # Re-enrichir les transactions (elles utiliseront le nouveau mapping si elles correspondent toujours)
-    # Charger les mappings de cette propriété une seule fois
-    property_mappings = db.query(Mapping).filter(Mapping.property_id == property_id).all()
-    
-    # OPTIMISATION: Faire le flush par batch au lieu d'une transaction par transaction
-    batch_size = 50
-    logger.info(f"[Mappings] Re-enrichissement de {len(transactions_to_re_enrich)} transaction(s) pour property_id={property_id}")
-    
-    for i, transaction in enumerate(transactions_to_re_enrich):
-        enrich_transaction(transaction, db, property_mappings)
-        # Flush par batch pour améliorer les performances
-        if (i + 1) % batch_size == 0:
-            db.flush()
-            logger.debug(f"[Mappings] Flush batch: {i + 1}/{len(transactions_to_re_enrich)} transactions traitées")
-    
-    db.commit()
-    logger.info(f"[Mappings] Re-enrichissement terminé pour property_id={property_id}")
+    # Re-enrichir les transactions impactées par l'ancien ou le nouveau nom
+    # (elles utiliseront le nouveau mapping si elles correspondent toujours)
+    stats = re_enrich_for_mapping_names(db, property_id, [old_mapping_nom, mapping.nom])
+    logger.info(f"[Mappings] Re-enrichissement terminé pour property_id={property_id}: {stats['updated'] + stats['created']} transaction(s) modifiée(s)")
     
     return MappingResponse.model_validate(mapping)
 
 
 @router.delete("/mappings/{mapping_id}", status_code=204)
-async def delete_mapping(
+def delete_mapping(
     mapping_id: int,
     property_id: int = Query(..., description="ID de la propriété (obligatoire)"),
     db: Session = Depends(get_db)
@@ -1074,9 +929,9 @@ async def delete_mapping(
     Supprimer un mapping et re-enrichir les transactions qui l'utilisaient.
     
     Lors de la suppression d'un mapping :
-    1. Trouve toutes les transactions de cette propriété dont le nom correspond au mapping
-    2. Re-enrichit ces transactions (elles seront remises à NULL si aucun autre mapping ne correspond)
-    3. Supprime le mapping
+    1. Supprime le mapping
+    2. Re-enrichit les transactions de cette propriété dont le nom contient celui du mapping
+       (elles seront remises à NULL si aucun autre mapping ne correspond)
     
     Args:
         mapping_id: ID du mapping à supprimer
@@ -1099,72 +954,26 @@ async def delete_mapping(
     if not mapping:
         raise HTTPException(status_code=404, detail=f"Mapping avec ID {mapping_id} non trouvé pour cette propriété")
     
-    # Sauvegarder les informations du mapping avant suppression
     mapping_nom = mapping.nom
-    mapping_level_1 = mapping.level_1
-    mapping_level_2 = mapping.level_2
-    mapping_level_3 = mapping.level_3
-    
-    # Trouver toutes les transactions enrichies de cette propriété qui utilisent ce mapping
-    # On cherche les transactions qui ont les mêmes level_1, level_2, level_3
-    # ET dont le nom correspond au mapping
-    enriched_transactions = db.query(EnrichedTransaction).join(Transaction).filter(
-        EnrichedTransaction.property_id == property_id,
-        Transaction.property_id == property_id,
-        EnrichedTransaction.level_1 == mapping_level_1,
-        EnrichedTransaction.level_2 == mapping_level_2,
-        EnrichedTransaction.level_3 == mapping_level_3
-    ).all()
-    
-    # Filtrer pour ne garder que celles dont le nom correspond au mapping
-    transactions_to_re_enrich = []
-    for enriched in enriched_transactions:
-        transaction = db.query(Transaction).filter(
-            Transaction.id == enriched.transaction_id,
-            Transaction.property_id == property_id
-        ).first()
-        if transaction:
-            # Vérifier si le nom de la transaction correspond au mapping
-            transaction_name = transaction.nom.strip()
-            mapping_name = mapping_nom.strip()
-            
-            # Utiliser la même logique que find_best_mapping
-            matches = False
-            if 'PRLV SEPA' in transaction_name and 'PRLV SEPA' in mapping_name:
-                matches = transaction_name.startswith(mapping_name)
-            elif 'VIR STRIPE' in transaction_name and mapping_name == 'VIR STRIPE':
-                matches = True
-            elif mapping_name in transaction_name or transaction_name.startswith(mapping_name):
-                matches = True
-            
-            if matches:
-                transactions_to_re_enrich.append(transaction)
     
     # Supprimer le mapping
     db.delete(mapping)
     db.commit()
     
-    # Re-enrichir les transactions (elles seront remises à NULL si aucun autre mapping ne correspond)
-    # Charger les mappings de cette propriété une seule fois
-    property_mappings = db.query(Mapping).filter(Mapping.property_id == property_id).all()
-    
-    # OPTIMISATION: Faire le flush par batch au lieu d'une transaction par transaction
-    batch_size = 50
-    for i, transaction in enumerate(transactions_to_re_enrich):
-        enrich_transaction(transaction, db, property_mappings)
-        # Flush par batch pour améliorer les performances
-        if (i + 1) % batch_size == 0:
-            db.flush()
-    
-    db.commit()
+    # Re-enrichir les transactions dont le nom contient celui du mapping
+    # (elles seront remises à NULL si aucun autre mapping ne correspond)
+    re_enrich_for_mapping_names(db, property_id, [mapping_nom])
     
     return None
 
 
 # Allowed mappings endpoints (doivent être définis AVANT /mappings/{mapping_id})
+# Réponses avec ETag (version de la hiérarchie autorisée) : 304 si le client est à jour
+# La hiérarchie est lue une seule fois par requête : contenu et ETag proviennent de la même version
 
 @router.get("/mappings/allowed-level1")
-async def get_allowed_level1(
+def get_allowed_level1(
+    request: Request,
     property_id: int = Query(..., description="ID de la propriété (obligatoire)"),
     db: Session = Depends(get_db)
 ):
@@ -1172,6 +981,7 @@ async def get_allowed_level1(
     Récupérer toutes les valeurs level_1 autorisées pour une propriété.
     
     Args:
+        request: Requête HTTP (If-None-Match)
         property_id: ID de la propriété (obligatoire)
         db: Session de base de données
     
@@ -1179,12 +989,14 @@ async def get_allowed_level1(
         Liste des valeurs level_1 uniques, triées
     """
     validate_property_id(db, property_id, "Mappings")
-    values = get_allowed_level1_values(db, property_id)
-    return {"level_1": values}
+    hierarchy = get_allowed_hierarchy(db, property_id)
+    values = get_allowed_level1_values(db, property_id, hierarchy=hierarchy)
+    return etag_response(request, {"level_1": values}, hierarchy.version)
 
 
 @router.get("/mappings/allowed-level2")
-async def get_allowed_level2(
+def get_allowed_level2(
+    request: Request,
     property_id: int = Query(..., description="ID de la propriété (obligatoire)"),
     level_1: Optional[str] = Query(None, description="Valeur de level_1 (optionnel, si non fourni retourne tous les level_2)"),
     db: Session = Depends(get_db)
@@ -1196,6 +1008,7 @@ async def get_allowed_level2(
     Si level_1 n'est pas fourni, retourne tous les level_2 autorisés (pour scénario 2).
     
     Args:
+        request: Requête HTTP (If-None-Match)
         property_id: ID de la propriété (obligatoire)
         level_1: Valeur de level_1 (optionnel)
         db: Session de base de données
@@ -1204,15 +1017,17 @@ async def get_allowed_level2(
         Liste des valeurs level_2 uniques, triées
     """
     validate_property_id(db, property_id, "Mappings")
+    hierarchy = get_allowed_hierarchy(db, property_id)
     if level_1:
-        values = get_allowed_level2_values(db, level_1, property_id)
+        values = get_allowed_level2_values(db, level_1, property_id, hierarchy=hierarchy)
     else:
-        values = get_all_allowed_level2_values(db, property_id)
-    return {"level_2": values}
+        values = get_all_allowed_level2_values(db, property_id, hierarchy=hierarchy)
+    return etag_response(request, {"level_2": values}, hierarchy.version)
 
 
 @router.get("/mappings/allowed-level3")
-async def get_allowed_level3(
+def get_allowed_level3(
+    request: Request,
     property_id: int = Query(..., description="ID de la propriété (obligatoire)"),
     level_1: str = Query(..., description="Valeur de level_1"),
     level_2: str = Query(..., description="Valeur de level_2"),
@@ -1222,6 +1037,7 @@ async def get_allowed_level3(
     Récupérer les valeurs level_3 autorisées pour un couple (level_1, level_2) pour une propriété.
     
     Args:
+        request: Requête HTTP (If-None-Match)
         property_id: ID de la propriété (obligatoire)
         level_1: Valeur de level_1
         level_2: Valeur de level_2
@@ -1231,12 +1047,14 @@ async def get_allowed_level3(
         Liste des valeurs level_3 uniques pour ce couple, triées
     """
     validate_property_id(db, property_id, "Mappings")
-    values = get_allowed_level3_values(db, level_1, level_2, property_id)
-    return {"level_3": values}
+    hierarchy = get_allowed_hierarchy(db, property_id)
+    values = get_allowed_level3_values(db, level_1, level_2, property_id, hierarchy=hierarchy)
+    return etag_response(request, {"level_3": values}, hierarchy.version)
 
 
 @router.get("/mappings/allowed-level2-for-level3")
-async def get_allowed_level2_for_level3_endpoint(
+def get_allowed_level2_for_level3_endpoint(
+    request: Request,
     level_3: str = Query(..., description="Valeur de level_3"),
     property_id: int = Query(..., description="ID de la propriété (obligatoire)"),
     db: Session = Depends(get_db)
@@ -1248,6 +1066,7 @@ async def get_allowed_level2_for_level3_endpoint(
     on peut filtrer les level_2 possibles.
     
     Args:
+        request: Requête HTTP (If-None-Match)
         level_3: Valeur de level_3
         property_id: ID de la propriété (obligatoire)
         db: Session de base de données
@@ -1257,12 +1076,14 @@ async def get_allowed_level2_for_level3_endpoint(
     """
     logger.info(f"[Mappings] GET allowed-level2-for-level3 - property_id={property_id}, level_3={level_3}")
     validate_property_id(db, property_id, "Mappings")
-    values = get_allowed_level2_for_level3(db, level_3, property_id)
-    return {"level_2": values}
+    hierarchy = get_allowed_hierarchy(db, property_id)
+    values = get_allowed_level2_for_level3(db, level_3, property_id, hierarchy=hierarchy)
+    return etag_response(request, {"level_2": values}, hierarchy.version)
 
 
 @router.get("/mappings/allowed-level1-for-level2")
-async def get_allowed_level1_for_level2_endpoint(
+def get_allowed_level1_for_level2_endpoint(
+    request: Request,
     level_2: str = Query(..., description="Valeur de level_2"),
     property_id: int = Query(..., description="ID de la propriété (obligatoire)"),
     db: Session = Depends(get_db)
@@ -1274,6 +1095,7 @@ async def get_allowed_level1_for_level2_endpoint(
     on peut filtrer les level_1 possibles.
     
     Args:
+        request: Requête HTTP (If-None-Match)
         level_2: Valeur de level_2
         property_id: ID de la propriété (obligatoire)
         db: Session de base de données
@@ -1283,12 +1105,14 @@ async def get_allowed_level1_for_level2_endpoint(
     """
     logger.info(f"[Mappings] GET allowed-level1-for-level2 - property_id={property_id}, level_2={level_2}")
     validate_property_id(db, property_id, "Mappings")
-    values = get_allowed_level1_for_level2(db, level_2, property_id)
-    return {"level_1": values}
+    hierarchy = get_allowed_hierarchy(db, property_id)
+    values = get_allowed_level1_for_level2(db, level_2, property_id, hierarchy=hierarchy)
+    return etag_response(request, {"level_1": values}, hierarchy.version)
 
 
 @router.get("/mappings/allowed-level1-for-level2-and-level3")
-async def get_allowed_level1_for_level2_and_level3_endpoint(
+def get_allowed_level1_for_level2_and_level3_endpoint(
+    request: Request,
     level_2: str = Query(..., description="Valeur de level_2"),
     level_3: str = Query(..., description="Valeur de level_3"),
     property_id: int = Query(..., description="ID de la propriété (obligatoire)"),
@@ -1301,6 +1125,7 @@ async def get_allowed_level1_for_level2_and_level3_endpoint(
     on peut filtrer les level_1 possibles pour validation.
     
     Args:
+        request: Requête HTTP (If-None-Match)
         level_2: Valeur de level_2
         level_3: Valeur de level_3
         property_id: ID de la propriété (obligatoire)
@@ -1311,12 +1136,14 @@ async def get_allowed_level1_for_level2_and_level3_endpoint(
     """
     logger.info(f"[Mappings] GET allowed-level1-for-level2-and-level3 - property_id={property_id}, level_2={level_2}, level_3={level_3}")
     validate_property_id(db, property_id, "Mappings")
-    values = get_allowed_level1_for_level2_and_level3(db, level_2, level_3, property_id)
-    return {"level_1": values}
+    hierarchy = get_allowed_hierarchy(db, property_id)
+    values = get_allowed_level1_for_level2_and_level3(db, level_2, level_3, property_id, hierarchy=hierarchy)
+    return etag_response(request, {"level_1": values}, hierarchy.version)
 
 
 @router.get("/mappings/allowed-level3-for-level2")
-async def get_allowed_level3_for_level2_endpoint(
+def get_allowed_level3_for_level2_endpoint(
+    request: Request,
     level_2: str = Query(..., description="Valeur de level_2"),
     property_id: int = Query(..., description="ID de la propriété (obligatoire)"),
     db: Session = Depends(get_db)
@@ -1328,6 +1155,7 @@ async def get_allowed_level3_for_level2_endpoint(
     on peut trouver le level_3 unique (si unique) pour pré-remplir automatiquement.
     
     Args:
+        request: Requête HTTP (If-None-Match)
         level_2: Valeur de level_2
         property_id: ID de la propriété (obligatoire)
         db: Session de base de données
@@ -1337,12 +1165,13 @@ async def get_allowed_level3_for_level2_endpoint(
     """
     logger.info(f"[Mappings] GET allowed-level3-for-level2 - property_id={property_id}, level_2={level_2}")
     validate_property_id(db, property_id, "Mappings")
-    values = get_allowed_level3_for_level2(db, level_2, property_id)
-    return {"level_3": values}
+    hierarchy = get_allowed_hierarchy(db, property_id)
+    values = get_allowed_level3_for_level2(db, level_2, property_id, hierarchy=hierarchy)
+    return etag_response(request, {"level_3": values}, hierarchy.version)
 
 
 @router.get("/mappings/combinations")
-async def get_mapping_combinations(
+def get_mapping_combinations(
     property_id: int = Query(..., description="ID de la propriété (obligatoire)"),
     level_1: Optional[str] = Query(None, description="Filtrer par level_1"),
     level_2: Optional[str] = Query(None, description="Filtrer par level_2 (nécessite level_1)"),
@@ -1428,7 +1257,7 @@ async def get_mapping_combinations(
 # ============================================================================
 
 @router.get("/mappings/allowed", response_model=AllowedMappingListResponse)
-async def get_allowed_mappings_endpoint(
+def get_allowed_mappings_endpoint(
     property_id: int = Query(..., description="ID de la propriété (obligatoire)"),
     skip: int = Query(0, ge=0, description="Nombre d'éléments à sauter"),
     limit: int = Query(100, ge=1, le=1000, description="Nombre d'éléments à retourner"),
@@ -1455,7 +1284,7 @@ async def get_allowed_mappings_endpoint(
 
 
 @router.post("/mappings/allowed", response_model=AllowedMappingResponse, status_code=201)
-async def create_allowed_mapping_endpoint(
+def create_allowed_mapping_endpoint(
     property_id: int = Query(..., description="ID de la propriété (obligatoire)"),
     level_1: str = Query(..., description="Valeur de level_1"),
     level_2: str = Query(..., description="Valeur de level_2"),
@@ -1487,7 +1316,7 @@ async def create_allowed_mapping_endpoint(
 
 
 @router.delete("/mappings/allowed/{mapping_id}", status_code=204)
-async def delete_allowed_mapping_endpoint(
+def delete_allowed_mapping_endpoint(
     mapping_id: int,
     property_id: int = Query(..., description="ID de la propriété (obligatoire)"),
     db: Session = Depends(get_db)
@@ -1514,8 +1343,9 @@ async def delete_allowed_mapping_endpoint(
 
 
 @router.post("/mappings/allowed/reset")
-async def reset_allowed_mappings_endpoint(
+def reset_allowed_mappings_endpoint(
     property_id: int = Query(..., description="ID de la propriété (obligatoire)"),
+    background: bool = Query(False, description="Exécuter en tâche de fond (retourne la tâche, 202)"),
     db: Session = Depends(get_db)
 ):
     """
@@ -1525,15 +1355,21 @@ async def reset_allowed_mappings_endpoint(
     
     Args:
         property_id: ID de la propriété (obligatoire)
+        background: Si True, soumet une tâche "allowed_mappings_reset" et retourne la tâche (statut 202)
         db: Session de base de données
     
     Returns:
-        Statistiques de l'opération
+        Statistiques de l'opération (ou la tâche soumise si background=True)
     """
     logger.info(f"[Mappings] POST allowed/reset - property_id={property_id}")
     validate_property_id(db, property_id, "Mappings")
+    if background:
+        job = submit_job_or_400(db, "allowed_mappings_reset", property_id)
+        return JSONResponse(status_code=202, content=jsonable_encoder(job))
     try:
-        stats = reset_allowed_mappings(db, property_id)
+        # Verrou de la propriété : pas de recalcul en parallèle d'une tâche de fond
+        with property_lock(property_id):
+            stats = reset_allowed_mappings(db, property_id)
         return {
             "message": "Reset effectué avec succès",
             "deleted_allowed": stats["deleted_allowed"],
@@ -1546,7 +1382,7 @@ async def reset_allowed_mappings_endpoint(
 
 
 @router.get("/mappings/export")
-async def export_mappings(
+def export_mappings(
     property_id: int = Query(..., description="ID de la propriété (obligatoire)"),
     format: str = Query("excel", description="Format d'export: 'excel' ou 'csv'"),
     db: Session = Depends(get_db)
@@ -1636,7 +1472,7 @@ async def export_mappings(
 
 
 @router.get("/mappings/{mapping_id}", response_model=MappingResponse)
-async def get_mapping(
+def get_mapping(
     mapping_id: int,
     property_id: int = Query(..., description="ID de la propriété (obligatoire)"),
     db: Session = Depends(get_db)
@@ -2,7 +2,7 @@
 # À ajouter à la fin de backend/api/routes/mappings.py
 
 @router.get("/mappings/allowed", response_model=AllowedMappingListResponse)
-async def get_allowed_mappings_endpoint(
+def get_allowed_mappings_endpoint(
     property_id: int = Query(..., description="ID de la propriété (obligatoire)"),
     skip: int = Query(0, ge=0, description="Nombre d'éléments à sauter"),
     limit: int = Query(100, ge=1, le=1000, description="Nombre d'éléments à retourner"),
@@ -30,7 +30,7 @@ async def get_allowed_mappings_endpoint(
 
 
 @router.post("/mappings/allowed", response_model=AllowedMappingResponse, status_code=201)
-async def create_allowed_mapping_endpoint(
+def create_allowed_mapping_endpoint(
     property_id: int = Query(..., description="ID de la propriété (obligatoire)"),
     level_1: str = Query(..., description="Valeur de level_1"),
     level_2: str = Query(..., description="Valeur de level_2"),
@@ -63,7 +63,7 @@ async def create_allowed_mapping_endpoint(
 
 
 @router.delete("/mappings/allowed/{mapping_id}", status_code=204)
-async def delete_allowed_mapping_endpoint(
+def delete_allowed_mapping_endpoint(
     mapping_id: int,
     db: Session = Depends(get_db)
 ):
@@ -86,7 +86,7 @@ async def delete_allowed_mapping_endpoint(
 
 
 @router.post("/mappings/allowed/reset")
-async def reset_allowed_mappings_endpoint(
+def reset_allowed_mappings_endpoint(
     db: Session = Depends(get_db)
 ):
     """
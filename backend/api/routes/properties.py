@@ -6,7 +6,7 @@ API routes for properties.
 
 import logging
 import traceback
-from fastapi import APIRouter, Depends, HTTPException, Query
+from fastapi import APIRouter, Depends, HTTPException, Query, Request
 from sqlalchemy.orm import Session
 from typing import List, Optional
 
@@ -16,14 +16,17 @@ from backend.api.models import (
     PropertyCreate,
     PropertyUpdate,
     PropertyResponse,
-    PropertyListResponse
+    PropertyListResponse,
+    PropertyFacetsResponse
 )
+from backend.api.services.facets_service import get_property_facets, invalidate_property_facets_on_commit
+from backend.api.utils.http_cache import etag_response
 
 router = APIRouter()
 
 
 @router.get("/properties", response_model=PropertyListResponse)
-async def get_properties(
+def get_properties(
     skip: int = Query(0, ge=0, description="Nombre d'éléments à sauter"),
     limit: int = Query(100, ge=1, le=1000, description="Nombre d'éléments à retourner"),
     db: Session = Depends(get_db)
@@ -57,7 +60,7 @@ async def get_properties(
 
 
 @router.get("/properties/{property_id}", response_model=PropertyResponse)
-async def get_property(
+def get_property(
     property_id: int,
     db: Session = Depends(get_db)
 ):
@@ -80,8 +83,32 @@ async def get_property(
     )
 
 
+@router.get("/properties/{property_id}/facets", response_model=PropertyFacetsResponse)
+def get_property_facets_endpoint(
+    request: Request,
+    property_id: int,
+    db: Session = Depends(get_db)
+):
+    """
+    Récupérer en un appel les valeurs distinctes (et effectifs) utilisées par l'interface de classification.
+    
+    - **property_id**: ID de la propriété
+    
+    Regroupe les valeurs de /transactions/unique-values (nom, level_1, level_2, level_3, annee, mois),
+    les combinaisons des mappings et les combinaisons autorisées. La réponse porte un ETag :
+    une requête avec If-None-Match à jour reçoit 304.
+    """
+    property = db.query(Property).filter(Property.id == property_id).first()
+    
+    if not property:
+        raise HTTPException(status_code=404, detail="Propriété non trouvée")
+    
+    facets = get_property_facets(db, property_id)
+    return etag_response(request, facets.content, facets.version)
+
+
 @router.post("/properties", response_model=PropertyResponse, status_code=201)
-async def create_property(
+def create_property(
     property_data: PropertyCreate,
     db: Session = Depends(get_db)
 ):
@@ -139,7 +166,7 @@ async def create_property(
 
 
 @router.put("/properties/{property_id}", response_model=PropertyResponse)
-async def update_property(
+def update_property(
     property_id: int,
     property_data: PropertyUpdate,
     db: Session = Depends(get_db)
@@ -185,7 +212,7 @@ async def update_property(
 
 
 @router.delete("/properties/{property_id}", status_code=204)
-async def delete_property(
+def delete_property(
     property_id: int,
     db: Session = Depends(get_db)
 ):
@@ -250,6 +277,8 @@ async def delete_property(
         # Cela inclut : transactions, mappings, crédits, amortissements, comptes de résultat, bilans, etc.
         logger.info(f"[Properties] DELETE /api/properties/{property_id} - Suppression de la propriété et de toutes ses données associées")
         db.delete(property)
+        # Un nouvel enregistrement peut réutiliser cet ID : oublier les facettes en cache
+        invalidate_property_facets_on_commit(db, property_id)
         db.commit()
         
         logger.info(f"[Properties] DELETE /api/properties/{property_id} - Propriété supprimée avec succès")
@@ -7,7 +7,7 @@ API routes for transactions.
 from fastapi import APIRouter, Depends, HTTPException, Query, UploadFile, File, Form
 from fastapi.responses import Response
 from sqlalchemy.orm import Session
-from sqlalchemy import or_, and_, desc, asc, func
+from sqlalchemy import or_, and_, func
 from typing import List, Optional
 from datetime import date, datetime
 import os
@@ -16,10 +16,20 @@ import pandas as pd
 import io
 import logging
 
-from backend.database import get_db
+from backend.database import get_db, get_read_db
 from backend.database.models import Transaction, FileImport, EnrichedTransaction
-from backend.api.services.enrichment_service import enrich_transaction
+from backend.api.services.enrichment_service import enrich_transaction, bulk_enrich_transactions
+from backend.api.services.transaction_fact_service import sum_level_1
 from backend.api.utils.validation import validate_property_id
+from backend.api.utils.transaction_query_utils import (
+    query_transactions_with_classification,
+    rows_to_transaction_responses,
+    resolve_transaction_sort,
+    apply_transaction_sort,
+    apply_transaction_cursor,
+    encode_transaction_cursor,
+    decode_transaction_cursor
+)
 
 logger = logging.getLogger(__name__)
 from backend.api.models import (
@@ -39,14 +49,17 @@ from backend.api.utils.csv_utils import (
     read_csv_safely,
     detect_column_mapping,
     validate_transactions,
-    preview_transactions
+    preview_transactions,
+    find_name_combination_column,
+    combine_name_columns
 )
+from backend.api.services.transaction_import_service import stream_import_transactions, TransactionDuplicateIndex
 
 router = APIRouter()
 
 
 @router.get("/transactions", response_model=TransactionListResponse)
-async def get_transactions(
+def get_transactions(
     property_id: int = Query(..., description="ID de la propriété (obligatoire)"),
     skip: int = Query(0, ge=0, description="Nombre d'éléments à sauter"),
     limit: int = Query(100, ge=1, le=1000, description="Nombre d'éléments à retourner"),
@@ -63,7 +76,9 @@ async def get_transactions(
     filter_solde_min: Optional[float] = Query(None, description="Filtre solde minimum"),
     filter_solde_max: Optional[float] = Query(None, description="Filtre solde maximum"),
     unclassified_only: Optional[bool] = Query(None, description="Filtrer uniquement les transactions non classées (level_1/2/3 = NULL)"),
-    db: Session = Depends(get_db)
+    cursor: Optional[str] = Query(None, description="Pagination par curseur : vide pour la première page, puis next_cursor de la page précédente (skip ignoré)"),
+    include_total: Optional[bool] = Query(None, description="Calculer le total (défaut : oui en pagination par offset, non en mode curseur)"),
+    db: Session = Depends(get_read_db)
 ):
     """
     Récupérer la liste des transactions.
@@ -83,31 +98,19 @@ async def get_transactions(
     - **filter_quantite_max**: Filtrer par quantité maximum
     - **filter_solde_min**: Filtrer par solde minimum
     - **filter_solde_max**: Filtrer par solde maximum
+    - **cursor**: Pagination par curseur (keyset sur la colonne de tri + ID) ; "" pour la première page
+    - **include_total**: Calculer le total (par défaut uniquement en pagination par offset)
     """
     logger.info(f"[Transactions] GET /api/transactions - property_id={property_id}")
     
     # Valider property_id
     validate_property_id(db, property_id, "Transactions")
     
-    # Base query - filtrer par property_id dès le début
-    base_query = db.query(Transaction).filter(Transaction.property_id == property_id)
-    
-    # Déterminer si on doit joindre avec EnrichedTransaction
-    needs_join = (
-        (sort_by and sort_by in ["level_1", "level_2", "level_3"]) or
-        filter_level_1 or filter_level_2 or filter_level_3 or
-        unclassified_only
-    )
-    
-    if needs_join:
-        query = base_query.outerjoin(EnrichedTransaction, Transaction.id == EnrichedTransaction.transaction_id)
-    else:
-        query = base_query
+    # Requête unique : transactions + classification (jointure externe 1-1), colonnes projetées
+    query = query_transactions_with_classification(db).filter(Transaction.property_id == property_id)
     
     # Filtre pour transactions non classées (level_1/2/3 = NULL)
     if unclassified_only:
-        if not needs_join:
-            query = query.outerjoin(EnrichedTransaction, Transaction.id == EnrichedTransaction.transaction_id)
         # Filtrer les transactions où level_1 est NULL (ou EnrichedTransaction n'existe pas)
         query = query.filter(
             or_(
@@ -127,8 +130,6 @@ async def get_transactions(
         query = query.filter(func.lower(Transaction.nom).contains(func.lower(filter_nom)))
     
     if filter_level_1:
-        if not needs_join:
-            query = query.outerjoin(EnrichedTransaction, Transaction.id == EnrichedTransaction.transaction_id)
         filter_normalized = filter_level_1.lower().strip()
         # Détecter "unassigned" ou préfixe de "unassigned" (ex: "un", "una", "unas")
         if filter_normalized == "unassigned":
@@ -145,8 +146,6 @@ async def get_transactions(
             query = query.filter(func.lower(EnrichedTransaction.level_1).contains(func.lower(filter_level_1)))
     
     if filter_level_2:
-        if not needs_join:
-            query = query.outerjoin(EnrichedTransaction, Transaction.id == EnrichedTransaction.transaction_id)
         filter_normalized = filter_level_2.lower().strip()
         # Détecter "unassigned" ou préfixe de "unassigned" (ex: "un", "una", "unas")
         if filter_normalized == "unassigned":
@@ -163,8 +162,6 @@ async def get_transactions(
             query = query.filter(func.lower(EnrichedTransaction.level_2).contains(func.lower(filter_level_2)))
     
     if filter_level_3:
-        if not needs_join:
-            query = query.outerjoin(EnrichedTransaction, Transaction.id == EnrichedTransaction.transaction_id)
         filter_normalized = filter_level_3.lower().strip()
         # Détecter "unassigned" ou préfixe de "unassigned" (ex: "un", "una", "unas")
         if filter_normalized == "unassigned":
@@ -192,90 +189,47 @@ async def get_transactions(
     if filter_solde_max is not None:
         query = query.filter(Transaction.solde <= filter_solde_max)
     
-    # Compter le total (avant tri)
-    total = query.count()
+    # Compter le total (avant tri) : toujours en pagination par offset, sur demande en mode curseur
+    if include_total is None:
+        include_total = cursor is None
+    total = query.count() if include_total else None
     
-    # Tri
-    if sort_by:
-        # Normaliser la direction
-        sort_dir = sort_direction.lower() if sort_direction else "desc"
-        if sort_dir not in ["asc", "desc"]:
-            sort_dir = "desc"
-        
-        # Déterminer la colonne de tri
-        if sort_by == "date":
-            order_col = Transaction.date
-        elif sort_by == "quantite":
-            order_col = Transaction.quantite
-        elif sort_by == "nom":
-            order_col = Transaction.nom
-        elif sort_by == "solde":
-            order_col = Transaction.solde
-        elif sort_by == "level_1":
-            if not needs_join:
-                query = query.outerjoin(EnrichedTransaction, Transaction.id == EnrichedTransaction.transaction_id)
-            order_col = EnrichedTransaction.level_1
-        elif sort_by == "level_2":
-            if not needs_join:
-                query = query.outerjoin(EnrichedTransaction, Transaction.id == EnrichedTransaction.transaction_id)
-            order_col = EnrichedTransaction.level_2
-        elif sort_by == "level_3":
-            if not needs_join:
-                query = query.outerjoin(EnrichedTransaction, Transaction.id == EnrichedTransaction.transaction_id)
-            order_col = EnrichedTransaction.level_3
-        else:
-            # Par défaut, trier par date desc
-            order_col = Transaction.date
-            sort_dir = "desc"
-        
-        # Appliquer le tri
-        if sort_dir == "asc":
-            query = query.order_by(asc(order_col))
-        else:
-            query = query.order_by(desc(order_col))
-    else:
-        # Par défaut, trier par date desc
-        query = query.order_by(desc(Transaction.date))
+    # Tri (colonne demandée puis Transaction.id pour un ordre stable)
+    sort_key, sort_dir = resolve_transaction_sort(sort_by, sort_direction)
+    query = apply_transaction_sort(query, sort_key, sort_dir)
     
     # Pagination
-    transactions = query.offset(skip).limit(limit).all()
+    if cursor is None:
+        rows = query.offset(skip).limit(limit).all()
+        next_cursor = None
+    else:
+        # Curseur vide = première page ; sinon reprise après la dernière ligne renvoyée
+        if cursor:
+            try:
+                cursor_value, cursor_id = decode_transaction_cursor(cursor, sort_key, sort_dir)
+            except ValueError as e:
+                raise HTTPException(status_code=400, detail=str(e))
+            query = apply_transaction_cursor(query, sort_key, sort_dir, cursor_value, cursor_id)
+        # Une ligne de plus pour savoir s'il reste une page
+        rows = query.limit(limit + 1).all()
+        next_cursor = encode_transaction_cursor(sort_key, sort_dir, rows[limit - 1]) if len(rows) > limit else None
+        rows = rows[:limit]
     
-    logger.info(f"[Transactions] Retourné {len(transactions)} transactions pour property_id={property_id} (total={total})")
+    logger.info(f"[Transactions] Retourné {len(rows)} transactions pour property_id={property_id} (total={total})")
     
-    # Récupérer les données enrichies pour chaque transaction
-    transaction_responses = []
-    for t in transactions:
-        # Récupérer les données enrichies
-        enriched = db.query(EnrichedTransaction).filter(
-            EnrichedTransaction.transaction_id == t.id
-        ).first()
-        
-        # Créer la réponse avec les données enrichies
-        transaction_dict = {
-            "id": t.id,
-            "date": t.date,
-            "quantite": t.quantite,
-            "nom": t.nom,
-            "solde": t.solde,
-            "source_file": t.source_file,
-            "created_at": t.created_at,
-            "updated_at": t.updated_at,
-            "level_1": enriched.level_1 if enriched else None,
-            "level_2": enriched.level_2 if enriched else None,
-            "level_3": enriched.level_3 if enriched else None,
-        }
-        transaction_responses.append(TransactionResponse(**transaction_dict))
+    transaction_responses = rows_to_transaction_responses(rows)
     
     return TransactionListResponse(
         transactions=transaction_responses,
         total=total,
         page=(skip // limit) + 1,
-        page_size=limit
+        page_size=limit,
+        next_cursor=next_cursor
     )
 
 
 @router.get("/transactions/unique-values")
-async def get_transaction_unique_values(
+def get_transaction_unique_values(
     property_id: int = Query(..., description="ID de la propriété (obligatoire)"),
     column: str = Query(..., description="Nom de la colonne (nom, level_1, level_2, level_3)"),
     start_date: Optional[date] = Query(None, description="Date de début (filtre optionnel)"),
@@ -383,7 +337,7 @@ async def get_transaction_unique_values(
 
 
 @router.get("/transactions/imports", response_model=List[FileImportHistory])
-async def get_imports_history(
+def get_imports_history(
     property_id: int = Query(..., description="ID de la propriété (obligatoire)"),
     db: Session = Depends(get_db)
 ):
@@ -412,7 +366,7 @@ async def get_imports_history(
 
 
 @router.delete("/transactions/imports", status_code=204)
-async def delete_all_imports(
+def delete_all_imports(
     property_id: int = Query(..., description="ID de la propriété (obligatoire)"),
     db: Session = Depends(get_db)
 ):
@@ -440,7 +394,7 @@ async def delete_all_imports(
 
 
 @router.get("/transactions/sum-by-level1")
-async def get_transaction_sum_by_level1(
+def get_transaction_sum_by_level1(
     property_id: int = Query(..., description="ID de la propriété (obligatoire)"),
     level_1: str = Query(..., description="Valeur de level_1 à filtrer"),
     end_date: Optional[date] = Query(None, description="Date de fin (filtre optionnel, cumul jusqu'à cette date)"),
@@ -463,19 +417,8 @@ async def get_transaction_sum_by_level1(
     # Valider property_id
     validate_property_id(db, property_id, "Transactions")
     
-    query = db.query(
-        func.sum(Transaction.quantite)
-    ).join(
-        EnrichedTransaction, Transaction.id == EnrichedTransaction.transaction_id
-    ).filter(
-        Transaction.property_id == property_id,
-        EnrichedTransaction.level_1 == level_1
-    )
-    
-    if end_date:
-        query = query.filter(Transaction.date <= end_date)
-    
-    total = query.scalar()
+    # Lecture dans la table de faits (mois de end_date lu dans les transactions)
+    total = sum_level_1(db, property_id, level_1, end_date)
     
     return {
         "level_1": level_1,
@@ -485,7 +428,7 @@ async def get_transaction_sum_by_level1(
 
 
 @router.get("/transactions/export")
-async def export_transactions(
+def export_transactions(
     property_id: int = Query(..., description="ID de la propriété (obligatoire)"),
     format: str = Query("excel", description="Format d'export: 'excel' ou 'csv'"),
     start_date: Optional[date] = Query(None, description="Date de début (filtre)"),
@@ -494,7 +437,7 @@ async def export_transactions(
     filter_level_2: Optional[str] = Query(None, description="Filtre sur level_2"),
     filter_level_3: Optional[str] = Query(None, description="Filtre sur level_3"),
     filter_nom: Optional[str] = Query(None, description="Filtre sur le nom (contient, insensible à la casse)"),
-    db: Session = Depends(get_db)
+    db: Session = Depends(get_read_db)
 ):
     """
     Exporter les transactions au format Excel ou CSV.
@@ -519,9 +462,7 @@ async def export_transactions(
     validate_property_id(db, property_id, "Transactions")
     
     # Construire la requête avec les mêmes filtres que GET /api/transactions - FILTRER PAR PROPERTY_ID
-    query = db.query(Transaction).filter(Transaction.property_id == property_id).outerjoin(
-        EnrichedTransaction, Transaction.id == EnrichedTransaction.transaction_id
-    )
+    query = query_transactions_with_classification(db).filter(Transaction.property_id == property_id)
     
     # Appliquer les filtres
     if start_date:
@@ -546,23 +487,18 @@ async def export_transactions(
     if not transactions:
         raise HTTPException(status_code=404, detail="Aucune transaction à exporter")
     
-    # Préparer les données pour le DataFrame
+    # Préparer les données pour le DataFrame (classification déjà jointe dans la requête)
     data = []
     for transaction in transactions:
-        # Récupérer les données enrichies
-        enriched = db.query(EnrichedTransaction).filter(
-            EnrichedTransaction.transaction_id == transaction.id
-        ).first()
-        
         data.append({
             'id': transaction.id,
             'date': transaction.date.strftime('%Y-%m-%d') if transaction.date else '',
             'quantite': transaction.quantite,
             'nom': transaction.nom,
             'solde': transaction.solde,
-            'level_1': enriched.level_1 if enriched else '',
-            'level_2': enriched.level_2 if enriched else '',
-            'level_3': enriched.level_3 if enriched else '',
+            'level_1': transaction.level_1 or '',
+            'level_2': transaction.level_2 or '',
+            'level_3': transaction.level_3 or '',
             'source_file': transaction.source_file or '',
             'created_at': transaction.created_at.strftime('%Y-%m-%d %H:%M:%S') if transaction.created_at else '',
             'updated_at': transaction.updated_at.strftime('%Y-%m-%d %H:%M:%S') if transaction.updated_at else ''
@@ -616,7 +552,7 @@ async def export_transactions(
 
 
 @router.get("/transactions/{transaction_id}", response_model=TransactionResponse)
-async def get_transaction(
+def get_transaction(
     transaction_id: int,
     property_id: int = Query(..., description="ID de la propriété (obligatoire)"),
     db: Session = Depends(get_db)
@@ -661,7 +597,7 @@ async def get_transaction(
 
 
 @router.post("/transactions", response_model=TransactionResponse, status_code=201)
-async def create_transaction(
+def create_transaction(
     transaction: TransactionCreate,
     db: Session = Depends(get_db)
 ):
@@ -716,7 +652,7 @@ async def create_transaction(
     
     # Recalculer les soldes à partir de la date de la transaction
     try:
-        recalculate_balances_from_date(db, db_transaction.date, transaction.property_id)
+        recalculate_balances_from_date(db, db_transaction.date, transaction.property_id, db_transaction.id)
     except Exception as e:
         import traceback
         error_details = traceback.format_exc()
@@ -744,7 +680,7 @@ async def create_transaction(
 
 
 @router.put("/transactions/{transaction_id}", response_model=TransactionResponse)
-async def update_transaction(
+def update_transaction(
     transaction_id: int,
     transaction_update: TransactionUpdate,
     property_id: int = Query(..., description="ID de la propriété (obligatoire)"),
@@ -858,7 +794,7 @@ async def update_transaction(
 
 
 @router.delete("/transactions/{transaction_id}", status_code=204)
-async def delete_transaction(
+def delete_transaction(
     transaction_id: int,
     property_id: int = Query(..., description="ID de la propriété (obligatoire)"),
     db: Session = Depends(get_db)
@@ -905,7 +841,7 @@ async def delete_transaction(
     db.commit()
     
     # Recalculer les soldes des transactions suivantes
-    recalculate_balances_from_date(db, transaction_date, property_id)
+    recalculate_balances_from_date(db, transaction_date, property_id, transaction_id)
     
     # Invalider le bilan pour l'année de la transaction supprimée
     try:
@@ -922,7 +858,7 @@ async def delete_transaction(
 # File upload endpoints
 
 @router.post("/transactions/preview", response_model=FilePreviewResponse)
-async def preview_file(
+def preview_file(
     file: UploadFile = File(...),
     db: Session = Depends(get_db)
 ):
@@ -933,7 +869,7 @@ async def preview_file(
     - Retourne: Preview, mapping proposé, statistiques
     """
     # Lire le fichier
-    file_content = await file.read()
+    file_content = file.file.read()
     
     try:
         # Lire CSV avec détection automatique
@@ -986,11 +922,109 @@ async def preview_file(
         raise HTTPException(status_code=400, detail=f"Erreur lors de l'analyse du fichier: {str(e)}")
 
 
+def _finalize_import(
+    db: Session,
+    property_id: int,
+    filename: str,
+    existing_import: Optional[FileImport],
+    warning_message: Optional[str],
+    inserted_ids: List[int],
+    imported_count: int,
+    duplicates_count: int,
+    errors_count: int,
+    duplicates_list: List[DuplicateTransaction],
+    errors_list: List[TransactionError],
+    period_start: Optional[date],
+    period_end: Optional[date]
+) -> FileImportResponse:
+    """
+    Termine un import (classique ou en flux) une fois les transactions insérées (flush) :
+    recalcul des soldes, enrichissement, amortissements, historique FileImport et invalidations.
+    """
+    # Recalculer les soldes après insertion
+    # Si on a inséré des transactions, on doit recalculer depuis la date minimale
+    # pour gérer le cas où des transactions sont insérées à des dates antérieures
+    if inserted_ids:
+        from backend.api.utils.balance_utils import recalculate_balances_from_date
+        # Seules les transactions à partir de la plus ancienne date importée sont relues,
+        # et seuls les soldes modifiés sont réécrits
+        recalculate_balances_from_date(db, period_start, property_id)
+        
+        # Enrichir automatiquement toutes les transactions insérées (moteur en masse)
+        from backend.api.services.amortization_service import recalculate_transaction_amortization
+        bulk_enrich_transactions(db, property_id=property_id, transaction_ids=inserted_ids)
+        for transaction_id in inserted_ids:
+            # Recalculer les amortissements après enrichissement
+            # (gestion silencieuse des erreurs pour ne pas bloquer l'import)
+            try:
+                recalculate_transaction_amortization(db, transaction_id)
+            except Exception as e:
+                # Log l'erreur mais ne bloque pas l'import
+                import traceback
+                error_details = traceback.format_exc()
+                print(f"⚠️ [import_file] Erreur lors du recalcul des amortissements pour transaction {transaction_id}: {error_details}")
+    
+    db.commit()
+    
+    # Créer ou mettre à jour l'enregistrement FileImport
+    if existing_import:
+        # Mettre à jour l'enregistrement existant
+        existing_import.imported_at = datetime.utcnow()
+        existing_import.imported_count = imported_count
+        existing_import.duplicates_count = duplicates_count
+        existing_import.errors_count = errors_count
+        existing_import.period_start = period_start
+        existing_import.period_end = period_end
+        db.commit()
+    else:
+        # Créer un nouvel enregistrement avec property_id
+        file_import = FileImport(
+            property_id=property_id,
+            filename=filename,
+            imported_count=imported_count,
+            duplicates_count=duplicates_count,
+            errors_count=errors_count,
+            period_start=period_start,
+            period_end=period_end
+        )
+        db.add(file_import)
+        db.commit()
+    
+    message = f"Import terminé: {imported_count} transactions importées, {duplicates_count} doublons détectés"
+    if warning_message:
+        message = f"{warning_message} {message}"
+    
+    logger.info(f"[Transactions] Import terminé: {imported_count} transactions créées pour property_id={property_id}")
+    
+    # Invalider les comptes de résultat pour toutes les années des transactions importées
+    if period_start and period_end:
+        try:
+            from backend.api.services.compte_resultat_service import invalidate_compte_resultat_for_date_range
+            invalidate_compte_resultat_for_date_range(db, period_start, period_end, property_id)
+        except Exception as e:
+            import traceback
+            error_details = traceback.format_exc()
+            print(f"⚠️ [import_file] Erreur lors de l'invalidation des comptes de résultat: {error_details}")
+    
+    return FileImportResponse(
+        filename=filename,
+        imported_count=imported_count,
+        duplicates_count=duplicates_count,
+        errors_count=errors_count,
+        duplicates=duplicates_list[:50],  # Limiter à 50 doublons pour la réponse
+        errors=errors_list[:100],  # Limiter à 100 erreurs pour la réponse
+        period_start=period_start.strftime('%d/%m/%Y') if period_start else None,
+        period_end=period_end.strftime('%d/%m/%Y') if period_end else None,
+        message=message
+    )
+
+
 @router.post("/transactions/import", response_model=FileImportResponse)
-async def import_file(
+def import_file(
     property_id: int = Form(..., description="ID de la propriété (obligatoire)"),
     file: UploadFile = File(...),
     mapping: str = Form(..., description="Mapping JSON string"),
+    streaming: bool = Form(False, description="Import en flux par blocs (fichiers volumineux)"),
     db: Session = Depends(get_db)
 ):
     """
@@ -999,6 +1033,7 @@ async def import_file(
     - **property_id**: ID de la propriété (obligatoire)
     - **file**: Fichier CSV à importer
     - **mapping**: Mapping des colonnes (JSON string)
+    - **streaming**: Si True, le fichier est lu, validé et inséré par blocs (mémoire constante)
     - Retourne: Statistiques d'import (imported, duplicates, errors)
     """
     import json
@@ -1024,13 +1059,45 @@ async def import_file(
         if existing_import:
             warning_message = f"⚠️ Le fichier {filename} a déjà été chargé le {existing_import.imported_at.strftime('%d/%m/%Y %H:%M')} pour cette propriété. Le traitement continue, les doublons seront détectés."
         
-        # Lire le fichier
-        file_content = await file.read()
-        
         # Sauvegarder le fichier dans data/input/trades/
         trades_dir = Path(__file__).parent.parent.parent / "data" / "input" / "trades"
         trades_dir.mkdir(parents=True, exist_ok=True)
         file_path = trades_dir / filename
+        
+        if streaming:
+            # Copier l'upload sur disque par blocs, puis l'importer bloc par bloc
+            with open(file_path, 'wb') as f:
+                while True:
+                    block = file.file.read(1024 * 1024)
+                    if not block:
+                        break
+                    f.write(block)
+            
+            # Avancement par bloc : journalisé uniquement (les insertions restent dans la transaction
+            # de la requête jusqu'au commit, une autre session ne peut pas écrire l'avancement en base)
+            try:
+                stats = stream_import_transactions(db, str(file_path), filename, property_id, column_mapping)
+            except ValueError as e:
+                raise HTTPException(status_code=400, detail=str(e))
+            
+            return _finalize_import(
+                db,
+                property_id=property_id,
+                filename=filename,
+                existing_import=existing_import,
+                warning_message=warning_message,
+                inserted_ids=stats["inserted_ids"],
+                imported_count=stats["imported_count"],
+                duplicates_count=stats["duplicates_count"],
+                errors_count=stats["errors_count"],
+                duplicates_list=[DuplicateTransaction(**duplicate) for duplicate in stats["duplicates"]],
+                errors_list=[TransactionError(**error) for error in stats["errors"]],
+                period_start=stats["period_start"],
+                period_end=stats["period_end"]
+            )
+        
+        # Lire le fichier
+        file_content = file.file.read()
         with open(file_path, 'wb') as f:
             f.write(file_content)
         
@@ -1050,53 +1117,12 @@ async def import_file(
             # Extraire la colonne de base (ex: "Col5_combined" → "Col5")
             base_col = nom_col.replace('_combined', '')
             
-            # Chercher les colonnes non mappées qui pourraient être combinées
-            # On cherche les colonnes qui ne sont pas déjà mappées et qui contiennent du texte
-            other_text_cols = []
-            for col in df.columns:
-                if col not in column_mapping.keys() and col != base_col:
-                    col_data = df[col].astype(str)
-                    non_empty = col_data[col_data.str.strip() != '']
-                    if len(non_empty) > len(df) * 0.1:  # Au moins 10% de valeurs non vides
-                        # Vérifier que ce n'est pas une date ou un nombre
-                        is_text = True
-                        sample_size = min(10, len(non_empty))
-                        for val in non_empty.head(sample_size):
-                            val_str = str(val).strip()
-                            if len(val_str) > 2:
-                                try:
-                                    # Utiliser l'import global datetime
-                                    datetime.strptime(val_str, '%d/%m/%Y')
-                                    is_text = False
-                                    break
-                                except:
-                                    pass
-                                try:
-                                    float(val_str.replace(',', '.').replace(' ', ''))
-                                    is_text = False
-                                    break
-                                except:
-                                    pass
-                        if is_text:
-                            other_text_cols.append(col)
+            # Chercher une colonne non mappée contenant du texte à combiner
+            best_other_col = find_name_combination_column(df, column_mapping, base_col)
             
             # Si on trouve une autre colonne et que la colonne de base existe, les combiner
-            if other_text_cols and base_col in df.columns:
-                best_other_col = other_text_cols[0]
-                def combine_cols(row):
-                    val1 = str(row[base_col]) if pd.notna(row[base_col]) else ''
-                    val2 = str(row[best_other_col]) if pd.notna(row[best_other_col]) else ''
-                    val1 = val1.strip()
-                    val2 = val2.strip()
-                    if val1.lower() == 'none':
-                        val1 = ''
-                    if val2.lower() == 'none':
-                        val2 = ''
-                    if val1 and val2:
-                        return (val1 + ' ' + val2).strip()
-                    return val1 or val2
-                
-                df[nom_col] = df.apply(combine_cols, axis=1)
+            if best_other_col and base_col in df.columns:
+                df[nom_col] = combine_name_columns(df, base_col, best_other_col)
             elif base_col in df.columns:
                 # Si on ne trouve pas d'autre colonne, utiliser juste la colonne de base
                 df[nom_col] = df[base_col].astype(str).str.strip()
@@ -1157,6 +1183,13 @@ async def import_file(
         # Liste des transactions à insérer (pour calculer le solde en une fois)
         transactions_to_insert = []
         
+        # Index des transactions existantes de la propriété sur la plage de dates du fichier
+        # (détection des doublons en O(1) par ligne, sans requête)
+        duplicate_index = TransactionDuplicateIndex(db, property_id)
+        valid_dates = df_validated['_date_parsed'].dropna()
+        if len(valid_dates):
+            duplicate_index.load_range(valid_dates.min().date(), valid_dates.max().date())
+        
         for idx, row in df_validated.iterrows():
             try:
                 # Numéro de ligne dans le fichier original
@@ -1204,44 +1237,36 @@ async def import_file(
                 # car le nom généré changera à chaque import
                 if not nom_value:
                     # Vérifier doublon sur (Date + Quantité) uniquement pour les transactions sans nom
-                    existing_no_nom = db.query(Transaction).filter(
-                        Transaction.date == date_value,
-                        Transaction.quantite == quantite_value
-                    ).first()
+                    existing_no_nom = duplicate_index.find_without_nom(date_value, quantite_value)
                     
                     if existing_no_nom:
                         # C'est un doublon, utiliser le nom existant pour l'affichage
+                        existing_id, existing_nom = existing_no_nom
                         duplicates_count += 1
                         duplicates_list.append(DuplicateTransaction(
                             date=date_value.strftime('%d/%m/%Y'),
                             quantite=quantite_value,
-                            nom=existing_no_nom.nom,  # Utiliser le nom existant (peut être modifié)
-                            existing_id=existing_no_nom.id
+                            nom=existing_nom,  # Utiliser le nom existant (peut être modifié)
+                            existing_id=existing_id
                         ))
                         continue
                     
                     # Pas de doublon, générer automatiquement un nom "nom_a_justifier_N"
-                    existing_justify_count = db.query(Transaction).filter(
-                        Transaction.nom.like('nom_a_justifier_%')
-                    ).count()
-                    nom_value = f"nom_a_justifier_{existing_justify_count + 1}"
+                    # (compteur initialisé une seule fois puis incrémenté pour chaque ligne sans nom)
+                    nom_value = duplicate_index.next_generated_name()
                     is_nom_generated = True
                 
                 # Vérifier doublon (Date + Quantité + nom) pour les transactions avec nom
                 if not is_nom_generated:
-                    existing = db.query(Transaction).filter(
-                        Transaction.date == date_value,
-                        Transaction.quantite == quantite_value,
-                        Transaction.nom == nom_value
-                    ).first()
+                    existing_id = duplicate_index.find(date_value, quantite_value, nom_value)
                     
-                    if existing:
+                    if existing_id:
                         duplicates_count += 1
                         duplicates_list.append(DuplicateTransaction(
                             date=date_value.strftime('%d/%m/%Y'),
                             quantite=quantite_value,
                             nom=nom_value,
-                            existing_id=existing.id
+                            existing_id=existing_id
                         ))
                         continue
                 
@@ -1303,89 +1328,20 @@ async def import_file(
             db.add(transaction)
         db.flush()  # Flush pour obtenir les IDs sans commit
         
-        # Recalculer tous les soldes après insertion
-        # Si on a inséré des transactions, on doit recalculer depuis la date minimale
-        # pour gérer le cas où des transactions sont insérées à des dates antérieures
-        if transactions_to_insert:
-            from backend.api.utils.balance_utils import recalculate_all_balances
-            # Trouver la date minimale des transactions insérées
-            min_inserted_date = min(t.date for t in transactions_to_insert)
-            # Recalculer tous les soldes depuis le début pour garantir la cohérence
-            # (plus simple et plus sûr que de recalculer depuis une date spécifique)
-            recalculate_all_balances(db, property_id)
-            
-            # Enrichir automatiquement toutes les transactions insérées
-            # Charger les mappings de cette propriété une seule fois pour optimiser
-            from backend.database.models import Mapping
-            from backend.api.services.amortization_service import recalculate_transaction_amortization
-            property_mappings = db.query(Mapping).filter(Mapping.property_id == property_id).all()
-            for transaction in transactions_to_insert:
-                # Enrichir la transaction (elle a déjà un ID après flush)
-                # enrich_transaction filtrera automatiquement les mappings par property_id
-                enrich_transaction(transaction, db, property_mappings)
-                
-                # Recalculer les amortissements après enrichissement
-                # (gestion silencieuse des erreurs pour ne pas bloquer l'import)
-                try:
-                    recalculate_transaction_amortization(db, transaction.id)
-                except Exception as e:
-                    # Log l'erreur mais ne bloque pas l'import
-                    import traceback
-                    error_details = traceback.format_exc()
-                    print(f"⚠️ [import_file] Erreur lors du recalcul des amortissements pour transaction {transaction.id}: {error_details}")
-        
-        db.commit()
-        
-        # Créer ou mettre à jour l'enregistrement FileImport
-        if existing_import:
-            # Mettre à jour l'enregistrement existant
-            existing_import.imported_at = datetime.utcnow()
-            existing_import.imported_count = imported_count
-            existing_import.duplicates_count = duplicates_count
-            existing_import.errors_count = errors_count
-            existing_import.period_start = period_start
-            existing_import.period_end = period_end
-            db.commit()
-        else:
-            # Créer un nouvel enregistrement avec property_id
-            file_import = FileImport(
-                property_id=property_id,
-                filename=filename,
-                imported_count=imported_count,
-                duplicates_count=duplicates_count,
-                errors_count=errors_count,
-                period_start=period_start,
-                period_end=period_end
-            )
-            db.add(file_import)
-            db.commit()
-        
-        message = f"Import terminé: {imported_count} transactions importées, {duplicates_count} doublons détectés"
-        if warning_message:
-            message = f"{warning_message} {message}"
-        
-        logger.info(f"[Transactions] Import terminé: {imported_count} transactions créées pour property_id={property_id}")
-        
-        # Invalider les comptes de résultat pour toutes les années des transactions importées
-        if period_start and period_end:
-            try:
-                from backend.api.services.compte_resultat_service import invalidate_compte_resultat_for_date_range
-                invalidate_compte_resultat_for_date_range(db, period_start, period_end)
-            except Exception as e:
-                import traceback
-                error_details = traceback.format_exc()
-                print(f"⚠️ [import_file] Erreur lors de l'invalidation des comptes de résultat: {error_details}")
-        
-        return FileImportResponse(
+        return _finalize_import(
+            db,
+            property_id=property_id,
             filename=filename,
+            existing_import=existing_import,
+            warning_message=warning_message,
+            inserted_ids=[t.id for t in transactions_to_insert],
             imported_count=imported_count,
             duplicates_count=duplicates_count,
             errors_count=errors_count,
-            duplicates=duplicates_list[:50],  # Limiter à 50 doublons pour la réponse
-            errors=errors_list[:100],  # Limiter à 100 erreurs pour la réponse
-            period_start=period_start.strftime('%d/%m/%Y') if period_start else None,
-            period_end=period_end.strftime('%d/%m/%Y') if period_end else None,
-            message=message
+            duplicates_list=duplicates_list,
+            errors_list=errors_list,
+            period_start=period_start,
+            period_end=period_end
         )
         
     except HTTPException:
@@ -7,14 +7,16 @@ Ce service implémente la logique de calcul des amortissements :
 - Convention 30/360 pour le calcul des jours
 - Répartition proportionnelle par année
 - Utilisation des AmortizationType pour le matching des transactions
+- Calcul vectorisé (NumPy) des échéanciers d'un lot de transactions
 """
 
 import json
 import logging
 from datetime import date, datetime
-from typing import List, Dict, Optional
+from typing import List, Dict, NamedTuple, Optional, Sequence
+import numpy as np
 from sqlalchemy.orm import Session
-from sqlalchemy import and_
+from sqlalchemy import and_, bindparam, delete, insert, select, update
 from dateutil.relativedelta import relativedelta
 
 from backend.database.models import (
@@ -23,6 +25,7 @@ from backend.database.models import (
     AmortizationType,
     AmortizationResult
 )
+from backend.api.services.compte_resultat_cache_service import invalidate_compte_resultat_cache
 
 logger = logging.getLogger(__name__)
 
@@ -129,127 +132,411 @@ def calculate_yearly_amounts(
     return yearly_amounts
 
 
-def recalculate_transaction_amortization(
+class AmortizationSchedule(NamedTuple):
+    """
+    Échéancier d'un lot de transactions (matrice transaction × année).
+
+    Attributes:
+        years: Années des colonnes (croissantes)
+        amounts: Montants par transaction et par année (négatifs, 0.0 hors échéancier)
+        mask: True si l'année fait partie de l'échéancier de la transaction
+    """
+    years: np.ndarray
+    amounts: np.ndarray
+    mask: np.ndarray
+
+    def yearly_amounts(self, index: int) -> Dict[int, float]:
+        """
+        Échéancier d'une transaction au format de calculate_yearly_amounts.
+
+        Args:
+            index: Position de la transaction dans le lot
+
+        Returns:
+            Dictionnaire {année: montant} avec montants négatifs
+        """
+        row_mask = self.mask[index]
+        return {
+            int(year): float(amount)
+            for year, amount in zip(self.years[row_mask], self.amounts[index][row_mask])
+        }
+
+
+def _is_leap_year(years: np.ndarray) -> np.ndarray:
+    return (years % 4 == 0) & ((years % 100 != 0) | (years % 400 == 0))
+
+
+def calculate_yearly_amounts_batch(
+    start_dates: Sequence[date],
+    total_amounts: Sequence[float],
+    durations: Sequence[float],
+    annual_amounts: Optional[Sequence[Optional[float]]] = None
+) -> AmortizationSchedule:
+    """
+    Calcule en une passe NumPy la répartition par année d'un lot d'amortissements.
+
+    Applique exactement la logique de calculate_yearly_amounts (prorata 30/360 la première
+    année, annuité les années complètes, prorata la dernière année puis ajustement du solde
+    au-delà de 0.01€) : chaque ligne est identique au calcul scalaire.
+
+    Args:
+        start_dates: Dates de début d'amortissement
+        total_amounts: Montants totaux à amortir (peuvent être négatifs)
+        durations: Durées d'amortissement en années
+        annual_amounts: Annuités (override, None ou 0 = montant / durée), optionnel
+
+    Returns:
+        AmortizationSchedule couvrant toutes les années du lot
+    """
+    count = len(start_dates)
+    if annual_amounts is None:
+        annual_amounts = [None] * count
+
+    start_year = np.fromiter((d.year for d in start_dates), dtype=np.int64, count=count)
+    start_month = np.fromiter((d.month for d in start_dates), dtype=np.int64, count=count)
+    start_day = np.fromiter((d.day for d in start_dates), dtype=np.int64, count=count)
+    total = np.abs(np.asarray(total_amounts, dtype=np.float64).reshape(count))
+    duration = np.asarray(durations, dtype=np.float64).reshape(count)
+    override = np.fromiter(
+        (np.nan if amount is None else amount for amount in annual_amounts),
+        dtype=np.float64,
+        count=count
+    )
+
+    valid = duration > 0
+    if not valid.any():
+        return AmortizationSchedule(
+            years=np.empty(0, dtype=np.int64),
+            amounts=np.zeros((count, 0)),
+            mask=np.zeros((count, 0), dtype=bool)
+        )
+
+    # Annuité : override (en valeur absolue) ou montant / durée
+    with np.errstate(divide="ignore", invalid="ignore"):
+        default_annuity = total / duration
+    use_default = np.isnan(override) | (override == 0)
+    annuity = np.where(valid, np.where(use_default, default_annuity, np.abs(override)), 0.0)
+    daily_amount = annuity / 360
+
+    # Date de fin exacte : start_date + int(duration) années (29/02 → 28/02 si non bissextile)
+    end_year = start_year + np.where(valid, np.trunc(np.where(valid, duration, 0)), 0).astype(np.int64)
+    end_month = start_month
+    end_day = np.where(
+        (start_month == 2) & (start_day == 29) & ~_is_leap_year(end_year),
+        28,
+        start_day
+    )
+
+    first_year = int(start_year[valid].min())
+    years = np.arange(first_year, int(end_year[valid].max()) + 1, dtype=np.int64)
+    rows = np.arange(count)
+    start_col = np.where(valid, start_year - first_year, 0)
+    end_col = np.where(valid, end_year - first_year, 0)
+
+    single = valid & (start_year == end_year)
+    multi = valid & ~single
+
+    # Années complètes (strictement entre la première et la dernière) : annuité exacte
+    grid = years[np.newaxis, :]
+    full_years = multi[:, np.newaxis] & (grid > start_year[:, np.newaxis]) & (grid < end_year[:, np.newaxis])
+    amounts = np.where(full_years, annuity[:, np.newaxis], 0.0)
+    mask = multi[:, np.newaxis] & (grid >= start_year[:, np.newaxis]) & (grid <= end_year[:, np.newaxis])
+
+    # Première année : du start_date au 31/12 ; dernière année : du 01/01 à la date de fin
+    first_year_days = (12 - start_month) * 30 + (31 - start_day)
+    last_year_days = (end_month - 1) * 30 + (end_day - 1)
+    multi_rows = rows[multi]
+    amounts[multi_rows, start_col[multi]] = (daily_amount * first_year_days)[multi]
+    amounts[multi_rows, end_col[multi]] = (daily_amount * last_year_days)[multi]
+
+    # Ajustement de la dernière année (somme cumulée dans l'ordre des années, comme sum())
+    difference = total - np.cumsum(amounts, axis=1)[:, -1]
+    adjust = multi & (np.abs(difference) > 0.01)
+    amounts[rows[adjust], end_col[adjust]] += difference[adjust]
+
+    # Cas spécial : tout dans une seule année
+    single_days = (end_year - start_year) * 360 + (end_month - start_month) * 30 + (end_day - start_day)
+    single = single & (single_days > 0)
+    amounts[rows[single], start_col[single]] = (daily_amount * single_days)[single]
+    mask[rows[single], start_col[single]] = True
+
+    return AmortizationSchedule(years=years, amounts=np.where(mask, -amounts, 0.0), mask=mask)
+
+
+def write_amortization_results(
+    db: Session,
+    property_id: int,
+    transaction_ids,
+    desired: Dict[int, Dict[int, tuple]]
+) -> Dict[str, int]:
+    """
+    Écrit les résultats d'amortissement par différence avec les lignes stockées.
+    
+    Seules les lignes qui changent sont écrites : insertion des années nouvelles, mise à jour
+    des montants / catégories modifiés, suppression des années disparues (et des doublons).
+    Le cache du compte de résultat n'est invalidé que pour les années réellement touchées.
+    Pas de commit (à la charge de l'appelant).
+    
+    Args:
+        db: Session de base de données
+        property_id: ID de la propriété des transactions
+        transaction_ids: IDs des transactions à synchroniser (liste ou sous-requête)
+        desired: Résultats attendus {transaction_id: {année: (catégorie, montant)}} ;
+            une transaction absente n'a plus de résultats
+    
+    Returns:
+        Dict avec results (lignes attendues), inserted, updated, deleted et touched
+    """
+    table = AmortizationResult.__table__
+    existing = db.execute(
+        select(table.c.id, table.c.transaction_id, table.c.year, table.c.category, table.c.amount)
+        .where(table.c.transaction_id.in_(transaction_ids))
+        .order_by(table.c.id)
+    ).all()
+    
+    now = datetime.utcnow()
+    stored = set()
+    to_delete = []
+    to_update = []
+    touched_years = set()
+    for row in existing:
+        key = (row.transaction_id, row.year)
+        target = desired.get(row.transaction_id, {}).get(row.year)
+        if target is None or key in stored:
+            # Année disparue de l'échéancier, ou doublon
+            to_delete.append(row.id)
+            touched_years.add(row.year)
+            continue
+        stored.add(key)
+        if (row.category, row.amount) != target:
+            to_update.append({"b_id": row.id, "category": target[0], "amount": target[1], "updated_at": now})
+            touched_years.add(row.year)
+    
+    to_insert = [
+        {
+            "transaction_id": transaction_id,
+            "property_id": property_id,
+            "year": year,
+            "category": category,
+            "amount": amount,
+            "created_at": now,
+            "updated_at": now,
+        }
+        for transaction_id, yearly in desired.items()
+        for year, (category, amount) in yearly.items()
+        if (transaction_id, year) not in stored
+    ]
+    touched_years.update(row["year"] for row in to_insert)
+    
+    for chunk_start in range(0, len(to_delete), 500):
+        db.execute(delete(table).where(table.c.id.in_(to_delete[chunk_start:chunk_start + 500])))
+    if to_update:
+        db.execute(
+            update(table).where(table.c.id == bindparam("b_id")).values(
+                category=bindparam("category"),
+                amount=bindparam("amount"),
+                updated_at=bindparam("updated_at")
+            ),
+            to_update
+        )
+    if to_insert:
+        db.execute(insert(table), to_insert)
+    if touched_years:
+        invalidate_compte_resultat_cache(db, property_id=property_id, years=touched_years)
+    
+    stats = {
+        "results": sum(len(yearly) for yearly in desired.values()),
+        "inserted": len(to_insert),
+        "updated": len(to_update),
+        "deleted": len(to_delete),
+    }
+    stats["touched"] = stats["inserted"] + stats["updated"] + stats["deleted"]
+    return stats
+
+
+def sync_transaction_amortization(
     db: Session,
     transaction_id: int
-) -> int:
+) -> Dict[str, int]:
     """
-    Recalcule les amortissements pour une transaction donnée.
+    Recalcule les amortissements d'une transaction et n'écrit que les lignes modifiées.
     
     Logique :
     1. Récupérer la transaction et son EnrichedTransaction
     2. Trouver le AmortizationType correspondant (level_2 + level_1)
-    3. Si type trouvé et duration > 0 :
-       - Calculer les montants par année
-       - Supprimer les anciens résultats
-       - Créer les nouveaux résultats
+    3. Si type trouvé et duration > 0 : calculer les montants par année
+    4. Écrire la différence avec les résultats stockés (write_amortization_results)
     
     Args:
         db: Session de base de données
         transaction_id: ID de la transaction
     
     Returns:
-        Nombre de résultats d'amortissement créés
+        Statistiques d'écriture (voir write_amortization_results)
     """
     # Récupérer la transaction
     transaction = db.query(Transaction).filter(Transaction.id == transaction_id).first()
     if not transaction:
-        return 0
+        return {"results": 0, "inserted": 0, "updated": 0, "deleted": 0, "touched": 0}
     
     # Récupérer l'enrichissement
     enriched = db.query(EnrichedTransaction).filter(
         EnrichedTransaction.transaction_id == transaction_id
     ).first()
     
-    if not enriched or not enriched.level_2 or not enriched.level_1:
-        # Pas d'enrichissement ou pas de level_2/level_1 → supprimer les résultats existants
-        db.query(AmortizationResult).filter(
-            AmortizationResult.transaction_id == transaction_id
-        ).delete()
-        db.commit()
-        return 0
+    desired = {}
+    if enriched and enriched.level_2 and enriched.level_1:
+        # Trouver le type d'amortissement correspondant (filtré par property_id de la transaction)
+        amortization_types = db.query(AmortizationType).filter(
+            AmortizationType.property_id == transaction.property_id,
+            AmortizationType.level_2_value == enriched.level_2
+        ).all()
+        matching_type = build_amortization_type_lookup(amortization_types).get((enriched.level_2, enriched.level_1))
+        
+        # Pas de type correspondant ou durée = 0 → pas de résultats
+        if matching_type and matching_type.duration > 0:
+            # Déterminer la date de début
+            start_date = matching_type.start_date if matching_type.start_date else transaction.date
+            
+            # Calculer les montants par année
+            yearly_amounts = calculate_yearly_amounts(
+                start_date=start_date,
+                total_amount=transaction.quantite,
+                duration=matching_type.duration,
+                annual_amount=matching_type.annual_amount
+            )
+            desired[transaction_id] = {
+                year: (matching_type.name, amount) for year, amount in yearly_amounts.items()
+            }
+    
+    stats = write_amortization_results(db, transaction.property_id, [transaction_id], desired)
+    db.commit()
+    return stats
+
+
+def recalculate_transaction_amortization(
+    db: Session,
+    transaction_id: int
+) -> int:
+    """
+    Recalcule les amortissements pour une transaction donnée.
     
-    # Trouver le type d'amortissement correspondant (filtré par property_id de la transaction)
-    amortization_types = db.query(AmortizationType).filter(
-        AmortizationType.property_id == transaction.property_id,
-        AmortizationType.level_2_value == enriched.level_2
-    ).all()
+    Args:
+        db: Session de base de données
+        transaction_id: ID de la transaction
     
-    matching_type = None
+    Returns:
+        Nombre de résultats d'amortissement de la transaction
+    """
+    return sync_transaction_amortization(db, transaction_id)["results"]
+
+
+def build_amortization_type_lookup(
+    amortization_types: List[AmortizationType]
+) -> Dict[tuple, AmortizationType]:
+    """
+    Construit la table de correspondance (level_2, level_1) → type d'amortissement.
+
+    Le premier type (dans l'ordre de la liste) qui contient un level_1 l'emporte.
+
+    Args:
+        amortization_types: Types d'amortissement d'une propriété
+
+    Returns:
+        Dictionnaire {(level_2, level_1): AmortizationType}
+    """
+    lookup = {}
     for atype in amortization_types:
-        level_1_values = json.loads(atype.level_1_values or "[]")
-        if enriched.level_1 in level_1_values:
-            matching_type = atype
-            break
-    
-    if not matching_type or matching_type.duration <= 0:
-        # Pas de type correspondant ou durée = 0 → supprimer les résultats existants
-        db.query(AmortizationResult).filter(
-            AmortizationResult.transaction_id == transaction_id
-        ).delete()
-        db.commit()
-        return 0
-    
-    # Déterminer la date de début
-    start_date = matching_type.start_date if matching_type.start_date else transaction.date
-    
-    # Calculer les montants par année
-    yearly_amounts = calculate_yearly_amounts(
-        start_date=start_date,
-        total_amount=transaction.quantite,
-        duration=matching_type.duration,
-        annual_amount=matching_type.annual_amount
-    )
-    
-    # Supprimer les anciens résultats
-    db.query(AmortizationResult).filter(
-        AmortizationResult.transaction_id == transaction_id
-    ).delete()
-    
-    # Créer les nouveaux résultats
-    created_count = 0
-    for year, amount in yearly_amounts.items():
-        result = AmortizationResult(
-            transaction_id=transaction_id,
-            year=year,
-            category=matching_type.name,
-            amount=amount
-        )
-        db.add(result)
-        created_count += 1
-    
-    db.commit()
-    return created_count
+        for level_1 in json.loads(atype.level_1_values or "[]"):
+            lookup.setdefault((atype.level_2_value, level_1), atype)
+    return lookup
 
 
-def recalculate_all_amortizations(db: Session, property_id: int) -> int:
+def sync_property_amortizations(db: Session, property_id: int) -> Dict[str, int]:
     """
-    Recalcule tous les amortissements pour toutes les transactions d'une propriété.
+    Recalcule tous les amortissements d'une propriété et n'écrit que les lignes modifiées.
+    
+    Logique (une seule transaction d'écriture) :
+    1. Charger les types une fois et construire la table (level_2, level_1) → type
+    2. Charger les transactions enrichies en une requête (jointure)
+    3. Calculer tous les échéanciers en lot (calculate_yearly_amounts_batch)
+    4. Écrire la différence avec les résultats stockés (write_amortization_results), un commit
     
     Args:
         db: Session de base de données
         property_id: ID de la propriété (obligatoire)
     
     Returns:
-        Nombre total de résultats d'amortissement créés
+        Statistiques d'écriture (voir write_amortization_results)
     """
     logger.info(f"[AmortizationService] Recalcul tous les amortissements pour property_id={property_id}")
     
+    amortization_types = db.query(AmortizationType).filter(
+        AmortizationType.property_id == property_id
+    ).order_by(AmortizationType.id).all()
+    type_lookup = build_amortization_type_lookup(amortization_types)
+    
     # Récupérer toutes les transactions avec enrichissement (filtrées par property_id)
-    transactions = db.query(Transaction).join(EnrichedTransaction).filter(
+    rows = db.query(
+        Transaction.id,
+        Transaction.date,
+        Transaction.quantite,
+        EnrichedTransaction.level_1,
+        EnrichedTransaction.level_2
+    ).join(
+        EnrichedTransaction, EnrichedTransaction.transaction_id == Transaction.id
+    ).filter(
         Transaction.property_id == property_id
     ).all()
     
-    total_created = 0
-    for transaction in transactions:
-        created = recalculate_transaction_amortization(db, transaction.id)
-        total_created += created
-        if created > 0:
-            logger.debug(f"[AmortizationService] Recalcul amortissement transaction {transaction.id} pour property_id={property_id}: {created} résultats créés")
+    # Transactions amortissables : type correspondant avec une durée > 0
+    matched = []
+    for row in rows:
+        if not row.level_2 or not row.level_1:
+            continue
+        atype = type_lookup.get((row.level_2, row.level_1))
+        if atype is not None and atype.duration > 0:
+            matched.append((row, atype))
+    
+    schedule = calculate_yearly_amounts_batch(
+        start_dates=[atype.start_date if atype.start_date else row.date for row, atype in matched],
+        total_amounts=[row.quantite for row, _ in matched],
+        durations=[atype.duration for _, atype in matched],
+        annual_amounts=[atype.annual_amount for _, atype in matched]
+    )
+    desired = {
+        row.id: {year: (atype.name, amount) for year, amount in schedule.yearly_amounts(index).items()}
+        for index, (row, atype) in enumerate(matched)
+    }
+    
+    # Synchroniser les résultats des transactions enrichies de la propriété
+    # (les transactions sans enrichissement gardent leurs résultats)
+    enriched_transaction_ids = select(Transaction.id).join(
+        EnrichedTransaction, EnrichedTransaction.transaction_id == Transaction.id
+    ).where(Transaction.property_id == property_id)
+    stats = write_amortization_results(db, property_id, enriched_transaction_ids, desired)
+    db.commit()
     
-    logger.info(f"[AmortizationService] Recalcul terminé pour property_id={property_id}: {total_created} résultats créés au total")
+    logger.info(
+        f"[AmortizationService] Recalcul terminé pour property_id={property_id}: {len(matched)} transactions amortissables, "
+        f"{stats['results']} résultats ({stats['inserted']} insérés, {stats['updated']} modifiés, {stats['deleted']} supprimés)"
+    )
     
-    return total_created
+    return stats
+
+
+def recalculate_all_amortizations(db: Session, property_id: int) -> int:
+    """
+    Recalcule tous les amortissements pour toutes les transactions d'une propriété.
+    
+    Args:
+        db: Session de base de données
+        property_id: ID de la propriété (obligatoire)
+    
+    Returns:
+        Nombre total de résultats d'amortissement de la propriété
+    """
+    return sync_property_amortizations(db, property_id)["results"]
 
 
 def validate_amortization_sum(
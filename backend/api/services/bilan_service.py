@@ -17,7 +17,7 @@ import logging
 from datetime import date
 from typing import List, Dict, Optional
 from sqlalchemy.orm import Session
-from sqlalchemy import and_, or_, func
+from sqlalchemy import and_, or_, func, extract
 
 from backend.database.models import (
     Transaction,
@@ -31,7 +31,8 @@ from backend.database.models import (
     CompteResultatData,
     CompteResultatOverride
 )
-from backend.api.services.compte_resultat_service import calculate_compte_resultat
+from backend.api.services.compte_resultat_service import calculate_compte_resultat, calculate_compte_resultat_range
+from backend.api.services.transaction_fact_service import get_level_1_totals
 
 logger = logging.getLogger(__name__)
 
@@ -250,11 +251,132 @@ def calculate_compte_bancaire(
     return last_transaction.solde if last_transaction.solde is not None else 0.0
 
 
+class CumulativeResults:
+    """
+    Résultats annuels d'une propriété et leur cumul (report à nouveau), construits une fois par requête.
+    
+    Le résultat d'une année est l'override saisi s'il existe, sinon le résultat net du compte de
+    résultat. Les années manquantes sont calculées en lot (calculate_compte_resultat_range), puis les
+    cumuls sont tenus sous forme de somme préfixe : report_a_nouveau(year) est une lecture O(1).
+    """
+    
+    def __init__(self, db: Session, property_id: int, years: Optional[List[int]] = None):
+        """
+        Args:
+            db: Session de base de données
+            property_id: ID de la propriété
+            years: Années dont le bilan sera demandé (précalculées en une fois, optionnel)
+        """
+        self.db = db
+        self.property_id = property_id
+        
+        # Première année avec des transactions (début du cumul)
+        first_transaction = db.query(func.min(Transaction.date)).filter(
+            Transaction.property_id == property_id
+        ).scalar()
+        if first_transaction is None:
+            self.first_year = None
+        else:
+            self.first_year = first_transaction.year if hasattr(first_transaction, 'year') else first_transaction
+        
+        self._results: Dict[int, float] = {}
+        # Somme préfixe : _cumul[y] = somme des résultats des années [first_year, y)
+        self._cumul: Dict[int, float] = {}
+        if years:
+            self.ensure(years)
+    
+    def ensure(self, years: List[int]) -> None:
+        """
+        Calculer en lot les résultats manquants nécessaires aux années demandées.
+        
+        Args:
+            years: Années dont le résultat et le report à nouveau seront lus
+        """
+        needed = set(years)
+        if self.first_year is not None and years:
+            needed.update(range(self.first_year, max(years)))
+        missing = sorted(needed - self._results.keys())
+        if not missing:
+            return
+        
+        logger.info(f"[BilanService] CumulativeResults - calcul de {len(missing)} année(s), property_id={self.property_id}")
+        overrides = dict(self.db.query(
+            CompteResultatOverride.year,
+            CompteResultatOverride.override_value
+        ).filter(
+            CompteResultatOverride.property_id == self.property_id,
+            CompteResultatOverride.year.in_(missing)
+        ).all())
+        to_calculate = [year for year in missing if year not in overrides]
+        computed = calculate_compte_resultat_range(self.db, to_calculate, self.property_id) if to_calculate else {}
+        
+        for year in missing:
+            if year in overrides:
+                self._results[year] = overrides[year]
+            else:
+                self._results[year] = computed[year].get("resultat_net", 0.0)
+        self._rebuild_cumul()
+    
+    def _rebuild_cumul(self) -> None:
+        """Recalculer la somme préfixe sur les années contiguës depuis first_year."""
+        self._cumul = {}
+        if self.first_year is None:
+            return
+        total = 0.0
+        year = self.first_year
+        while year in self._results:
+            self._cumul[year] = total
+            total += self._results[year]
+            year += 1
+        self._cumul[year] = total
+    
+    def invalidate(self, year: int) -> None:
+        """
+        Oublier le résultat d'une année (il sera recalculé à la prochaine lecture).
+        
+        Args:
+            year: Année dont les données ont changé
+        """
+        self._results.pop(year, None)
+        self._rebuild_cumul()
+    
+    def resultat_exercice(self, year: int) -> float:
+        """
+        Résultat de l'exercice (override appliqué).
+        
+        Args:
+            year: Année
+        
+        Returns:
+            Résultat de l'exercice (bénéfice positif, perte négative)
+        """
+        if year not in self._results:
+            self.ensure([year])
+        return self._results[year]
+    
+    def report_a_nouveau(self, year: int) -> float:
+        """
+        Cumul des résultats des années [first_year, year).
+        
+        Args:
+            year: Année
+        
+        Returns:
+            Report à nouveau (0 pour la première année ou sans transactions)
+        """
+        if self.first_year is None or year <= self.first_year:
+            return 0.0
+        if year not in self._cumul:
+            self.ensure([year])
+        return self._cumul[year]
+
+
 def calculate_resultat_exercice(
     db: Session,
     year: int,
     property_id: int,
-    compte_resultat_view_id: Optional[int] = None
+    compte_resultat_view_id: Optional[int] = None,
+    cumulative_results: Optional[CumulativeResults] = None
 ) -> float:
     """
     Calculer le résultat de l'exercice pour une année et une propriété.
@@ -268,12 +390,16 @@ def calculate_resultat_exercice(
         year: Année à calculer
         property_id: ID de la propriété
         compte_resultat_view_id: ID de la vue compte de résultat (optionnel, non utilisé pour l'instant)
+        cumulative_results: Résultats annuels déjà construits pour la requête (optionnel)
     
     Returns:
         Résultat de l'exercice (bénéfice positif, perte négative)
     """
     logger.info(f"[BilanService] calculate_resultat_exercice - year={year}, property_id={property_id}")
     
+    if cumulative_results is not None:
+        return cumulative_results.resultat_exercice(year)
+    
     # Chercher un override pour l'année et la propriété
     override = db.query(CompteResultatOverride).filter(
         and_(
@@ -293,7 +419,8 @@ def calculate_resultat_exercice(
 def calculate_report_a_nouveau(
     db: Session,
     year: int,
-    property_id: int
+    property_id: int,
+    cumulative_results: Optional[CumulativeResults] = None
 ) -> float:
     """
     Calculer le report à nouveau (cumul des résultats des années précédentes) pour une propriété.
@@ -306,54 +433,17 @@ def calculate_report_a_nouveau(
         db: Session de base de données
         year: Année à calculer
         property_id: ID de la propriété
+        cumulative_results: Résultats annuels déjà construits pour la requête (optionnel,
+            construits pour cette année sinon)
     
     Returns:
         Report à nouveau (cumul des résultats précédents)
     """
     logger.info(f"[BilanService] calculate_report_a_nouveau - year={year}, property_id={property_id}")
     
-    # Trouver la première année avec des transactions pour cette propriété
-    first_transaction = db.query(func.min(Transaction.date)).filter(
-        Transaction.property_id == property_id
-    ).scalar()
-    if not first_transaction:
-        return 0.0
-    
-    first_year = first_transaction.year if hasattr(first_transaction, 'year') else first_transaction
-    
-    if year <= first_year:
-        return 0.0
-    
-    # OPTIMISATION: Calculer tous les résultats en une seule fois au lieu de boucler
-    # Récupérer tous les overrides d'un coup pour cette propriété
-    overrides = db.query(CompteResultatOverride).filter(
-        and_(
-            CompteResultatOverride.property_id == property_id,
-            CompteResultatOverride.year >= first_year,
-            CompteResultatOverride.year < year
-        )
-    ).all()
-    override_dict = {o.year: o.override_value for o in overrides}
-    
-    # Calculer les années qui n'ont pas d'override
-    total = 0.0
-    years_to_calculate = []
-    for prev_year in range(first_year, year):
-        if prev_year in override_dict:
-            total += override_dict[prev_year]
-        else:
-            years_to_calculate.append(prev_year)
-    
-    # Calculer les années sans override en une seule fois si possible
-    if years_to_calculate:
-        # Pour chaque année, calculer le compte de résultat
-        # Note: On pourrait optimiser davantage en calculant toutes les années en une fois
-        # mais pour l'instant, on garde la logique simple
-        for prev_year in years_to_calculate:
-            compte_resultat = calculate_compte_resultat(db, prev_year, property_id=property_id)
-            total += compte_resultat.get("resultat_net", 0.0)
-    
-    return total
+    if cumulative_results is None:
+        cumulative_results = CumulativeResults(db, property_id, [year])
+    return cumulative_results.report_a_nouveau(year)
 
 
 def calculate_capital_restant_du(
@@ -457,12 +547,214 @@ def calculate_capital_restant_du(
     return max(0.0, remaining)
 
 
+# level_1 des transactions de crédit (montant emprunté) pour le capital restant dû
+LOAN_LEVEL_1 = "Dettes financières (emprunt bancaire)"
+
+
+def _cumulate(amounts_by_year: Dict[int, float], years: List[int]) -> Dict[int, float]:
+    """
+    Cumuler des montants annuels : pour chaque année demandée, somme des années <= année.
+    
+    Args:
+        amounts_by_year: Montants par année
+        years: Années demandées
+    
+    Returns:
+        Dictionnaire {année: cumul}
+    """
+    cumul = {}
+    total = 0.0
+    ordered = sorted(amounts_by_year.items())
+    index = 0
+    for year in sorted(set(years)):
+        while index < len(ordered) and ordered[index][0] <= year:
+            total += ordered[index][1] or 0.0
+            index += 1
+        cumul[year] = total
+    return cumul
+
+
+class BilanEvaluationPlan:
+    """
+    Entrées du bilan de toutes les années demandées, collectées en quelques requêtes groupées.
+    
+    Au lieu d'interroger la base par catégorie et par année, le plan charge une fois :
+    - les sommes par (level_1, année) des catégories normales (filtre level_3, table de faits), cumulées par année
+    - le solde de la dernière transaction de chaque année (compte bancaire)
+    - les amortissements par année, cumulés
+    - le crédit emprunté par année et le capital remboursé par (crédit, année), cumulés
+    - les résultats annuels et le report à nouveau (CumulativeResults)
+    
+    Seules les entrées utilisées par les mappings sont chargées. Toutes les catégories sont
+    ensuite évaluées en mémoire : le coût dépend du nombre d'années, pas années × catégories.
+    """
+    
+    def __init__(
+        self,
+        db: Session,
+        property_id: int,
+        years: List[int],
+        mappings: List[BilanMapping],
+        level_3_values: List[str],
+        cumulative_results: Optional[CumulativeResults] = None
+    ):
+        """
+        Args:
+            db: Session de base de données
+            property_id: ID de la propriété
+            years: Années dont le bilan sera calculé
+            mappings: Mappings du bilan de la propriété
+            level_3_values: Valeurs level_3 à considérer pour les catégories normales
+            cumulative_results: Résultats annuels déjà construits (optionnel, construits si nécessaire)
+        """
+        self.property_id = property_id
+        self.years = sorted(set(years))
+        logger.info(f"[BilanService] BilanEvaluationPlan - years={self.years}, property_id={property_id}")
+        
+        end_date = date(max(self.years), 12, 31) if self.years else None
+        special_sources = {m.special_source for m in mappings if m.is_special}
+        
+        # Catégories normales : category_name -> level_1 (mappings JSON invalides ignorés)
+        self.category_level_1: Dict[str, set] = {}
+        for mapping in mappings:
+            if mapping.is_special or not mapping.level_1_values:
+                continue
+            try:
+                self.category_level_1[mapping.category_name] = set(json.loads(mapping.level_1_values))
+            except (json.JSONDecodeError, TypeError):
+                continue
+        all_level_1_values = set().union(*self.category_level_1.values())
+        
+        # Sommes cumulées par level_1 (une requête sur la table de faits, groupée par level_1 et année)
+        self._level_1_cumul: Dict[str, Dict[int, float]] = {}
+        if end_date and all_level_1_values and level_3_values:
+            by_level_1 = {}
+            for year, level_1, total in get_level_1_totals(
+                db, property_id, end_year=end_date.year,
+                level_3_values=level_3_values, level_1_values=all_level_1_values
+            ):
+                by_level_1.setdefault(level_1, {})[year] = total
+            self._level_1_cumul = {
+                level_1: _cumulate(amounts, self.years) for level_1, amounts in by_level_1.items()
+            }
+        
+        # Compte bancaire : solde de la dernière transaction de chaque année
+        self._balances: Dict[int, float] = {}
+        if end_date and "transactions" in special_sources:
+            year_column = extract('year', Transaction.date)
+            ranked = db.query(
+                year_column.label("year"),
+                Transaction.solde.label("solde"),
+                func.row_number().over(
+                    partition_by=year_column,
+                    order_by=(Transaction.date.desc(), Transaction.id.desc())
+                ).label("rank")
+            ).filter(
+                Transaction.property_id == property_id,
+                Transaction.date <= end_date
+            ).subquery()
+            last_by_year = dict(db.query(ranked.c.year, ranked.c.solde).filter(ranked.c.rank == 1).all())
+            for year in self.years:
+                previous_years = [y for y in last_by_year if y <= year]
+                if previous_years:
+                    solde = last_by_year[max(previous_years)]
+                    self._balances[year] = solde if solde is not None else 0.0
+        
+        # Amortissements cumulés (property_id dénormalisé sur amortization_results)
+        self._amortizations: Dict[int, float] = {}
+        if end_date and special_sources & {"amortization_result", "amortizations"}:
+            self._amortizations = _cumulate(dict(db.query(
+                AmortizationResult.year,
+                func.sum(AmortizationResult.amount)
+            ).filter(
+                AmortizationResult.property_id == property_id,
+                AmortizationResult.year <= max(self.years)
+            ).group_by(AmortizationResult.year).all()), self.years)
+        
+        # Capital restant dû : crédit emprunté cumulé et capital remboursé cumulé par crédit
+        self._credit: Dict[int, float] = {}
+        self._capital_paid: Dict[str, Dict[int, float]] = {}
+        self._loans: List[tuple] = []
+        if end_date and "loan_payments" in special_sources:
+            self._credit = _cumulate({
+                year: total for year, _, total in get_level_1_totals(
+                    db, property_id, end_year=end_date.year, level_1_values=[LOAN_LEVEL_1]
+                )
+            }, self.years)
+            self._loans = db.query(LoanConfig.name, LoanConfig.loan_start_date).filter(
+                LoanConfig.property_id == property_id
+            ).all()
+            payment_year = extract('year', LoanPayment.date)
+            paid_by_loan = {}
+            for loan_name, year, capital in db.query(
+                LoanPayment.loan_name,
+                payment_year,
+                func.sum(LoanPayment.capital)
+            ).filter(
+                LoanPayment.property_id == property_id,
+                LoanPayment.date <= end_date
+            ).group_by(LoanPayment.loan_name, payment_year).all():
+                paid_by_loan.setdefault(loan_name, {})[year] = capital
+            self._capital_paid = {
+                loan_name: _cumulate(amounts, self.years) for loan_name, amounts in paid_by_loan.items()
+            }
+        
+        # Résultat de l'exercice et report à nouveau
+        self.cumulative_results = cumulative_results
+        if self.cumulative_results is None and special_sources & {"compte_resultat", "compte_resultat_cumul"}:
+            self.cumulative_results = CumulativeResults(db, property_id, self.years)
+    
+    def _require(self, year: int) -> None:
+        if year not in self.years:
+            raise ValueError(f"Année {year} absente du plan d'évaluation du bilan ({self.years})")
+    
+    def level_1_cumul(self, level_1: str, year: int) -> float:
+        """
+        Somme des transactions d'un level_1 jusqu'au 31/12 de l'année (filtre level_3 appliqué).
+        
+        Args:
+            level_1: Valeur level_1
+            year: Année
+        
+        Returns:
+            Somme brute (avec signe)
+        """
+        self._require(year)
+        return self._level_1_cumul.get(level_1, {}).get(year, 0.0)
+    
+    def amortizations_cumul(self, year: int) -> float:
+        """Cumul des amortissements jusqu'à l'année (voir calculate_amortizations_cumul)."""
+        self._require(year)
+        return self._amortizations.get(year, 0.0)
+    
+    def compte_bancaire(self, year: int) -> float:
+        """Solde bancaire au 31/12 de l'année (voir calculate_compte_bancaire)."""
+        self._require(year)
+        return self._balances.get(year, 0.0)
+    
+    def capital_restant_du(self, year: int) -> float:
+        """Capital restant dû au 31/12 de l'année (voir calculate_capital_restant_du)."""
+        self._require(year)
+        credit_amount = abs(self._credit.get(year, 0.0))
+        if credit_amount == 0.0:
+            return 0.0
+        end_date = date(year, 12, 31)
+        active_loan_names = {
+            name for name, loan_start_date in self._loans
+            if loan_start_date is None or loan_start_date <= end_date
+        }
+        capital_paid = sum(self._capital_paid.get(name, {}).get(year, 0.0) for name in active_loan_names)
+        return max(0.0, credit_amount - capital_paid)
+
+
 def calculate_bilan(
     db: Session,
     year: int,
     property_id: int,
     mappings: Optional[List[BilanMapping]] = None,
-    level_3_values: Optional[List[str]] = None
+    level_3_values: Optional[List[str]] = None,
+    cumulative_results: Optional[CumulativeResults] = None,
+    plan: Optional[BilanEvaluationPlan] = None
 ) -> Dict[str, any]:
     """
     Calculer le bilan complet pour une année et une propriété.
@@ -473,6 +765,11 @@ def calculate_bilan(
         property_id: ID de la propriété
         mappings: Liste des mappings (optionnel, sera chargée depuis DB si non fournie)
         level_3_values: Liste des valeurs level_3 (optionnel, sera chargée depuis config si non fournie)
+        cumulative_results: Résultats annuels partagés entre les années d'une même requête
+            (optionnel, construits pour cette année sinon)
+        plan: Entrées collectées pour toutes les années d'une même requête (optionnel,
+            construit pour cette année sinon ; doit avoir été construit avec les mêmes mappings
+            et level_3_values)
     
     Returns:
         Dictionnaire avec :
@@ -494,100 +791,62 @@ def calculate_bilan(
     if level_3_values is None:
         level_3_values = get_level_3_values(db, property_id)
     
+    if plan is None:
+        plan = BilanEvaluationPlan(db, property_id, [year], mappings, level_3_values, cumulative_results)
+    
     # Dictionnaire pour stocker les montants par catégorie
     categories = {}
     
-    # OPTIMISATION: Calculer toutes les catégories normales en une seule requête
+    # Catégories normales : évaluées depuis les cumuls par level_1 du plan
     normal_mappings = [m for m in mappings if not m.is_special]
-    if normal_mappings:
-        # Date de fin de l'année (cumul jusqu'à cette date)
-        end_date = date(year, 12, 31)
+    if normal_mappings and any(plan.category_level_1.values()):
+        # Initialiser toutes les catégories normales à 0
+        for mapping in normal_mappings:
+            categories[mapping.category_name] = 0.0
         
-        # Construire un dictionnaire category_name -> set(level_1_values)
-        category_to_level_1 = {}
-        all_level_1_values = set()
+        # Répartir les cumuls par catégorie (chaque level_1 peut appartenir à plusieurs catégories)
+        # IMPORTANT: On additionne d'abord les montants bruts (avec leurs signes), puis on applique la logique
+        # à la somme finale. Cela permet de gérer correctement les catégories avec transactions mixtes
+        # (ex: "Cautions reçues" avec paiements positifs et remboursements négatifs)
+        for category_name, level_1_set in plan.category_level_1.items():
+            for level_1 in level_1_set:
+                categories[category_name] += plan.level_1_cumul(level_1, year)
+        
+        # Appliquer la logique de signe à la somme finale de chaque catégorie
+        # Construire un dictionnaire category_name -> type (ACTIF/PASSIF) pour déterminer la logique
+        category_to_type = {}
         for mapping in normal_mappings:
-            if not mapping.level_1_values:
-                continue
-            try:
-                level_1_values_list = json.loads(mapping.level_1_values)
-                category_to_level_1[mapping.category_name] = set(level_1_values_list)
-                all_level_1_values.update(level_1_values_list)
-            except (json.JSONDecodeError, TypeError):
-                continue
+            category_to_type[mapping.category_name] = mapping.type
         
-        if all_level_1_values:
-            # Une seule requête pour toutes les catégories normales, filtrée par property_id
-            query = db.query(
-                EnrichedTransaction.level_1,
-                func.sum(Transaction.quantite).label('total')
-            ).join(
-                Transaction, Transaction.id == EnrichedTransaction.transaction_id
-            ).filter(
-                and_(
-                    Transaction.property_id == property_id,
-                    EnrichedTransaction.level_3.in_(level_3_values),
-                    EnrichedTransaction.level_1.in_(list(all_level_1_values)),
-                    Transaction.date <= end_date
-                )
-            ).group_by(EnrichedTransaction.level_1)
-            
-            results = query.all()
+        for category_name in categories:
+            result = categories[category_name]
+            category_type = category_to_type.get(category_name, "ACTIF")  # Par défaut ACTIF
             
-            # Initialiser toutes les catégories normales à 0
-            for mapping in normal_mappings:
-                categories[mapping.category_name] = 0.0
-            
-            # Répartir les résultats par catégorie (chaque level_1 peut appartenir à plusieurs catégories)
-            # IMPORTANT: On additionne d'abord les montants bruts (avec leurs signes), puis on applique la logique
-            # à la somme finale. Cela permet de gérer correctement les catégories avec transactions mixtes
-            # (ex: "Cautions reçues" avec paiements positifs et remboursements négatifs)
-            for level_1, total in results:
-                if level_1 and total is not None:
-                    # Trouver toutes les catégories qui utilisent ce level_1
-                    for category_name, level_1_set in category_to_level_1.items():
-                        if level_1 in level_1_set:
-                            # Additionner les montants bruts (avec leurs signes)
-                            categories[category_name] += total
-            
-            # Appliquer la logique de signe à la somme finale de chaque catégorie
-            # Construire un dictionnaire category_name -> type (ACTIF/PASSIF) pour déterminer la logique
-            category_to_type = {}
-            for mapping in normal_mappings:
-                category_to_type[mapping.category_name] = mapping.type
-            
-            for category_name in categories:
-                result = categories[category_name]
-                category_type = category_to_type.get(category_name, "ACTIF")  # Par défaut ACTIF
-                
-                if category_type == "ACTIF":
-                    # Pour les ACTIFS : toujours retourner la valeur absolue (positif)
-                    # Les transactions sont souvent négatives (débits), mais l'actif doit être positif
-                    categories[category_name] = abs(result) if result is not None else 0.0
-                else:
-                    # Pour les PASSIFS : si négatif → 0 (on ne peut pas avoir une dette négative)
-                    # Sinon, valeur absolue pour garantir un montant positif
-                    if result < 0:
-                        categories[category_name] = 0.0
-                    else:
-                        categories[category_name] = abs(result) if result is not None else 0.0
-    
-    # Calculer les catégories spéciales (une par une, elles sont peu nombreuses)
+            if category_type == "ACTIF":
+                # Pour les ACTIFS : toujours retourner la valeur absolue (positif)
+                # Les transactions sont souvent négatives (débits), mais l'actif doit être positif
+                categories[category_name] = abs(result)
+            else:
+                # Pour les PASSIFS : si négatif → 0 (on ne peut pas avoir une dette négative)
+                # Sinon, valeur absolue pour garantir un montant positif
+                categories[category_name] = 0.0 if result < 0 else abs(result)
+    
+    # Calculer les catégories spéciales depuis les entrées du plan
     for mapping in mappings:
         if mapping.is_special:
             category_name = mapping.category_name
             if mapping.special_source == "amortization_result" or mapping.special_source == "amortizations":
-                amount = calculate_amortizations_cumul(db, year, property_id)
+                amount = plan.amortizations_cumul(year)
             elif mapping.special_source == "transactions":
-                amount = calculate_compte_bancaire(db, year, property_id)
+                amount = plan.compte_bancaire(year)
             elif mapping.special_source == "compte_resultat":
                 amount = calculate_resultat_exercice(
-                    db, year, property_id, mapping.compte_resultat_view_id
+                    db, year, property_id, mapping.compte_resultat_view_id, plan.cumulative_results
                 )
             elif mapping.special_source == "compte_resultat_cumul":
-                amount = calculate_report_a_nouveau(db, year, property_id)
+                amount = calculate_report_a_nouveau(db, year, property_id, plan.cumulative_results)
             elif mapping.special_source == "loan_payments":
-                amount = calculate_capital_restant_du(db, year, property_id)
+                amount = plan.capital_restant_du(year)
             else:
                 amount = 0.0
             categories[category_name] = amount
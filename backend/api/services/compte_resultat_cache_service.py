@@ -0,0 +1,324 @@
+"""
+Cache persistant des comptes de résultat calculés.
+
+⚠️ Before making changes, read: ../../docs/workflow/BEST_PRACTICES.md
+
+Chaque compte de résultat calculé est stocké dans compte_resultat_cache, par (property_id, year),
+avec l'empreinte de la configuration utilisée :
+- CompteResultatMapping et CompteResultatConfig.level_3_values de la propriété
+- AmortizationType et LoanConfig de la propriété
+
+Une entrée est servie tant que l'empreinte courante est identique (un changement de configuration
+rend donc tout le cache de la propriété obsolète sans suppression explicite). Les changements de
+données invalident précisément les années concernées :
+- Écritures ORM (flush) sur Transaction, EnrichedTransaction, AmortizationResult, LoanPayment
+- UPDATE/DELETE en masse ORM sur ces tables (années lues avec le même filtre avant exécution)
+- Écritures Core en masse (import, enrichissement en masse) : appel explicite de
+  invalidate_compte_resultat_cache
+
+Les suppressions sont faites dans la transaction de l'écriture : un rollback les annule aussi.
+"""
+
+import hashlib
+import json
+import logging
+import threading
+from datetime import datetime
+from itertools import chain
+from typing import Dict, Iterable, List, Optional, Set, Tuple
+
+from sqlalchemy import delete, event, extract, inspect, or_, and_, select
+from sqlalchemy.dialects.sqlite import insert as sqlite_insert
+from sqlalchemy.orm import Session
+
+from backend.database.models import (
+    Transaction,
+    EnrichedTransaction,
+    AmortizationResult,
+    AmortizationType,
+    LoanPayment,
+    LoanConfig,
+    CompteResultatMapping,
+    CompteResultatConfig,
+    CompteResultatCache
+)
+
+logger = logging.getLogger(__name__)
+
+# Clé "toutes les années" / "toutes les propriétés" dans les ensembles d'invalidation
+_ALL = None
+
+# Compteurs cumulés depuis le démarrage du processus
+_stats_lock = threading.Lock()
+_stats = {"hits": 0, "misses": 0, "invalidated": 0}
+
+
+def _record_stats(**increments: int) -> None:
+    with _stats_lock:
+        for key, value in increments.items():
+            _stats[key] += value
+
+
+def get_compte_resultat_cache_stats() -> Dict[str, int]:
+    """
+    Compteurs cumulés du cache depuis le démarrage du processus.
+
+    Returns:
+        Dict avec hits, misses et invalidated (entrées supprimées)
+    """
+    with _stats_lock:
+        return dict(_stats)
+
+
+def reset_compte_resultat_cache_stats() -> None:
+    """Remettre à zéro les compteurs du cache (tests)."""
+    with _stats_lock:
+        for key in _stats:
+            _stats[key] = 0
+
+
+def compute_compte_resultat_fingerprint(db: Session, property_id: int) -> str:
+    """
+    Calculer l'empreinte de la configuration qui détermine le compte de résultat d'une propriété.
+
+    Args:
+        db: Session de base de données
+        property_id: ID de la propriété
+
+    Returns:
+        Empreinte SHA-256 (hexadécimale)
+    """
+    mappings = db.query(
+        CompteResultatMapping.id,
+        CompteResultatMapping.category_name,
+        CompteResultatMapping.type,
+        CompteResultatMapping.level_1_values
+    ).filter(CompteResultatMapping.property_id == property_id).order_by(CompteResultatMapping.id).all()
+    configs = db.query(CompteResultatConfig.level_3_values).filter(
+        CompteResultatConfig.property_id == property_id
+    ).order_by(CompteResultatConfig.id).all()
+    amortization_types = db.query(
+        AmortizationType.id,
+        AmortizationType.name,
+        AmortizationType.level_2_value,
+        AmortizationType.level_1_values,
+        AmortizationType.start_date,
+        AmortizationType.duration,
+        AmortizationType.annual_amount
+    ).filter(AmortizationType.property_id == property_id).order_by(AmortizationType.id).all()
+    loan_configs = db.query(
+        LoanConfig.id,
+        LoanConfig.name,
+        LoanConfig.loan_start_date
+    ).filter(LoanConfig.property_id == property_id).order_by(LoanConfig.id).all()
+
+    payload = json.dumps(
+        [
+            [list(row) for row in mappings],
+            [row.level_3_values for row in configs],
+            [list(row) for row in amortization_types],
+            [list(row) for row in loan_configs],
+        ],
+        default=str,
+        separators=(",", ":")
+    )
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+
+def get_compte_resultat_cached(
+    db: Session,
+    years: List[int],
+    property_id: int
+) -> Tuple[Dict[int, Dict[str, any]], Dict[str, int]]:
+    """
+    Lire les comptes de résultat depuis le cache, en calculant (en lot) et stockant les années manquantes.
+
+    Args:
+        db: Session de base de données
+        years: Années demandées
+        property_id: ID de la propriété
+
+    Returns:
+        Tuple (résultats {année: compte de résultat} dans l'ordre de years, {"hits": n, "misses": n})
+    """
+    # Import local : compte_resultat_service importe ce module pour ses invalidations
+    from backend.api.services.compte_resultat_service import calculate_compte_resultat_range
+
+    year_set = set(years)
+    fingerprint = compute_compte_resultat_fingerprint(db, property_id)
+
+    cached = {}
+    if year_set:
+        rows = db.query(CompteResultatCache.year, CompteResultatCache.result).filter(
+            CompteResultatCache.property_id == property_id,
+            CompteResultatCache.year.in_(year_set),
+            CompteResultatCache.fingerprint == fingerprint
+        ).all()
+        cached = {row.year: json.loads(row.result) for row in rows}
+
+    missing = sorted(year_set - cached.keys())
+    if missing:
+        computed = calculate_compte_resultat_range(db, missing, property_id)
+        table = CompteResultatCache.__table__
+        insert_stmt = sqlite_insert(table)
+        upsert_stmt = insert_stmt.on_conflict_do_update(
+            index_elements=[table.c.property_id, table.c.year],
+            set_={
+                "fingerprint": insert_stmt.excluded.fingerprint,
+                "result": insert_stmt.excluded.result,
+                "created_at": insert_stmt.excluded.created_at,
+            }
+        )
+        now = datetime.utcnow()
+        db.execute(upsert_stmt, [
+            {
+                "property_id": property_id,
+                "year": year,
+                "fingerprint": fingerprint,
+                "result": json.dumps(computed[year]),
+                "created_at": now,
+            }
+            for year in missing
+        ])
+        db.commit()
+        cached.update(computed)
+
+    stats = {"hits": len(year_set) - len(missing), "misses": len(missing)}
+    _record_stats(**stats)
+    logger.info(f"[CompteResultatCache] property_id={property_id}: {stats['hits']} hit(s), {stats['misses']} miss(es)")
+    return {year: cached[year] for year in years}, stats
+
+
+def _delete_statement(keys: Iterable[Tuple[Optional[int], Optional[int]]]):
+    """Construire le DELETE des entrées correspondant aux clés (property_id, year), None = toutes."""
+    keys = set(keys)
+    if (_ALL, _ALL) in keys:
+        return delete(CompteResultatCache)
+    conditions = []
+    whole_properties = {property_id for property_id, year in keys if year is _ALL}
+    if whole_properties:
+        conditions.append(CompteResultatCache.property_id.in_(whole_properties))
+    for property_id, year in keys:
+        if year is _ALL or property_id in whole_properties:
+            continue
+        if property_id is _ALL:
+            conditions.append(CompteResultatCache.year == year)
+        else:
+            conditions.append(and_(CompteResultatCache.property_id == property_id, CompteResultatCache.year == year))
+    return delete(CompteResultatCache).where(or_(*conditions))
+
+
+def invalidate_compte_resultat_cache(
+    db: Session,
+    property_id: Optional[int] = None,
+    years: Optional[Iterable[int]] = None
+) -> int:
+    """
+    Supprimer les entrées du cache, dans la transaction courante (pas de commit).
+
+    Args:
+        db: Session de base de données
+        property_id: ID de la propriété (optionnel, toutes les propriétés si non fourni)
+        years: Années à invalider (optionnel, toutes les années si non fourni)
+
+    Returns:
+        Nombre d'entrées supprimées
+    """
+    if years is None:
+        keys = {(property_id, _ALL)}
+    else:
+        keys = {(property_id, year) for year in years}
+    if not keys:
+        return 0
+    deleted_count = db.connection().execute(_delete_statement(keys)).rowcount
+    _record_stats(invalidated=deleted_count)
+    return deleted_count
+
+
+def _attribute_values(obj, attribute: str) -> set:
+    """
+    Valeurs connues d'un attribut (nouvelle et ancienne), sans déclencher de chargement.
+
+    Une valeur inconnue (attribut non chargé, ou ancienne valeur d'un objet expiré avant
+    modification) ajoute _ALL : toutes les valeurs sont alors invalidées.
+    """
+    state = inspect(obj)
+    history = state.attrs[attribute].history
+    values = {value for value in chain(history.added, history.unchanged, history.deleted) if value is not None}
+    if not values or (history.added and not history.deleted and not state.pending):
+        values.add(_ALL)
+    return values
+
+
+def _years(values: set) -> set:
+    """Années des dates d'un ensemble de valeurs (_ALL conservé)."""
+    return {_ALL if value is _ALL else value.year for value in values}
+
+
+def _flush_keys(session: Session) -> Set[Tuple[Optional[int], Optional[int]]]:
+    """Clés (property_id, year) touchées par les objets du flush en cours."""
+    keys = set()
+    for obj in chain(session.new, session.dirty, session.deleted):
+        if isinstance(obj, Transaction):
+            if obj in session.dirty and not any(
+                inspect(obj).attrs[attribute].history.has_changes() for attribute in ("date", "quantite", "property_id")
+            ):
+                # Ex : mise à jour du solde uniquement
+                continue
+            years = _years(_attribute_values(obj, "date"))
+        elif isinstance(obj, EnrichedTransaction):
+            years = _attribute_values(obj, "annee")
+        elif isinstance(obj, LoanPayment):
+            years = _years(_attribute_values(obj, "date"))
+        elif isinstance(obj, AmortizationResult):
+            years = _attribute_values(obj, "year")
+        else:
+            continue
+        keys.update((property_id, year) for property_id in _attribute_values(obj, "property_id") for year in years)
+    return keys
+
+
+@event.listens_for(Session, "after_flush")
+def _invalidate_on_flush(session: Session, flush_context) -> None:
+    """Invalide les années touchées par les objets créés, modifiés ou supprimés."""
+    keys = _flush_keys(session)
+    if keys:
+        deleted_count = session.connection().execute(_delete_statement(keys)).rowcount
+        _record_stats(invalidated=deleted_count)
+
+
+# Requête des clés (property_id, year) touchées par un UPDATE/DELETE en masse, par entité
+_BULK_KEY_QUERIES = {
+    Transaction: lambda: select(Transaction.property_id, extract('year', Transaction.date)),
+    EnrichedTransaction: lambda: select(EnrichedTransaction.property_id, EnrichedTransaction.annee),
+    LoanPayment: lambda: select(LoanPayment.property_id, extract('year', LoanPayment.date)),
+    AmortizationResult: lambda: select(AmortizationResult.property_id, AmortizationResult.year),
+}
+
+
+@event.listens_for(Session, "do_orm_execute")
+def _invalidate_on_bulk_statement(orm_execute_state) -> None:
+    """Invalide les années touchées par un UPDATE/DELETE en masse ORM (query.update() / query.delete())."""
+    if not (orm_execute_state.is_update or orm_execute_state.is_delete):
+        return
+    entity = next(
+        (mapper.class_ for mapper in orm_execute_state.all_mappers if mapper.class_ in _BULK_KEY_QUERIES),
+        None
+    )
+    if entity is None:
+        return
+
+    key_query = _BULK_KEY_QUERIES[entity]().distinct()
+    whereclause = orm_execute_state.statement.whereclause
+    if whereclause is not None:
+        key_query = key_query.where(whereclause)
+    connection = orm_execute_state.session.connection()
+    rows = connection.execute(key_query).all()
+    if orm_execute_state.is_update:
+        # Les nouvelles valeurs (date, année) ne sont pas connues : toute la propriété est invalidée
+        keys = {(property_id, _ALL) for property_id, _ in rows}
+    else:
+        keys = {(property_id, year) for property_id, year in rows}
+    if keys:
+        deleted_count = connection.execute(_delete_statement(keys)).rowcount
+        _record_stats(invalidated=deleted_count)
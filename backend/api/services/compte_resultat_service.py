@@ -18,7 +18,7 @@ import logging
 from datetime import date
 from typing import List, Dict, Optional
 from sqlalchemy.orm import Session
-from sqlalchemy import and_, or_, func
+from sqlalchemy import and_, or_, func, extract
 
 from backend.database.models import (
     Transaction,
@@ -30,6 +30,8 @@ from backend.database.models import (
     LoanPayment,
     LoanConfig
 )
+from backend.api.services.compte_resultat_cache_service import invalidate_compte_resultat_cache
+from backend.api.services.transaction_fact_service import get_level_1_totals
 
 # Logger configuration
 logger = logging.getLogger(__name__)
@@ -76,6 +78,59 @@ def get_level_3_values(db: Session, property_id: int) -> List[str]:
         return []
 
 
+# Catégories prédéfinies de produits (type déduit quand le mapping n'a pas de type)
+PRODUITS_CATEGORIES = [
+    'Loyers hors charge encaissés',
+    'Charges locatives payées par locataires',
+    'Autres revenus',
+]
+
+# Catégories spéciales calculées hors transactions
+AMORTISSEMENTS_CATEGORY = "Charges d'amortissements"
+COUT_FINANCEMENT_CATEGORY = "Coût du financement (hors remboursement du capital)"
+
+
+def get_category_level_1_values(
+    mappings: List[CompteResultatMapping],
+    mapping_type: str
+) -> Dict[str, set]:
+    """
+    Regrouper les level_1 configurés par catégorie pour un type de mapping.
+    
+    Les catégories spéciales (amortissements, coût du financement) sont ignorées, et le type
+    d'un mapping sans type est déduit de sa catégorie (PRODUITS_CATEGORIES).
+    
+    Args:
+        mappings: Liste des mappings configurés
+        mapping_type: "Produits d'exploitation" ou "Charges d'exploitation"
+    
+    Returns:
+        Dictionnaire {category_name: set(level_1)} (catégories sans level_1 exclues)
+    """
+    values_by_category = {}
+    for mapping in mappings:
+        category_name = mapping.category_name
+        
+        # Ignorer les catégories spéciales (amortissements, coût financement)
+        if category_name in [AMORTISSEMENTS_CATEGORY, COUT_FINANCEMENT_CATEGORY]:
+            continue
+        
+        # Déterminer le type (automatiquement si None)
+        category_type = mapping.type or (
+            "Produits d'exploitation" if category_name in PRODUITS_CATEGORIES else "Charges d'exploitation"
+        )
+        if category_type != mapping_type:
+            continue
+        
+        if mapping.level_1_values:
+            try:
+                values_by_category.setdefault(category_name, set()).update(json.loads(mapping.level_1_values))
+            except (json.JSONDecodeError, TypeError):
+                continue
+    
+    return {category: values for category, values in values_by_category.items() if values}
+
+
 def calculate_produits_exploitation(
     db: Session,
     year: int,
@@ -136,60 +191,7 @@ def calculate_produits_exploitation(
     # Grouper par catégorie selon les mappings
     # IMPORTANT : Regrouper tous les mappings d'une même catégorie avec OR pour éviter les doublons
     results = {}
-    
-    # Catégories prédéfinies de produits
-    PRODUITS_CATEGORIES = [
-        'Loyers hors charge encaissés',
-        'Charges locatives payées par locataires',
-        'Autres revenus',
-    ]
-    
-    # Déterminer le type si None
-    def get_type_for_category(category_name, mapping_type):
-        if mapping_type:
-            return mapping_type
-        # Déterminer automatiquement selon la catégorie
-        if category_name in PRODUITS_CATEGORIES:
-            return "Produits d'exploitation"
-        return "Charges d'exploitation"
-    
-    # Grouper les mappings par catégorie
-    # IMPORTANT : Filtrer uniquement les mappings de type "Produits d'exploitation"
-    mappings_by_category = {}
-    for mapping in mappings:
-        category_name = mapping.category_name
-        
-        # Ignorer les catégories spéciales (amortissements, coût financement)
-        if category_name in ["Charges d'amortissements", "Coût du financement (hors remboursement du capital)"]:
-            continue
-        
-        # Déterminer le type (automatiquement si None)
-        mapping_type = get_type_for_category(category_name, mapping.type)
-        
-        # Filtrer uniquement les produits d'exploitation
-        if mapping_type != "Produits d'exploitation":
-            continue
-        
-        if category_name not in mappings_by_category:
-            mappings_by_category[category_name] = []
-        mappings_by_category[category_name].append(mapping)
-    
-    # Pour chaque catégorie, regrouper tous les level_1_values avec OR
-    for category_name, category_mappings in mappings_by_category.items():
-        # Collecter tous les level_1_values de tous les mappings de cette catégorie (OR)
-        all_level_1_values = set()
-        for mapping in category_mappings:
-            if mapping.level_1_values:
-                try:
-                    level_1_values = json.loads(mapping.level_1_values)
-                    all_level_1_values.update(level_1_values)
-                except (json.JSONDecodeError, TypeError):
-                    continue
-        
-        if not all_level_1_values:
-            # Pas de level_1_values configuré pour cette catégorie
-            continue
-        
+    for category_name, all_level_1_values in get_category_level_1_values(mappings, "Produits d'exploitation").items():
         # Filtrer les transactions dont le level_1 est dans la liste (OR de tous les mappings)
         category_amount = 0.0
         for level_1, quantite in transactions:
@@ -263,60 +265,7 @@ def calculate_charges_exploitation(
     # Grouper par catégorie selon les mappings
     # IMPORTANT : Regrouper tous les mappings d'une même catégorie avec OR pour éviter les doublons
     results = {}
-    
-    # Catégories prédéfinies de produits
-    PRODUITS_CATEGORIES = [
-        'Loyers hors charge encaissés',
-        'Charges locatives payées par locataires',
-        'Autres revenus',
-    ]
-    
-    # Déterminer le type si None
-    def get_type_for_category(category_name, mapping_type):
-        if mapping_type:
-            return mapping_type
-        # Déterminer automatiquement selon la catégorie
-        if category_name in PRODUITS_CATEGORIES:
-            return "Produits d'exploitation"
-        return "Charges d'exploitation"
-    
-    # Grouper les mappings par catégorie
-    # IMPORTANT : Filtrer uniquement les mappings de type "Charges d'exploitation"
-    mappings_by_category = {}
-    for mapping in mappings:
-        category_name = mapping.category_name
-        
-        # Ignorer les catégories spéciales (amortissements, coût financement)
-        if category_name in ["Charges d'amortissements", "Coût du financement (hors remboursement du capital)"]:
-            continue
-        
-        # Déterminer le type (automatiquement si None)
-        mapping_type = get_type_for_category(category_name, mapping.type)
-        
-        # Filtrer uniquement les charges d'exploitation
-        if mapping_type != "Charges d'exploitation":
-            continue
-        
-        if category_name not in mappings_by_category:
-            mappings_by_category[category_name] = []
-        mappings_by_category[category_name].append(mapping)
-    
-    # Pour chaque catégorie, regrouper tous les level_1_values avec OR
-    for category_name, category_mappings in mappings_by_category.items():
-        # Collecter tous les level_1_values de tous les mappings de cette catégorie (OR)
-        all_level_1_values = set()
-        for mapping in category_mappings:
-            if mapping.level_1_values:
-                try:
-                    level_1_values = json.loads(mapping.level_1_values)
-                    all_level_1_values.update(level_1_values)
-                except (json.JSONDecodeError, TypeError):
-                    continue
-        
-        if not all_level_1_values:
-            # Pas de level_1_values configuré pour cette catégorie
-            continue
-        
+    for category_name, all_level_1_values in get_category_level_1_values(mappings, "Charges d'exploitation").items():
         # Filtrer les transactions dont le level_1 est dans la liste (OR de tous les mappings)
         category_amount = 0.0
         for level_1, quantite in transactions:
@@ -455,14 +404,36 @@ def calculate_compte_resultat(
     # Calculer les charges d'exploitation
     charges = calculate_charges_exploitation(db, year, mappings, level_3_values, property_id)
     
-    # Ajouter les catégories spéciales
     amortissements = get_amortissements(db, year, property_id)
+    cout_financement = get_cout_financement(db, year, property_id)
+    
+    return build_compte_resultat(produits, charges, amortissements, cout_financement)
+
+
+def build_compte_resultat(
+    produits: Dict[str, float],
+    charges: Dict[str, float],
+    amortissements: float,
+    cout_financement: float
+) -> Dict[str, any]:
+    """
+    Assembler le compte de résultat d'une année à partir des montants calculés.
+    
+    Args:
+        produits: Produits d'exploitation par catégorie
+        charges: Charges d'exploitation par catégorie (hors catégories spéciales)
+        amortissements: Total des amortissements de l'année
+        cout_financement: Coût du financement de l'année
+    
+    Returns:
+        Dictionnaire du compte de résultat (voir calculate_compte_resultat)
+    """
+    # Ajouter les catégories spéciales
     if amortissements != 0.0:
-        charges["Charges d'amortissements"] = amortissements
+        charges[AMORTISSEMENTS_CATEGORY] = amortissements
     
-    cout_financement = get_cout_financement(db, year, property_id)
     if cout_financement != 0.0:
-        charges["Coût du financement (hors remboursement du capital)"] = cout_financement
+        charges[COUT_FINANCEMENT_CATEGORY] = cout_financement
     
     # Calculer les totaux
     # IMPORTANT : Le frontend exclut les charges d'intérêt du total des charges d'exploitation
@@ -472,7 +443,7 @@ def calculate_compte_resultat(
     # Note: Les charges sont négatives (sorties d'argent), les crédits/remboursements sont positifs
     # On prend abs(sum()) pour que les crédits réduisent correctement le total des charges
     charges_exploitation = {k: v for k, v in charges.items() 
-                            if k != "Coût du financement (hors remboursement du capital)"}
+                            if k != COUT_FINANCEMENT_CATEGORY}
     total_charges_exploitation = abs(sum(v for v in charges_exploitation.values() if v))
     
     # Résultat d'exploitation = Produits - Charges d'exploitation (sans charges d'intérêt)
@@ -497,6 +468,110 @@ def calculate_compte_resultat(
     }
 
 
+def calculate_compte_resultat_range(
+    db: Session,
+    years: List[int],
+    property_id: int,
+    mappings: Optional[List[CompteResultatMapping]] = None,
+    level_3_values: Optional[List[str]] = None
+) -> Dict[int, Dict[str, any]]:
+    """
+    Calculer le compte de résultat de plusieurs années en un nombre constant de requêtes.
+    
+    Même résultat que calculate_compte_resultat appelé année par année, mais :
+    - les transactions sont agrégées par (année, level_1) en un seul GROUP BY
+    - les amortissements sont sommés par année en une requête
+    - le coût du financement (intérêts + assurance) est sommé par année en une requête
+    
+    Args:
+        db: Session de base de données
+        years: Années à calculer
+        property_id: ID de la propriété
+        mappings: Liste des mappings (optionnel, sera chargée depuis DB si non fournie)
+        level_3_values: Liste des valeurs level_3 (optionnel, sera chargée depuis config si non fournie)
+    
+    Returns:
+        Dictionnaire {année: compte de résultat} dans l'ordre de years
+    """
+    logger.info(f"[CompteResultatService] calculate_compte_resultat_range - years={years}, property_id={property_id}")
+    
+    year_set = set(years)
+    if not year_set:
+        return {}
+    
+    # Charger les mappings si non fournis
+    if mappings is None:
+        mappings = get_mappings(db, property_id)
+    
+    # Charger les level_3_values si non fournis
+    if level_3_values is None:
+        level_3_values = get_level_3_values(db, property_id)
+    
+    start_date = date(min(year_set), 1, 1)
+    end_date = date(max(year_set), 12, 31)
+    
+    # Montants par (année, level_1) en une seule requête sur la table de faits
+    amounts_by_year = {year: {} for year in year_set}
+    if level_3_values:
+        for year, level_1, amount in get_level_1_totals(
+            db, property_id, min(year_set), max(year_set), level_3_values
+        ):
+            if year in amounts_by_year and level_1 is not None:
+                amounts_by_year[year][level_1] = amount
+    
+    # Amortissements par année (JOIN Transaction pour filtrer par property_id)
+    amortissements_by_year = dict(db.query(
+        AmortizationResult.year,
+        func.sum(AmortizationResult.amount)
+    ).join(
+        Transaction, Transaction.id == AmortizationResult.transaction_id
+    ).filter(
+        AmortizationResult.year.in_(year_set),
+        Transaction.property_id == property_id
+    ).group_by(AmortizationResult.year).all())
+    
+    # Coût du financement par année (uniquement les crédits configurés pour la propriété)
+    cout_financement_by_year = {}
+    loan_names = [name for (name,) in db.query(LoanConfig.name).filter(LoanConfig.property_id == property_id).all()]
+    if loan_names:
+        payment_year = extract('year', LoanPayment.date)
+        cout_financement_by_year = dict(db.query(
+            payment_year,
+            func.sum(LoanPayment.interest + LoanPayment.insurance)
+        ).filter(
+            LoanPayment.property_id == property_id,
+            LoanPayment.date >= start_date,
+            LoanPayment.date <= end_date,
+            LoanPayment.loan_name.in_(loan_names)
+        ).group_by(payment_year).all())
+    
+    produits_level_1 = get_category_level_1_values(mappings, "Produits d'exploitation")
+    charges_level_1 = get_category_level_1_values(mappings, "Charges d'exploitation")
+    
+    def sum_categories(amounts: Dict[str, float], level_1_by_category: Dict[str, set]) -> Dict[str, float]:
+        results = {}
+        for category_name, level_1_values in level_1_by_category.items():
+            category_amount = 0.0
+            for level_1, amount in amounts.items():
+                if level_1 in level_1_values:
+                    category_amount += amount
+            if category_amount != 0.0:
+                results[category_name] = category_amount
+        return results
+    
+    results = {}
+    for year in years:
+        amounts = amounts_by_year[year]
+        results[year] = build_compte_resultat(
+            sum_categories(amounts, produits_level_1),
+            sum_categories(amounts, charges_level_1),
+            amortissements_by_year.get(year) or 0.0,
+            cout_financement_by_year.get(year) or 0.0
+        )
+    
+    return results
+
+
 # ========== Invalidation Functions ==========
 
 def invalidate_compte_resultat_for_year(db: Session, year: int, property_id: int) -> int:
@@ -516,6 +591,7 @@ def invalidate_compte_resultat_for_year(db: Session, year: int, property_id: int
         CompteResultatData.annee == year,
         CompteResultatData.property_id == property_id
     ).delete()
+    invalidate_compte_resultat_cache(db, property_id, [year])
     db.commit()
     return deleted_count
 
@@ -547,6 +623,7 @@ def invalidate_compte_resultat_for_date_range(
         CompteResultatData.annee <= end_year,
         CompteResultatData.property_id == property_id
     ).delete()
+    invalidate_compte_resultat_cache(db, property_id, range(start_year, end_year + 1))
     db.commit()
     return deleted_count
 
@@ -566,6 +643,7 @@ def invalidate_all_compte_resultat(db: Session, property_id: int) -> int:
     deleted_count = db.query(CompteResultatData).filter(
         CompteResultatData.property_id == property_id
     ).delete()
+    invalidate_compte_resultat_cache(db, property_id)
     db.commit()
     return deleted_count
 
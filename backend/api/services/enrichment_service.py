@@ -7,9 +7,11 @@ Ce service implémente la logique de mapping intelligent pour enrichir
 les transactions avec des classifications hiérarchiques (level_1, level_2, level_3).
 """
 
+from sqlalchemy import func, or_
 from sqlalchemy.orm import Session
-from typing import Optional, Tuple
-from datetime import date
+from sqlalchemy.dialects.sqlite import insert as sqlite_insert
+from typing import Dict, Iterable, Optional, Tuple, Union
+from datetime import date, datetime
 import logging
 
 from backend.database.models import Transaction, Mapping, EnrichedTransaction
@@ -17,11 +19,22 @@ from backend.api.services.mapping_obligatoire_service import (
     validate_mapping,
     validate_level3_value
 )
+from backend.api.services.compte_resultat_cache_service import invalidate_compte_resultat_cache
+from backend.api.services.transaction_fact_service import refresh_transaction_facts
+from backend.api.services.facets_service import invalidate_property_facets_on_commit
+from backend.api.services.mapping_matcher_service import (
+    MappingMatcher,
+    evaluate_mapping_match,
+    get_mapping_matcher
+)
 
 logger = logging.getLogger(__name__)
 
+# Taille des lots pour les clauses IN et les écritures en masse (limite de variables SQLite)
+BULK_ENRICH_BATCH_SIZE = 500
+
 
-def find_best_mapping(transaction_name: str, mappings: list[Mapping]) -> Optional[Mapping]:
+def find_best_mapping(transaction_name: str, mappings: Union[list[Mapping], MappingMatcher]) -> Optional[Mapping]:
     """
     Trouve le meilleur mapping pour un nom de transaction donné.
     
@@ -45,101 +58,17 @@ def find_best_mapping(transaction_name: str, mappings: list[Mapping]) -> Optiona
     
     Args:
         transaction_name: Nom de la transaction à mapper
-        mappings: Liste des mappings disponibles
+        mappings: Liste des mappings disponibles, ou index compilé (MappingMatcher)
     
     Returns:
         Le meilleur mapping trouvé (le plus long qui correspond), ou None si aucun mapping ne correspond
         ou si plusieurs mappings de même longueur correspondent, ou si le mapping est trop générique
     """
-    best_match = None
-    best_length = 0
-    matching_mappings = []
-    
-    # Normaliser le nom de la transaction (supprimer espaces en début/fin)
-    transaction_name = transaction_name.strip()
-    transaction_length = len(transaction_name)
-    
-    # Seuil minimum de similarité pour les mappings préfixes (70%)
-    # Cela évite qu'un mapping générique comme "achat appart" (12 chars) 
-    # mappe "achat appart (Immobilisation Facade/Toiture)" (47 chars)
-    MIN_SIMILARITY_RATIO = 0.70
-    
-    for mapping in mappings:
-        mapping_name = mapping.nom.strip()
-        matches = False
-        match_length = 0
-        
-        # Correspondance exacte → toujours utiliser (même si court)
-        if transaction_name == mapping_name:
-            matches = True
-            match_length = len(mapping_name)
-        
-        # Cas spécial pour PRLV SEPA
-        elif 'PRLV SEPA' in transaction_name and 'PRLV SEPA' in mapping_name:
-            if transaction_name.startswith(mapping_name):
-                matches = True
-                match_length = len(mapping_name)
-        
-        # Cas spécial pour VIR STRIPE (correspondance exacte)
-        elif 'VIR STRIPE' in transaction_name and mapping_name == 'VIR STRIPE':
-            matches = True
-            match_length = len(mapping_name)
-        
-        # Cas général : recherche par préfixe (si is_prefix_match = True)
-        # MAIS seulement si le ratio de similarité est suffisant
-        elif mapping.is_prefix_match:
-            if transaction_name.startswith(mapping_name):
-                mapping_length = len(mapping_name)
-                similarity_ratio = mapping_length / transaction_length if transaction_length > 0 else 0
-                # Utiliser le mapping seulement si le ratio est >= 70%
-                if similarity_ratio >= MIN_SIMILARITY_RATIO:
-                    matches = True
-                    match_length = mapping_length
-                else:
-                    # Mapping trop générique → ignorer
-                    logger.debug(
-                        f"[find_best_mapping] Mapping générique ignoré: "
-                        f"'{mapping_name}' ({mapping_length} chars) vs '{transaction_name}' ({transaction_length} chars) "
-                        f"(ratio={similarity_ratio:.2%} < {MIN_SIMILARITY_RATIO:.2%})"
-                    )
-        
-        # Matching "smart" : recherche par pattern/contient
-        # Si le nom de la transaction contient le nom du mapping
-        # MAIS seulement si le ratio de similarité est suffisant
-        elif mapping_name in transaction_name:
-            mapping_length = len(mapping_name)
-            similarity_ratio = mapping_length / transaction_length if transaction_length > 0 else 0
-            # Utiliser le mapping seulement si le ratio est >= 70%
-            if similarity_ratio >= MIN_SIMILARITY_RATIO:
-                matches = True
-                match_length = mapping_length
-            else:
-                # Mapping trop générique → ignorer
-                logger.debug(
-                    f"[find_best_mapping] Mapping générique ignoré: "
-                    f"'{mapping_name}' ({mapping_length} chars) vs '{transaction_name}' ({transaction_length} chars) "
-                    f"(ratio={similarity_ratio:.2%} < {MIN_SIMILARITY_RATIO:.2%})"
-                )
-        
-        if matches:
-            matching_mappings.append((mapping, match_length))
-            # Garder le meilleur (le plus long)
-            if match_length > best_length:
-                best_match = mapping
-                best_length = match_length
-    
-    # Si aucun mapping ne correspond
-    if len(matching_mappings) == 0:
-        return None
-    
-    # Si plusieurs mappings correspondent avec la même longueur maximale, retourner None
-    # (conflit réel - plusieurs mappings équivalents)
-    max_length_mappings = [m for m, length in matching_mappings if length == best_length]
-    if len(max_length_mappings) > 1:
-        return None
-    
-    # Retourner le meilleur mapping (le plus long)
-    return best_match
+    if isinstance(mappings, MappingMatcher):
+        return mappings.find_best(transaction_name)
+    
+    # Liste de mappings → compiler un index ponctuel (utiliser get_mapping_matcher pour un index en cache)
+    return MappingMatcher(mappings).find_best(transaction_name)
 
 
 def transaction_matches_mapping_name(transaction_name: str, mapping_name: str, is_prefix_match: bool = True) -> bool:
@@ -158,36 +87,13 @@ def transaction_matches_mapping_name(transaction_name: str, mapping_name: str, i
     Returns:
         True si la transaction correspond au mapping, False sinon
     """
-    transaction_name = transaction_name.strip()
-    mapping_name = mapping_name.strip()
-    transaction_length = len(transaction_name)
-    mapping_length = len(mapping_name)
-    
-    # Seuil minimum de similarité (70%)
-    MIN_SIMILARITY_RATIO = 0.70
-    
-    # Correspondance exacte → toujours OK
-    if transaction_name == mapping_name:
-        return True
-    
-    # Cas spécial pour PRLV SEPA
-    if 'PRLV SEPA' in transaction_name and 'PRLV SEPA' in mapping_name:
-        return transaction_name.startswith(mapping_name)
-    
-    # Cas spécial pour VIR STRIPE (correspondance exacte)
-    if 'VIR STRIPE' in transaction_name and mapping_name == 'VIR STRIPE':
-        return True
-    
-    # Cas général : recherche par préfixe ou contient
-    # MAIS seulement si le ratio de similarité est suffisant
-    if is_prefix_match and transaction_name.startswith(mapping_name):
-        similarity_ratio = mapping_length / transaction_length if transaction_length > 0 else 0
-        return similarity_ratio >= MIN_SIMILARITY_RATIO
-    elif mapping_name in transaction_name:
-        similarity_ratio = mapping_length / transaction_length if transaction_length > 0 else 0
-        return similarity_ratio >= MIN_SIMILARITY_RATIO
-    
-    return False
+    match_length = evaluate_mapping_match(
+        transaction_name.strip(),
+        mapping_name.strip(),
+        is_prefix_match,
+        contains_fallback=True
+    )
+    return match_length is not None
 
 
 def enrich_transaction(transaction: Transaction, db: Session, mappings: Optional[list[Mapping]] = None) -> EnrichedTransaction:
@@ -197,7 +103,7 @@ def enrich_transaction(transaction: Transaction, db: Session, mappings: Optional
     Args:
         transaction: Transaction à enrichir
         db: Session de base de données
-        mappings: Liste des mappings (optionnel, sera chargée depuis DB si non fournie)
+        mappings: Liste des mappings (optionnel, index compilé de la propriété utilisé si non fournie)
     
     Returns:
         L'objet EnrichedTransaction créé ou mis à jour
@@ -206,20 +112,22 @@ def enrich_transaction(transaction: Transaction, db: Session, mappings: Optional
     annee = transaction.date.year
     mois = transaction.date.month
     
-    # Récupérer tous les mappings de cette propriété depuis la DB si non fournis
+    # Utiliser l'index compilé (en cache) des mappings de cette propriété si non fournis
     if mappings is None:
-        mappings = db.query(Mapping).filter(Mapping.property_id == transaction.property_id).all()
+        matcher = get_mapping_matcher(db, transaction.property_id)
     else:
         # CRITIQUE: Filtrer les mappings fournis pour ne garder que ceux de la même propriété
         # Cela évite d'utiliser des mappings d'autres propriétés par erreur
         mappings = [m for m in mappings if m.property_id == transaction.property_id]
-        if not mappings:
+        if mappings:
+            matcher = MappingMatcher(mappings)
+        else:
             # Si aucun mapping ne correspond après filtrage, recharger depuis la DB
             logger.warning(f"[enrich_transaction] Aucun mapping valide fourni pour property_id={transaction.property_id}, rechargement depuis DB")
-            mappings = db.query(Mapping).filter(Mapping.property_id == transaction.property_id).all()
+            matcher = get_mapping_matcher(db, transaction.property_id)
     
     # Trouver le meilleur mapping
-    best_mapping = find_best_mapping(transaction.nom, mappings)
+    best_mapping = matcher.find_best(transaction.nom)
     
     # Déterminer les valeurs de level_1, level_2, level_3
     if best_mapping:
@@ -286,54 +194,238 @@ def enrich_transaction(transaction: Transaction, db: Session, mappings: Optional
     return enriched
 
 
-def enrich_all_transactions(db: Session, property_id: Optional[int] = None) -> Tuple[int, int]:
+def bulk_enrich_transactions(
+    db: Session,
+    property_id: Optional[int] = None,
+    transaction_ids: Optional[Iterable[int]] = None,
+    names: Optional[Iterable[str]] = None
+) -> Dict[str, int]:
     """
-    Enrichit toutes les transactions qui n'ont pas encore été enrichies.
+    Enrichit un ensemble de transactions en masse (version ensembliste de enrich_transaction).
+    
+    1. Charge les transactions et les enrichissements existants (une requête chacun, par lots d'IDs si fournis)
+    2. Classifie en mémoire avec l'index compilé des mappings (une seule fois par nom distinct)
+    3. Écrit uniquement les lignes modifiées via un UPSERT en masse, dans une seule transaction
     
     Args:
         db: Session de base de données
-        property_id: ID de la propriété (optionnel, si fourni, enrichit uniquement les transactions de cette propriété)
+        property_id: ID de la propriété (optionnel, toutes les propriétés si non fourni)
+        transaction_ids: IDs des transactions à enrichir (optionnel, toutes les transactions si non fourni)
+        names: Noms exacts des transactions à enrichir (optionnel, ignoré si transaction_ids est fourni)
     
     Returns:
-        Tuple (nombre de transactions enrichies, nombre de transactions déjà enrichies)
+        Dict avec les compteurs created, updated et unchanged
     """
-    # Récupérer toutes les transactions (filtrées par property_id si fourni)
+    transactions_query = db.query(
+        Transaction.id,
+        Transaction.property_id,
+        Transaction.date,
+        Transaction.nom
+    )
+    enriched_query = db.query(
+        EnrichedTransaction.transaction_id,
+        EnrichedTransaction.property_id,
+        EnrichedTransaction.annee,
+        EnrichedTransaction.mois,
+        EnrichedTransaction.level_1,
+        EnrichedTransaction.level_2,
+        EnrichedTransaction.level_3
+    )
+    if property_id or (names is not None and transaction_ids is None):
+        enriched_query = enriched_query.join(
+            Transaction, Transaction.id == EnrichedTransaction.transaction_id
+        )
     if property_id:
-        transactions = db.query(Transaction).filter(Transaction.property_id == property_id).all()
-        # Récupérer tous les mappings de cette propriété
-        mappings = db.query(Mapping).filter(Mapping.property_id == property_id).all()
+        transactions_query = transactions_query.filter(Transaction.property_id == property_id)
+        enriched_query = enriched_query.filter(Transaction.property_id == property_id)
+    
+    if transaction_ids is None and names is not None:
+        unique_names = sorted(set(names))
+        transactions = []
+        existing_rows = []
+        for i in range(0, len(unique_names), BULK_ENRICH_BATCH_SIZE):
+            batch = unique_names[i:i + BULK_ENRICH_BATCH_SIZE]
+            transactions.extend(transactions_query.filter(Transaction.nom.in_(batch)).all())
+            existing_rows.extend(enriched_query.filter(Transaction.nom.in_(batch)).all())
+    elif transaction_ids is None:
+        transactions = transactions_query.all()
+        existing_rows = enriched_query.all()
     else:
-        # Mode legacy : toutes les transactions (pour compatibilité)
-        transactions = db.query(Transaction).all()
-        # Récupérer tous les mappings (groupés par property_id)
-        all_mappings = db.query(Mapping).all()
-        mappings = all_mappings
-    
-    enriched_count = 0
-    already_enriched_count = 0
+        ids = sorted(set(transaction_ids))
+        transactions = []
+        existing_rows = []
+        for i in range(0, len(ids), BULK_ENRICH_BATCH_SIZE):
+            batch = ids[i:i + BULK_ENRICH_BATCH_SIZE]
+            transactions.extend(transactions_query.filter(Transaction.id.in_(batch)).all())
+            existing_rows.extend(enriched_query.filter(EnrichedTransaction.transaction_id.in_(batch)).all())
+    
+    existing = {row.transaction_id: tuple(row[1:]) for row in existing_rows}
+    
+    # Classification en mémoire : un seul passage dans l'index par (propriété, nom) distinct
+    classifications: Dict[Tuple[int, str], Tuple[Optional[str], Optional[str], Optional[str]]] = {}
+    rows_to_write = []
+    # Années modifiées par propriété (invalidation du cache des comptes de résultat)
+    changed_years: Dict[int, set] = {}
+    created_count = 0
+    updated_count = 0
+    unchanged_count = 0
     
     for transaction in transactions:
-        # Si property_id est fourni, utiliser uniquement les mappings de cette propriété
-        if property_id:
-            transaction_mappings = [m for m in mappings if m.property_id == transaction.property_id]
-        else:
-            # Mode legacy : utiliser tous les mappings (pour compatibilité)
-            transaction_mappings = mappings
+        key = (transaction.property_id, transaction.nom)
+        levels = classifications.get(key)
+        if levels is None:
+            best_mapping = get_mapping_matcher(db, transaction.property_id).find_best(transaction.nom)
+            if best_mapping:
+                levels = (best_mapping.level_1, best_mapping.level_2, best_mapping.level_3)
+            else:
+                # Pas de mapping trouvé → valeurs NULL (affichées "unassigned" dans l'interface)
+                levels = (None, None, None)
+            classifications[key] = levels
         
-        # Vérifier si déjà enrichi
-        existing = db.query(EnrichedTransaction).filter(
-            EnrichedTransaction.transaction_id == transaction.id
-        ).first()
+        values = (transaction.property_id, transaction.date.year, transaction.date.month) + levels
+        current = existing.get(transaction.id)
+        if current == values:
+            unchanged_count += 1
+            continue
         
-        if existing:
-            already_enriched_count += 1
-            # Re-enrichir quand même pour mettre à jour si le mapping a changé
-            enrich_transaction(transaction, db, transaction_mappings)
+        if current is None:
+            created_count += 1
         else:
-            enrich_transaction(transaction, db, transaction_mappings)
-            enriched_count += 1
+            updated_count += 1
+            # L'ancienne classification comptait peut-être dans une autre année/propriété
+            changed_years.setdefault(current[0], set()).add(current[1])
+        changed_years.setdefault(values[0], set()).add(values[1])
+        rows_to_write.append({
+            "transaction_id": transaction.id,
+            "property_id": values[0],
+            "annee": values[1],
+            "mois": values[2],
+            "level_1": values[3],
+            "level_2": values[4],
+            "level_3": values[5],
+        })
+    
+    if rows_to_write:
+        now = datetime.utcnow()
+        table = EnrichedTransaction.__table__
+        insert_stmt = sqlite_insert(table)
+        upsert_stmt = insert_stmt.on_conflict_do_update(
+            index_elements=[table.c.transaction_id],
+            set_={
+                "property_id": insert_stmt.excluded.property_id,
+                "annee": insert_stmt.excluded.annee,
+                "mois": insert_stmt.excluded.mois,
+                "level_1": insert_stmt.excluded.level_1,
+                "level_2": insert_stmt.excluded.level_2,
+                "level_3": insert_stmt.excluded.level_3,
+                "updated_at": insert_stmt.excluded.updated_at,
+            }
+        )
+        try:
+            for i in range(0, len(rows_to_write), BULK_ENRICH_BATCH_SIZE):
+                batch = rows_to_write[i:i + BULK_ENRICH_BATCH_SIZE]
+                for row in batch:
+                    row["created_at"] = now
+                    row["updated_at"] = now
+                db.execute(upsert_stmt, batch)
+            for changed_property_id, years in changed_years.items():
+                invalidate_compte_resultat_cache(db, changed_property_id, years)
+                # Écriture Core : la table de faits est recalculée explicitement
+                refresh_transaction_facts(db, changed_property_id, years)
+                invalidate_property_facets_on_commit(db, changed_property_id)
+            db.commit()
+        except Exception:
+            db.rollback()
+            raise
+    
+    logger.info(
+        f"[enrich_bulk] property_id={property_id}: {len(transactions)} transaction(s), "
+        f"{len(classifications)} nom(s) distinct(s) - créées={created_count}, "
+        f"mises à jour={updated_count}, inchangées={unchanged_count}"
+    )
+    
+    return {
+        "created": created_count,
+        "updated": updated_count,
+        "unchanged": unchanged_count,
+    }
+
+
+def enrich_all_transactions(db: Session, property_id: Optional[int] = None) -> Tuple[int, int]:
+    """
+    Enrichit toutes les transactions (nouvelles et déjà enrichies) via le moteur en masse.
     
-    return enriched_count, already_enriched_count
+    Args:
+        db: Session de base de données
+        property_id: ID de la propriété (optionnel, si fourni, enrichit uniquement les transactions de cette propriété)
+    
+    Returns:
+        Tuple (nombre de transactions enrichies, nombre de transactions déjà enrichies)
+    """
+    counts = bulk_enrich_transactions(db, property_id=property_id)
+    return counts["created"], counts["updated"] + counts["unchanged"]
+
+
+def get_transaction_names(
+    db: Session,
+    property_id: int,
+    containing: Optional[Iterable[str]] = None
+) -> Dict[str, int]:
+    """
+    Liste les noms distincts des transactions d'une propriété avec leur nombre de transactions.
+    
+    Lecture de l'index (property_id, nom) uniquement, sans charger les transactions.
+    
+    Args:
+        db: Session de base de données
+        property_id: ID de la propriété
+        containing: Ne garder que les noms contenant au moins une de ces chaînes (optionnel,
+            sensible à la casse, comme le matching des mappings)
+    
+    Returns:
+        Dict nom → nombre de transactions
+    """
+    query = db.query(Transaction.nom, func.count(Transaction.id)).filter(
+        Transaction.property_id == property_id
+    )
+    if containing is not None:
+        fragments = sorted({fragment.strip() for fragment in containing if fragment and fragment.strip()})
+        if not fragments:
+            return {}
+        query = query.filter(or_(*(func.instr(Transaction.nom, fragment) > 0 for fragment in fragments)))
+    return dict(query.group_by(Transaction.nom).all())
+
+
+def re_enrich_for_mapping_names(db: Session, property_id: int, mapping_names: Iterable[str]) -> Dict[str, int]:
+    """
+    Re-enrichit les transactions impactées par la création, modification ou suppression de mappings.
+    
+    Un mapping ne peut correspondre à une transaction que si son nom est contenu dans celui
+    de la transaction (exact, préfixe, contient, PRLV SEPA, VIR STRIPE). Les noms impactés sont
+    donc les noms distincts contenant l'ancien ou le nouveau nom du mapping : chacun est
+    reclassifié une seule fois, et seules les transactions dont la classification change sont écrites.
+    
+    À appeler après le commit du mapping (l'index compilé des mappings est alors à jour).
+    
+    Args:
+        db: Session de base de données
+        property_id: ID de la propriété
+        mapping_names: Noms des mappings modifiés (ancien et nouveau nom pour une modification)
+    
+    Returns:
+        Dict avec les compteurs names, transactions, created, updated et unchanged
+    """
+    names = get_transaction_names(db, property_id, containing=mapping_names)
+    if not names:
+        return {"names": 0, "transactions": 0, "created": 0, "updated": 0, "unchanged": 0}
+    
+    counts = bulk_enrich_transactions(db, property_id=property_id, names=names)
+    counts.update({"names": len(names), "transactions": sum(names.values())})
+    logger.info(
+        f"[enrich_mapping] property_id={property_id}: {counts['names']} nom(s) impacté(s), "
+        f"{counts['transactions']} transaction(s), {counts['created'] + counts['updated']} écrite(s)"
+    )
+    return counts
 
 
 def update_transaction_classification(
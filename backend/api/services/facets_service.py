@@ -0,0 +1,301 @@
+"""
+Facettes d'une propriété pour l'interface de classification.
+
+⚠️ Before making changes, read: ../../docs/workflow/BEST_PRACTICES.md
+
+Regroupe en une réponse ce que la page des transactions chargeait en une dizaine d'appels
+(/transactions/unique-values par colonne, /mappings/combinations, /mappings/allowed-level*) :
+- Transactions : valeurs distinctes et effectifs de nom, level_1/2/3, annee, mois
+- Mappings : combinaisons (level_1, level_2, level_3) et leurs effectifs
+- Mappings autorisés : combinaisons de la hiérarchie (get_allowed_hierarchy)
+
+Calcul en trois requêtes groupées (noms sur transactions, niveaux et périodes sur transaction_facts,
+combinaisons sur mappings), puis mise en cache par propriété. Le cache est indexé par la version
+des données de la propriété, incrémentée :
+- Écritures ORM (flush) sur Transaction, EnrichedTransaction, Mapping
+- UPDATE/DELETE en masse ORM sur ces tables (toutes les propriétés)
+- Écritures Core (import de transactions, enrichissement en masse, import de mappings) :
+  appel explicite de invalidate_property_facets_on_commit
+Les mappings autorisés sont couverts par la version de leur hiérarchie.
+"""
+
+import hashlib
+import json
+import logging
+import threading
+from itertools import chain
+from typing import Any, Dict, List, Optional, Tuple
+
+from sqlalchemy import event, func, inspect, select
+from sqlalchemy.orm import Session
+
+from backend.database.models import Transaction, EnrichedTransaction, TransactionFact, Mapping
+from backend.api.services.mapping_obligatoire_service import get_allowed_hierarchy
+
+logger = logging.getLogger(__name__)
+
+# Colonnes des facettes de transactions (mêmes noms que /transactions/unique-values)
+TRANSACTION_FACET_COLUMNS = ("nom", "level_1", "level_2", "level_3", "annee", "mois")
+
+
+class PropertyFacets:
+    """
+    Facettes calculées d'une propriété.
+
+    content est le corps JSON de la réponse, version une empreinte du contenu (ETag).
+    """
+
+    def __init__(self, content: Dict[str, Any]):
+        self.content = content
+        self.version = hashlib.sha1(
+            json.dumps(content, ensure_ascii=False, sort_keys=True).encode("utf-8")
+        ).hexdigest()[:16]
+
+
+def _facet_values(counts: Dict[Any, int]) -> List[Dict[str, Any]]:
+    """Valeurs non vides triées, avec leur effectif (valeurs converties en texte)."""
+    return [
+        {"value": str(value), "count": counts[value]}
+        for value in sorted(value for value in counts if value is not None and value != "")
+    ]
+
+
+def _combination_sort_key(row) -> Tuple:
+    """Tri des combinaisons (level_1, level_2, level_3, ...) avec les valeurs None en premier."""
+    return tuple((value is not None, value or "") for value in row[:3])
+
+
+def compute_property_facets(db: Session, property_id: int) -> PropertyFacets:
+    """
+    Calculer les facettes d'une propriété (sans cache).
+
+    Args:
+        db: Session de base de données
+        property_id: ID de la propriété
+
+    Returns:
+        PropertyFacets
+    """
+    name_counts = dict(db.execute(
+        select(Transaction.nom, func.count()).where(
+            Transaction.property_id == property_id
+        ).group_by(Transaction.nom)
+    ).all())
+
+    # Transactions enrichies : les effectifs par (année, mois, niveaux) sont déjà dans transaction_facts
+    level_counts: Dict[str, Dict[Any, int]] = {column: {} for column in TRANSACTION_FACET_COLUMNS[1:]}
+    enriched_count = 0
+    unassigned_count = 0
+    fact_rows = db.execute(
+        select(
+            TransactionFact.annee,
+            TransactionFact.mois,
+            TransactionFact.level_1,
+            TransactionFact.level_2,
+            TransactionFact.level_3,
+            func.sum(TransactionFact.transaction_count)
+        ).where(
+            TransactionFact.property_id == property_id
+        ).group_by(
+            TransactionFact.annee,
+            TransactionFact.mois,
+            TransactionFact.level_1,
+            TransactionFact.level_2,
+            TransactionFact.level_3
+        )
+    ).all()
+    for annee, mois, level_1, level_2, level_3, count in fact_rows:
+        enriched_count += count
+        if level_1 is None:
+            unassigned_count += count
+        for column, value in (("level_1", level_1), ("level_2", level_2), ("level_3", level_3), ("annee", annee), ("mois", mois)):
+            counts = level_counts[column]
+            counts[value] = counts.get(value, 0) + count
+
+    mapping_rows = sorted(db.execute(
+        select(Mapping.level_1, Mapping.level_2, Mapping.level_3, func.count()).where(
+            Mapping.property_id == property_id
+        ).group_by(Mapping.level_1, Mapping.level_2, Mapping.level_3)
+    ).all(), key=_combination_sort_key)
+
+    hierarchy = get_allowed_hierarchy(db, property_id)
+    allowed_combinations = sorted(hierarchy.combinations, key=_combination_sort_key)
+
+    content = {
+        "property_id": property_id,
+        "transactions": {
+            "total": sum(name_counts.values()),
+            "enriched": enriched_count,
+            "unassigned": unassigned_count,
+            "facets": {
+                "nom": _facet_values(name_counts),
+                **{column: _facet_values(counts) for column, counts in level_counts.items()},
+            },
+        },
+        "mappings": {
+            "total": sum(row[3] for row in mapping_rows),
+            "combinations": [
+                {"level_1": level_1, "level_2": level_2, "level_3": level_3, "count": count}
+                for level_1, level_2, level_3, count in mapping_rows
+            ],
+        },
+        "allowed": {
+            "level_1": hierarchy.level_1_values,
+            "level_2": hierarchy.level_2_values,
+            "combinations": [
+                {"level_1": level_1, "level_2": level_2, "level_3": level_3}
+                for level_1, level_2, level_3 in allowed_combinations
+            ],
+        },
+    }
+    return PropertyFacets(content)
+
+
+# ========== Cache par version de données ==========
+
+# property_id -> ((version des données, version des mappings autorisés), facettes)
+_facets_cache: Dict[int, Tuple[Tuple[Tuple[int, int], str], PropertyFacets]] = {}
+_facets_generations: Dict[Optional[int], int] = {}
+_facets_lock = threading.Lock()
+
+# Clé de session.info pour les propriétés dont les données ont changé (invalidées au commit/rollback)
+_PENDING_KEY = "property_facets_pending_property_ids"
+# Marqueur "toutes les propriétés" (mise à jour/suppression en masse)
+_ALL_PROPERTIES = None
+
+
+def get_data_version(property_id: int) -> Tuple[int, int]:
+    """
+    Version des données d'une propriété dans ce processus (incrémentée à chaque écriture).
+
+    Args:
+        property_id: ID de la propriété
+
+    Returns:
+        Tuple (version de la propriété, version globale)
+    """
+    with _facets_lock:
+        return _facets_generations.get(property_id, 0), _facets_generations.get(_ALL_PROPERTIES, 0)
+
+
+def get_property_facets(db: Session, property_id: int) -> PropertyFacets:
+    """
+    Récupérer les facettes d'une propriété (calculées une fois par version de données).
+
+    Args:
+        db: Session de base de données
+        property_id: ID de la propriété
+
+    Returns:
+        PropertyFacets
+    """
+    key = (get_data_version(property_id), get_allowed_hierarchy(db, property_id).version)
+    with _facets_lock:
+        cached = _facets_cache.get(property_id)
+    if cached is not None and cached[0] == key:
+        return cached[1]
+
+    facets = compute_property_facets(db, property_id)
+
+    # Ne pas mettre en cache si une écriture a eu lieu pendant le calcul
+    if get_data_version(property_id) == key[0]:
+        with _facets_lock:
+            _facets_cache[property_id] = (key, facets)
+
+    logger.info(f"[Facets] Facettes calculées pour property_id={property_id} (version {facets.version})")
+    return facets
+
+
+def invalidate_property_facets(property_id: Optional[int] = None) -> None:
+    """
+    Invalider les facettes d'une propriété (ou de toutes les propriétés si property_id est None).
+
+    Args:
+        property_id: ID de la propriété (optionnel, toutes les propriétés si non fourni)
+    """
+    with _facets_lock:
+        _facets_generations[property_id] = _facets_generations.get(property_id, 0) + 1
+        if property_id is _ALL_PROPERTIES:
+            _facets_cache.clear()
+        else:
+            _facets_cache.pop(property_id, None)
+
+
+def invalidate_property_facets_on_commit(session: Session, property_id: int) -> None:
+    """
+    Invalider les facettes d'une propriété après une écriture Core (non vue par les
+    événements de session), maintenant puis au commit/rollback.
+
+    Args:
+        session: Session qui a écrit les données
+        property_id: ID de la propriété
+    """
+    invalidate_property_facets(property_id)
+    session.info.setdefault(_PENDING_KEY, set()).add(property_id)
+
+
+def _invalidate_pending(session: Session) -> None:
+    pending = session.info.pop(_PENDING_KEY, None)
+    if not pending:
+        return
+    if _ALL_PROPERTIES in pending:
+        invalidate_property_facets()
+        return
+    for property_id in pending:
+        invalidate_property_facets(property_id)
+
+
+# Attributs qui modifient les facettes, par modèle (ex : une mise à jour du solde seul est ignorée)
+_FACET_ATTRIBUTES = {
+    Transaction: ("property_id", "nom", "date"),
+    EnrichedTransaction: ("property_id", "transaction_id", "annee", "mois", "level_1", "level_2", "level_3"),
+    Mapping: ("property_id", "level_1", "level_2", "level_3"),
+}
+
+
+def _changes_facets(session: Session, obj) -> bool:
+    attributes = _FACET_ATTRIBUTES.get(type(obj))
+    if attributes is None:
+        return False
+    if obj not in session.dirty:
+        return True
+    state = inspect(obj)
+    return any(state.attrs[attribute].history.has_changes() for attribute in attributes)
+
+
+@event.listens_for(Session, "after_flush")
+def _invalidate_on_flush(session: Session, flush_context) -> None:
+    """Invalide les facettes des propriétés dont des transactions, enrichissements ou mappings ont changé."""
+    property_ids = set()
+    for obj in chain(session.new, session.dirty, session.deleted):
+        if _changes_facets(session, obj):
+            property_ids.add(obj.property_id)
+            # Déplacement vers une autre propriété : l'ancienne propriété change aussi
+            property_ids.update(inspect(obj).attrs.property_id.history.deleted or ())
+    if not property_ids:
+        return
+    for property_id in property_ids:
+        invalidate_property_facets(property_id)
+    # Invalider à nouveau au commit/rollback : une autre session a pu recalculer
+    # les facettes entre le flush et le commit
+    session.info.setdefault(_PENDING_KEY, set()).update(property_ids)
+
+
+@event.listens_for(Session, "do_orm_execute")
+def _invalidate_on_bulk_statement(orm_execute_state) -> None:
+    """Invalide toutes les facettes lors d'un INSERT/UPDATE/DELETE en masse ORM sur ces tables."""
+    if not (orm_execute_state.is_insert or orm_execute_state.is_update or orm_execute_state.is_delete):
+        return
+    if any(mapper.class_ in _FACET_ATTRIBUTES for mapper in orm_execute_state.all_mappers):
+        invalidate_property_facets()
+        orm_execute_state.session.info.setdefault(_PENDING_KEY, set()).add(_ALL_PROPERTIES)
+
+
+@event.listens_for(Session, "after_commit")
+def _invalidate_on_commit(session: Session) -> None:
+    _invalidate_pending(session)
+
+
+@event.listens_for(Session, "after_rollback")
+def _invalidate_on_rollback(session: Session) -> None:
+    _invalidate_pending(session)
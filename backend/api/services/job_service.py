@@ -0,0 +1,350 @@
+"""
+Tâches de fond pour les recalculs longs.
+
+⚠️ Before making changes, read: ../../docs/workflow/BEST_PRACTICES.md
+
+Les re-enrichissements et recalculs lourds sont exécutés hors du traitement de la requête :
+- Chaque tâche est persistée dans la table jobs (statut, avancement, résultat ou erreur)
+- Un pool de threads en processus exécute les tâches, chacune avec sa propre session
+- Les tâches d'une même propriété sont exécutées une à la fois, dans l'ordre de soumission
+- Un verrou par propriété (property_lock) est pris par les tâches et par les appels synchrones
+  des mêmes recalculs : deux recalculs d'une même propriété ne s'exécutent jamais en parallèle
+
+Au démarrage du pool, les tâches "running" d'un processus précédent sont marquées en échec et
+les tâches "pending" sont soumises à nouveau.
+"""
+
+import json
+import logging
+import os
+import threading
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import contextmanager
+from datetime import datetime
+from typing import Any, Callable, Dict, Iterator, Optional
+
+from sqlalchemy.orm import Session
+
+from backend.database.models import Job
+
+logger = logging.getLogger(__name__)
+
+# Nombre de workers du pool (les tâches d'une même propriété restent séquentielles)
+JOB_WORKERS = int(os.getenv("LMNP_JOB_WORKERS", "2"))
+
+JOB_STATUS_PENDING = "pending"
+JOB_STATUS_RUNNING = "running"
+JOB_STATUS_SUCCEEDED = "succeeded"
+JOB_STATUS_FAILED = "failed"
+
+# property_id -> verrou des recalculs de la propriété (partagé par les tâches et les routes synchrones)
+_property_locks: Dict[int, threading.Lock] = {}
+_property_locks_lock = threading.Lock()
+
+
+@contextmanager
+def property_lock(property_id: int) -> Iterator[None]:
+    """
+    Exécuter un recalcul d'une propriété en excluant les autres (tâche de fond ou appel synchrone).
+
+    Args:
+        property_id: ID de la propriété
+    """
+    with _property_locks_lock:
+        lock = _property_locks.setdefault(property_id, threading.Lock())
+    with lock:
+        yield
+
+
+# Signature d'un callback d'avancement : (fraction entre 0 et 1, message optionnel)
+ProgressCallback = Callable[[float, Optional[str]], None]
+
+
+def _run_re_enrich(db: Session, property_id: int, params: Dict[str, Any], progress: ProgressCallback) -> Dict[str, Any]:
+    """Re-enrichir toutes les transactions de la propriété (POST /enrichment/re-enrich)."""
+    from backend.api.services.enrichment_service import bulk_enrich_transactions
+
+    progress(0.1, "Re-enrichissement des transactions")
+    counts = bulk_enrich_transactions(db, property_id=property_id)
+    return {
+        "created_count": counts["created"],
+        "updated_count": counts["updated"],
+        "unchanged_count": counts["unchanged"],
+    }
+
+
+def _run_amortization_recalculate(db: Session, property_id: int, params: Dict[str, Any], progress: ProgressCallback) -> Dict[str, Any]:
+    """Recalculer les amortissements de la propriété (POST /amortization/recalculate)."""
+    from backend.api.services.amortization_service import sync_property_amortizations
+    from backend.api.services.compte_resultat_service import invalidate_all_compte_resultat
+
+    progress(0.1, "Recalcul des amortissements")
+    stats = sync_property_amortizations(db, property_id=property_id)
+    if stats["touched"]:
+        progress(0.9, "Invalidation des comptes de résultat")
+        invalidate_all_compte_resultat(db, property_id)
+    return {"results_created": stats["results"], "touched": stats["touched"]}
+
+
+def _run_allowed_mappings_reset(db: Session, property_id: int, params: Dict[str, Any], progress: ProgressCallback) -> Dict[str, Any]:
+    """Reset des mappings autorisés de la propriété (POST /mappings/allowed/reset)."""
+    from backend.api.services.mapping_obligatoire_service import reset_allowed_mappings
+
+    progress(0.1, "Reset des mappings autorisés")
+    stats = reset_allowed_mappings(db, property_id)
+    return {
+        "deleted_allowed": stats["deleted_allowed"],
+        "deleted_mappings": stats["deleted_mappings"],
+        "unassigned_transactions": stats["unassigned_transactions"],
+    }
+
+
+# Types de tâches : kind -> fonction (db, property_id, params, progress) -> résultat JSON
+JOB_HANDLERS: Dict[str, Callable[[Session, int, Dict[str, Any], ProgressCallback], Dict[str, Any]]] = {
+    "re_enrich": _run_re_enrich,
+    "amortization_recalculate": _run_amortization_recalculate,
+    "allowed_mappings_reset": _run_allowed_mappings_reset,
+}
+
+
+class JobRunner:
+    """
+    Pool de workers qui exécute les tâches persistées, une à la fois par propriété.
+
+    Les tâches d'une propriété déjà en cours attendent dans une file par propriété (sans
+    occuper de worker) ; la suivante est soumise au pool à la fin de la précédente.
+    """
+
+    def __init__(self, session_factory: Callable[[], Session], max_workers: int = JOB_WORKERS):
+        """
+        Args:
+            session_factory: Fabrique de sessions (une session par tâche et par mise à jour d'avancement)
+            max_workers: Nombre de threads du pool
+        """
+        self.session_factory = session_factory
+        self._executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="lmnp-job")
+        self._lock = threading.Lock()
+        self._waiting: Dict[int, deque] = {}  # property_id -> IDs des tâches en attente
+        self._active: set = set()  # property_id avec une tâche en cours
+        self._idle = threading.Condition(self._lock)
+
+    def submit(self, db: Session, kind: str, property_id: int, params: Optional[Dict[str, Any]] = None) -> Job:
+        """
+        Créer une tâche (statut pending) et la mettre en file.
+
+        Args:
+            db: Session de base de données (la tâche est validée avec cette session)
+            kind: Type de tâche (clé de JOB_HANDLERS)
+            property_id: ID de la propriété
+            params: Paramètres de la tâche (optionnel)
+
+        Returns:
+            Tâche créée
+
+        Raises:
+            ValueError: Si le type de tâche est inconnu
+        """
+        if kind not in JOB_HANDLERS:
+            raise ValueError(f"Type de tâche inconnu: {kind}. Types supportés: {sorted(JOB_HANDLERS)}")
+        job = Job(
+            property_id=property_id,
+            kind=kind,
+            status=JOB_STATUS_PENDING,
+            params=json.dumps(params or {}),
+            progress=0.0
+        )
+        db.add(job)
+        db.commit()
+        db.refresh(job)
+        logger.info(f"[Jobs] Tâche {job.id} ({kind}) soumise pour property_id={property_id}")
+        self._enqueue(job.id, property_id)
+        return job
+
+    def recover(self) -> None:
+        """Marquer en échec les tâches interrompues et soumettre à nouveau les tâches en attente."""
+        db = self.session_factory()
+        try:
+            interrupted = db.query(Job).filter(Job.status == JOB_STATUS_RUNNING).update({
+                Job.status: JOB_STATUS_FAILED,
+                Job.error: "Tâche interrompue (redémarrage du serveur)",
+                Job.finished_at: datetime.utcnow()
+            }, synchronize_session=False)
+            db.commit()
+            pending = db.query(Job.id, Job.property_id).filter(
+                Job.status == JOB_STATUS_PENDING
+            ).order_by(Job.id).all()
+        finally:
+            db.close()
+        if interrupted or pending:
+            logger.info(f"[Jobs] Reprise : {interrupted} tâche(s) interrompue(s), {len(pending)} tâche(s) en attente")
+        for job_id, property_id in pending:
+            self._enqueue(job_id, property_id)
+
+    def wait_idle(self, timeout: Optional[float] = None) -> bool:
+        """
+        Attendre que toutes les tâches soumises soient terminées.
+
+        Args:
+            timeout: Délai maximum en secondes (optionnel)
+
+        Returns:
+            True si le pool est inactif, False si le délai est dépassé
+        """
+        with self._idle:
+            return self._idle.wait_for(lambda: not self._active, timeout=timeout)
+
+    def shutdown(self, wait: bool = True) -> None:
+        """Arrêter le pool (les tâches en attente restent pending et seront reprises au redémarrage)."""
+        with self._lock:
+            self._waiting.clear()
+        self._executor.shutdown(wait=wait, cancel_futures=True)
+
+    def _enqueue(self, job_id: int, property_id: int) -> None:
+        with self._lock:
+            if property_id in self._active:
+                self._waiting.setdefault(property_id, deque()).append(job_id)
+                return
+            self._active.add(property_id)
+        self._executor.submit(self._run_and_continue, job_id, property_id)
+
+    def _run_and_continue(self, job_id: int, property_id: int) -> None:
+        """Exécuter la tâche puis soumettre la suivante de la même propriété."""
+        try:
+            self._run(job_id)
+        finally:
+            with self._lock:
+                waiting = self._waiting.get(property_id)
+                next_job_id = waiting.popleft() if waiting else None
+                if waiting is not None and not waiting:
+                    del self._waiting[property_id]
+                if next_job_id is None:
+                    self._active.discard(property_id)
+                    self._idle.notify_all()
+            if next_job_id is not None:
+                self._executor.submit(self._run_and_continue, next_job_id, property_id)
+
+    def _update(self, job_id: int, **values: Any) -> None:
+        """Mettre à jour une tâche dans une session dédiée (visible immédiatement par les autres requêtes)."""
+        db = self.session_factory()
+        try:
+            db.query(Job).filter(Job.id == job_id).update(
+                {getattr(Job, key): value for key, value in values.items()}, synchronize_session=False
+            )
+            db.commit()
+        finally:
+            db.close()
+
+    def _run(self, job_id: int) -> None:
+        db = self.session_factory()
+        try:
+            job = db.get(Job, job_id)
+            if job is None or job.status != JOB_STATUS_PENDING:
+                return
+            kind, property_id = job.kind, job.property_id
+            params = json.loads(job.params) if job.params else {}
+            db.commit()
+
+            self._update(job_id, status=JOB_STATUS_RUNNING, started_at=datetime.utcnow(), message="Démarrage")
+            logger.info(f"[Jobs] Tâche {job_id} ({kind}) démarrée pour property_id={property_id}")
+
+            def progress(fraction: float, message: Optional[str] = None) -> None:
+                # À appeler entre deux étapes validées (SQLite : un seul écrivain à la fois)
+                values = {"progress": max(0.0, min(1.0, fraction))}
+                if message is not None:
+                    values["message"] = message[:255]
+                try:
+                    self._update(job_id, **values)
+                except Exception as e:
+                    # L'avancement est indicatif : ne fait jamais échouer la tâche
+                    logger.warning(f"[Jobs] Avancement de la tâche {job_id} non enregistré: {e}")
+
+            try:
+                with property_lock(property_id):
+                    result = JOB_HANDLERS[kind](db, property_id, params, progress)
+                    db.commit()
+            except Exception as e:
+                db.rollback()
+                logger.error(f"[Jobs] Tâche {job_id} ({kind}) en échec: {e}", exc_info=True)
+                self._update(
+                    job_id, status=JOB_STATUS_FAILED, error=str(e), message="Échec", finished_at=datetime.utcnow()
+                )
+                return
+
+            self._update(
+                job_id, status=JOB_STATUS_SUCCEEDED, progress=1.0, message="Terminé",
+                result=json.dumps(result, default=str), finished_at=datetime.utcnow()
+            )
+            logger.info(f"[Jobs] Tâche {job_id} ({kind}) terminée pour property_id={property_id}")
+        except Exception as e:
+            # Erreur hors de la tâche (base indisponible...) : ne pas bloquer la file de la propriété
+            logger.error(f"[Jobs] Erreur du worker pour la tâche {job_id}: {e}", exc_info=True)
+        finally:
+            db.close()
+
+
+_runner: Optional[JobRunner] = None
+_runner_lock = threading.Lock()
+
+
+def get_job_runner() -> JobRunner:
+    """
+    Pool de tâches du processus (créé au premier appel, avec reprise des tâches persistées).
+
+    Returns:
+        JobRunner partagé
+    """
+    global _runner
+    with _runner_lock:
+        if _runner is None:
+            from backend.database.connection import SessionLocal
+            _runner = JobRunner(SessionLocal)
+            _runner.recover()
+        return _runner
+
+
+def shutdown_job_runner() -> None:
+    """Arrêter le pool de tâches du processus s'il a été démarré (arrêt de l'application)."""
+    global _runner
+    with _runner_lock:
+        if _runner is not None:
+            _runner.shutdown(wait=True)
+            _runner = None
+
+
+def configure_job_runner(session_factory: Callable[[], Session], max_workers: int = JOB_WORKERS) -> JobRunner:
+    """
+    Remplacer le pool de tâches du processus (ex : autre base de données).
+
+    Args:
+        session_factory: Fabrique de sessions
+        max_workers: Nombre de threads du pool
+
+    Returns:
+        Nouveau JobRunner
+    """
+    global _runner
+    with _runner_lock:
+        if _runner is not None:
+            _runner.shutdown(wait=True)
+        _runner = JobRunner(session_factory, max_workers)
+        return _runner
+
+
+def submit_job(db: Session, kind: str, property_id: int, params: Optional[Dict[str, Any]] = None) -> Job:
+    """
+    Soumettre une tâche de fond au pool du processus.
+
+    Args:
+        db: Session de base de données
+        kind: Type de tâche (clé de JOB_HANDLERS)
+        property_id: ID de la propriété
+        params: Paramètres de la tâche (optionnel)
+
+    Returns:
+        Tâche créée (statut pending)
+
+    Raises:
+        ValueError: Si le type de tâche est inconnu
+    """
+    return get_job_runner().submit(db, kind, property_id, params)
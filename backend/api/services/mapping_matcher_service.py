@@ -0,0 +1,350 @@
+"""
+Service d'indexation des mappings pour le matching des transactions.
+
+⚠️ Before making changes, read: ../../docs/workflow/BEST_PRACTICES.md
+
+Ce service compile les mappings d'une propriété dans un index en mémoire
+pour éviter de parcourir tous les mappings pour chaque transaction :
+- Un arbre de préfixes (trie) sur Mapping.nom : correspondances exactes, préfixes, PRLV SEPA
+- Un second trie parcouru à chaque position du nom de transaction pour les mappings
+  de type "contient" (is_prefix_match = False) et le cas spécial VIR STRIPE
+- Un cache par propriété, invalidé automatiquement à chaque création, modification
+  ou suppression de mapping (événements de session SQLAlchemy)
+- Une mémoïsation des résultats par nom de transaction dans chaque index : un nom répété
+  des milliers de fois (loyers, prélèvements SEPA...) n'est classifié qu'une fois par version
+  des mappings de la propriété (l'index, et donc sa mémoïsation, est remplacé à chaque modification)
+
+Les règles de matching (seuil de 70%, mapping le plus long, conflit → None) sont
+définies une seule fois dans evaluate_mapping_match et partagées avec enrichment_service.
+"""
+
+import logging
+import threading
+from itertools import chain
+from typing import Any, Dict, Iterable, Iterator, Optional, Tuple
+
+from sqlalchemy import event
+from sqlalchemy.orm import Session
+
+from backend.database.models import Mapping
+
+logger = logging.getLogger(__name__)
+
+# Seuil minimum de similarité pour les mappings préfixes/contient (70%)
+# Cela évite qu'un mapping générique comme "achat appart" (12 chars)
+# mappe "achat appart (Immobilisation Facade/Toiture)" (47 chars)
+MIN_SIMILARITY_RATIO = 0.70
+
+# Nombre maximum de noms mémoïsés par index (au-delà, les nouveaux noms sont classifiés sans être retenus)
+MATCH_MEMO_MAX_SIZE = 100_000
+
+
+def evaluate_mapping_match(
+    transaction_name: str,
+    mapping_name: str,
+    is_prefix_match: Optional[bool],
+    contains_fallback: bool = False
+) -> Optional[int]:
+    """
+    Évalue si un mapping correspond à une transaction et retourne la longueur du match.
+
+    Les deux noms doivent déjà être normalisés (strip). Les règles sont évaluées dans l'ordre :
+    1. Correspondance exacte → toujours utiliser (même si court)
+    2. Cas spécial PRLV SEPA : préfixe uniquement, sans seuil de similarité
+    3. Cas spécial VIR STRIPE : le mapping "VIR STRIPE" correspond à toute transaction qui le contient
+    4. Préfixe (si is_prefix_match) avec ratio longueur_mapping / longueur_transaction >= 70%
+    5. Contient (si not is_prefix_match, ou si contains_fallback) avec le même seuil
+
+    Args:
+        transaction_name: Nom de la transaction (normalisé)
+        mapping_name: Nom du mapping (normalisé)
+        is_prefix_match: Si True, le mapping est un mapping par préfixe
+        contains_fallback: Si True, un mapping préfixe qui ne correspond pas par préfixe
+            est aussi testé en "contient" (logique de transaction_matches_mapping_name)
+
+    Returns:
+        Longueur du match (len(mapping_name)) si le mapping correspond, None sinon
+    """
+    # Correspondance exacte → toujours utiliser (même si court)
+    if transaction_name == mapping_name:
+        return len(mapping_name)
+
+    # Cas spécial pour PRLV SEPA
+    if 'PRLV SEPA' in transaction_name and 'PRLV SEPA' in mapping_name:
+        return len(mapping_name) if transaction_name.startswith(mapping_name) else None
+
+    # Cas spécial pour VIR STRIPE (correspondance exacte)
+    if 'VIR STRIPE' in transaction_name and mapping_name == 'VIR STRIPE':
+        return len(mapping_name)
+
+    # Cas général : recherche par préfixe ou contient
+    # MAIS seulement si le ratio de similarité est suffisant
+    if is_prefix_match and transaction_name.startswith(mapping_name):
+        pass
+    elif (contains_fallback or not is_prefix_match) and mapping_name in transaction_name:
+        pass
+    else:
+        return None
+
+    transaction_length = len(transaction_name)
+    mapping_length = len(mapping_name)
+    similarity_ratio = mapping_length / transaction_length if transaction_length > 0 else 0
+    if similarity_ratio >= MIN_SIMILARITY_RATIO:
+        return mapping_length
+
+    # Mapping trop générique → ignorer
+    logger.debug(
+        f"[MappingMatcher] Mapping générique ignoré: "
+        f"'{mapping_name}' ({mapping_length} chars) vs '{transaction_name}' ({transaction_length} chars) "
+        f"(ratio={similarity_ratio:.2%} < {MIN_SIMILARITY_RATIO:.2%})"
+    )
+    return None
+
+
+class _NameTrie:
+    """Arbre de préfixes sur les noms de mappings (un nœud = un dict caractère → nœud)."""
+
+    # Clé réservée pour les entrées terminales d'un nœud (jamais un caractère)
+    _ENTRIES = None
+
+    def __init__(self):
+        self.root: Dict[Any, Any] = {}
+
+    def insert(self, name: str, entry: Tuple[str, Any]) -> None:
+        node = self.root
+        for char in name:
+            node = node.setdefault(char, {})
+        node.setdefault(self._ENTRIES, []).append(entry)
+
+    def iter_prefixes_of(self, text: str, start: int = 0) -> Iterator[Tuple[str, Any]]:
+        """Itère sur les entrées dont le nom est un préfixe de text[start:]."""
+        node = self.root
+        entries = node.get(self._ENTRIES)
+        if entries:
+            yield from entries
+        for position in range(start, len(text)):
+            node = node.get(text[position])
+            if node is None:
+                return
+            entries = node.get(self._ENTRIES)
+            if entries:
+                yield from entries
+
+
+class MappingMatcher:
+    """
+    Index compilé des mappings d'une propriété.
+
+    Chaque mapping est indexé par son nom normalisé. Un mapping ne peut correspondre
+    à une transaction que si son nom est une sous-chaîne du nom de la transaction :
+    seuls ces candidats sont évalués avec evaluate_mapping_match, au lieu de tous
+    les mappings de la propriété.
+
+    Les objets indexés doivent exposer nom et is_prefix_match ; ils sont retournés
+    tels quels (objets Mapping ou lignes de requête avec level_1/level_2/level_3).
+    """
+
+    def __init__(self, mappings: Iterable[Any]):
+        self._prefix_trie = _NameTrie()
+        self._contains_trie = _NameTrie()
+        self.size = 0
+        # Nom de transaction → meilleur mapping (ou None), pour cette version des mappings
+        self._memo: Dict[str, Optional[Any]] = {}
+        # Nombre de noms réellement évalués (hors mémoïsation)
+        self.match_count = 0
+
+        for mapping in mappings:
+            mapping_name = mapping.nom.strip()
+            entry = (mapping_name, mapping)
+            # Tous les mappings peuvent correspondre par préfixe (exact, PRLV SEPA, préfixe)
+            self._prefix_trie.insert(mapping_name, entry)
+            # Seuls les mappings "contient" et VIR STRIPE peuvent correspondre au milieu du nom
+            if not mapping.is_prefix_match or mapping_name == 'VIR STRIPE':
+                self._contains_trie.insert(mapping_name, entry)
+            self.size += 1
+
+    def _iter_candidates(self, transaction_name: str) -> Iterator[Tuple[str, Any]]:
+        seen = set()
+        candidates = chain(
+            self._prefix_trie.iter_prefixes_of(transaction_name),
+            chain.from_iterable(
+                self._contains_trie.iter_prefixes_of(transaction_name, start)
+                for start in range(1, len(transaction_name))
+            )
+        )
+        for entry in candidates:
+            if id(entry) not in seen:
+                seen.add(id(entry))
+                yield entry
+
+    def find_best(self, transaction_name: str) -> Optional[Any]:
+        """
+        Trouve le meilleur mapping pour un nom de transaction (même règles que find_best_mapping).
+
+        Le résultat est mémoïsé par nom : un nom déjà classifié par cet index n'est pas réévalué.
+
+        Returns:
+            Le mapping le plus long qui correspond, ou None si aucun mapping ne correspond
+            ou si plusieurs mappings de même longueur correspondent
+        """
+        try:
+            return self._memo[transaction_name]
+        except KeyError:
+            pass
+        best_match = self._match(transaction_name)
+        if len(self._memo) < MATCH_MEMO_MAX_SIZE:
+            self._memo[transaction_name] = best_match
+        return best_match
+
+    def _match(self, transaction_name: str) -> Optional[Any]:
+        self.match_count += 1
+        transaction_name = transaction_name.strip()
+        best_match = None
+        best_length = 0
+        max_length_count = 0
+        has_match = False
+
+        for mapping_name, mapping in self._iter_candidates(transaction_name):
+            match_length = evaluate_mapping_match(transaction_name, mapping_name, mapping.is_prefix_match)
+            if match_length is None:
+                continue
+            has_match = True
+            if match_length > best_length:
+                best_match = mapping
+                best_length = match_length
+                max_length_count = 1
+            elif match_length == best_length:
+                max_length_count += 1
+
+        # Si aucun mapping ne correspond, ou conflit réel (plusieurs mappings de même longueur maximale)
+        if not has_match or max_length_count > 1:
+            return None
+
+        return best_match
+
+
+# ========== Cache par propriété ==========
+
+_matcher_cache: Dict[int, MappingMatcher] = {}
+_matcher_generations: Dict[Optional[int], int] = {}
+_cache_lock = threading.Lock()
+
+# Clé de session.info pour les propriétés dont les mappings ont changé (invalidées au commit/rollback)
+_PENDING_KEY = "mapping_matcher_pending_property_ids"
+# Marqueur "toutes les propriétés" (mise à jour/suppression en masse)
+_ALL_PROPERTIES = None
+
+
+def get_mapping_matcher(db: Session, property_id: int) -> MappingMatcher:
+    """
+    Récupérer l'index compilé des mappings d'une propriété (construit une seule fois, puis mis en cache).
+
+    Args:
+        db: Session de base de données
+        property_id: ID de la propriété
+
+    Returns:
+        MappingMatcher de la propriété
+    """
+    with _cache_lock:
+        matcher = _matcher_cache.get(property_id)
+        generation = (_matcher_generations.get(property_id, 0), _matcher_generations.get(_ALL_PROPERTIES, 0))
+    if matcher is not None:
+        return matcher
+
+    # Charger uniquement les colonnes utiles (pas d'objets ORM dans le cache, ils expirent au commit)
+    rows = db.query(
+        Mapping.id,
+        Mapping.property_id,
+        Mapping.nom,
+        Mapping.level_1,
+        Mapping.level_2,
+        Mapping.level_3,
+        Mapping.is_prefix_match
+    ).filter(Mapping.property_id == property_id).all()
+    matcher = MappingMatcher(rows)
+
+    with _cache_lock:
+        # Ne pas mettre en cache si une invalidation a eu lieu pendant la construction
+        current = (_matcher_generations.get(property_id, 0), _matcher_generations.get(_ALL_PROPERTIES, 0))
+        if current == generation:
+            _matcher_cache[property_id] = matcher
+
+    logger.info(f"[MappingMatcher] Index compilé pour property_id={property_id}: {matcher.size} mapping(s)")
+    return matcher
+
+
+def invalidate_mapping_matcher(property_id: Optional[int] = None) -> None:
+    """
+    Invalider l'index compilé d'une propriété (ou de toutes les propriétés si property_id est None).
+
+    Args:
+        property_id: ID de la propriété (optionnel, toutes les propriétés si non fourni)
+    """
+    with _cache_lock:
+        _matcher_generations[property_id] = _matcher_generations.get(property_id, 0) + 1
+        if property_id is _ALL_PROPERTIES:
+            _matcher_cache.clear()
+        else:
+            _matcher_cache.pop(property_id, None)
+
+
+def invalidate_mapping_matcher_on_commit(session: Session, property_id: int) -> None:
+    """
+    Invalider l'index d'une propriété après une écriture Core sur la table mappings
+    (non vue par les événements de session), maintenant puis au commit/rollback.
+
+    Args:
+        session: Session qui a écrit les mappings
+        property_id: ID de la propriété
+    """
+    invalidate_mapping_matcher(property_id)
+    session.info.setdefault(_PENDING_KEY, set()).add(property_id)
+
+
+def _invalidate_pending(session: Session) -> None:
+    pending = session.info.pop(_PENDING_KEY, None)
+    if not pending:
+        return
+    if _ALL_PROPERTIES in pending:
+        invalidate_mapping_matcher()
+        return
+    for property_id in pending:
+        invalidate_mapping_matcher(property_id)
+
+
+@event.listens_for(Session, "after_flush")
+def _invalidate_on_flush(session: Session, flush_context) -> None:
+    """Invalide l'index des propriétés dont des mappings ont été créés, modifiés ou supprimés."""
+    property_ids = {
+        obj.property_id
+        for obj in chain(session.new, session.dirty, session.deleted)
+        if isinstance(obj, Mapping)
+    }
+    if not property_ids:
+        return
+    for property_id in property_ids:
+        invalidate_mapping_matcher(property_id)
+    # Invalider à nouveau au commit/rollback : une autre session a pu reconstruire
+    # l'index entre le flush et le commit avec les données non encore commitées
+    session.info.setdefault(_PENDING_KEY, set()).update(property_ids)
+
+
+@event.listens_for(Session, "do_orm_execute")
+def _invalidate_on_bulk_statement(orm_execute_state) -> None:
+    """Invalide tous les index lors d'un UPDATE/DELETE en masse sur la table mappings."""
+    if not (orm_execute_state.is_update or orm_execute_state.is_delete):
+        return
+    if any(mapper.class_ is Mapping for mapper in orm_execute_state.all_mappers):
+        invalidate_mapping_matcher()
+        orm_execute_state.session.info.setdefault(_PENDING_KEY, set()).add(_ALL_PROPERTIES)
+
+
+@event.listens_for(Session, "after_commit")
+def _invalidate_on_commit(session: Session) -> None:
+    _invalidate_pending(session)
+
+
+@event.listens_for(Session, "after_rollback")
+def _invalidate_on_rollback(session: Session) -> None:
+    _invalidate_pending(session)
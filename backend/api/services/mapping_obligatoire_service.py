@@ -2,16 +2,27 @@
 Service de gestion des mappings autorisés (combinaisons level_1, level_2, level_3).
 
 ⚠️ Before making changes, read: ../../../docs/workflow/BEST_PRACTICES.md
+
+Les listes des dropdowns en cascade et la validation des combinaisons sont servies par une
+hiérarchie en mémoire par propriété (AllowedMappingHierarchy), construite en une requête et
+invalidée automatiquement à chaque écriture sur allowed_mappings (événements de session SQLAlchemy).
 """
 
+import hashlib
+import json
+import logging
+import threading
+from itertools import chain
+from sqlalchemy import event
 from sqlalchemy.orm import Session
-from sqlalchemy import distinct
-from typing import List, Optional
+from typing import Dict, FrozenSet, Iterable, List, Optional, Tuple
 from pathlib import Path
 import pandas as pd
 
 from backend.database.models import AllowedMapping, Transaction
 
+logger = logging.getLogger(__name__)
+
 
 # Liste fixe des valeurs level_3 autorisées
 ALLOWED_LEVEL_3_VALUES = [
@@ -38,6 +49,167 @@ def validate_level3_value(level_3: str) -> bool:
     return level_3 in ALLOWED_LEVEL_3_VALUES
 
 
+class AllowedMappingHierarchy:
+    """
+    Combinaisons autorisées d'une propriété, indexées dans les deux sens
+    (level_1 → level_2 → level_3 et level_3 → level_2 → level_1).
+
+    Chaque liste est triée et sans valeur vide, comme les anciennes requêtes DISTINCT ... ORDER BY.
+    version est une empreinte du contenu (utilisée comme ETag par les routes).
+    """
+
+    def __init__(self, combinations: Iterable[Tuple[str, str, Optional[str]]]):
+        self.combinations: FrozenSet[Tuple[str, str, Optional[str]]] = frozenset(combinations)
+
+        level_1_values = set()
+        level_2_values = set()
+        level_2_by_level_1: Dict[str, set] = {}
+        level_3_by_level_1_2: Dict[Tuple[str, str], set] = {}
+        level_2_by_level_3: Dict[str, set] = {}
+        level_1_by_level_2: Dict[str, set] = {}
+        level_1_by_level_2_3: Dict[Tuple[str, str], set] = {}
+        level_3_by_level_2: Dict[str, set] = {}
+
+        for level_1, level_2, level_3 in self.combinations:
+            if level_1:
+                level_1_values.add(level_1)
+            if level_2:
+                level_2_values.add(level_2)
+                level_2_by_level_1.setdefault(level_1, set()).add(level_2)
+            if level_1:
+                level_1_by_level_2.setdefault(level_2, set()).add(level_1)
+            if level_3:
+                level_3_by_level_1_2.setdefault((level_1, level_2), set()).add(level_3)
+                level_3_by_level_2.setdefault(level_2, set()).add(level_3)
+                if level_2:
+                    level_2_by_level_3.setdefault(level_3, set()).add(level_2)
+                if level_1:
+                    level_1_by_level_2_3.setdefault((level_2, level_3), set()).add(level_1)
+
+        self.level_1_values: List[str] = sorted(level_1_values)
+        self.level_2_values: List[str] = sorted(level_2_values)
+        self.level_2_by_level_1 = {key: sorted(values) for key, values in level_2_by_level_1.items()}
+        self.level_3_by_level_1_2 = {key: sorted(values) for key, values in level_3_by_level_1_2.items()}
+        self.level_2_by_level_3 = {key: sorted(values) for key, values in level_2_by_level_3.items()}
+        self.level_1_by_level_2 = {key: sorted(values) for key, values in level_1_by_level_2.items()}
+        self.level_1_by_level_2_3 = {key: sorted(values) for key, values in level_1_by_level_2_3.items()}
+        self.level_3_by_level_2 = {key: sorted(values) for key, values in level_3_by_level_2.items()}
+
+        canonical = sorted(self.combinations, key=lambda combination: tuple((value is not None, value or "") for value in combination))
+        self.version = hashlib.sha1(json.dumps(canonical, ensure_ascii=False).encode("utf-8")).hexdigest()[:16]
+
+    def is_allowed(self, level_1: str, level_2: str, level_3: Optional[str] = None) -> bool:
+        """Vrai si la combinaison existe (level_3 None pour une combinaison sans level_3)."""
+        return (level_1, level_2, level_3) in self.combinations
+
+
+# ========== Cache par propriété ==========
+
+_hierarchy_cache: Dict[int, AllowedMappingHierarchy] = {}
+_hierarchy_generations: Dict[Optional[int], int] = {}
+_hierarchy_lock = threading.Lock()
+
+# Clé de session.info pour les propriétés dont les mappings autorisés ont changé (invalidées au commit/rollback)
+_PENDING_KEY = "allowed_mapping_hierarchy_pending_property_ids"
+# Marqueur "toutes les propriétés" (mise à jour/suppression en masse)
+_ALL_PROPERTIES = None
+
+
+def get_allowed_hierarchy(db: Session, property_id: int) -> AllowedMappingHierarchy:
+    """
+    Récupérer la hiérarchie des mappings autorisés d'une propriété (construite une fois, puis en cache).
+
+    Args:
+        db: Session de base de données
+        property_id: ID de la propriété
+
+    Returns:
+        AllowedMappingHierarchy de la propriété
+    """
+    with _hierarchy_lock:
+        hierarchy = _hierarchy_cache.get(property_id)
+        generation = (_hierarchy_generations.get(property_id, 0), _hierarchy_generations.get(_ALL_PROPERTIES, 0))
+    if hierarchy is not None:
+        return hierarchy
+
+    rows = db.query(AllowedMapping.level_1, AllowedMapping.level_2, AllowedMapping.level_3).filter(
+        AllowedMapping.property_id == property_id
+    ).all()
+    hierarchy = AllowedMappingHierarchy(tuple(row) for row in rows)
+
+    with _hierarchy_lock:
+        # Ne pas mettre en cache si une invalidation a eu lieu pendant la construction
+        current = (_hierarchy_generations.get(property_id, 0), _hierarchy_generations.get(_ALL_PROPERTIES, 0))
+        if current == generation:
+            _hierarchy_cache[property_id] = hierarchy
+
+    logger.info(f"[MappingObligatoire] Hiérarchie construite pour property_id={property_id}: {len(hierarchy.combinations)} combinaison(s)")
+    return hierarchy
+
+
+def invalidate_allowed_hierarchy(property_id: Optional[int] = None) -> None:
+    """
+    Invalider la hiérarchie d'une propriété (ou de toutes les propriétés si property_id est None).
+
+    Args:
+        property_id: ID de la propriété (optionnel, toutes les propriétés si non fourni)
+    """
+    with _hierarchy_lock:
+        _hierarchy_generations[property_id] = _hierarchy_generations.get(property_id, 0) + 1
+        if property_id is _ALL_PROPERTIES:
+            _hierarchy_cache.clear()
+        else:
+            _hierarchy_cache.pop(property_id, None)
+
+
+def _invalidate_pending(session: Session) -> None:
+    pending = session.info.pop(_PENDING_KEY, None)
+    if not pending:
+        return
+    if _ALL_PROPERTIES in pending:
+        invalidate_allowed_hierarchy()
+        return
+    for property_id in pending:
+        invalidate_allowed_hierarchy(property_id)
+
+
+@event.listens_for(Session, "after_flush")
+def _invalidate_on_flush(session: Session, flush_context) -> None:
+    """Invalide la hiérarchie des propriétés dont des mappings autorisés ont été créés, modifiés ou supprimés."""
+    property_ids = {
+        obj.property_id
+        for obj in chain(session.new, session.dirty, session.deleted)
+        if isinstance(obj, AllowedMapping)
+    }
+    if not property_ids:
+        return
+    for property_id in property_ids:
+        invalidate_allowed_hierarchy(property_id)
+    # Invalider à nouveau au commit/rollback : une autre session a pu reconstruire
+    # la hiérarchie entre le flush et le commit
+    session.info.setdefault(_PENDING_KEY, set()).update(property_ids)
+
+
+@event.listens_for(Session, "do_orm_execute")
+def _invalidate_on_bulk_statement(orm_execute_state) -> None:
+    """Invalide toutes les hiérarchies lors d'un INSERT/UPDATE/DELETE en masse sur allowed_mappings."""
+    if not (orm_execute_state.is_insert or orm_execute_state.is_update or orm_execute_state.is_delete):
+        return
+    if any(mapper.class_ is AllowedMapping for mapper in orm_execute_state.all_mappers):
+        invalidate_allowed_hierarchy()
+        orm_execute_state.session.info.setdefault(_PENDING_KEY, set()).add(_ALL_PROPERTIES)
+
+
+@event.listens_for(Session, "after_commit")
+def _invalidate_on_commit(session: Session) -> None:
+    _invalidate_pending(session)
+
+
+@event.listens_for(Session, "after_rollback")
+def _invalidate_on_rollback(session: Session) -> None:
+    _invalidate_pending(session)
+
+
 def load_allowed_mappings_from_excel(db: Session, property_id: int, excel_path: Optional[Path] = None) -> int:
     """
     Charge le fichier Excel et insère les combinaisons dans la table allowed_mappings pour une propriété spécifique.
@@ -133,25 +305,27 @@ def load_allowed_mappings_from_excel(db: Session, property_id: int, excel_path:
     return loaded_count
 
 
-def get_allowed_level1_values(db: Session, property_id: int) -> List[str]:
+def _resolve_hierarchy(db: Session, property_id: int, hierarchy: Optional[AllowedMappingHierarchy]) -> AllowedMappingHierarchy:
+    """Hiérarchie fournie par l'appelant (même version pour le contenu et l'ETag), sinon celle du cache."""
+    return hierarchy if hierarchy is not None else get_allowed_hierarchy(db, property_id)
+
+
+def get_allowed_level1_values(db: Session, property_id: int, hierarchy: Optional[AllowedMappingHierarchy] = None) -> List[str]:
     """
     Retourne toutes les valeurs level_1 autorisées (distinct) pour une propriété.
     
     Args:
         db: Session de base de données
         property_id: ID de la propriété
+        hierarchy: Hiérarchie déjà chargée (optionnel, lue depuis le cache si non fournie)
     
     Returns:
         Liste des valeurs level_1 uniques, triées
     """
-    values = db.query(distinct(AllowedMapping.level_1)).filter(
-        AllowedMapping.property_id == property_id,
-        AllowedMapping.level_1.isnot(None)
-    ).order_by(AllowedMapping.level_1).all()
-    return [v[0] for v in values if v[0]]
+    return list(_resolve_hierarchy(db, property_id, hierarchy).level_1_values)
 
 
-def get_allowed_level2_values(db: Session, level_1: str, property_id: int) -> List[str]:
+def get_allowed_level2_values(db: Session, level_1: str, property_id: int, hierarchy: Optional[AllowedMappingHierarchy] = None) -> List[str]:
     """
     Retourne les valeurs level_2 autorisées pour un level_1 donné (distinct) pour une propriété.
     
@@ -159,19 +333,15 @@ def get_allowed_level2_values(db: Session, level_1: str, property_id: int) -> Li
         db: Session de base de données
         level_1: Valeur de level_1
         property_id: ID de la propriété
+        hierarchy: Hiérarchie déjà chargée (optionnel, lue depuis le cache si non fournie)
     
     Returns:
         Liste des valeurs level_2 uniques pour ce level_1, triées
     """
-    values = db.query(distinct(AllowedMapping.level_2)).filter(
-        AllowedMapping.property_id == property_id,
-        AllowedMapping.level_1 == level_1,
-        AllowedMapping.level_2.isnot(None)
-    ).order_by(AllowedMapping.level_2).all()
-    return [v[0] for v in values if v[0]]
+    return list(_resolve_hierarchy(db, property_id, hierarchy).level_2_by_level_1.get(level_1, ()))
 
 
-def get_all_allowed_level2_values(db: Session, property_id: int) -> List[str]:
+def get_all_allowed_level2_values(db: Session, property_id: int, hierarchy: Optional[AllowedMappingHierarchy] = None) -> List[str]:
     """
     Retourne toutes les valeurs level_2 autorisées (distinct, sans filtre level_1) pour une propriété.
     
@@ -180,18 +350,15 @@ def get_all_allowed_level2_values(db: Session, property_id: int) -> List[str]:
     Args:
         db: Session de base de données
         property_id: ID de la propriété
+        hierarchy: Hiérarchie déjà chargée (optionnel, lue depuis le cache si non fournie)
     
     Returns:
         Liste de toutes les valeurs level_2 uniques, triées
     """
-    values = db.query(distinct(AllowedMapping.level_2)).filter(
-        AllowedMapping.property_id == property_id,
-        AllowedMapping.level_2.isnot(None)
-    ).order_by(AllowedMapping.level_2).all()
-    return [v[0] for v in values if v[0]]
+    return list(_resolve_hierarchy(db, property_id, hierarchy).level_2_values)
 
 
-def get_allowed_level3_values(db: Session, level_1: str, level_2: str, property_id: int) -> List[str]:
+def get_allowed_level3_values(db: Session, level_1: str, level_2: str, property_id: int, hierarchy: Optional[AllowedMappingHierarchy] = None) -> List[str]:
     """
     Retourne les valeurs level_3 autorisées pour un couple (level_1, level_2) (distinct) pour une propriété.
     
@@ -200,17 +367,12 @@ def get_allowed_level3_values(db: Session, level_1: str, level_2: str, property_
         level_1: Valeur de level_1
         level_2: Valeur de level_2
         property_id: ID de la propriété
+        hierarchy: Hiérarchie déjà chargée (optionnel, lue depuis le cache si non fournie)
     
     Returns:
         Liste des valeurs level_3 uniques pour ce couple, triées
     """
-    values = db.query(distinct(AllowedMapping.level_3)).filter(
-        AllowedMapping.property_id == property_id,
-        AllowedMapping.level_1 == level_1,
-        AllowedMapping.level_2 == level_2,
-        AllowedMapping.level_3.isnot(None)
-    ).order_by(AllowedMapping.level_3).all()
-    return [v[0] for v in values if v[0]]
+    return list(_resolve_hierarchy(db, property_id, hierarchy).level_3_by_level_1_2.get((level_1, level_2), ()))
 
 
 def validate_mapping(db: Session, level_1: str, level_2: str, level_3: Optional[str] = None, property_id: Optional[int] = None) -> bool:
@@ -230,18 +392,24 @@ def validate_mapping(db: Session, level_1: str, level_2: str, level_3: Optional[
     if property_id is None:
         raise ValueError("property_id est obligatoire pour valider un mapping")
     
-    query = db.query(AllowedMapping).filter(
-        AllowedMapping.property_id == property_id,
-        AllowedMapping.level_1 == level_1,
-        AllowedMapping.level_2 == level_2
-    )
+    return get_allowed_hierarchy(db, property_id).is_allowed(level_1, level_2, level_3)
+
+
+def get_allowed_combinations(db: Session, property_id: int) -> FrozenSet[Tuple[str, str, Optional[str]]]:
+    """
+    Retourne les combinaisons autorisées d'une propriété (validation en masse).
     
-    if level_3 is not None:
-        query = query.filter(AllowedMapping.level_3 == level_3)
-    else:
-        query = query.filter(AllowedMapping.level_3.is_(None))
+    Une combinaison (level_1, level_2, level_3) est valide pour validate_mapping si et
+    seulement si elle appartient à cet ensemble (level_3 None pour une combinaison sans level_3).
     
-    return query.first() is not None
+    Args:
+        db: Session de base de données
+        property_id: ID de la propriété
+    
+    Returns:
+        Ensemble (immuable) des tuples (level_1, level_2, level_3)
+    """
+    return get_allowed_hierarchy(db, property_id).combinations
 
 
 def reset_to_hardcoded_values(db: Session) -> int:
@@ -261,7 +429,7 @@ def reset_to_hardcoded_values(db: Session) -> int:
     return deleted_count
 
 
-def get_allowed_level2_for_level3(db: Session, level_3: str, property_id: int) -> List[str]:
+def get_allowed_level2_for_level3(db: Session, level_3: str, property_id: int, hierarchy: Optional[AllowedMappingHierarchy] = None) -> List[str]:
     """
     Retourne les valeurs level_2 autorisées pour un level_3 donné (distinct) pour une propriété spécifique.
     
@@ -272,23 +440,17 @@ def get_allowed_level2_for_level3(db: Session, level_3: str, property_id: int) -
         db: Session de base de données
         level_3: Valeur de level_3
         property_id: ID de la propriété (obligatoire pour l'isolation multi-propriétés)
+        hierarchy: Hiérarchie déjà chargée (optionnel, lue depuis le cache si non fournie)
     
     Returns:
         Liste des valeurs level_2 uniques pour ce level_3, triées
     """
-    import logging
-    logger = logging.getLogger(__name__)
     logger.info(f"[MappingObligatoire] get_allowed_level2_for_level3 - property_id={property_id}, level_3={level_3}")
     
-    values = db.query(distinct(AllowedMapping.level_2)).filter(
-        AllowedMapping.property_id == property_id,
-        AllowedMapping.level_3 == level_3,
-        AllowedMapping.level_2.isnot(None)
-    ).order_by(AllowedMapping.level_2).all()
-    return [v[0] for v in values if v[0]]
+    return list(_resolve_hierarchy(db, property_id, hierarchy).level_2_by_level_3.get(level_3, ()))
 
 
-def get_allowed_level1_for_level2(db: Session, level_2: str, property_id: int) -> List[str]:
+def get_allowed_level1_for_level2(db: Session, level_2: str, property_id: int, hierarchy: Optional[AllowedMappingHierarchy] = None) -> List[str]:
     """
     Retourne les valeurs level_1 autorisées pour un level_2 donné (distinct) pour une propriété spécifique.
     
@@ -299,23 +461,17 @@ def get_allowed_level1_for_level2(db: Session, level_2: str, property_id: int) -
         db: Session de base de données
         level_2: Valeur de level_2
         property_id: ID de la propriété (obligatoire pour l'isolation multi-propriétés)
+        hierarchy: Hiérarchie déjà chargée (optionnel, lue depuis le cache si non fournie)
     
     Returns:
         Liste des valeurs level_1 uniques pour ce level_2, triées
     """
-    import logging
-    logger = logging.getLogger(__name__)
     logger.info(f"[MappingObligatoire] get_allowed_level1_for_level2 - property_id={property_id}, level_2={level_2}")
     
-    values = db.query(distinct(AllowedMapping.level_1)).filter(
-        AllowedMapping.property_id == property_id,
-        AllowedMapping.level_2 == level_2,
-        AllowedMapping.level_1.isnot(None)
-    ).order_by(AllowedMapping.level_1).all()
-    return [v[0] for v in values if v[0]]
+    return list(_resolve_hierarchy(db, property_id, hierarchy).level_1_by_level_2.get(level_2, ()))
 
 
-def get_allowed_level1_for_level2_and_level3(db: Session, level_2: str, level_3: str, property_id: int) -> List[str]:
+def get_allowed_level1_for_level2_and_level3(db: Session, level_2: str, level_3: str, property_id: int, hierarchy: Optional[AllowedMappingHierarchy] = None) -> List[str]:
     """
     Retourne les valeurs level_1 autorisées pour un couple (level_2, level_3) (distinct) pour une propriété spécifique.
     
@@ -327,24 +483,17 @@ def get_allowed_level1_for_level2_and_level3(db: Session, level_2: str, level_3:
         level_2: Valeur de level_2
         level_3: Valeur de level_3
         property_id: ID de la propriété (obligatoire pour l'isolation multi-propriétés)
+        hierarchy: Hiérarchie déjà chargée (optionnel, lue depuis le cache si non fournie)
     
     Returns:
         Liste des valeurs level_1 uniques pour ce couple, triées
     """
-    import logging
-    logger = logging.getLogger(__name__)
     logger.info(f"[MappingObligatoire] get_allowed_level1_for_level2_and_level3 - property_id={property_id}, level_2={level_2}, level_3={level_3}")
     
-    values = db.query(distinct(AllowedMapping.level_1)).filter(
-        AllowedMapping.property_id == property_id,
-        AllowedMapping.level_2 == level_2,
-        AllowedMapping.level_3 == level_3,
-        AllowedMapping.level_1.isnot(None)
-    ).order_by(AllowedMapping.level_1).all()
-    return [v[0] for v in values if v[0]]
+    return list(_resolve_hierarchy(db, property_id, hierarchy).level_1_by_level_2_3.get((level_2, level_3), ()))
 
 
-def get_allowed_level3_for_level2(db: Session, level_2: str, property_id: int) -> List[str]:
+def get_allowed_level3_for_level2(db: Session, level_2: str, property_id: int, hierarchy: Optional[AllowedMappingHierarchy] = None) -> List[str]:
     """
     Retourne les valeurs level_3 autorisées pour un level_2 donné (distinct) pour une propriété spécifique.
     
@@ -355,20 +504,14 @@ def get_allowed_level3_for_level2(db: Session, level_2: str, property_id: int) -
         db: Session de base de données
         level_2: Valeur de level_2
         property_id: ID de la propriété (obligatoire pour l'isolation multi-propriétés)
+        hierarchy: Hiérarchie déjà chargée (optionnel, lue depuis le cache si non fournie)
     
     Returns:
         Liste des valeurs level_3 uniques pour ce level_2, triées
     """
-    import logging
-    logger = logging.getLogger(__name__)
     logger.info(f"[MappingObligatoire] get_allowed_level3_for_level2 - property_id={property_id}, level_2={level_2}")
     
-    values = db.query(distinct(AllowedMapping.level_3)).filter(
-        AllowedMapping.property_id == property_id,
-        AllowedMapping.level_2 == level_2,
-        AllowedMapping.level_3.isnot(None)
-    ).order_by(AllowedMapping.level_3).all()
-    return [v[0] for v in values if v[0]]
+    return list(_resolve_hierarchy(db, property_id, hierarchy).level_3_by_level_2.get(level_2, ()))
 
 
 def get_all_allowed_mappings(db: Session, property_id: int, skip: int = 0, limit: int = 100) -> tuple[List[AllowedMapping], int]:
@@ -448,8 +591,6 @@ def delete_allowed_mapping(db: Session, mapping_id: int, property_id: int) -> bo
     Raises:
         ValueError: Si le mapping est hard codé (is_hardcoded = True)
     """
-    import logging
-    logger = logging.getLogger(__name__)
     logger.info(f"[MappingObligatoire] delete_allowed_mapping - property_id={property_id}, mapping_id={mapping_id}")
     
     mapping = db.query(AllowedMapping).filter(
@@ -480,8 +621,6 @@ def reset_allowed_mappings(db: Session, property_id: int) -> dict:
     Returns:
         Dictionnaire avec les statistiques (deleted_allowed, deleted_mappings, unassigned_transactions)
     """
-    import logging
-    logger = logging.getLogger(__name__)
     logger.info(f"[MappingObligatoire] reset_allowed_mappings - property_id={property_id}")
     
     from backend.database.models import Mapping, EnrichedTransaction
@@ -494,12 +633,7 @@ def reset_allowed_mappings(db: Session, property_id: int) -> dict:
     db.commit()
     
     # 2. Supprimer les mappings invalides (combinaisons qui ne sont plus dans allowed_mappings) pour cette propriété
-    all_allowed = db.query(AllowedMapping).filter(
-        AllowedMapping.property_id == property_id
-    ).all()
-    allowed_combinations = {
-        (m.level_1, m.level_2, m.level_3) for m in all_allowed
-    }
+    allowed_combinations = get_allowed_combinations(db, property_id)
     
     all_mappings = db.query(Mapping).filter(
         Mapping.property_id == property_id
@@ -0,0 +1,406 @@
+"""
+Table de faits des transactions enrichies.
+
+⚠️ Before making changes, read: ../../docs/workflow/BEST_PRACTICES.md
+
+transaction_facts contient, par (property_id, annee, mois, level_1, level_2, level_3), la somme des
+quantite et le nombre de transactions enrichies. annee/mois sont ceux de Transaction.date (les rapports
+filtrent sur la date de la transaction), les levels ceux de EnrichedTransaction.
+
+Les rapports (compte de résultat, bilan, somme par level_1) lisent cette table au lieu d'agréger
+transactions ⨝ enriched_transactions. Elle est maintenue dans la transaction de l'écriture, en
+recalculant les années (property_id, annee) touchées :
+- Écritures ORM (flush) sur Transaction et EnrichedTransaction
+- UPDATE/DELETE en masse ORM (query.update() / query.delete()) sur ces tables
+- Écritures Core en masse (enrichissement en masse) : appel explicite de refresh_transaction_facts
+
+check_transaction_facts compare la table à une reconstruction complète.
+"""
+
+import logging
+from datetime import date, datetime
+from itertools import chain
+from typing import Dict, Iterable, List, Optional, Set, Tuple
+
+from sqlalchemy import DateTime, and_, delete, event, extract, func, insert, inspect, literal, or_, select
+from sqlalchemy.orm import Session
+
+from backend.database.models import Transaction, EnrichedTransaction, TransactionFact
+
+logger = logging.getLogger(__name__)
+
+# Clé "toutes les années" / "toutes les propriétés" dans les ensembles de clés à recalculer
+_ALL = None
+
+# Taille des lots de transaction_id lus après un flush
+FACT_KEY_BATCH_SIZE = 500
+
+# Clé de session.info : clés touchées par un UPDATE/DELETE en masse, recalculées après son exécution
+_PENDING_KEYS = "transaction_facts_pending_keys"
+
+# Colonnes d'une ligne de faits (hors id)
+_FACT_COLUMNS = ["property_id", "annee", "mois", "level_1", "level_2", "level_3", "total", "transaction_count", "updated_at"]
+
+
+def _aggregate_statement(transaction_filter=None):
+    """SELECT des faits agrégés depuis transactions ⨝ enriched_transactions (filtre optionnel sur Transaction)."""
+    transaction_year = extract('year', Transaction.date)
+    transaction_month = extract('month', Transaction.date)
+    group_columns = [
+        Transaction.property_id,
+        transaction_year,
+        transaction_month,
+        EnrichedTransaction.level_1,
+        EnrichedTransaction.level_2,
+        EnrichedTransaction.level_3,
+    ]
+    statement = select(
+        Transaction.property_id,
+        transaction_year.label("annee"),
+        transaction_month.label("mois"),
+        EnrichedTransaction.level_1,
+        EnrichedTransaction.level_2,
+        EnrichedTransaction.level_3,
+        func.sum(Transaction.quantite).label("total"),
+        func.count(Transaction.id).label("transaction_count"),
+        literal(datetime.utcnow(), DateTime).label("updated_at")
+    ).join(
+        EnrichedTransaction, EnrichedTransaction.transaction_id == Transaction.id
+    ).group_by(*group_columns)
+    if transaction_filter is not None:
+        statement = statement.where(transaction_filter)
+    return statement
+
+
+def _key_filters(keys: Set[Tuple[Optional[int], Optional[int]]]):
+    """
+    Filtres (sur Transaction, sur TransactionFact) correspondant aux clés (property_id, annee), None = toutes.
+
+    Returns:
+        Tuple (filtre transactions, filtre faits), (None, None) si tout est concerné
+    """
+    if (_ALL, _ALL) in keys:
+        return None, None
+    transaction_conditions = []
+    fact_conditions = []
+    whole_properties = {property_id for property_id, year in keys if year is _ALL}
+    if whole_properties:
+        transaction_conditions.append(Transaction.property_id.in_(whole_properties))
+        fact_conditions.append(TransactionFact.property_id.in_(whole_properties))
+    for property_id, year in keys:
+        if year is _ALL or property_id in whole_properties:
+            continue
+        transaction_condition = Transaction.date.between(date(year, 1, 1), date(year, 12, 31))
+        fact_condition = TransactionFact.annee == year
+        if property_id is not _ALL:
+            transaction_condition = and_(Transaction.property_id == property_id, transaction_condition)
+            fact_condition = and_(TransactionFact.property_id == property_id, fact_condition)
+        transaction_conditions.append(transaction_condition)
+        fact_conditions.append(fact_condition)
+    return or_(*transaction_conditions), or_(*fact_conditions)
+
+
+def _refresh_keys(connection, keys: Iterable[Tuple[Optional[int], Optional[int]]]) -> int:
+    """Recalculer les faits des clés (property_id, annee) depuis les transactions. Retourne le nombre de lignes écrites."""
+    keys = set(keys)
+    if not keys:
+        return 0
+    transaction_filter, fact_filter = _key_filters(keys)
+    delete_statement = delete(TransactionFact)
+    if fact_filter is not None:
+        delete_statement = delete_statement.where(fact_filter)
+    connection.execute(delete_statement)
+    return connection.execute(
+        insert(TransactionFact).from_select(_FACT_COLUMNS, _aggregate_statement(transaction_filter))
+    ).rowcount
+
+
+def refresh_transaction_facts(
+    db: Session,
+    property_id: Optional[int] = None,
+    years: Optional[Iterable[int]] = None
+) -> int:
+    """
+    Recalculer les faits depuis les transactions, dans la transaction courante (pas de commit).
+
+    À appeler après les écritures Core sur transactions / enriched_transactions (les écritures ORM
+    sont prises en compte automatiquement).
+
+    Args:
+        db: Session de base de données
+        property_id: ID de la propriété (optionnel, toutes les propriétés si non fourni)
+        years: Années à recalculer (optionnel, toutes les années si non fourni)
+
+    Returns:
+        Nombre de lignes de faits écrites
+    """
+    if years is None:
+        keys = {(property_id, _ALL)}
+    else:
+        keys = {(property_id, year) for year in years}
+    return _refresh_keys(db.connection(), keys)
+
+
+def rebuild_transaction_facts(db: Session, property_id: Optional[int] = None) -> int:
+    """
+    Reconstruire entièrement les faits (d'une propriété ou de toutes) et valider.
+
+    Args:
+        db: Session de base de données
+        property_id: ID de la propriété (optionnel, toutes les propriétés si non fourni)
+
+    Returns:
+        Nombre de lignes de faits écrites
+    """
+    written = refresh_transaction_facts(db, property_id)
+    db.commit()
+    logger.info(f"[TransactionFacts] rebuild - property_id={property_id}: {written} ligne(s)")
+    return written
+
+
+def check_transaction_facts(db: Session, property_id: Optional[int] = None) -> List[Dict[str, any]]:
+    """
+    Comparer la table de faits à une reconstruction complète depuis les transactions.
+
+    Args:
+        db: Session de base de données
+        property_id: ID de la propriété (optionnel, toutes les propriétés si non fourni)
+
+    Returns:
+        Liste des écarts : clé (property_id, annee, mois, level_1, level_2, level_3) avec
+        expected_total/stored_total et expected_count/stored_count (vide si la table est cohérente)
+    """
+    key_columns = ["property_id", "annee", "mois", "level_1", "level_2", "level_3"]
+    expected_statement = _aggregate_statement(
+        Transaction.property_id == property_id if property_id is not None else None
+    )
+    expected = {
+        tuple(row[:6]): (row.total or 0.0, row.transaction_count)
+        for row in db.execute(expected_statement).all()
+    }
+
+    stored_statement = select(
+        *[getattr(TransactionFact, column) for column in key_columns],
+        func.sum(TransactionFact.total).label("total"),
+        func.sum(TransactionFact.transaction_count).label("transaction_count")
+    ).group_by(*[getattr(TransactionFact, column) for column in key_columns])
+    if property_id is not None:
+        stored_statement = stored_statement.where(TransactionFact.property_id == property_id)
+    stored = {
+        tuple(row[:6]): (row.total or 0.0, row.transaction_count)
+        for row in db.execute(stored_statement).all()
+    }
+
+    differences = []
+    for key in sorted(expected.keys() | stored.keys(), key=lambda k: tuple((v is None, v) for v in k)):
+        expected_total, expected_count = expected.get(key, (0.0, 0))
+        stored_total, stored_count = stored.get(key, (0.0, 0))
+        if expected_count != stored_count or abs(expected_total - stored_total) > 1e-6:
+            differences.append({
+                **dict(zip(key_columns, key)),
+                "expected_total": expected_total,
+                "stored_total": stored_total,
+                "expected_count": expected_count,
+                "stored_count": stored_count,
+            })
+    logger.info(f"[TransactionFacts] check - property_id={property_id}: {len(differences)} écart(s)")
+    return differences
+
+
+def get_level_1_totals(
+    db: Session,
+    property_id: int,
+    start_year: Optional[int] = None,
+    end_year: Optional[int] = None,
+    level_3_values: Optional[List[str]] = None,
+    level_1_values: Optional[Iterable[str]] = None
+) -> List[Tuple[int, Optional[str], float]]:
+    """
+    Sommes des transactions enrichies par (année, level_1), lues dans la table de faits.
+
+    Args:
+        db: Session de base de données
+        property_id: ID de la propriété
+        start_year: Première année incluse (optionnel)
+        end_year: Dernière année incluse (optionnel)
+        level_3_values: Filtre sur level_3 (optionnel)
+        level_1_values: Filtre sur level_1 (optionnel)
+
+    Returns:
+        Liste de tuples (année, level_1, somme des quantite)
+    """
+    query = db.query(
+        TransactionFact.annee,
+        TransactionFact.level_1,
+        func.sum(TransactionFact.total)
+    ).filter(TransactionFact.property_id == property_id)
+    if start_year is not None:
+        query = query.filter(TransactionFact.annee >= start_year)
+    if end_year is not None:
+        query = query.filter(TransactionFact.annee <= end_year)
+    if level_3_values is not None:
+        query = query.filter(TransactionFact.level_3.in_(level_3_values))
+    if level_1_values is not None:
+        query = query.filter(TransactionFact.level_1.in_(list(level_1_values)))
+    return [tuple(row) for row in query.group_by(TransactionFact.annee, TransactionFact.level_1).all()]
+
+
+def sum_level_1(db: Session, property_id: int, level_1: str, end_date: Optional[date] = None) -> Optional[float]:
+    """
+    Somme des transactions d'un level_1, cumulée jusqu'à end_date incluse.
+
+    Les mois complets sont lus dans la table de faits ; le mois de end_date est lu dans les transactions.
+
+    Args:
+        db: Session de base de données
+        property_id: ID de la propriété
+        level_1: Valeur level_1
+        end_date: Date de fin (optionnel, toutes les transactions sinon)
+
+    Returns:
+        Somme des quantite (None si aucune transaction)
+    """
+    query = db.query(func.sum(TransactionFact.total)).filter(
+        TransactionFact.property_id == property_id,
+        TransactionFact.level_1 == level_1
+    )
+    if end_date is None:
+        return query.scalar()
+
+    total = query.filter(or_(
+        TransactionFact.annee < end_date.year,
+        and_(TransactionFact.annee == end_date.year, TransactionFact.mois < end_date.month)
+    )).scalar()
+    month_total = db.query(func.sum(Transaction.quantite)).join(
+        EnrichedTransaction, Transaction.id == EnrichedTransaction.transaction_id
+    ).filter(
+        Transaction.property_id == property_id,
+        EnrichedTransaction.level_1 == level_1,
+        Transaction.date >= end_date.replace(day=1),
+        Transaction.date <= end_date
+    ).scalar()
+    if total is None and month_total is None:
+        return None
+    return (total or 0.0) + (month_total or 0.0)
+
+
+def _attribute_values(obj, attribute: str) -> set:
+    """
+    Valeurs connues d'un attribut (nouvelle et ancienne), sans déclencher de chargement.
+
+    Une valeur inconnue (attribut non chargé, ou ancienne valeur d'un objet expiré avant
+    modification) ajoute _ALL.
+    """
+    state = inspect(obj)
+    history = state.attrs[attribute].history
+    values = {value for value in chain(history.added, history.unchanged, history.deleted) if value is not None}
+    if not values or (history.added and not history.deleted and not state.pending):
+        values.add(_ALL)
+    return values
+
+
+def _has_changes(obj, attributes: Tuple[str, ...]) -> bool:
+    state = inspect(obj)
+    return any(state.attrs[attribute].history.has_changes() for attribute in attributes)
+
+
+def _flush_keys(session: Session) -> Tuple[Set[Tuple[Optional[int], Optional[int]]], Set[int]]:
+    """Clés (property_id, annee) et transaction_id enrichis touchés par le flush en cours."""
+    keys = set()
+    enriched_transaction_ids = set()
+    for obj in chain(session.new, session.dirty, session.deleted):
+        if isinstance(obj, Transaction):
+            if obj in session.dirty and not _has_changes(obj, ("date", "quantite", "property_id")):
+                # Ex : mise à jour du solde uniquement
+                continue
+            years = {_ALL if value is _ALL else value.year for value in _attribute_values(obj, "date")}
+            keys.update((property_id, year) for property_id in _attribute_values(obj, "property_id") for year in years)
+        elif isinstance(obj, EnrichedTransaction):
+            if obj in session.dirty and not _has_changes(obj, ("transaction_id", "level_1", "level_2", "level_3")):
+                continue
+            transaction_ids = _attribute_values(obj, "transaction_id")
+            if _ALL in transaction_ids:
+                keys.update((property_id, _ALL) for property_id in _attribute_values(obj, "property_id"))
+            else:
+                enriched_transaction_ids.update(transaction_ids)
+    return keys, enriched_transaction_ids
+
+
+@event.listens_for(Session, "after_flush")
+def _refresh_on_flush(session: Session, flush_context) -> None:
+    """Recalcule les années touchées par les transactions et enrichissements créés, modifiés ou supprimés."""
+    keys, enriched_transaction_ids = _flush_keys(session)
+    if not keys and not enriched_transaction_ids:
+        return
+    connection = session.connection()
+    transaction_year = extract('year', Transaction.date)
+    transaction_ids = list(enriched_transaction_ids)
+    for i in range(0, len(transaction_ids), FACT_KEY_BATCH_SIZE):
+        # L'année d'un enrichissement est celle de sa transaction (lue après le flush)
+        keys.update(connection.execute(
+            select(Transaction.property_id, transaction_year).where(
+                Transaction.id.in_(transaction_ids[i:i + FACT_KEY_BATCH_SIZE])
+            ).distinct()
+        ).all())
+    _refresh_keys(connection, keys)
+
+
+# Requête des clés (property_id, annee) touchées par un UPDATE/DELETE en masse, par entité
+_BULK_KEY_QUERIES = {
+    Transaction: lambda: select(Transaction.property_id, extract('year', Transaction.date)),
+    EnrichedTransaction: lambda: select(Transaction.property_id, extract('year', Transaction.date)).select_from(
+        EnrichedTransaction
+    ).join(Transaction, Transaction.id == EnrichedTransaction.transaction_id),
+}
+
+
+@event.listens_for(Session, "do_orm_execute")
+def _collect_bulk_statement_keys(orm_execute_state) -> None:
+    """Note les années touchées par un UPDATE/DELETE en masse ORM, recalculées après son exécution."""
+    if not (orm_execute_state.is_update or orm_execute_state.is_delete):
+        return
+    entity = next(
+        (mapper.class_ for mapper in orm_execute_state.all_mappers if mapper.class_ in _BULK_KEY_QUERIES),
+        None
+    )
+    if entity is None:
+        return
+
+    key_query = _BULK_KEY_QUERIES[entity]().distinct()
+    whereclause = orm_execute_state.statement.whereclause
+    if whereclause is not None:
+        key_query = key_query.where(whereclause)
+    rows = orm_execute_state.session.connection().execute(key_query).all()
+    if orm_execute_state.is_update and entity is Transaction:
+        # Les nouvelles dates ne sont pas connues : toute la propriété est recalculée
+        keys = {(property_id, _ALL) for property_id, _ in rows}
+    else:
+        keys = set(rows)
+    orm_execute_state.session.info.setdefault(_PENDING_KEYS, set()).update(keys)
+
+
+def _refresh_pending(session: Session) -> None:
+    keys = session.info.pop(_PENDING_KEYS, None)
+    if keys:
+        _refresh_keys(session.connection(), keys)
+
+
+@event.listens_for(Session, "after_bulk_update")
+def _refresh_after_bulk_update(update_context) -> None:
+    _refresh_pending(update_context.session)
+
+
+@event.listens_for(Session, "after_bulk_delete")
+def _refresh_after_bulk_delete(delete_context) -> None:
+    _refresh_pending(delete_context.session)
+
+
+@event.listens_for(Session, "before_commit")
+def _refresh_before_commit(session: Session) -> None:
+    """Instructions update()/delete() de style 2.0 (sans after_bulk_*) : recalcul avant le commit."""
+    _refresh_pending(session)
+
+
+@event.listens_for(Session, "after_rollback")
+def _discard_pending(session: Session) -> None:
+    session.info.pop(_PENDING_KEYS, None)
@@ -0,0 +1,383 @@
+"""
+Service d'import de transactions en flux (fichiers CSV volumineux).
+
+⚠️ Before making changes, read: ../../docs/workflow/BEST_PRACTICES.md
+
+Ce service importe un fichier CSV bloc par bloc pour garder une mémoire constante :
+- Encodage, séparateur et en-tête détectés une seule fois sur un échantillon du début du fichier
+- Lecture par blocs de taille fixe avec le moteur C de pandas
+- Validation vectorisée de chaque bloc (mêmes règles que validate_transactions)
+- Insertion de chaque bloc en une seule instruction (executemany)
+- Progression rapportée après chaque bloc
+
+Il fournit aussi l'index des doublons (TransactionDuplicateIndex) utilisé par les deux modes
+d'import : les clés (date, quantite, nom) existantes sont chargées une fois par plage de dates
+puis chaque ligne est vérifiée en O(1), sans requête par ligne.
+"""
+
+import logging
+from datetime import date, timedelta
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+from sqlalchemy import func, Integer
+from sqlalchemy.orm import Session
+
+from backend.database.models import Transaction
+from backend.api.services.facets_service import invalidate_property_facets_on_commit
+from backend.api.utils.csv_utils import (
+    CSV_ENCODINGS,
+    sniff_csv_format,
+    iter_csv_chunks,
+    parse_transaction_dates,
+    parse_transaction_amounts,
+    clean_transaction_names,
+    find_name_combination_column,
+    combine_name_columns
+)
+
+logger = logging.getLogger(__name__)
+
+# Taille de l'échantillon lu pour détecter le format du fichier
+HEAD_SAMPLE_SIZE = 64 * 1024
+# Nombre de lignes lues, validées et insérées par bloc
+STREAMING_CHUNK_SIZE = 5000
+# Nombre maximum de doublons / erreurs détaillés conservés (mémoire constante)
+MAX_DUPLICATES_DETAILS = 50
+MAX_ERRORS_DETAILS = 100
+# Préfixe des noms générés pour les transactions sans libellé
+GENERATED_NAME_PREFIX = 'nom_a_justifier_'
+
+
+class TransactionDuplicateIndex:
+    """
+    Index en mémoire des transactions existantes d'une propriété pour la détection des doublons.
+
+    - Doublon avec nom : même (date, quantite, nom)
+    - Doublon sans nom : même (date, quantite), quel que soit le nom existant
+    - Les clés sont chargées par plage de dates (une requête par extension de la plage couverte)
+    - Seules les transactions existant avant l'import sont prises en compte (id <= max_id)
+    """
+
+    def __init__(self, db: Session, property_id: int, max_id: Optional[int] = None):
+        self.db = db
+        self.property_id = property_id
+        if max_id is None:
+            max_id = db.query(func.max(Transaction.id)).scalar() or 0
+        self.max_id = max_id
+        self._by_key: Dict[Tuple[date, float, str], int] = {}
+        self._by_date_amount: Dict[Tuple[date, float], Tuple[int, str]] = {}
+        self._range_start: Optional[date] = None
+        self._range_end: Optional[date] = None
+        self._next_generated_number: Optional[int] = None
+
+    def _load(self, start: date, end: date) -> None:
+        rows = self.db.query(
+            Transaction.id,
+            Transaction.date,
+            Transaction.quantite,
+            Transaction.nom
+        ).filter(
+            Transaction.property_id == self.property_id,
+            Transaction.id <= self.max_id,
+            Transaction.date >= start,
+            Transaction.date <= end
+        ).order_by(Transaction.id).all()
+        for row in rows:
+            self._by_key.setdefault((row.date, row.quantite, row.nom), row.id)
+            self._by_date_amount.setdefault((row.date, row.quantite), (row.id, row.nom))
+
+    def load_range(self, start: date, end: date) -> None:
+        """
+        Charge les clés des transactions existantes entre start et end (bornes incluses).
+        Seule la partie de la plage qui n'est pas encore couverte est chargée.
+        """
+        if self._range_start is None:
+            self._load(start, end)
+            self._range_start, self._range_end = start, end
+            return
+        if start < self._range_start:
+            self._load(start, self._range_start - timedelta(days=1))
+            self._range_start = start
+        if end > self._range_end:
+            self._load(self._range_end + timedelta(days=1), end)
+            self._range_end = end
+
+    def find(self, date_value: date, quantite: float, nom: str) -> Optional[int]:
+        """Retourne l'ID de la transaction existante (date, quantite, nom), ou None."""
+        return self._by_key.get((date_value, quantite, nom))
+
+    def find_without_nom(self, date_value: date, quantite: float) -> Optional[Tuple[int, str]]:
+        """Retourne (id, nom) d'une transaction existante (date, quantite), ou None."""
+        return self._by_date_amount.get((date_value, quantite))
+
+    def next_generated_name(self) -> str:
+        """
+        Génère le prochain nom "nom_a_justifier_N".
+
+        Le compteur est initialisé une seule fois (au-delà du nombre et du plus grand numéro
+        des noms générés existants), puis incrémenté en mémoire pour chaque ligne sans nom.
+        """
+        if self._next_generated_number is None:
+            generated = Transaction.nom.like(f'{GENERATED_NAME_PREFIX}%')
+            existing_count = self.db.query(func.count(Transaction.id)).filter(generated).scalar() or 0
+            max_number = self.db.query(
+                func.max(func.cast(func.substr(Transaction.nom, len(GENERATED_NAME_PREFIX) + 1), Integer))
+            ).filter(generated).scalar() or 0
+            self._next_generated_number = max(existing_count, max_number) + 1
+        name = f"{GENERATED_NAME_PREFIX}{self._next_generated_number}"
+        self._next_generated_number += 1
+        return name
+
+
+def _get_mapped_columns(column_mapping: Dict[str, str]) -> Dict[str, Optional[str]]:
+    columns = {'date': None, 'quantite': None, 'nom': None}
+    for file_col, db_col in column_mapping.items():
+        if db_col in columns:
+            columns[db_col] = file_col
+    return columns
+
+
+def stream_import_transactions(
+    db: Session,
+    file_path: str,
+    filename: str,
+    property_id: int,
+    column_mapping: Dict[str, str],
+    chunk_size: int = STREAMING_CHUNK_SIZE,
+    progress_callback: Optional[Callable[[Dict[str, Any]], None]] = None
+) -> Dict[str, Any]:
+    """
+    Importe un fichier CSV de transactions bloc par bloc.
+
+    Les transactions sont insérées dans la transaction courante de la session (pas de commit) :
+    l'appelant recalcule les soldes, enrichit et commit. Si l'encodage détecté échoue plus loin
+    dans le fichier, l'import est annulé (rollback) et relancé avec l'encodage suivant.
+
+    Args:
+        db: Session de base de données
+        file_path: Chemin du fichier CSV sur disque
+        filename: Nom du fichier (source_file des transactions)
+        property_id: ID de la propriété
+        column_mapping: Mapping des colonnes fichier → BDD
+        chunk_size: Nombre de lignes par bloc
+        progress_callback: Fonction appelée après chaque bloc avec les compteurs courants (optionnel ;
+            l'avancement est toujours journalisé). Elle s'exécute pendant la transaction d'import :
+            ne pas y écrire en base depuis une autre session (SQLite : un seul écrivain à la fois)
+
+    Returns:
+        Dict avec imported_count, duplicates_count, errors_count, duplicates, errors (détails limités),
+        period_start, period_end et inserted_ids
+
+    Raises:
+        ValueError: Si le mapping est incomplet ou si le fichier ne peut pas être lu
+    """
+    columns = _get_mapped_columns(column_mapping)
+    if not all(columns.values()):
+        raise ValueError("Mapping incomplet: date, quantite et nom requis")
+
+    with open(file_path, 'rb') as f:
+        head = f.read(HEAD_SAMPLE_SIZE)
+    encoding, separator, has_header, names = sniff_csv_format(head, is_complete=len(head) < HEAD_SAMPLE_SIZE)
+    logger.info(f"[TransactionImport] Format détecté pour {filename}: encoding={encoding}, separator={repr(separator)}, header={has_header}")
+
+    # Encodages de repli si l'encodage détecté sur l'échantillon échoue plus loin dans le fichier
+    fallback_encodings = [enc for enc in CSV_ENCODINGS if enc not in (encoding, 'utf-8', 'utf-8-sig')]
+    for attempt_encoding in [encoding] + fallback_encodings:
+        try:
+            return _import_chunks(
+                db, file_path, filename, property_id, columns, column_mapping,
+                attempt_encoding, separator, has_header, names, chunk_size, progress_callback
+            )
+        except UnicodeDecodeError:
+            db.rollback()
+            logger.warning(f"[TransactionImport] Encodage {attempt_encoding} invalide pour {filename}, nouvel essai avec l'encodage suivant")
+
+    raise ValueError(f"Impossible de lire le fichier {filename} avec les encodages disponibles")
+
+
+def _import_chunks(
+    db: Session,
+    file_path: str,
+    filename: str,
+    property_id: int,
+    columns: Dict[str, str],
+    column_mapping: Dict[str, str],
+    encoding: str,
+    separator: str,
+    has_header: bool,
+    names: Optional[List[str]],
+    chunk_size: int,
+    progress_callback: Optional[Callable[[Dict[str, Any]], None]]
+) -> Dict[str, Any]:
+    date_col = columns['date']
+    quantite_col = columns['quantite']
+    nom_col = columns['nom']
+
+    # Les doublons sont recherchés uniquement parmi les transactions existant avant l'import
+    # (comme l'import classique, où les lignes du fichier ne sont insérées qu'à la fin)
+    duplicate_index = TransactionDuplicateIndex(db, property_id)
+    last_transaction = db.query(Transaction).order_by(Transaction.date.desc(), Transaction.id.desc()).first()
+    current_solde = last_transaction.solde if last_transaction else 0.0
+
+    stats = {
+        "imported_count": 0,
+        "duplicates_count": 0,
+        "errors_count": 0,
+        "duplicates": [],
+        "errors": [],
+        "period_start": None,
+        "period_end": None,
+    }
+    invalid_dates = 0
+    invalid_amounts = 0
+    empty_names = 0
+    rows_read = 0
+    combination_col = None
+    insert_stmt = Transaction.__table__.insert()
+
+    def add_error(error: Dict[str, Any]) -> None:
+        stats["errors_count"] += 1
+        if len(stats["errors"]) < MAX_ERRORS_DETAILS:
+            stats["errors"].append(error)
+
+    def add_duplicate(duplicate: Dict[str, Any]) -> None:
+        stats["duplicates_count"] += 1
+        if len(stats["duplicates"]) < MAX_DUPLICATES_DETAILS:
+            stats["duplicates"].append(duplicate)
+
+    for chunk_index, chunk in enumerate(iter_csv_chunks(file_path, encoding, separator, has_header, names, chunk_size)):
+        rows_read += len(chunk)
+
+        # Colonne nom combinée (ex: "Col5_combined") : colonne complémentaire choisie sur le premier bloc
+        if '_combined' in nom_col and nom_col not in chunk.columns:
+            base_col = nom_col.replace('_combined', '')
+            if chunk_index == 0:
+                combination_col = find_name_combination_column(chunk, column_mapping, base_col)
+            if combination_col and base_col in chunk.columns and combination_col in chunk.columns:
+                chunk[nom_col] = combine_name_columns(chunk, base_col, combination_col)
+            elif base_col in chunk.columns:
+                chunk[nom_col] = chunk[base_col].astype(str).str.strip()
+
+        missing = [col for col in (date_col, quantite_col, nom_col) if col not in chunk.columns]
+        if missing:
+            raise ValueError(f"Colonnes introuvables dans le fichier: {', '.join(missing)}")
+
+        # Validation vectorisée (mêmes règles que validate_transactions)
+        dates = parse_transaction_dates(chunk[date_col])
+        valid_dates = dates.notna()
+        invalid_dates += int((~valid_dates).sum())
+        amounts = parse_transaction_amounts(chunk[quantite_col])[valid_dates]
+        noms = clean_transaction_names(chunk[nom_col])[valid_dates]
+        dates = dates[valid_dates]
+        if len(dates):
+            duplicate_index.load_range(dates.min().date(), dates.max().date())
+        invalid_amounts += int(amounts.isna().sum())
+        empty_names += int((noms == '').sum())
+
+        rows_to_insert = []
+        for line_index, date_parsed, quantite_value, nom_value in zip(
+            dates.index, dates.dt.date, amounts.tolist(), noms.tolist()
+        ):
+            line_number = int(line_index) + 1
+            date_value: date = date_parsed
+
+            if quantite_value != quantite_value:  # NaN
+                add_error({
+                    "line_number": line_number,
+                    "date": date_value.strftime('%d/%m/%Y'),
+                    "quantite": None,
+                    "nom": None,
+                    "error_message": "Quantité invalide: Quantité manquante ou invalide"
+                })
+                continue
+
+            # Si le nom est vide, vérifier les doublons sur (Date + Quantité) uniquement
+            if not nom_value:
+                existing_no_nom = duplicate_index.find_without_nom(date_value, quantite_value)
+                if existing_no_nom:
+                    add_duplicate({
+                        "date": date_value.strftime('%d/%m/%Y'),
+                        "quantite": quantite_value,
+                        "nom": existing_no_nom[1],
+                        "existing_id": existing_no_nom[0]
+                    })
+                    continue
+
+                # Pas de doublon, générer automatiquement un nom "nom_a_justifier_N"
+                nom_value = duplicate_index.next_generated_name()
+            else:
+                existing_id = duplicate_index.find(date_value, quantite_value, nom_value)
+                if existing_id:
+                    add_duplicate({
+                        "date": date_value.strftime('%d/%m/%Y'),
+                        "quantite": quantite_value,
+                        "nom": nom_value,
+                        "existing_id": existing_id
+                    })
+                    continue
+
+            # Solde provisoire (recalculé par l'appelant après l'import)
+            current_solde = current_solde + quantite_value
+            rows_to_insert.append({
+                "property_id": property_id,
+                "date": date_value,
+                "quantite": quantite_value,
+                "nom": nom_value,
+                "solde": current_solde,
+                "source_file": filename,
+            })
+
+            if stats["period_start"] is None or date_value < stats["period_start"]:
+                stats["period_start"] = date_value
+            if stats["period_end"] is None or date_value > stats["period_end"]:
+                stats["period_end"] = date_value
+
+        # Insertion du bloc en une seule instruction
+        if rows_to_insert:
+            db.execute(insert_stmt, rows_to_insert)
+            # Écriture Core : invalider explicitement les facettes de la propriété
+            invalidate_property_facets_on_commit(db, property_id)
+            stats["imported_count"] += len(rows_to_insert)
+
+        progress = {
+            "chunk": chunk_index + 1,
+            "rows_read": rows_read,
+            "imported_count": stats["imported_count"],
+            "duplicates_count": stats["duplicates_count"],
+            "errors_count": stats["errors_count"],
+        }
+        logger.info(
+            f"[TransactionImport] {filename} - bloc {progress['chunk']}: {rows_read} ligne(s) lue(s), "
+            f"{stats['imported_count']} importée(s), {stats['duplicates_count']} doublon(s), {stats['errors_count']} erreur(s)"
+        )
+        if progress_callback:
+            progress_callback(progress)
+
+    # Erreurs de validation agrégées (mêmes messages que validate_transactions)
+    validation_errors = []
+    if invalid_dates > 0:
+        validation_errors.append(f"{invalid_dates} dates invalides détectées")
+    if invalid_amounts > 0:
+        validation_errors.append(f"{invalid_amounts} valeurs numériques invalides dans {quantite_col}")
+    if empty_names > 0:
+        validation_errors.append(f"{empty_names} noms vides détectés")
+    stats["errors_count"] += len(validation_errors)
+    stats["errors"] = [
+        {
+            "line_number": 0,
+            "date": None,
+            "quantite": None,
+            "nom": None,
+            "error_message": f"Erreur de validation: {validation_error}"
+        }
+        for validation_error in validation_errors
+    ] + stats["errors"]
+
+    stats["inserted_ids"] = [
+        row.id for row in db.query(Transaction.id).filter(
+            Transaction.id > duplicate_index.max_id,
+            Transaction.property_id == property_id
+        ).order_by(Transaction.id).all()
+    ]
+
+    return stats
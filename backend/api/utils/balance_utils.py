@@ -2,68 +2,121 @@
 Balance calculation utilities.
 
 ⚠️ Before making changes, read: ../../docs/workflow/BEST_PRACTICES.md
+
+Le solde d'une transaction est la somme cumulée des quantités de la propriété dans l'ordre (date, id).
+Le recalcul est incrémental : seules les transactions à partir du premier point modifié sont lues
+(colonnes id, quantite, solde uniquement) et seules celles dont le solde change sont réécrites,
+par lots, avec un UPDATE exécuté en executemany (pas d'objets ORM).
 """
 
+import logging
+from datetime import date
+from typing import Optional
+
+from sqlalchemy import and_, bindparam, or_, true, update
 from sqlalchemy.orm import Session
 from backend.database.models import Transaction
-from datetime import date
 
+logger = logging.getLogger(__name__)
+
+# Nombre de soldes réécrits par instruction UPDATE (executemany)
+BALANCE_UPDATE_BATCH_SIZE = 1000
+
+
+def _rewrite_balances(db: Session, property_id: int, start_filter, current_solde: float) -> int:
+    """
+    Réécrit les soldes des transactions de la propriété qui satisfont start_filter.
+
+    Args:
+        db: Session de base de données
+        property_id: ID de la propriété
+        start_filter: Condition SQL sélectionnant les transactions à partir du point modifié
+        current_solde: Solde de la transaction précédant le point modifié (0.0 si aucune)
 
-def recalculate_balances_from_date(db: Session, from_date: date, property_id: int) -> None:
+    Returns:
+        Nombre de transactions dont le solde a été modifié
+    """
+    rows = db.query(Transaction.id, Transaction.quantite, Transaction.solde).filter(
+        Transaction.property_id == property_id,
+        start_filter
+    ).order_by(Transaction.date, Transaction.id).all()
+
+    table = Transaction.__table__
+    update_stmt = update(table).where(table.c.id == bindparam('b_id')).values(solde=bindparam('b_solde'))
+
+    changed = []
+    changed_count = 0
+    for row in rows:
+        current_solde = current_solde + row.quantite
+        # Ne pas réécrire les lignes dont le solde est déjà correct
+        if row.solde != current_solde:
+            changed.append({'b_id': row.id, 'b_solde': current_solde})
+            if len(changed) >= BALANCE_UPDATE_BATCH_SIZE:
+                db.execute(update_stmt, changed)
+                changed_count += len(changed)
+                changed = []
+    if changed:
+        db.execute(update_stmt, changed)
+        changed_count += len(changed)
+
+    db.commit()
+    logger.info(f"[Balance] property_id={property_id}: {len(rows)} transaction(s) relue(s), {changed_count} solde(s) modifié(s)")
+    return changed_count
+
+
+def recalculate_balances_from_date(
+    db: Session,
+    from_date: date,
+    property_id: int,
+    from_id: Optional[int] = None
+) -> int:
     """
     Recalcule les soldes de toutes les transactions à partir d'une date donnée pour une propriété.
-    
+
+    Le solde de départ est celui de la dernière transaction qui précède le point de départ.
+
     Args:
         db: Session de base de données
         from_date: Date à partir de laquelle recalculer (inclusive)
         property_id: ID de la propriété (obligatoire)
+        from_id: ID de la première transaction modifiée à from_date (optionnel) ;
+            les transactions de cette date avec un ID inférieur ne sont pas relues
+
+    Returns:
+        Nombre de transactions dont le solde a été modifié
     """
-    # Récupérer toutes les transactions triées par date - FILTRER PAR PROPERTY_ID
-    all_transactions = db.query(Transaction).filter(
-        Transaction.property_id == property_id
-    ).order_by(Transaction.date, Transaction.id).all()
-    
-    if not all_transactions:
-        return
-    
-    # Trouver l'index de la première transaction à partir de from_date
-    start_index = 0
-    for i, trans in enumerate(all_transactions):
-        if trans.date >= from_date:
-            start_index = i
-            break
-    
-    # Si on commence au début, solde initial = 0
-    # Sinon, prendre le solde de la transaction précédente
-    if start_index == 0:
-        current_solde = 0.0
+    if from_id is None:
+        start_filter = Transaction.date >= from_date
+        before_filter = Transaction.date < from_date
     else:
-        current_solde = all_transactions[start_index - 1].solde
-    
-    # Recalculer les soldes à partir de start_index
-    for i in range(start_index, len(all_transactions)):
-        transaction = all_transactions[i]
-        current_solde = current_solde + transaction.quantite
-        transaction.solde = current_solde
-    
-    db.commit()
+        start_filter = or_(
+            Transaction.date > from_date,
+            and_(Transaction.date == from_date, Transaction.id >= from_id)
+        )
+        before_filter = or_(
+            Transaction.date < from_date,
+            and_(Transaction.date == from_date, Transaction.id < from_id)
+        )
 
+    # Solde de la transaction précédente (0.0 si on commence au début)
+    previous = db.query(Transaction.solde).filter(
+        Transaction.property_id == property_id,
+        before_filter
+    ).order_by(Transaction.date.desc(), Transaction.id.desc()).first()
+    current_solde = previous.solde if previous and previous.solde is not None else 0.0
 
-def recalculate_all_balances(db: Session, property_id: int) -> None:
+    return _rewrite_balances(db, property_id, start_filter, current_solde)
+
+
+def recalculate_all_balances(db: Session, property_id: int) -> int:
     """
     Recalcule tous les soldes depuis le début (solde initial = 0).
-    
+
     Args:
         db: Session de base de données
-    """
-    transactions = db.query(Transaction).filter(
-        Transaction.property_id == property_id
-    ).order_by(Transaction.date, Transaction.id).all()
-    
-    current_solde = 0.0
-    for transaction in transactions:
-        current_solde = current_solde + transaction.quantite
-        transaction.solde = current_solde
-    
-    db.commit()
+        property_id: ID de la propriété
 
+    Returns:
+        Nombre de transactions dont le solde a été modifié
+    """
+    return _rewrite_balances(db, property_id, true(), 0.0)
@@ -5,11 +5,16 @@ CSV utilities for reading, detecting columns, and validating transaction data.
 """
 
 import pandas as pd
-from typing import Dict, List, Optional, Tuple, Any
+from typing import Dict, Iterator, List, Optional, Tuple, Any
 from datetime import datetime
 import io
 
 
+# Séparateurs et encodages essayés (dans cet ordre) pour lire les fichiers CSV
+CSV_SEPARATORS = [';', ',', '\t']
+CSV_ENCODINGS = ['utf-8', 'utf-8-sig', 'latin-1', 'iso-8859-1', 'cp1252']
+
+
 def _has_header(lines: List[str], separator: str) -> bool:
     """
     Détecte si la première ligne est un en-tête ou des données en analysant plusieurs lignes.
@@ -115,11 +120,8 @@ def read_csv_safely(file_content: bytes, filename: str = "") -> Tuple[pd.DataFra
     Raises:
         ValueError: Si le fichier ne peut pas être lu avec les encodages/séparateurs disponibles
     """
-    separators = [';', ',', '\t']
-    encodings = ['utf-8', 'utf-8-sig', 'latin-1', 'iso-8859-1', 'cp1252']
-    
-    for enc in encodings:
-        for sep_char in separators:
+    for enc in CSV_ENCODINGS:
+        for sep_char in CSV_SEPARATORS:
             try:
                 # Convertir bytes en string
                 file_string = file_content.decode(enc)
@@ -194,6 +196,120 @@ def read_csv_safely(file_content: bytes, filename: str = "") -> Tuple[pd.DataFra
     raise ValueError(f"Impossible de lire le fichier {filename} avec les encodages et séparateurs disponibles")
 
 
+def sniff_csv_format(head: bytes, is_complete: bool = False) -> Tuple[str, str, bool, Optional[List[str]]]:
+    """
+    Détecte l'encodage, le séparateur et la présence d'un en-tête à partir d'un échantillon
+    du début du fichier (mêmes règles et même ordre d'essai que read_csv_safely).
+    
+    Args:
+        head: Premiers octets du fichier
+        is_complete: True si l'échantillon contient tout le fichier
+    
+    Returns:
+        Tuple[encoding, separator, has_header, names]: names contient les noms de colonnes
+        génériques (Col1, Col2, ...) si le fichier n'a pas d'en-tête, None sinon
+    
+    Raises:
+        ValueError: Si l'échantillon ne peut pas être lu avec les encodages/séparateurs disponibles
+    """
+    # Ne garder que des lignes complètes (la dernière peut être coupée au milieu d'un caractère)
+    if not is_complete and b'\n' in head:
+        head = head[:head.rindex(b'\n')]
+    
+    for enc in CSV_ENCODINGS:
+        try:
+            sample = head.decode(enc)
+        except UnicodeDecodeError:
+            continue
+        
+        # Le BOM UTF-8 est retiré par read_csv_safely : utiliser utf-8-sig pour la lecture en flux
+        stream_encoding = enc
+        if sample.startswith('\ufeff'):
+            sample = sample[1:]
+            if enc == 'utf-8':
+                stream_encoding = 'utf-8-sig'
+        
+        lines = [line.strip() for line in sample.split('\n') if line.strip()]
+        if not lines:
+            continue
+        
+        for sep_char in CSV_SEPARATORS:
+            try:
+                has_header = _has_header(lines[:min(5, len(lines))], sep_char)
+                names = None
+                if not has_header:
+                    max_cols = max(len(line.split(sep_char)) for line in lines)
+                    names = [f'Col{i+1}' for i in range(max_cols)]
+                
+                df = pd.read_csv(
+                    io.StringIO('\n'.join(lines)),
+                    sep=sep_char,
+                    engine='c',
+                    on_bad_lines='skip',
+                    header=0 if has_header else None,
+                    names=names,
+                    dtype=str,
+                    keep_default_na=False
+                )
+                # Même critère que read_csv_safely : au moins 2 colonnes non vides
+                non_empty_cols = [
+                    col for col in df.columns
+                    if not (df[col].isna().all() or df[col].astype(str).str.strip().eq('').all())
+                ]
+                if len(non_empty_cols) > 1:
+                    return stream_encoding, sep_char, has_header, names
+            except (pd.errors.ParserError, ValueError):
+                continue
+    
+    raise ValueError("Impossible de détecter l'encodage et le séparateur du fichier")
+
+
+def iter_csv_chunks(
+    file_path: str,
+    encoding: str,
+    separator: str,
+    has_header: bool,
+    names: Optional[List[str]] = None,
+    chunk_size: int = 5000
+) -> Iterator[pd.DataFrame]:
+    """
+    Lit un fichier CSV par blocs de taille fixe avec le moteur C de pandas.
+    
+    Toutes les colonnes sont lues en chaînes (types identiques d'un bloc à l'autre) et les
+    espaces en début/fin de valeur sont supprimés (équivalent du nettoyage des lignes de read_csv_safely).
+    L'index des DataFrames est continu d'un bloc à l'autre (position de la ligne dans le fichier).
+    
+    Args:
+        file_path: Chemin du fichier
+        encoding: Encodage (voir sniff_csv_format)
+        separator: Séparateur
+        has_header: True si la première ligne est un en-tête
+        names: Noms de colonnes génériques si pas d'en-tête
+        chunk_size: Nombre de lignes par bloc
+    
+    Yields:
+        pd.DataFrame: Bloc de lignes
+    """
+    reader = pd.read_csv(
+        file_path,
+        sep=separator,
+        encoding=encoding,
+        engine='c',
+        on_bad_lines='skip',
+        header=0 if has_header else None,
+        names=names,
+        dtype=str,
+        keep_default_na=False,
+        skip_blank_lines=True,
+        chunksize=chunk_size
+    )
+    with reader:
+        for chunk in reader:
+            for col in chunk.columns:
+                chunk[col] = chunk[col].str.strip()
+            yield chunk
+
+
 def _detect_column_by_content(df: pd.DataFrame, col_name: str, target_type: str) -> bool:
     """
     Détecte le type d'une colonne en analysant son contenu.
@@ -471,6 +587,110 @@ def detect_column_mapping(df: pd.DataFrame) -> Dict[str, str]:
     return mapping
 
 
+def find_name_combination_column(df: pd.DataFrame, column_mapping: Dict[str, str], base_col: str) -> Optional[str]:
+    """
+    Cherche la colonne de texte non mappée à combiner avec la colonne nom de base
+    (recréation d'une colonne "<base>_combined" détectée lors de l'aperçu).
+    
+    Args:
+        df: DataFrame (ou premier bloc du fichier)
+        column_mapping: Mapping des colonnes fichier → BDD
+        base_col: Colonne nom de base (ex: "Col5" pour "Col5_combined")
+    
+    Returns:
+        Nom de la colonne à combiner, ou None si aucune colonne de texte n'est trouvée
+    """
+    for col in df.columns:
+        if col in column_mapping.keys() or col == base_col:
+            continue
+        col_data = df[col].astype(str)
+        non_empty = col_data[col_data.str.strip() != '']
+        if len(non_empty) <= len(df) * 0.1:  # Au moins 10% de valeurs non vides
+            continue
+        # Vérifier que ce n'est pas une date ou un nombre
+        is_text = True
+        for val in non_empty.head(min(10, len(non_empty))):
+            val_str = str(val).strip()
+            if len(val_str) > 2:
+                try:
+                    datetime.strptime(val_str, '%d/%m/%Y')
+                    is_text = False
+                    break
+                except:
+                    pass
+                try:
+                    float(val_str.replace(',', '.').replace(' ', ''))
+                    is_text = False
+                    break
+                except:
+                    pass
+        if is_text:
+            return col
+    return None
+
+
+def combine_name_columns(df: pd.DataFrame, base_col: str, other_col: str) -> pd.Series:
+    """
+    Combine deux colonnes de libellé (valeurs non vides jointes par un espace, "None" ignoré).
+    
+    Args:
+        df: DataFrame
+        base_col: Colonne nom principale
+        other_col: Colonne de texte complémentaire
+    
+    Returns:
+        pd.Series: Libellés combinés
+    """
+    def _clean(values: pd.Series) -> pd.Series:
+        values = values.where(values.notna(), '').astype(str).str.strip()
+        return values.mask(values.str.lower() == 'none', '')
+    
+    first = _clean(df[base_col])
+    second = _clean(df[other_col])
+    combined = first.where(first != '', second)
+    both = (first != '') & (second != '')
+    return combined.mask(both, (first + ' ' + second).str.strip())
+
+
+def parse_transaction_dates(values: pd.Series) -> pd.Series:
+    """
+    Parse une colonne de dates au format DD/MM/YYYY (valeurs invalides → NaT).
+    
+    Args:
+        values: Série de valeurs brutes
+    
+    Returns:
+        pd.Series: Série datetime64 (NaT pour les dates invalides)
+    """
+    return pd.to_datetime(values, format='%d/%m/%Y', errors='coerce')
+
+
+def parse_transaction_amounts(values: pd.Series) -> pd.Series:
+    """
+    Parse une colonne de montants (virgule ou point, espaces ignorés ; valeurs invalides → NaN).
+    
+    Args:
+        values: Série de valeurs brutes
+    
+    Returns:
+        pd.Series: Série numérique (NaN pour les montants invalides)
+    """
+    return pd.to_numeric(values.astype(str).str.replace(' ', '').str.replace(',', '.'), errors='coerce')
+
+
+def clean_transaction_names(values: pd.Series) -> pd.Series:
+    """
+    Normalise une colonne de noms (conversion en chaîne et suppression des espaces en début/fin).
+    
+    Args:
+        values: Série de valeurs brutes
+    
+    Returns:
+        pd.Series: Série de chaînes nettoyées
+    """
+    return values.astype(str).str.strip()
+
+
 def validate_transactions(df: pd.DataFrame, column_mapping: Dict[str, str]) -> Tuple[pd.DataFrame, List[str]]:
     """
     Valide les transactions du DataFrame.
@@ -499,7 +719,7 @@ def validate_transactions(df: pd.DataFrame, column_mapping: Dict[str, str]) -> T
     if date_col:
         try:
             # Essayer de parser les dates au format DD/MM/YYYY
-            df_clean[date_col] = pd.to_datetime(df_clean[date_col], format='%d/%m/%Y', errors='coerce')
+            df_clean[date_col] = parse_transaction_dates(df_clean[date_col])
             invalid_dates = df_clean[date_col].isna().sum()
             if invalid_dates > 0:
                 errors.append(f"{invalid_dates} dates invalides détectées")
@@ -513,8 +733,7 @@ def validate_transactions(df: pd.DataFrame, column_mapping: Dict[str, str]) -> T
         if bdd_col == 'quantite':
             try:
                 # Convertir en string, remplacer virgule par point, puis en numérique
-                df_clean[col] = df_clean[col].astype(str).str.replace(' ', '').str.replace(',', '.')
-                df_clean[col] = pd.to_numeric(df_clean[col], errors='coerce')
+                df_clean[col] = parse_transaction_amounts(df_clean[col])
                 invalid_nums = df_clean[col].isna().sum()
                 if invalid_nums > 0:
                     errors.append(f"{invalid_nums} valeurs numériques invalides dans {col}")
@@ -530,7 +749,7 @@ def validate_transactions(df: pd.DataFrame, column_mapping: Dict[str, str]) -> T
     
     if nom_col:
         try:
-            df_clean[nom_col] = df_clean[nom_col].astype(str).str.strip()
+            df_clean[nom_col] = clean_transaction_names(df_clean[nom_col])
             empty_names = (df_clean[nom_col] == '').sum()
             if empty_names > 0:
                 errors.append(f"{empty_names} noms vides détectés")
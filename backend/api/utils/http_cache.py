@@ -0,0 +1,52 @@
+"""
+HTTP conditional request utilities (ETag / If-None-Match) for API endpoints.
+
+⚠️ Before making changes, read: ../../docs/workflow/BEST_PRACTICES.md
+"""
+
+from typing import Any
+
+from fastapi import Request
+from fastapi.encoders import jsonable_encoder
+from fastapi.responses import JSONResponse, Response
+
+
+def etag_matches(request: Request, etag: str) -> bool:
+    """
+    Indiquer si l'en-tête If-None-Match de la requête correspond à l'ETag.
+
+    Args:
+        request: Requête HTTP
+        etag: ETag courant (entre guillemets)
+
+    Returns:
+        True si le client possède déjà cette version
+    """
+    header = request.headers.get("if-none-match")
+    if not header:
+        return False
+    candidates = [candidate.strip() for candidate in header.split(",")]
+    # Comparaison faible (RFC 9110) : W/"x" correspond à "x"
+    return "*" in candidates or etag in (candidate.removeprefix("W/") for candidate in candidates)
+
+
+def etag_response(request: Request, content: Any, version: str) -> Response:
+    """
+    Construire une réponse JSON avec ETag, ou une 304 si le client a déjà cette version.
+
+    Le client doit revalider à chaque fois (Cache-Control: no-cache) : la réponse 304
+    évite seulement de renvoyer le corps.
+
+    Args:
+        request: Requête HTTP
+        content: Contenu JSON de la réponse
+        version: Version des données (sans guillemets)
+
+    Returns:
+        JSONResponse (200) ou Response (304)
+    """
+    etag = f'"{version}"'
+    headers = {"ETag": etag, "Cache-Control": "no-cache"}
+    if etag_matches(request, etag):
+        return Response(status_code=304, headers=headers)
+    return JSONResponse(content=jsonable_encoder(content), headers=headers)
@@ -0,0 +1,63 @@
+"""
+Background job utilities for API endpoints.
+
+⚠️ Before making changes, read: ../../docs/workflow/BEST_PRACTICES.md
+"""
+
+import json
+from typing import Optional
+
+from fastapi import HTTPException
+from sqlalchemy.orm import Session
+
+from backend.database.models import Job
+from backend.api.models import JobResponse
+from backend.api.services.job_service import submit_job
+
+
+def job_to_response(job: Job) -> JobResponse:
+    """
+    Convertir une tâche en réponse API (params/result JSON décodés).
+
+    Args:
+        job: Tâche
+
+    Returns:
+        JobResponse
+    """
+    return JobResponse(
+        id=job.id,
+        property_id=job.property_id,
+        kind=job.kind,
+        status=job.status,
+        progress=job.progress,
+        message=job.message,
+        result=json.loads(job.result) if job.result else None,
+        error=job.error,
+        created_at=job.created_at,
+        started_at=job.started_at,
+        finished_at=job.finished_at
+    )
+
+
+def submit_job_or_400(db: Session, kind: str, property_id: int, params: Optional[dict] = None) -> JobResponse:
+    """
+    Soumettre une tâche de fond (property_id déjà validé) et retourner sa réponse API.
+
+    Args:
+        db: Session de base de données
+        kind: Type de tâche
+        property_id: ID de la propriété
+        params: Paramètres de la tâche (optionnel)
+
+    Returns:
+        JobResponse de la tâche créée (statut pending)
+
+    Raises:
+        HTTPException(400): Si le type de tâche est inconnu
+    """
+    try:
+        job = submit_job(db, kind, property_id, params)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    return job_to_response(job)
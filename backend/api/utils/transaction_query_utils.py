@@ -0,0 +1,198 @@
+"""
+Transaction query utilities.
+
+⚠️ Before making changes, read: ../../docs/workflow/BEST_PRACTICES.md
+
+Les listes de transactions (liste paginée, export, détails du tableau croisé) sont lues en une seule
+requête : Transaction jointe (jointure externe 1-1) à EnrichedTransaction, limitée aux colonnes
+sérialisées dans TransactionResponse, au lieu d'une requête de classification par transaction.
+
+La liste paginée supporte aussi une pagination par curseur (keyset) : le curseur contient la valeur
+de la colonne de tri et l'ID de la dernière transaction renvoyée, et la page suivante est lue avec
+une condition de reprise sur (colonne de tri, Transaction.id) au lieu d'un OFFSET.
+"""
+
+import base64
+import binascii
+import json
+from datetime import date
+from typing import Any, Iterable, List, Optional, Tuple
+
+from sqlalchemy import and_, asc, desc, or_
+from sqlalchemy.orm import Query, Session
+from backend.database.models import Transaction, EnrichedTransaction
+from backend.api.models import TransactionResponse
+
+# Colonnes sérialisées dans TransactionResponse (Transaction + classification de EnrichedTransaction)
+TRANSACTION_RESPONSE_COLUMNS = (
+    Transaction.id,
+    Transaction.date,
+    Transaction.quantite,
+    Transaction.nom,
+    Transaction.solde,
+    Transaction.source_file,
+    Transaction.created_at,
+    Transaction.updated_at,
+    EnrichedTransaction.level_1,
+    EnrichedTransaction.level_2,
+    EnrichedTransaction.level_3,
+)
+
+
+def query_transactions_with_classification(db: Session) -> Query:
+    """
+    Construit la requête projetée Transaction + classification (sans filtre).
+
+    Args:
+        db: Session de base de données
+
+    Returns:
+        Requête SQLAlchemy sur TRANSACTION_RESPONSE_COLUMNS, EnrichedTransaction en jointure externe
+    """
+    return db.query(*TRANSACTION_RESPONSE_COLUMNS).outerjoin(
+        EnrichedTransaction, Transaction.id == EnrichedTransaction.transaction_id
+    )
+
+
+def rows_to_transaction_responses(rows: Iterable) -> List[TransactionResponse]:
+    """
+    Sérialise les lignes projetées en TransactionResponse.
+
+    Args:
+        rows: Lignes issues d'une requête sur TRANSACTION_RESPONSE_COLUMNS
+
+    Returns:
+        Liste de TransactionResponse
+    """
+    return [TransactionResponse(**row._mapping) for row in rows]
+
+
+# Colonnes de tri autorisées pour GET /api/transactions
+TRANSACTION_SORT_COLUMNS = {
+    "date": Transaction.date,
+    "quantite": Transaction.quantite,
+    "nom": Transaction.nom,
+    "solde": Transaction.solde,
+    "level_1": EnrichedTransaction.level_1,
+    "level_2": EnrichedTransaction.level_2,
+    "level_3": EnrichedTransaction.level_3,
+}
+
+
+def resolve_transaction_sort(sort_by: Optional[str], sort_direction: Optional[str]) -> Tuple[str, str]:
+    """
+    Normalise la colonne et la direction de tri.
+
+    Args:
+        sort_by: Colonne de tri demandée (None ou inconnue → date)
+        sort_direction: Direction demandée (asc, desc)
+
+    Returns:
+        Tuple (clé de tri, direction) ; par défaut ("date", "desc")
+    """
+    if not sort_by or sort_by not in TRANSACTION_SORT_COLUMNS:
+        return "date", "desc"
+    sort_dir = sort_direction.lower() if sort_direction else "desc"
+    if sort_dir not in ["asc", "desc"]:
+        sort_dir = "desc"
+    return sort_by, sort_dir
+
+
+def apply_transaction_sort(query: Query, sort_key: str, sort_dir: str) -> Query:
+    """
+    Trie la requête sur la colonne demandée, puis sur Transaction.id (départage stable).
+
+    Args:
+        query: Requête issue de query_transactions_with_classification
+        sort_key: Clé de tri (voir TRANSACTION_SORT_COLUMNS)
+        sort_dir: Direction (asc, desc), appliquée aussi à l'ID
+
+    Returns:
+        Requête triée
+    """
+    direction = asc if sort_dir == "asc" else desc
+    return query.order_by(direction(TRANSACTION_SORT_COLUMNS[sort_key]), direction(Transaction.id))
+
+
+def encode_transaction_cursor(sort_key: str, sort_dir: str, row: Any) -> str:
+    """
+    Encode le curseur pointant après une ligne de la liste.
+
+    Args:
+        sort_key: Clé de tri de la liste
+        sort_dir: Direction de tri de la liste
+        row: Dernière ligne renvoyée (requête sur TRANSACTION_RESPONSE_COLUMNS)
+
+    Returns:
+        Curseur opaque (base64 url-safe)
+    """
+    value = row._mapping[sort_key]
+    if isinstance(value, date):
+        value = value.isoformat()
+    payload = json.dumps([sort_key, sort_dir, value, row.id], separators=(",", ":"))
+    return base64.urlsafe_b64encode(payload.encode("utf-8")).decode("ascii")
+
+
+def decode_transaction_cursor(cursor: str, sort_key: str, sort_dir: str) -> Tuple[Any, int]:
+    """
+    Décode un curseur et vérifie qu'il correspond au tri demandé.
+
+    Args:
+        cursor: Curseur renvoyé par la page précédente
+        sort_key: Clé de tri de la requête courante
+        sort_dir: Direction de tri de la requête courante
+
+    Returns:
+        Tuple (valeur de tri, ID de transaction)
+
+    Raises:
+        ValueError: Si le curseur est invalide ou a été émis pour un autre tri
+    """
+    try:
+        cursor_key, cursor_dir, value, transaction_id = json.loads(
+            base64.urlsafe_b64decode(cursor.encode("ascii")).decode("utf-8")
+        )
+    except (ValueError, TypeError, binascii.Error):
+        raise ValueError("Curseur de pagination invalide")
+    if cursor_key != sort_key or cursor_dir != sort_dir:
+        raise ValueError("Le curseur ne correspond pas au tri demandé")
+    if not isinstance(transaction_id, int):
+        raise ValueError("Curseur de pagination invalide")
+    if sort_key == "date" and value is not None:
+        value = date.fromisoformat(value)
+    return value, transaction_id
+
+
+def apply_transaction_cursor(query: Query, sort_key: str, sort_dir: str, value: Any, transaction_id: int) -> Query:
+    """
+    Filtre la requête sur les lignes situées après le curseur (keyset).
+
+    SQLite place les NULL en premier en tri croissant et en dernier en tri décroissant ;
+    la condition de reprise en tient compte pour les tris sur level_1/2/3.
+
+    Args:
+        query: Requête issue de query_transactions_with_classification
+        sort_key: Clé de tri
+        sort_dir: Direction de tri
+        value: Valeur de tri de la dernière ligne renvoyée
+        transaction_id: ID de la dernière ligne renvoyée
+
+    Returns:
+        Requête filtrée
+    """
+    column = TRANSACTION_SORT_COLUMNS[sort_key]
+    if sort_dir == "asc":
+        if value is None:
+            condition = or_(and_(column.is_(None), Transaction.id > transaction_id), column.isnot(None))
+        else:
+            condition = or_(column > value, and_(column == value, Transaction.id > transaction_id))
+    else:
+        if value is None:
+            condition = and_(column.is_(None), Transaction.id < transaction_id)
+        else:
+            condition = or_(
+                column < value,
+                and_(column == value, Transaction.id < transaction_id),
+                column.is_(None)
+            )
+    return query.filter(condition)
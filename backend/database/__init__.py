@@ -4,7 +4,7 @@ Database package.
 ⚠️ Before making changes, read: ../../docs/workflow/BEST_PRACTICES.md
 """
 
-from .connection import get_db, init_database, engine, SessionLocal
+from .connection import get_db, get_read_db, init_database, engine, read_engine, SessionLocal, ReadSessionLocal
 from .models import (
     Base,
     Transaction,
@@ -27,9 +27,12 @@ from .models import (
 
 __all__ = [
     "get_db",
+    "get_read_db",
     "init_database",
     "engine",
+    "read_engine",
     "SessionLocal",
+    "ReadSessionLocal",
     "Base",
     "Transaction",
     "EnrichedTransaction",
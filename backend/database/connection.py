@@ -3,44 +3,143 @@ Database connection and initialization using SQLAlchemy.
 
 ⚠️ Before making changes, read: ../../docs/workflow/BEST_PRACTICES.md
 Always check with the user before modifying this file.
+
+Deux pools de connexions partagent le même fichier SQLite :
+- engine / SessionLocal / get_db : connexions d'écriture (imports, CRUD, recalculs)
+- read_engine / ReadSessionLocal / get_read_db : connexions en lecture seule (PRAGMA query_only)
+  pour les tableaux de bord, qui continuent de lire pendant qu'un import écrit (mode WAL)
+
+Les PRAGMA sont appliqués une seule fois par connexion physique (événement "connect" du pool),
+et non plus à chaque requête. Réglages surchargeables par variables d'environnement :
+- LMNP_DB_FILE : chemin du fichier SQLite (défaut : backend/database/lmnp.db)
+- LMNP_SQLITE_JOURNAL_MODE : journal_mode (défaut : WAL)
+- LMNP_SQLITE_SYNCHRONOUS : synchronous (défaut : NORMAL)
+- LMNP_SQLITE_BUSY_TIMEOUT_MS : attente sur un verrou avant erreur "database is locked" (défaut : 5000)
+- LMNP_SQLITE_MMAP_SIZE : taille du mapping mémoire en octets (défaut : 256 Mo)
+- LMNP_SQLITE_CACHE_SIZE : cache_size, négatif = Kio (défaut : -65536, soit 64 Mo)
+- LMNP_SQLITE_TEMP_STORE : temp_store (défaut : MEMORY)
+- LMNP_DB_WRITE_POOL_SIZE / LMNP_DB_READ_POOL_SIZE : taille des pools (défaut : 5 / 10)
+- LMNP_DB_ECHO : "1" pour journaliser les requêtes SQL
 """
 
+import logging
+import os
 from pathlib import Path
-from sqlalchemy import create_engine, text
+from sqlalchemy import create_engine, event
+from sqlalchemy.engine import Engine
 from sqlalchemy.orm import sessionmaker, Session
 from typing import Generator
 
 from .models import Base
 
+logger = logging.getLogger(__name__)
+
 # Database path
 DB_DIR = Path(__file__).parent
-DB_FILE = DB_DIR / "lmnp.db"
+DB_FILE = Path(os.getenv("LMNP_DB_FILE", str(DB_DIR / "lmnp.db")))
 
 # Database URL
 DATABASE_URL = f"sqlite:///{DB_FILE}"
 
-# Create engine
-engine = create_engine(
-    DATABASE_URL,
-    connect_args={"check_same_thread": False},  # Needed for SQLite
-    echo=False  # Set to True for SQL query logging
-)
+# Réglages SQLite (voir docstring du module)
+SQLITE_JOURNAL_MODE = os.getenv("LMNP_SQLITE_JOURNAL_MODE", "WAL")
+SQLITE_SYNCHRONOUS = os.getenv("LMNP_SQLITE_SYNCHRONOUS", "NORMAL")
+SQLITE_BUSY_TIMEOUT_MS = int(os.getenv("LMNP_SQLITE_BUSY_TIMEOUT_MS", "5000"))
+SQLITE_MMAP_SIZE = int(os.getenv("LMNP_SQLITE_MMAP_SIZE", str(256 * 1024 * 1024)))
+SQLITE_CACHE_SIZE = int(os.getenv("LMNP_SQLITE_CACHE_SIZE", "-65536"))
+SQLITE_TEMP_STORE = os.getenv("LMNP_SQLITE_TEMP_STORE", "MEMORY")
+WRITE_POOL_SIZE = int(os.getenv("LMNP_DB_WRITE_POOL_SIZE", "5"))
+READ_POOL_SIZE = int(os.getenv("LMNP_DB_READ_POOL_SIZE", "10"))
+DB_ECHO = os.getenv("LMNP_DB_ECHO", "0") == "1"
+
+
+def apply_sqlite_pragmas(dbapi_connection, read_only: bool = False) -> None:
+    """
+    Applique les PRAGMA de performance et d'intégrité sur une connexion SQLite brute.
+
+    Args:
+        dbapi_connection: Connexion sqlite3
+        read_only: Si True, la connexion refuse toute écriture (PRAGMA query_only)
+    """
+    cursor = dbapi_connection.cursor()
+    try:
+        cursor.execute(f"PRAGMA busy_timeout = {SQLITE_BUSY_TIMEOUT_MS}")
+        # journal_mode est persistant dans le fichier : seul le pool d'écriture le positionne
+        if not read_only:
+            cursor.execute(f"PRAGMA journal_mode = {SQLITE_JOURNAL_MODE}")
+        cursor.execute(f"PRAGMA synchronous = {SQLITE_SYNCHRONOUS}")
+        cursor.execute(f"PRAGMA mmap_size = {SQLITE_MMAP_SIZE}")
+        cursor.execute(f"PRAGMA cache_size = {SQLITE_CACHE_SIZE}")
+        cursor.execute(f"PRAGMA temp_store = {SQLITE_TEMP_STORE}")
+        cursor.execute("PRAGMA foreign_keys = ON")
+        if read_only:
+            cursor.execute("PRAGMA query_only = ON")
+    finally:
+        cursor.close()
+
+
+def create_sqlite_engine(database_url: str, read_only: bool = False, pool_size: int = WRITE_POOL_SIZE) -> Engine:
+    """
+    Crée un moteur SQLite dont chaque connexion du pool est configurée à sa création.
+
+    Args:
+        database_url: URL SQLAlchemy du fichier SQLite
+        read_only: Pool en lecture seule (PRAGMA query_only)
+        pool_size: Nombre de connexions conservées dans le pool
+
+    Returns:
+        Engine SQLAlchemy
+    """
+    sqlite_engine = create_engine(
+        database_url,
+        connect_args={"check_same_thread": False},  # Needed for SQLite
+        pool_size=pool_size,
+        max_overflow=pool_size,
+        echo=DB_ECHO  # LMNP_DB_ECHO=1 for SQL query logging
+    )
+
+    @event.listens_for(sqlite_engine, "connect")
+    def _on_connect(dbapi_connection, connection_record):
+        apply_sqlite_pragmas(dbapi_connection, read_only=read_only)
+
+    return sqlite_engine
+
 
-# Session factory
+# Create engines (écriture / lecture seule)
+engine = create_sqlite_engine(DATABASE_URL, pool_size=WRITE_POOL_SIZE)
+read_engine = create_sqlite_engine(DATABASE_URL, read_only=True, pool_size=READ_POOL_SIZE)
+
+# Session factories
 SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
+ReadSessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=read_engine)
 
 
 def get_db() -> Generator[Session, None, None]:
     """
     Dependency for getting database session.
-    
+
     Yields:
-        Session: Database session
+        Session: Database session (pool d'écriture)
     """
     db = SessionLocal()
     try:
-        # Activer les foreign keys pour SQLite (doit être fait à chaque connexion)
-        db.execute(text("PRAGMA foreign_keys = ON"))
+        yield db
+    finally:
+        db.close()
+
+
+def get_read_db() -> Generator[Session, None, None]:
+    """
+    Dependency for getting a read-only database session.
+
+    À utiliser pour les routes qui ne font que lire : elles ne prennent pas de connexion
+    au pool d'écriture et ne sont pas bloquées par un import en cours (WAL).
+
+    Yields:
+        Session: Database session (pool en lecture seule)
+    """
+    db = ReadSessionLocal()
+    try:
         yield db
     finally:
         db.close()
@@ -52,9 +151,18 @@ def init_database():
     Creates the database file and all tables if they don't exist.
     """
     # Ensure database directory exists
-    DB_DIR.mkdir(parents=True, exist_ok=True)
-    
+    DB_FILE.parent.mkdir(parents=True, exist_ok=True)
+
     # Create all tables
     Base.metadata.create_all(bind=engine)
+    logger.info(f"[Database] Base initialisée : {DB_FILE} (journal_mode={SQLITE_JOURNAL_MODE}, synchronous={SQLITE_SYNCHRONOUS})")
 
-
+    # Table de faits créée vide sur une base existante : la construire depuis les transactions
+    from backend.api.services.transaction_fact_service import rebuild_transaction_facts
+    from .models import EnrichedTransaction, TransactionFact
+    db = SessionLocal()
+    try:
+        if db.query(TransactionFact.id).first() is None and db.query(EnrichedTransaction.id).first() is not None:
+            rebuild_transaction_facts(db)
+    finally:
+        db.close()
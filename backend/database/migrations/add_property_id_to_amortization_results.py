@@ -0,0 +1,94 @@
+"""
+Migration: Add property_id to amortization_results table.
+
+This script adds the property_id column to the amortization_results table
+(denormalized from transactions.property_id), fills it for existing rows,
+and creates the composite index used by the aggregated amortization endpoint.
+
+⚠️ Before running, read: ../../docs/workflow/BEST_PRACTICES.md
+"""
+
+import sqlite3
+from pathlib import Path
+
+# Database path
+DB_DIR = Path(__file__).parent.parent
+DB_FILE = DB_DIR / "lmnp.db"
+
+
+def migrate():
+    """Add property_id to amortization_results table."""
+    if not DB_FILE.exists():
+        print(f"Database file not found: {DB_FILE}")
+        return False
+
+    conn = sqlite3.connect(str(DB_FILE))
+    cursor = conn.cursor()
+
+    try:
+        print("=== Ajout de property_id à amortization_results ===\n")
+
+        # 1. Vérifier si la table amortization_results existe
+        cursor.execute("SELECT name FROM sqlite_master WHERE type='table' AND name='amortization_results'")
+        if not cursor.fetchone():
+            print("❌ ERREUR: La table amortization_results n'existe pas")
+            return False
+
+        # 2. Ajouter la colonne si nécessaire
+        print("📋 Vérification de la colonne property_id...")
+        cursor.execute("PRAGMA table_info(amortization_results)")
+        columns = [col[1] for col in cursor.fetchall()]
+
+        if 'property_id' in columns:
+            print("✅ La colonne property_id existe déjà")
+        else:
+            print("📋 Ajout de la colonne property_id...")
+            cursor.execute(
+                "ALTER TABLE amortization_results ADD COLUMN property_id INTEGER "
+                "REFERENCES properties(id) ON DELETE CASCADE"
+            )
+            print("✅ Colonne property_id ajoutée")
+
+        # 3. Renseigner property_id depuis la transaction
+        cursor.execute("""
+            UPDATE amortization_results
+            SET property_id = (
+                SELECT transactions.property_id FROM transactions
+                WHERE transactions.id = amortization_results.transaction_id
+            )
+            WHERE property_id IS NULL
+        """)
+        print(f"✅ {cursor.rowcount} résultat(s) mis à jour depuis transactions.property_id")
+
+        cursor.execute("SELECT COUNT(*) FROM amortization_results WHERE property_id IS NULL")
+        orphan_count = cursor.fetchone()[0]
+        if orphan_count > 0:
+            print(f"⚠️  {orphan_count} résultat(s) sans transaction, suppression...")
+            cursor.execute("DELETE FROM amortization_results WHERE property_id IS NULL")
+
+        # 4. Créer l'index composite (property_id, category, year)
+        print("\n📋 Création de l'index idx_amortization_result_property_category_year...")
+        cursor.execute("""
+            CREATE INDEX IF NOT EXISTS idx_amortization_result_property_category_year
+            ON amortization_results(property_id, category, year)
+        """)
+        print("✅ Index idx_amortization_result_property_category_year créé")
+
+        conn.commit()
+        print("\n✅ Migration terminée avec succès")
+        return True
+
+    except Exception as e:
+        conn.rollback()
+        print(f"❌ Erreur lors de la migration: {e}")
+        import traceback
+        traceback.print_exc()
+        return False
+    finally:
+        conn.close()
+
+
+if __name__ == "__main__":
+    success = migrate()
+    if not success:
+        exit(1)
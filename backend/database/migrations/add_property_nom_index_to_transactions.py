@@ -0,0 +1,60 @@
+"""
+Migration: Add the (property_id, nom) index to transactions table.
+
+This script creates the composite index used to list the distinct transaction
+names of a property (re-enrichment after a mapping create/update/delete).
+
+⚠️ Before running, read: ../../docs/workflow/BEST_PRACTICES.md
+"""
+
+import sqlite3
+from pathlib import Path
+
+# Database path
+DB_DIR = Path(__file__).parent.parent
+DB_FILE = DB_DIR / "lmnp.db"
+
+
+def migrate():
+    """Add idx_transactions_property_nom to transactions table."""
+    if not DB_FILE.exists():
+        print(f"Database file not found: {DB_FILE}")
+        return False
+
+    conn = sqlite3.connect(str(DB_FILE))
+    cursor = conn.cursor()
+
+    try:
+        print("=== Ajout de l'index (property_id, nom) à transactions ===\n")
+
+        cursor.execute("SELECT name FROM sqlite_master WHERE type='table' AND name='transactions'")
+        if not cursor.fetchone():
+            print("❌ ERREUR: La table transactions n'existe pas")
+            return False
+
+        print("📋 Création de l'index idx_transactions_property_nom...")
+        cursor.execute("""
+            CREATE INDEX IF NOT EXISTS idx_transactions_property_nom
+            ON transactions(property_id, nom)
+        """)
+        cursor.execute("ANALYZE transactions")
+        print("✅ Index idx_transactions_property_nom créé")
+
+        conn.commit()
+        print("\n✅ Migration terminée avec succès")
+        return True
+
+    except Exception as e:
+        conn.rollback()
+        print(f"❌ Erreur lors de la migration: {e}")
+        import traceback
+        traceback.print_exc()
+        return False
+    finally:
+        conn.close()
+
+
+if __name__ == "__main__":
+    success = migrate()
+    if not success:
+        exit(1)
@@ -0,0 +1,98 @@
+"""
+Migration: Add transaction_facts table.
+
+This script creates the transaction_facts table (sums and counts of enriched
+transactions per property, year, month and level_1/2/3) with its indexes,
+and builds it from the existing transactions.
+
+⚠️ Before running, read: ../../docs/workflow/BEST_PRACTICES.md
+"""
+
+import sqlite3
+from pathlib import Path
+
+# Database path
+DB_DIR = Path(__file__).parent.parent
+DB_FILE = DB_DIR / "lmnp.db"
+
+
+def migrate():
+    """Create and build transaction_facts table."""
+    if not DB_FILE.exists():
+        print(f"Database file not found: {DB_FILE}")
+        return False
+
+    conn = sqlite3.connect(str(DB_FILE))
+    cursor = conn.cursor()
+
+    try:
+        print("=== Création de la table transaction_facts ===\n")
+
+        # 1. Créer la table si nécessaire
+        cursor.execute("""
+            CREATE TABLE IF NOT EXISTS transaction_facts (
+                id INTEGER PRIMARY KEY,
+                property_id INTEGER NOT NULL REFERENCES properties(id) ON DELETE CASCADE,
+                annee INTEGER NOT NULL,
+                mois INTEGER NOT NULL,
+                level_1 VARCHAR(100),
+                level_2 VARCHAR(100),
+                level_3 VARCHAR(100),
+                total FLOAT NOT NULL,
+                transaction_count INTEGER NOT NULL,
+                updated_at DATETIME
+            )
+        """)
+        print("✅ Table transaction_facts créée (ou déjà existante)")
+
+        # 2. Créer les index
+        cursor.execute("CREATE INDEX IF NOT EXISTS ix_transaction_facts_id ON transaction_facts(id)")
+        cursor.execute("""
+            CREATE INDEX IF NOT EXISTS idx_transaction_facts_property_year
+            ON transaction_facts(property_id, annee, mois)
+        """)
+        cursor.execute("""
+            CREATE INDEX IF NOT EXISTS idx_transaction_facts_property_level_1
+            ON transaction_facts(property_id, level_1, annee)
+        """)
+        print("✅ Index créés")
+
+        # 3. Construire les faits depuis les transactions enrichies
+        cursor.execute("DELETE FROM transaction_facts")
+        cursor.execute("""
+            INSERT INTO transaction_facts
+                (property_id, annee, mois, level_1, level_2, level_3, total, transaction_count, updated_at)
+            SELECT
+                t.property_id,
+                CAST(STRFTIME('%Y', t.date) AS INTEGER),
+                CAST(STRFTIME('%m', t.date) AS INTEGER),
+                e.level_1, e.level_2, e.level_3,
+                SUM(t.quantite), COUNT(t.id), CURRENT_TIMESTAMP
+            FROM transactions t
+            JOIN enriched_transactions e ON e.transaction_id = t.id
+            GROUP BY
+                t.property_id,
+                CAST(STRFTIME('%Y', t.date) AS INTEGER),
+                CAST(STRFTIME('%m', t.date) AS INTEGER),
+                e.level_1, e.level_2, e.level_3
+        """)
+        print(f"✅ {cursor.rowcount} ligne(s) de faits construites")
+
+        conn.commit()
+        print("\n✅ Migration terminée avec succès")
+        return True
+
+    except Exception as e:
+        conn.rollback()
+        print(f"❌ Erreur lors de la migration: {e}")
+        import traceback
+        traceback.print_exc()
+        return False
+    finally:
+        conn.close()
+
+
+if __name__ == "__main__":
+    success = migrate()
+    if not success:
+        exit(1)
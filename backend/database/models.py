@@ -74,6 +74,8 @@ class Transaction(Base):
     __table_args__ = (
         Index('idx_transaction_unique', 'date', 'quantite', 'nom'),
         Index('idx_transactions_property_id', 'property_id'),
+        # Index des noms par propriété : noms distincts et leurs effectifs sans lire la table
+        Index('idx_transactions_property_nom', 'property_id', 'nom'),
     )
 
 
@@ -104,6 +106,27 @@ class EnrichedTransaction(Base):
     )
 
 
+class TransactionFact(Base):
+    """Sommes et nombres de transactions enrichies par (propriété, année, mois, level_1/2/3), maintenus à chaque écriture."""
+    __tablename__ = "transaction_facts"
+
+    id = Column(Integer, primary_key=True, index=True)
+    property_id = Column(Integer, ForeignKey("properties.id", ondelete="CASCADE"), nullable=False)
+    annee = Column(Integer, nullable=False)  # Année de Transaction.date
+    mois = Column(Integer, nullable=False)  # Mois de Transaction.date (1-12)
+    level_1 = Column(String(100))
+    level_2 = Column(String(100))
+    level_3 = Column(String(100))
+    total = Column(Float, nullable=False)  # Somme des quantite
+    transaction_count = Column(Integer, nullable=False)  # Nombre de transactions
+    updated_at = Column(DateTime, default=datetime.utcnow)
+
+    __table_args__ = (
+        Index('idx_transaction_facts_property_year', 'property_id', 'annee', 'mois'),
+        Index('idx_transaction_facts_property_level_1', 'property_id', 'level_1', 'annee'),
+    )
+
+
 class Mapping(Base):
     """Mapping rules for transaction names to categories."""
     __tablename__ = "mappings"
@@ -325,6 +348,7 @@ class AmortizationResult(Base):
     
     id = Column(Integer, primary_key=True, index=True)
     transaction_id = Column(Integer, ForeignKey("transactions.id", ondelete="CASCADE"), nullable=False, index=True)
+    property_id = Column(Integer, ForeignKey("properties.id", ondelete="CASCADE"), nullable=False)  # Dénormalisé depuis la transaction
     year = Column(Integer, nullable=False, index=True)  # Année d'amortissement (ex: 2021, 2022)
     category = Column(String(255), nullable=False, index=True)  # Nom du type d'amortissement (ex: "Immobilisation terrain")
     amount = Column(Float, nullable=False)  # Montant amorti pour cette année (négatif)
@@ -338,6 +362,7 @@ class AmortizationResult(Base):
     __table_args__ = (
         Index('idx_amortization_result_year_category', 'year', 'category'),
         Index('idx_amortization_result_transaction', 'transaction_id'),
+        Index('idx_amortization_result_property_category_year', 'property_id', 'category', 'year'),
     )
 
 
@@ -484,6 +509,23 @@ class CompteResultatOverride(Base):
     )
 
 
+class CompteResultatCache(Base):
+    """Compte de résultat calculé, mis en cache par année (valide tant que l'empreinte de configuration est identique)."""
+    __tablename__ = "compte_resultat_cache"
+    
+    id = Column(Integer, primary_key=True, index=True)
+    property_id = Column(Integer, ForeignKey("properties.id", ondelete="CASCADE"), nullable=False)
+    year = Column(Integer, nullable=False)  # Année du compte de résultat
+    fingerprint = Column(String(64), nullable=False)  # Empreinte SHA-256 de la configuration utilisée pour le calcul
+    result = Column(Text, nullable=False)  # JSON du résultat de calculate_compte_resultat
+    created_at = Column(DateTime, default=datetime.utcnow)
+    
+    # Une seule entrée par (property_id, year)
+    __table_args__ = (
+        Index('idx_compte_resultat_cache_property_year', 'property_id', 'year', unique=True),
+    )
+
+
 class BilanMapping(Base):
     """Mappings pour le bilan (level_1 → catégories comptables)."""
     __tablename__ = "bilan_mappings"
@@ -555,3 +597,27 @@ class BilanConfig(Base):
         Index('idx_bilan_config_property_id', 'property_id'),
     )
 
+
+
+class Job(Base):
+    """Tâche de fond (re-enrichissement, recalculs) exécutée par le pool de workers, une à la fois par propriété."""
+    __tablename__ = "jobs"
+    
+    id = Column(Integer, primary_key=True, index=True)
+    property_id = Column(Integer, ForeignKey("properties.id", ondelete="CASCADE"), nullable=False)
+    kind = Column(String(50), nullable=False)  # Type de tâche (ex: "re_enrich", "amortization_recalculate")
+    status = Column(String(20), nullable=False, default="pending")  # "pending", "running", "succeeded", "failed"
+    params = Column(Text, nullable=True)  # JSON des paramètres de la tâche
+    progress = Column(Float, nullable=False, default=0.0)  # Avancement entre 0 et 1
+    message = Column(String(255), nullable=True)  # Étape en cours
+    result = Column(Text, nullable=True)  # JSON du résultat
+    error = Column(Text, nullable=True)  # Message d'erreur si échec
+    created_at = Column(DateTime, default=datetime.utcnow)
+    started_at = Column(DateTime, nullable=True)
+    finished_at = Column(DateTime, nullable=True)
+    
+    # Index pour recherches fréquentes
+    __table_args__ = (
+        Index('idx_jobs_property_created', 'property_id', 'created_at'),
+        Index('idx_jobs_status', 'status'),
+    )
@@ -0,0 +1,155 @@
+"""
+Benchmark de chargements concurrents du tableau de bord.
+
+⚠️ Before making changes, read: ../../docs/workflow/BEST_PRACTICES.md
+
+Mesure le temps d'un chargement du tableau de bord (transactions, filtres, compte de résultat,
+bilan, amortissements), puis celui de N chargements lancés en parallèle sur la même boucle
+d'événements, comme sous uvicorn. Les routes synchrones étant exécutées dans le pool de threads,
+les N chargements doivent se chevaucher au lieu de s'exécuter les uns après les autres.
+
+La base est une base SQLite temporaire générée (aucune donnée réelle n'est modifiée).
+
+Usage:
+    python backend/scripts/benchmark_concurrent_requests.py [--transactions 20000] [--parallel 8]
+"""
+
+import argparse
+import asyncio
+import os
+import random
+import sys
+import tempfile
+import time
+from datetime import date, timedelta
+
+# Ajouter le chemin du projet au PYTHONPATH
+project_root = os.path.abspath(os.path.join(os.path.dirname(__file__), '../..'))
+sys.path.insert(0, project_root)
+
+import httpx
+from sqlalchemy.orm import sessionmaker
+
+from backend.api.main import app
+from backend.api.services.enrichment_service import bulk_enrich_transactions
+from backend.database import Base, get_db, get_read_db
+from backend.database.connection import create_sqlite_engine
+from backend.database.models import Property, Transaction, Mapping
+
+YEARS = [2021, 2022, 2023, 2024]
+NAMES = [
+    ("LOYER", "LOYERS", "Produits", "Résultat"),
+    ("CHARGES COPRO", "CHARGES", "Charges", "Résultat"),
+    ("ASSURANCE PNO", "ASSURANCES", "Charges", "Résultat"),
+    ("TAXE FONCIERE", "IMPOTS", "Charges", "Résultat"),
+    ("PRET IMMO", "PRET", "Financement", "Bilan"),
+]
+
+
+def seed(session_factory, transaction_count: int) -> int:
+    """Créer une propriété avec des transactions enrichies réparties sur YEARS."""
+    db = session_factory()
+    try:
+        prop = Property(name="Benchmark")
+        db.add(prop)
+        db.commit()
+        for nom, level_1, level_2, level_3 in NAMES:
+            db.add(Mapping(property_id=prop.id, nom=nom, level_1=level_1, level_2=level_2, level_3=level_3))
+        random.seed(42)
+        start = date(YEARS[0], 1, 1)
+        span = (date(YEARS[-1], 12, 31) - start).days
+        solde = 0.0
+        for _ in range(transaction_count):
+            quantite = round(random.uniform(-500, 900), 2)
+            solde += quantite
+            db.add(Transaction(
+                property_id=prop.id,
+                date=start + timedelta(days=random.randint(0, span)),
+                quantite=quantite,
+                nom=random.choice(NAMES)[0],
+                solde=solde
+            ))
+        db.commit()
+        bulk_enrich_transactions(db, property_id=prop.id)
+        db.commit()
+        return prop.id
+    finally:
+        db.close()
+
+
+async def load_dashboard(client: httpx.AsyncClient, property_id: int) -> None:
+    """Les requêtes d'un chargement de tableau de bord, lancées comme le ferait le frontend."""
+    years = ",".join(str(year) for year in YEARS)
+    responses = await asyncio.gather(
+        client.get("/api/transactions", params={"property_id": property_id, "limit": 100}),
+        client.get("/api/transactions/unique-values", params={"property_id": property_id, "column": "level_1"}),
+        client.get("/api/compte-resultat/calculate", params={"property_id": property_id, "years": years}),
+        client.get("/api/bilan/calculate", params={"property_id": property_id, "years": years}),
+        client.get("/api/amortization/results/aggregated", params={"property_id": property_id}),
+    )
+    for response in responses:
+        response.raise_for_status()
+
+
+async def run(property_id: int, parallel: int, rounds: int) -> None:
+    transport = httpx.ASGITransport(app=app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://benchmark") as client:
+        await load_dashboard(client, property_id)  # échauffement (caches, connexions)
+
+        single = []
+        for _ in range(rounds):
+            started = time.perf_counter()
+            await load_dashboard(client, property_id)
+            single.append(time.perf_counter() - started)
+
+        concurrent = []
+        for _ in range(rounds):
+            started = time.perf_counter()
+            await asyncio.gather(*(load_dashboard(client, property_id) for _ in range(parallel)))
+            concurrent.append(time.perf_counter() - started)
+
+    best_single, best_concurrent = min(single), min(concurrent)
+    print(f"1 chargement              : {best_single * 1000:8.1f} ms")
+    print(f"{parallel} chargements parallèles : {best_concurrent * 1000:8.1f} ms "
+          f"({best_concurrent / best_single:.2f}x un chargement, {parallel}x en séquentiel)")
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Benchmark de chargements concurrents du tableau de bord")
+    parser.add_argument("--transactions", type=int, default=20000, help="Nombre de transactions générées")
+    parser.add_argument("--parallel", type=int, default=8, help="Nombre de chargements simultanés")
+    parser.add_argument("--rounds", type=int, default=3, help="Nombre de mesures (le meilleur temps est retenu)")
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        database_url = f"sqlite:///{os.path.join(tmp_dir, 'benchmark.db')}"
+        engine = create_sqlite_engine(database_url)
+        read_engine = create_sqlite_engine(database_url, read_only=True, pool_size=2 * args.parallel)
+        Base.metadata.create_all(bind=engine)
+        session_factory = sessionmaker(autocommit=False, autoflush=False, bind=engine)
+        read_session_factory = sessionmaker(autocommit=False, autoflush=False, bind=read_engine)
+
+        print(f"Génération de {args.transactions} transactions...")
+        property_id = seed(session_factory, args.transactions)
+
+        def override(factory):
+            def dependency():
+                db = factory()
+                try:
+                    yield db
+                finally:
+                    db.close()
+            return dependency
+
+        app.dependency_overrides[get_db] = override(session_factory)
+        app.dependency_overrides[get_read_db] = override(read_session_factory)
+        try:
+            asyncio.run(run(property_id, args.parallel, args.rounds))
+        finally:
+            app.dependency_overrides.clear()
+            engine.dispose()
+            read_engine.dispose()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,54 @@
+"""
+Script de vérification de la table de faits des transactions (transaction_facts).
+
+Compare la table à une reconstruction complète depuis transactions ⨝ enriched_transactions.
+Avec --rebuild, reconstruit la table (toutes les propriétés, ou --property-id).
+"""
+
+import argparse
+import sys
+from pathlib import Path
+
+# Add project root to path
+project_root = Path(__file__).parent.parent.parent
+sys.path.insert(0, str(project_root))
+
+from backend.database.connection import get_db
+from backend.api.services.transaction_fact_service import check_transaction_facts, rebuild_transaction_facts
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Vérifier la table transaction_facts")
+    parser.add_argument("--property-id", type=int, default=None, help="ID de la propriété (toutes si non fourni)")
+    parser.add_argument("--rebuild", action="store_true", help="Reconstruire la table après vérification")
+    args = parser.parse_args()
+
+    db = next(get_db())
+    try:
+        print("=== VÉRIFICATION DE transaction_facts ===\n")
+        differences = check_transaction_facts(db, args.property_id)
+        if not differences:
+            print("✅ La table de faits est cohérente avec les transactions")
+        else:
+            print(f"❌ {len(differences)} écart(s) trouvé(s) :")
+            for difference in differences[:50]:
+                print(
+                    f"  - property_id={difference['property_id']} {difference['annee']}-{difference['mois']:02d} "
+                    f"{difference['level_1']} / {difference['level_2']} / {difference['level_3']} : "
+                    f"attendu {difference['expected_total']:.2f} € ({difference['expected_count']}), "
+                    f"stocké {difference['stored_total']:.2f} € ({difference['stored_count']})"
+                )
+            if len(differences) > 50:
+                print(f"  ... et {len(differences) - 50} autre(s)")
+
+        if args.rebuild:
+            written = rebuild_transaction_facts(db, args.property_id)
+            print(f"\n✅ Table reconstruite : {written} ligne(s)")
+            return 0
+        return 1 if differences else 0
+    finally:
+        db.close()
+
+
+if __name__ == "__main__":
+    sys.exit(main())
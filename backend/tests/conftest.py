@@ -0,0 +1,89 @@
+"""
+Shared fixtures for backend tests.
+
+⚠️ Before making changes, read: ../../docs/workflow/BEST_PRACTICES.md
+
+- engine : base SQLite en mémoire isolée (une connexion partagée, utilisable depuis plusieurs threads)
+  ou, si le module redéfinit database_url, base sur fichier (une connexion par thread, ex : workers)
+- db_session : session sur cette base
+- client : TestClient dont les routes (get_db, get_read_db) ouvrent une session par requête sur cette base
+Les caches en mémoire du processus sont remis à zéro avant et après chaque test.
+"""
+
+import pytest
+from fastapi.testclient import TestClient
+from sqlalchemy import create_engine
+from sqlalchemy.orm import sessionmaker
+from sqlalchemy.pool import StaticPool
+
+from backend.api.main import app
+from backend.api.services.compte_resultat_cache_service import reset_compte_resultat_cache_stats
+from backend.api.services.facets_service import invalidate_property_facets
+from backend.api.services.mapping_matcher_service import invalidate_mapping_matcher
+from backend.api.services.mapping_obligatoire_service import invalidate_allowed_hierarchy
+from backend.database import Base, get_db, get_read_db
+
+
+def reset_caches() -> None:
+    """Vider les caches en mémoire (index des mappings, hiérarchie autorisée, facettes, statistiques)."""
+    invalidate_mapping_matcher()
+    invalidate_allowed_hierarchy()
+    invalidate_property_facets()
+    reset_compte_resultat_cache_stats()
+
+
+@pytest.fixture
+def database_url():
+    return "sqlite://"
+
+
+@pytest.fixture
+def engine(database_url):
+    if database_url == "sqlite://":
+        engine = create_engine(
+            database_url,
+            connect_args={"check_same_thread": False},
+            poolclass=StaticPool
+        )
+    else:
+        engine = create_engine(database_url, connect_args={"check_same_thread": False})
+    Base.metadata.create_all(bind=engine)
+    reset_caches()
+    yield engine
+    reset_caches()
+    Base.metadata.drop_all(bind=engine)
+    engine.dispose()
+
+
+@pytest.fixture
+def session_factory(engine):
+    return sessionmaker(autocommit=False, autoflush=False, bind=engine)
+
+
+@pytest.fixture
+def db_session(session_factory):
+    session = session_factory()
+    yield session
+    session.close()
+
+
+@pytest.fixture
+def override_db(session_factory):
+    """Brancher get_db et get_read_db sur la base de test (une session par requête)."""
+    def override_get_db():
+        db = session_factory()
+        try:
+            yield db
+        finally:
+            db.close()
+
+    app.dependency_overrides[get_db] = override_get_db
+    app.dependency_overrides[get_read_db] = override_get_db
+    yield
+    app.dependency_overrides.pop(get_db, None)
+    app.dependency_overrides.pop(get_read_db, None)
+
+
+@pytest.fixture
+def client(override_db):
+    return TestClient(app)
@@ -0,0 +1,177 @@
+"""
+Tests for the in-memory allowed-mapping hierarchy (mapping_obligatoire_service) and its ETag routes.
+
+⚠️ Before making changes, read: ../../docs/workflow/BEST_PRACTICES.md
+"""
+
+import pytest
+from sqlalchemy import event
+
+from backend.api.routes import mappings
+from backend.api.services import mapping_obligatoire_service
+from backend.api.services.mapping_obligatoire_service import (
+    get_allowed_hierarchy,
+    get_allowed_level1_values,
+    get_allowed_level2_values,
+    get_all_allowed_level2_values,
+    get_allowed_level3_values,
+    get_allowed_level2_for_level3,
+    get_allowed_level1_for_level2,
+    get_allowed_level1_for_level2_and_level3,
+    get_allowed_level3_for_level2,
+    validate_mapping,
+    create_allowed_mapping,
+    delete_allowed_mapping,
+    reset_allowed_mappings,
+)
+from backend.database.models import Property, AllowedMapping
+
+
+@pytest.fixture
+def property_id(db_session):
+    prop = Property(name="Hiérarchie")
+    other = Property(name="Autre")
+    db_session.add_all([prop, other])
+    db_session.commit()
+    db_session.add_all([
+        AllowedMapping(property_id=prop.id, level_1="LOYERS", level_2="Produits Locatifs", level_3="Produits", is_hardcoded=True),
+        AllowedMapping(property_id=prop.id, level_1="CHARGES", level_2="Energie", level_3=None, is_hardcoded=True),
+        AllowedMapping(property_id=prop.id, level_1="CHARGES", level_2="Energie", level_3="Charges Déductibles", is_hardcoded=True),
+        AllowedMapping(property_id=prop.id, level_1="EAU", level_2="Energie", level_3="Charges Déductibles", is_hardcoded=True),
+        AllowedMapping(property_id=other.id, level_1="AUTRE", level_2="Energie", level_3="Produits", is_hardcoded=True),
+    ])
+    db_session.commit()
+    return prop.id
+
+
+def _count_queries(engine, action):
+    statements = []
+
+    def record(conn, cursor, statement, parameters, context, executemany):
+        statements.append(statement)
+
+    event.listen(engine, "before_cursor_execute", record)
+    try:
+        result = action()
+    finally:
+        event.remove(engine, "before_cursor_execute", record)
+    return result, len(statements)
+
+
+def test_hierarchy_answers_all_lookups_after_one_query(engine, db_session, property_id):
+    """Toutes les listes en cascade et la validation sont servies par une seule requête, puis sans requête."""
+    def lookups():
+        return (
+            get_allowed_level1_values(db_session, property_id),
+            get_allowed_level2_values(db_session, "CHARGES", property_id),
+            get_all_allowed_level2_values(db_session, property_id),
+            get_allowed_level3_values(db_session, "CHARGES", "Energie", property_id),
+            get_allowed_level2_for_level3(db_session, "Charges Déductibles", property_id),
+            get_allowed_level1_for_level2(db_session, "Energie", property_id),
+            get_allowed_level1_for_level2_and_level3(db_session, "Energie", "Charges Déductibles", property_id),
+            get_allowed_level3_for_level2(db_session, "Energie", property_id),
+            get_allowed_level2_values(db_session, "INCONNU", property_id),
+            validate_mapping(db_session, "CHARGES", "Energie", None, property_id),
+            validate_mapping(db_session, "EAU", "Energie", None, property_id),
+            validate_mapping(db_session, "LOYERS", "Produits Locatifs", "Produits", property_id),
+        )
+
+    expected = (
+        ["CHARGES", "EAU", "LOYERS"],
+        ["Energie"],
+        ["Energie", "Produits Locatifs"],
+        ["Charges Déductibles"],
+        ["Energie"],
+        ["CHARGES", "EAU"],
+        ["CHARGES", "EAU"],
+        ["Charges Déductibles"],
+        [],
+        True,
+        False,
+        True,
+    )
+    assert _count_queries(engine, lookups) == (expected, 1)
+    assert _count_queries(engine, lookups) == (expected, 0)
+
+    # Les listes retournées sont des copies : les modifier n'altère pas le cache
+    get_allowed_level1_values(db_session, property_id).append("MODIFIÉ")
+    assert get_allowed_level1_values(db_session, property_id) == ["CHARGES", "EAU", "LOYERS"]
+    with pytest.raises(ValueError):
+        validate_mapping(db_session, "CHARGES", "Energie", None, None)
+
+
+def test_hierarchy_invalidated_by_writes(db_session, property_id):
+    """create/delete/reset (et les écritures ORM directes) invalident la hiérarchie de la propriété."""
+    version = get_allowed_hierarchy(db_session, property_id).version
+
+    created = create_allowed_mapping(db_session, "TAXES", "Impôts", property_id, "Charges Déductibles")
+    assert "TAXES" in get_allowed_level1_values(db_session, property_id)
+    assert get_allowed_hierarchy(db_session, property_id).version != version
+
+    assert delete_allowed_mapping(db_session, created.id, property_id)
+    assert "TAXES" not in get_allowed_level1_values(db_session, property_id)
+    assert get_allowed_hierarchy(db_session, property_id).version == version
+
+    create_allowed_mapping(db_session, "TAXES", "Impôts", property_id, "Charges Déductibles")
+    assert reset_allowed_mappings(db_session, property_id)["deleted_allowed"] == 1
+    assert get_allowed_level1_values(db_session, property_id) == ["CHARGES", "EAU", "LOYERS"]
+
+    db_session.add(AllowedMapping(property_id=property_id, level_1="DIRECT", level_2="Energie", level_3=None))
+    db_session.commit()
+    assert validate_mapping(db_session, "DIRECT", "Energie", None, property_id)
+
+
+def test_allowed_level_routes_use_etag(client, property_id):
+    """Les routes allowed-level* renvoient un ETag, 304 si inchangé et une nouvelle version après modification."""
+    url = "/api/mappings/allowed-level1-for-level2"
+    params = {"property_id": property_id, "level_2": "Energie"}
+    response = client.get(url, params=params)
+    assert response.status_code == 200
+    assert response.json() == {"level_1": ["CHARGES", "EAU"]}
+    etag = response.headers["etag"]
+    assert response.headers["cache-control"] == "no-cache"
+
+    not_modified = client.get(url, params=params, headers={"If-None-Match": etag})
+    assert not_modified.status_code == 304
+    assert not_modified.headers["etag"] == etag
+    assert client.get(url, params=params, headers={"If-None-Match": f'"autre", W/{etag}'}).status_code == 304
+
+    created = client.post("/api/mappings/allowed", params={
+        "property_id": property_id, "level_1": "TAXES", "level_2": "Energie", "level_3": "Charges Déductibles"
+    })
+    assert created.status_code == 201
+    changed = client.get(url, params=params, headers={"If-None-Match": etag})
+    assert changed.status_code == 200
+    assert changed.json() == {"level_1": ["CHARGES", "EAU", "TAXES"]}
+    assert changed.headers["etag"] != etag
+
+    assert client.get("/api/mappings/allowed-level1", params={"property_id": 999999}).status_code == 400
+
+
+def test_allowed_level_routes_read_hierarchy_once(monkeypatch, client, property_id):
+    """Chaque route lit la hiérarchie une seule fois : le contenu et l'ETag viennent de la même version."""
+    hierarchies = []
+
+    def recording_get_allowed_hierarchy(db, property_id):
+        hierarchy = get_allowed_hierarchy(db, property_id)
+        hierarchies.append(hierarchy)
+        return hierarchy
+
+    monkeypatch.setattr(mappings, "get_allowed_hierarchy", recording_get_allowed_hierarchy)
+    monkeypatch.setattr(mapping_obligatoire_service, "get_allowed_hierarchy", recording_get_allowed_hierarchy)
+    requests = [
+        ("/api/mappings/allowed-level1", {}),
+        ("/api/mappings/allowed-level2", {"level_1": "CHARGES"}),
+        ("/api/mappings/allowed-level2", {}),
+        ("/api/mappings/allowed-level3", {"level_1": "CHARGES", "level_2": "Energie"}),
+        ("/api/mappings/allowed-level2-for-level3", {"level_3": "Charges Déductibles"}),
+        ("/api/mappings/allowed-level1-for-level2", {"level_2": "Energie"}),
+        ("/api/mappings/allowed-level1-for-level2-and-level3", {"level_2": "Energie", "level_3": "Charges Déductibles"}),
+        ("/api/mappings/allowed-level3-for-level2", {"level_2": "Energie"}),
+    ]
+    for url, params in requests:
+        hierarchies.clear()
+        response = client.get(url, params={"property_id": property_id, **params})
+        assert response.status_code == 200
+        assert len(hierarchies) == 1
+        assert response.headers["etag"] == f'"{hierarchies[0].version}"'
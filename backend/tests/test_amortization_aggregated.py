@@ -0,0 +1,84 @@
+"""
+Tests for the SQL-aggregated amortization pivot (GET /api/amortization/results/aggregated).
+
+⚠️ Before making changes, read: ../../docs/workflow/BEST_PRACTICES.md
+"""
+
+from collections import defaultdict
+from datetime import date
+
+import pytest
+from sqlalchemy import event
+
+from backend.database.models import Property, Transaction, AmortizationResult
+
+
+def _seed(session_factory, asset_count):
+    """Propriété avec asset_count transactions amorties sur 3 catégories (+ une autre propriété)."""
+    db = session_factory()
+    prop = Property(name="Aggregated Test")
+    other = Property(name="Other")
+    db.add_all([prop, other])
+    db.commit()
+    expected = defaultdict(lambda: defaultdict(float))
+    for index in range(asset_count):
+        transaction = Transaction(property_id=prop.id, date=date(2020, 1, 1), quantite=-1000.0, nom=f"A{index}", solde=0.0)
+        db.add(transaction)
+        db.flush()
+        category = ["Mobilier", "Travaux", "Frais"][index % 3]
+        for year in range(2020 + index % 2, 2024):
+            amount = -(100.0 + index) / 3
+            db.add(AmortizationResult(transaction_id=transaction.id, property_id=prop.id, year=year, category=category, amount=amount))
+            expected[category][year] += amount
+    other_transaction = Transaction(property_id=other.id, date=date(2020, 1, 1), quantite=-1.0, nom="X", solde=0.0)
+    db.add(other_transaction)
+    db.flush()
+    db.add(AmortizationResult(transaction_id=other_transaction.id, property_id=other.id, year=2030, category="Autre", amount=-5.0))
+    db.commit()
+    prop_id = prop.id
+    db.close()
+    return prop_id, expected
+
+
+@pytest.mark.parametrize("asset_count", [3, 300])
+def test_aggregated_pivot(engine, session_factory, client, asset_count):
+    """Le tableau croisé est calculé par GROUP BY, avec un nombre de requêtes constant."""
+    property_id, expected = _seed(session_factory, asset_count)
+
+    statements = []
+
+    @event.listens_for(engine, "before_cursor_execute")
+    def _record(conn, cursor, statement, parameters, context, executemany):
+        statements.append(statement)
+
+    response = client.get("/api/amortization/results/aggregated", params={"property_id": property_id})
+    event.remove(engine, "before_cursor_execute", _record)
+    assert response.status_code == 200
+    body = response.json()
+
+    # Validation de la propriété + agrégation
+    assert len(statements) == 2
+    assert "GROUP BY" in statements[-1]
+    assert "JOIN" not in statements[-1]
+
+    assert body["categories"] == ["Frais", "Mobilier", "Travaux"]
+    assert body["years"] == [2020, 2021, 2022, 2023]
+    for row, category in zip(body["data"], body["categories"]):
+        assert row == pytest.approx([expected[category].get(year, 0.0) for year in body["years"]])
+        assert body["totals_by_category"][category] == pytest.approx(sum(expected[category].values()))
+    assert body["grand_total"] == pytest.approx(sum(sum(years.values()) for years in expected.values()))
+    assert {int(year): total for year, total in body["totals_by_year"].items()} == pytest.approx({
+        year: sum(expected[category].get(year, 0.0) for category in expected) for year in body["years"]
+    })
+
+
+def test_aggregated_pivot_empty(session_factory, client):
+    """Une propriété sans résultats renvoie un tableau vide."""
+    db = session_factory()
+    prop = Property(name="Empty")
+    db.add(prop)
+    db.commit()
+    response = client.get("/api/amortization/results/aggregated", params={"property_id": prop.id})
+    db.close()
+    assert response.status_code == 200
+    assert response.json()["categories"] == [] and response.json()["grand_total"] == 0.0
@@ -0,0 +1,155 @@
+"""
+Tests for the property-wide amortization recompute and the diff-based result writer.
+
+⚠️ Before making changes, read: ../../docs/workflow/BEST_PRACTICES.md
+"""
+
+import json
+from datetime import date
+
+from sqlalchemy import event
+
+from backend.database.models import (
+    Property,
+    Transaction,
+    EnrichedTransaction,
+    AmortizationType,
+    AmortizationResult
+)
+from backend.api.services.amortization_service import (
+    recalculate_all_amortizations,
+    recalculate_transaction_amortization,
+    sync_property_amortizations,
+    sync_transaction_amortization
+)
+
+
+def _seed(db, asset_count=300):
+    """Propriété avec des types variés, des transactions enrichies ou non et des résultats obsolètes."""
+    prop = Property(name="Bulk Amortization")
+    other = Property(name="Other")
+    db.add_all([prop, other])
+    db.commit()
+
+    db.add_all([
+        AmortizationType(property_id=prop.id, name="Mobilier", level_2_value="Immobilisations", level_1_values=json.dumps(["MOBILIER", "CUISINE"]), duration=5),
+        # CUISINE est aussi dans ce type : le premier type l'emporte
+        AmortizationType(property_id=prop.id, name="Cuisine", level_2_value="Immobilisations", level_1_values=json.dumps(["CUISINE"]), duration=10),
+        AmortizationType(property_id=prop.id, name="Travaux", level_2_value="Immobilisations", level_1_values=json.dumps(["TRAVAUX"]), duration=10, start_date=date(2022, 7, 1)),
+        AmortizationType(property_id=prop.id, name="Frais", level_2_value="Immobilisations", level_1_values=json.dumps(["FRAIS"]), duration=3, annual_amount=750.0),
+        AmortizationType(property_id=prop.id, name="Terrain", level_2_value="Immobilisations", level_1_values=json.dumps(["TERRAIN"]), duration=0),
+        AmortizationType(property_id=other.id, name="Autre", level_2_value="Immobilisations", level_1_values=json.dumps(["MOBILIER"]), duration=2),
+    ])
+
+    level_1_cycle = ["MOBILIER", "CUISINE", "TRAVAUX", "FRAIS", "TERRAIN", "AUTRE"]
+    for index in range(asset_count):
+        transaction = Transaction(
+            property_id=prop.id,
+            date=date(2019 + index % 6, 1 + index % 12, 1 + index % 28),
+            quantite=-(1000.0 + 37.5 * index),
+            nom=f"Achat {index}",
+            solde=0.0
+        )
+        db.add(transaction)
+        db.flush()
+        level_2 = "Immobilisations" if index % 7 else "Charges"
+        db.add(EnrichedTransaction(
+            transaction_id=transaction.id, property_id=prop.id, annee=transaction.date.year,
+            mois=transaction.date.month, level_1=level_1_cycle[index % len(level_1_cycle)], level_2=level_2
+        ))
+        # Résultat obsolète qui doit disparaître ou être remplacé
+        db.add(AmortizationResult(transaction_id=transaction.id, property_id=prop.id, year=2000, category="Obsolète", amount=-1.0))
+
+    # Transaction non enrichie : ses résultats ne sont pas touchés
+    orphan = Transaction(property_id=prop.id, date=date(2020, 1, 1), quantite=-500.0, nom="Sans enrichissement", solde=0.0)
+    other_transaction = Transaction(property_id=other.id, date=date(2020, 1, 1), quantite=-500.0, nom="Autre", solde=0.0)
+    db.add_all([orphan, other_transaction])
+    db.flush()
+    db.add(EnrichedTransaction(transaction_id=other_transaction.id, property_id=other.id, annee=2020, mois=1, level_1="MOBILIER", level_2="Immobilisations"))
+    db.add(AmortizationResult(transaction_id=orphan.id, property_id=prop.id, year=2020, category="Manuel", amount=-10.0))
+    db.add(AmortizationResult(transaction_id=other_transaction.id, property_id=other.id, year=2020, category="Autre", amount=-250.0))
+    db.commit()
+    return prop.id
+
+
+def _snapshot(db):
+    return sorted(
+        (row.transaction_id, row.year, row.category, row.amount)
+        for row in db.query(AmortizationResult.transaction_id, AmortizationResult.year, AmortizationResult.category, AmortizationResult.amount)
+    )
+
+
+def test_bulk_recompute_matches_per_transaction(engine, db_session):
+    """Le recalcul en masse produit les mêmes résultats que le recalcul transaction par transaction."""
+    property_id = _seed(db_session)
+
+    statements = []
+
+    @event.listens_for(engine, "before_cursor_execute")
+    def _record(conn, cursor, statement, parameters, context, executemany):
+        statements.append(statement)
+
+    created = recalculate_all_amortizations(db_session, property_id)
+    event.remove(engine, "before_cursor_execute", _record)
+    # Nombre de requêtes indépendant du nombre de transactions
+    assert len(statements) <= 12
+    bulk = _snapshot(db_session)
+    assert created == len([row for row in bulk if row[2] not in ("Manuel", "Autre")])
+    assert not any(row[2] == "Obsolète" for row in bulk)
+    assert any(row[2] == "Manuel" for row in bulk) and any(row[2] == "Autre" for row in bulk)
+    assert not any(row[2] in ("Cuisine", "Terrain") for row in bulk)
+
+    transaction_ids = [
+        transaction_id for (transaction_id,) in db_session.query(Transaction.id).join(EnrichedTransaction).filter(
+            Transaction.property_id == property_id
+        )
+    ]
+    for transaction_id in transaction_ids:
+        recalculate_transaction_amortization(db_session, transaction_id)
+    assert _snapshot(db_session) == bulk
+
+
+def test_bulk_recompute_is_idempotent(db_session):
+    """Un second recalcul remplace les résultats sans les dupliquer."""
+    property_id = _seed(db_session, asset_count=20)
+    first = recalculate_all_amortizations(db_session, property_id)
+    before = _snapshot(db_session)
+    assert recalculate_all_amortizations(db_session, property_id) == first
+    assert _snapshot(db_session) == before
+
+
+def test_diff_writer_only_touches_changed_rows(db_session):
+    """Un recalcul sans changement n'écrit rien ; un changement de type n'écrit que les lignes concernées."""
+    property_id = _seed(db_session, asset_count=20)
+    first = sync_property_amortizations(db_session, property_id)
+    assert first["deleted"] == 20  # résultats obsolètes
+    assert first["inserted"] == first["results"] and first["updated"] == 0
+
+    timestamps = dict(db_session.query(AmortizationResult.id, AmortizationResult.updated_at))
+    unchanged = sync_property_amortizations(db_session, property_id)
+    assert unchanged == {"results": first["results"], "inserted": 0, "updated": 0, "deleted": 0, "touched": 0}
+    assert dict(db_session.query(AmortizationResult.id, AmortizationResult.updated_at)) == timestamps
+
+    # Frais : annuité 750 sur 3 ans → 1000 sur 2 ans
+    frais = db_session.query(AmortizationType).filter(AmortizationType.name == "Frais").one()
+    frais_rows_before = db_session.query(AmortizationResult).filter(AmortizationResult.category == "Frais").count()
+    frais.annual_amount = 1000.0
+    frais.duration = 2
+    db_session.commit()
+    changed = sync_property_amortizations(db_session, property_id)
+    frais_rows_after = db_session.query(AmortizationResult).filter(AmortizationResult.category == "Frais").count()
+    assert changed["inserted"] == 0
+    assert changed["deleted"] == frais_rows_before - frais_rows_after > 0
+    assert 0 < changed["updated"] <= frais_rows_after
+    assert changed["touched"] == changed["updated"] + changed["deleted"]
+
+    # Doublon d'une année : supprimé, la ligne d'origine est conservée
+    original = db_session.query(AmortizationResult).filter(AmortizationResult.category == "Mobilier").first()
+    db_session.add(AmortizationResult(
+        transaction_id=original.transaction_id, property_id=property_id, year=original.year,
+        category=original.category, amount=original.amount
+    ))
+    db_session.commit()
+    stats = sync_transaction_amortization(db_session, original.transaction_id)
+    assert (stats["inserted"], stats["updated"], stats["deleted"]) == (0, 0, 1)
+    assert db_session.get(AmortizationResult, original.id) is not None
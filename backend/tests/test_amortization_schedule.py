@@ -0,0 +1,71 @@
+"""
+Tests for the vectorized amortization schedule (calculate_yearly_amounts_batch).
+
+⚠️ Before making changes, read: ../../docs/workflow/BEST_PRACTICES.md
+"""
+
+import random
+from datetime import date, timedelta
+
+import pytest
+
+from backend.api.services.amortization_service import (
+    calculate_yearly_amounts,
+    calculate_yearly_amounts_batch
+)
+
+
+def _random_case(rng: random.Random):
+    """Cas aléatoire (date, montant, durée, annuité) incluant les cas limites."""
+    start_date = rng.choice([
+        date(2000, 1, 1) + timedelta(days=rng.randrange(365 * 40)),
+        date(2000, 1, 1) + timedelta(days=rng.randrange(365 * 40)),
+        date(rng.choice([2000, 2004, 2020, 2024]), 2, 29),
+        date(rng.randrange(2000, 2040), 12, 31),
+        date(rng.randrange(2000, 2040), 1, 1),
+    ])
+    total_amount = round(rng.uniform(-500000, 500000), rng.choice([0, 2, 6]))
+    duration = rng.choice([
+        rng.randrange(-2, 60),
+        round(rng.uniform(0, 40), 2),
+        rng.uniform(0, 1),
+    ])
+    annual_amount = rng.choice([None, None, 0, 0.0, round(rng.uniform(-50000, 50000), 2), rng.uniform(0, 10)])
+    return start_date, total_amount, duration, annual_amount
+
+
+@pytest.mark.parametrize("seed", range(20))
+def test_batch_matches_scalar(seed):
+    """Chaque ligne du calcul vectorisé est identique (au bit près) au calcul scalaire."""
+    rng = random.Random(seed)
+    cases = [_random_case(rng) for _ in range(rng.randrange(1, 250))]
+
+    schedule = calculate_yearly_amounts_batch(*zip(*cases))
+
+    assert schedule.amounts.shape == schedule.mask.shape == (len(cases), len(schedule.years))
+    for index, (start_date, total_amount, duration, annual_amount) in enumerate(cases):
+        expected = calculate_yearly_amounts(start_date, total_amount, duration, annual_amount)
+        actual = schedule.yearly_amounts(index)
+        assert list(actual) == list(expected), cases[index]
+        assert actual == expected, cases[index]
+
+
+def test_batch_edge_cases():
+    """Lots vides, durées invalides et annuités par défaut."""
+    empty = calculate_yearly_amounts_batch([], [], [])
+    assert empty.years.size == 0 and empty.amounts.shape == (0, 0)
+
+    invalid = calculate_yearly_amounts_batch([date(2024, 1, 1)] * 2, [1000.0, 1000.0], [0, -3])
+    assert invalid.yearly_amounts(0) == {} and invalid.yearly_amounts(1) == {}
+
+    schedule = calculate_yearly_amounts_batch(
+        [date(2024, 1, 1), date(2020, 7, 1), date(2022, 5, 5)],
+        [-3600.0, 1000.0, 500.0],
+        [3, 0, 0.5],
+        [None, 100.0, None]
+    )
+    assert schedule.years.tolist() == list(range(2022, 2028))
+    assert schedule.yearly_amounts(0) == {2024: pytest.approx(-1200.0), 2025: -1200.0, 2026: pytest.approx(-1200.0), 2027: 0.0}
+    assert schedule.yearly_amounts(1) == {}
+    assert schedule.yearly_amounts(2) == {}
+    assert not schedule.mask[1:].any()
@@ -0,0 +1,116 @@
+"""
+Tests for the batched amortization types summary (GET /api/amortization/types/summary).
+
+⚠️ Before making changes, read: ../../docs/workflow/BEST_PRACTICES.md
+"""
+
+import json
+from datetime import date, timedelta
+
+import pytest
+from sqlalchemy import event
+
+from backend.database.models import Property, Transaction, EnrichedTransaction, AmortizationType
+from backend.api.services.amortization_service import sync_property_amortizations
+
+
+@pytest.fixture
+def property_id(session_factory):
+    """Propriété avec 4 types (dont un vide et un de durée nulle) et des achats amortis."""
+    db = session_factory()
+    prop = Property(name="Summary Test")
+    db.add(prop)
+    db.commit()
+    db.add_all([
+        AmortizationType(property_id=prop.id, name="Mobilier", level_2_value="Immobilisations", level_1_values=json.dumps(["MOBILIER", "CUISINE"]), duration=5),
+        AmortizationType(property_id=prop.id, name="Travaux", level_2_value="Immobilisations", level_1_values=json.dumps(["TRAVAUX"]), duration=10, annual_amount=300.0),
+        AmortizationType(property_id=prop.id, name="Terrain", level_2_value="Immobilisations", level_1_values=json.dumps(["TERRAIN"]), duration=0),
+        AmortizationType(property_id=prop.id, name="Vide", level_2_value="Immobilisations", level_1_values=json.dumps([]), duration=3),
+    ])
+    purchases = [
+        ("MOBILIER", "Immobilisations", date(2019, 3, 15), -4500.0),
+        ("CUISINE", "Immobilisations", date(2021, 9, 1), -8000.0),
+        ("TRAVAUX", "Immobilisations", date(2020, 6, 30), -12000.0),
+        ("TRAVAUX", "Immobilisations", date(2022, 1, 10), -3000.0),
+        ("TERRAIN", "Immobilisations", date(2019, 1, 1), -20000.0),
+        ("MOBILIER", "Charges", date(2020, 1, 1), -50.0),  # autre level_2
+    ]
+    for level_1, level_2, purchase_date, quantite in purchases:
+        transaction = Transaction(property_id=prop.id, date=purchase_date, quantite=quantite, nom=level_1, solde=0.0)
+        db.add(transaction)
+        db.flush()
+        db.add(EnrichedTransaction(
+            transaction_id=transaction.id, property_id=prop.id, annee=purchase_date.year,
+            mois=purchase_date.month, level_1=level_1, level_2=level_2
+        ))
+    db.commit()
+    sync_property_amortizations(db, prop.id)
+    prop_id = prop.id
+    db.close()
+    return prop_id
+
+
+def test_summary_matches_per_type_endpoints(engine, client, property_id):
+    """Le résumé renvoie les mêmes valeurs que les 3 endpoints par type, en un nombre constant de requêtes."""
+    statements = []
+
+    @event.listens_for(engine, "before_cursor_execute")
+    def _record(conn, cursor, statement, parameters, context, executemany):
+        statements.append(statement)
+
+    response = client.get("/api/amortization/types/summary", params={"property_id": property_id})
+    event.remove(engine, "before_cursor_execute", _record)
+    assert response.status_code == 200
+    body = response.json()
+    # Validation de la propriété + types + transactions des types
+    assert len(statements) == 3
+
+    assert body["total"] == 4
+    assert [item["type_name"] for item in body["items"]] == ["Mobilier", "Travaux", "Terrain", "Vide"]
+    for item in body["items"]:
+        params = {"property_id": property_id}
+        type_url = f"/api/amortization/types/{item['type_id']}"
+        assert item["amount"] == pytest.approx(client.get(f"{type_url}/amount", params=params).json()["amount"])
+        assert item["transaction_count"] == client.get(f"{type_url}/transaction-count", params=params).json()["transaction_count"]
+        assert item["cumulated_amount"] == pytest.approx(client.get(f"{type_url}/cumulated", params=params).json()["cumulated_amount"])
+
+    mobilier, travaux, terrain, vide = body["items"]
+    assert (mobilier["transaction_count"], mobilier["amount"]) == (2, 12500.0)
+    assert travaux["cumulated_amount"] > 0
+    assert terrain["cumulated_amount"] == 0.0 and terrain["amount"] == 20000.0
+    assert vide == {**vide, "amount": 0.0, "cumulated_amount": 0.0, "transaction_count": 0}
+
+
+def test_summary_aggregates_per_type_id(client, session_factory, property_id):
+    """Types homonymes, types qui se recouvrent et date de début future : mêmes valeurs que les endpoints par type."""
+    db = session_factory()
+    db.add_all([
+        # Même nom qu'un type existant, autres transactions
+        AmortizationType(property_id=property_id, name="Mobilier", level_2_value="Immobilisations", level_1_values=json.dumps(["TRAVAUX"]), duration=8),
+        # Recouvre Mobilier (transaction CUISINE comptée pour les deux types)
+        AmortizationType(property_id=property_id, name="Cuisine", level_2_value="Immobilisations", level_1_values=json.dumps(["CUISINE"]), duration=4),
+        # Début dans le futur : rien d'amorti
+        AmortizationType(property_id=property_id, name="Futur", level_2_value="Immobilisations", level_1_values=json.dumps(["MOBILIER"]), duration=5, start_date=date.today() + timedelta(days=1)),
+    ])
+    db.commit()
+    db.close()
+
+    params = {"property_id": property_id}
+    items = client.get("/api/amortization/types/summary", params=params).json()["items"]
+    assert [item["type_name"] for item in items] == ["Mobilier", "Travaux", "Terrain", "Vide", "Mobilier", "Cuisine", "Futur"]
+    for item in items:
+        type_url = f"/api/amortization/types/{item['type_id']}"
+        assert item["amount"] == pytest.approx(client.get(f"{type_url}/amount", params=params).json()["amount"])
+        assert item["transaction_count"] == client.get(f"{type_url}/transaction-count", params=params).json()["transaction_count"]
+        assert item["cumulated_amount"] == pytest.approx(client.get(f"{type_url}/cumulated", params=params).json()["cumulated_amount"])
+
+    mobilier, travaux, _, _, homonyme, cuisine, futur = items
+    assert homonyme["cumulated_amount"] != mobilier["cumulated_amount"]
+    assert (homonyme["transaction_count"], homonyme["amount"]) == (travaux["transaction_count"], travaux["amount"])
+    assert (cuisine["transaction_count"], cuisine["amount"]) == (1, 8000.0)
+    assert futur["cumulated_amount"] == 0.0 and futur["transaction_count"] == 1
+
+
+def test_summary_unknown_property(client):
+    """Une propriété inexistante est refusée."""
+    assert client.get("/api/amortization/types/summary", params={"property_id": 999}).status_code == 400
@@ -0,0 +1,68 @@
+"""
+Tests for the incremental balance recalculation (balance_utils).
+
+⚠️ Before making changes, read: ../../docs/workflow/BEST_PRACTICES.md
+"""
+
+from datetime import date
+
+from sqlalchemy import event
+
+from backend.database.models import Property, Transaction
+from backend.api.utils.balance_utils import recalculate_balances_from_date, recalculate_all_balances
+
+
+def _balances(db, property_id):
+    return [
+        row.solde for row in db.query(Transaction.solde).filter(
+            Transaction.property_id == property_id
+        ).order_by(Transaction.date, Transaction.id)
+    ]
+
+
+def test_incremental_balances(engine, db_session):
+    """Seules les transactions à partir du point modifié sont réécrites, et seulement si leur solde change."""
+    prop = Property(name="Balance Test")
+    other = Property(name="Other Balance Test")
+    db_session.add_all([prop, other])
+    db_session.commit()
+
+    amounts = [100.0, -20.5, 30.25, -5.0, 12.0]
+    transactions = [
+        Transaction(property_id=prop.id, date=date(2024, 1, day + 1), quantite=amount, nom=f"T{day}", solde=0.0)
+        for day, amount in enumerate(amounts)
+    ]
+    db_session.add_all(transactions + [
+        Transaction(property_id=other.id, date=date(2024, 1, 1), quantite=7.0, nom="X", solde=0.0)
+    ])
+    db_session.commit()
+
+    assert recalculate_all_balances(db_session, prop.id) == 5
+    assert _balances(db_session, prop.id) == [100.0, 79.5, 109.75, 104.75, 116.75]
+    assert _balances(db_session, other.id) == [0.0]
+
+    # Aucun solde ne change → aucune écriture
+    assert recalculate_all_balances(db_session, prop.id) == 0
+
+    # Modification de la 4ème transaction : seules les 2 dernières sont relues et réécrites
+    updates = []
+
+    @event.listens_for(engine, "before_cursor_execute")
+    def _record_updates(conn, cursor, statement, parameters, context, executemany):
+        if statement.startswith("UPDATE"):
+            updates.append(statement)
+
+    fourth = transactions[3]
+    db_session.query(Transaction).filter(Transaction.id == fourth.id).update({"quantite": -15.0})
+    db_session.commit()
+    updates.clear()
+    assert recalculate_balances_from_date(db_session, date(2024, 1, 4), prop.id) == 2
+    assert len(updates) == 1  # un seul executemany
+    assert _balances(db_session, prop.id) == [100.0, 79.5, 109.75, 94.75, 106.75]
+
+    # Nouvelle transaction le même jour : les transactions de ce jour avec un ID inférieur ne sont pas relues
+    new_transaction = Transaction(property_id=prop.id, date=date(2024, 1, 3), quantite=1.0, nom="NEW", solde=0.0)
+    db_session.add(new_transaction)
+    db_session.commit()
+    assert recalculate_balances_from_date(db_session, new_transaction.date, prop.id, new_transaction.id) == 3
+    assert _balances(db_session, prop.id) == [100.0, 79.5, 109.75, 110.75, 95.75, 107.75]
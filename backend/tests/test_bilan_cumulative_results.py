@@ -0,0 +1,100 @@
+"""
+Tests for the memoized report à nouveau (bilan_service.CumulativeResults).
+
+⚠️ Before making changes, read: ../../docs/workflow/BEST_PRACTICES.md
+"""
+
+import json
+from datetime import date
+
+import pytest
+from sqlalchemy import event
+
+from backend.database.models import (
+    Property,
+    Transaction,
+    EnrichedTransaction,
+    CompteResultatMapping,
+    CompteResultatConfig,
+    CompteResultatOverride
+)
+from backend.api.services.bilan_service import (
+    CumulativeResults,
+    calculate_resultat_exercice,
+    calculate_report_a_nouveau
+)
+
+
+@pytest.fixture
+def property_id(db_session):
+    """Propriété avec des loyers et des charges de 2019 à 2023, et un override en 2021."""
+    prop = Property(name="Cumul Test")
+    db_session.add(prop)
+    db_session.commit()
+    db_session.add(CompteResultatConfig(property_id=prop.id, level_3_values=json.dumps(["Résultat"])))
+    db_session.add_all([
+        CompteResultatMapping(property_id=prop.id, category_name="Loyers hors charge encaissés", level_1_values='["LOYERS"]'),
+        CompteResultatMapping(property_id=prop.id, category_name="Charges", type="Charges d'exploitation", level_1_values='["CHARGES"]'),
+    ])
+    for year in range(2019, 2024):
+        for level_1, quantite in [("LOYERS", 1000.0 + year), ("CHARGES", -150.5 * (year - 2018))]:
+            transaction = Transaction(property_id=prop.id, date=date(year, 3, 1), quantite=quantite, nom=level_1, solde=0.0)
+            db_session.add(transaction)
+            db_session.flush()
+            db_session.add(EnrichedTransaction(
+                transaction_id=transaction.id, property_id=prop.id, annee=year, mois=3,
+                level_1=level_1, level_2="X", level_3="Résultat"
+            ))
+    db_session.add(CompteResultatOverride(property_id=prop.id, year=2021, override_value=123.0))
+    db_session.commit()
+    return prop.id
+
+
+def _naive_report(db, year, property_id, first_year=2019):
+    return sum(calculate_resultat_exercice(db, prev_year, property_id) for prev_year in range(first_year, year))
+
+
+def test_report_a_nouveau_prefix_sums(engine, db_session, property_id):
+    """Les cumuls correspondent à la somme année par année et sont construits en un nombre constant de requêtes."""
+    years = list(range(2017, 2031))
+
+    statements = []
+
+    @event.listens_for(engine, "before_cursor_execute")
+    def _record(conn, cursor, statement, parameters, context, executemany):
+        statements.append(statement)
+
+    cumulative = CumulativeResults(db_session, property_id, years)
+    build_queries = len(statements)
+    assert build_queries <= 8
+
+    for year in years:
+        assert cumulative.report_a_nouveau(year) == pytest.approx(_naive_report(db_session, year, property_id))
+        assert cumulative.resultat_exercice(year) == pytest.approx(calculate_resultat_exercice(db_session, year, property_id))
+
+    statements.clear()
+    for year in years:
+        cumulative.report_a_nouveau(year)
+        cumulative.resultat_exercice(year)
+    assert statements == []
+
+    assert cumulative.resultat_exercice(2021) == 123.0
+    assert cumulative.report_a_nouveau(2019) == 0.0
+    assert calculate_report_a_nouveau(db_session, 2024, property_id) == pytest.approx(cumulative.report_a_nouveau(2024))
+
+
+def test_invalidate_year(db_session, property_id):
+    """Une année invalidée est recalculée et les cumuls suivants sont mis à jour."""
+    cumulative = CumulativeResults(db_session, property_id, [2024])
+    before = cumulative.report_a_nouveau(2024)
+
+    db_session.add(CompteResultatOverride(property_id=property_id, year=2020, override_value=0.0))
+    db_session.commit()
+    previous_2020 = cumulative.resultat_exercice(2020)
+    # Sans invalidation, la valeur mémorisée est conservée
+    assert cumulative.report_a_nouveau(2024) == before
+
+    cumulative.invalidate(2020)
+    assert cumulative.resultat_exercice(2020) == 0.0
+    assert cumulative.report_a_nouveau(2024) == pytest.approx(before - previous_2020)
+    assert cumulative.report_a_nouveau(2020) == pytest.approx(_naive_report(db_session, 2020, property_id))
@@ -0,0 +1,153 @@
+"""
+Tests for the grouped bilan evaluation (bilan_service.BilanEvaluationPlan).
+
+⚠️ Before making changes, read: ../../docs/workflow/BEST_PRACTICES.md
+"""
+
+import json
+from collections import defaultdict
+from datetime import date
+
+import pytest
+from sqlalchemy import event
+
+from backend.database.models import (
+    Property,
+    Transaction,
+    EnrichedTransaction,
+    AmortizationResult,
+    BilanMapping,
+    BilanConfig,
+    LoanConfig,
+    LoanPayment
+)
+from backend.api.services.bilan_service import (
+    BilanEvaluationPlan,
+    LOAN_LEVEL_1,
+    calculate_bilan,
+    calculate_amortizations_cumul,
+    calculate_compte_bancaire,
+    calculate_capital_restant_du,
+    get_level_3_values,
+    get_mappings
+)
+
+
+@pytest.fixture
+def seeded(db_session):
+    """Propriété avec des catégories normales et spéciales, deux crédits et des années sans transaction."""
+    prop = Property(name="Bilan Plan Test")
+    other = Property(name="Other")
+    db_session.add_all([prop, other])
+    db_session.commit()
+    db_session.add(BilanConfig(property_id=prop.id, level_3_values=json.dumps(["Bilan"])))
+    db_session.add_all([
+        BilanMapping(property_id=prop.id, category_name="Immobilisations", type="ACTIF", sub_category="Actif immobilisé", level_1_values=json.dumps(["MOBILIER", "TRAVAUX"])),
+        BilanMapping(property_id=prop.id, category_name="Travaux", type="ACTIF", sub_category="Actif immobilisé", level_1_values=json.dumps(["TRAVAUX"])),
+        BilanMapping(property_id=prop.id, category_name="Cautions reçues", type="PASSIF", sub_category="Dettes", level_1_values=json.dumps(["CAUTIONS"])),
+        BilanMapping(property_id=prop.id, category_name="Invalide", type="ACTIF", sub_category="Actif immobilisé", level_1_values="pas du json"),
+        BilanMapping(property_id=prop.id, category_name="Amortissements cumulés", type="ACTIF", sub_category="Actif immobilisé", is_special=True, special_source="amortizations"),
+        BilanMapping(property_id=prop.id, category_name="Compte bancaire", type="ACTIF", sub_category="Trésorerie", is_special=True, special_source="transactions"),
+        BilanMapping(property_id=prop.id, category_name="Emprunt", type="PASSIF", sub_category="Dettes", is_special=True, special_source="loan_payments"),
+        BilanMapping(property_id=prop.id, category_name="Report à nouveau", type="PASSIF", sub_category="Capitaux propres", is_special=True, special_source="compte_resultat_cumul"),
+    ])
+    db_session.add_all([
+        LoanConfig(property_id=prop.id, name="Prêt principal", credit_amount=100000.0, interest_rate=1.5, duration_years=20, loan_start_date=date(2019, 6, 1)),
+        LoanConfig(property_id=prop.id, name="Prêt travaux", credit_amount=20000.0, interest_rate=2.0, duration_years=10, loan_start_date=date(2022, 3, 1)),
+    ])
+
+    raw = defaultdict(list)  # level_1 -> [(date, quantite)] comptés dans le bilan
+    rows = [
+        ("MOBILIER", "Bilan", date(2019, 2, 1), -5000.0),
+        ("TRAVAUX", "Bilan", date(2020, 5, 1), -12000.0),
+        ("TRAVAUX", "Autre", date(2020, 5, 2), -999.0),  # level_3 hors config
+        ("CAUTIONS", "Bilan", date(2019, 7, 1), 800.0),
+        ("CAUTIONS", "Bilan", date(2021, 7, 1), -1200.0),
+        ("CAUTIONS", "Bilan", date(2023, 7, 1), 900.0),
+        (LOAN_LEVEL_1, "Autre", date(2019, 6, 1), -100000.0),
+        (LOAN_LEVEL_1, "Autre", date(2022, 3, 1), -20000.0),
+    ]
+    solde = 1000.0
+    for index, (level_1, level_3, transaction_date, quantite) in enumerate(rows):
+        solde += quantite
+        transaction = Transaction(property_id=prop.id, date=transaction_date, quantite=quantite, nom=f"T{index}", solde=solde)
+        db_session.add(transaction)
+        db_session.flush()
+        db_session.add(EnrichedTransaction(
+            transaction_id=transaction.id, property_id=prop.id, annee=transaction_date.year,
+            mois=transaction_date.month, level_1=level_1, level_2="X", level_3=level_3
+        ))
+        if level_3 == "Bilan":
+            raw[level_1].append((transaction_date, quantite))
+        if level_1 in ("MOBILIER", "TRAVAUX") and level_3 == "Bilan":
+            for year in range(transaction_date.year, transaction_date.year + 4):
+                db_session.add(AmortizationResult(transaction_id=transaction.id, property_id=prop.id, year=year, category=level_1, amount=quantite / 4))
+    # Deux transactions le même jour : la dernière saisie donne le solde
+    db_session.add_all([
+        Transaction(property_id=prop.id, date=date(2023, 12, 31), quantite=10.0, nom="Même jour 1", solde=111.0),
+        Transaction(property_id=prop.id, date=date(2023, 12, 31), quantite=20.0, nom="Même jour 2", solde=222.0),
+        Transaction(property_id=other.id, date=date(2024, 1, 1), quantite=1.0, nom="Autre", solde=-1.0),
+    ])
+    for year in range(2019, 2026):
+        db_session.add(LoanPayment(property_id=prop.id, loan_name="Prêt principal", date=date(year, 1, 1), capital=4000.0, interest=1000.0, insurance=50.0, total=5050.0))
+        db_session.add(LoanPayment(property_id=prop.id, loan_name="Prêt travaux", date=date(year, 1, 1), capital=1500.0, interest=300.0, insurance=0.0, total=1800.0))
+    db_session.commit()
+    return prop.id, raw
+
+
+def _count_statements(engine, action):
+    statements = []
+
+    @event.listens_for(engine, "before_cursor_execute")
+    def _record(conn, cursor, statement, parameters, context, executemany):
+        statements.append(statement)
+
+    result = action()
+    event.remove(engine, "before_cursor_execute", _record)
+    return result, len(statements)
+
+
+def test_plan_matches_per_year_helpers(engine, db_session, seeded):
+    """Chaque entrée du plan est identique au calcul année par année."""
+    property_id, raw = seeded
+    years = list(range(2017, 2027))
+    plan = BilanEvaluationPlan(db_session, property_id, years, get_mappings(db_session, property_id), get_level_3_values(db_session, property_id))
+
+    for year in years:
+        for level_1, amounts in raw.items():
+            expected = sum(quantite for transaction_date, quantite in amounts if transaction_date.year <= year)
+            assert plan.level_1_cumul(level_1, year) == pytest.approx(expected), (level_1, year)
+        assert plan.amortizations_cumul(year) == pytest.approx(calculate_amortizations_cumul(db_session, year, property_id))
+        assert plan.compte_bancaire(year) == calculate_compte_bancaire(db_session, year, property_id)
+        assert plan.capital_restant_du(year) == pytest.approx(calculate_capital_restant_du(db_session, year, property_id))
+    assert plan.compte_bancaire(2023) == 222.0
+
+    with pytest.raises(ValueError):
+        plan.compte_bancaire(2030)
+
+
+def test_calculate_bilan_query_count_is_independent_of_years(engine, db_session, seeded):
+    """Le bilan de N années se calcule en un nombre de requêtes indépendant de N."""
+    property_id, _ = seeded
+    mappings = get_mappings(db_session, property_id)
+    level_3_values = get_level_3_values(db_session, property_id)
+
+    def run(years):
+        plan = BilanEvaluationPlan(db_session, property_id, years, mappings, level_3_values)
+        return {year: calculate_bilan(db_session, year, property_id, mappings, level_3_values, plan=plan) for year in years}
+
+    few, few_queries = _count_statements(engine, lambda: run([2021, 2022]))
+    many, many_queries = _count_statements(engine, lambda: run(list(range(2015, 2031))))
+    assert few_queries == many_queries
+
+    for year in (2021, 2022):
+        single = calculate_bilan(db_session, year, property_id, mappings, level_3_values)
+        assert many[year]["categories"] == pytest.approx(single["categories"])
+        assert few[year]["categories"] == pytest.approx(single["categories"])
+
+    categories = many[2021]["categories"]
+    assert categories["Immobilisations"] == pytest.approx(17000.0)
+    assert categories["Travaux"] == pytest.approx(12000.0)
+    assert categories["Cautions reçues"] == 0.0  # remboursé plus que reçu
+    assert categories["Invalide"] == 0.0
+    assert many[2023]["categories"]["Cautions reçues"] == pytest.approx(500.0)
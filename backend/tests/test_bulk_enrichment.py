@@ -0,0 +1,74 @@
+"""
+Tests for the bulk enrichment engine (bulk_enrich_transactions).
+
+⚠️ Before making changes, read: ../../docs/workflow/BEST_PRACTICES.md
+"""
+
+from datetime import date
+
+from backend.database.models import Property, Transaction, EnrichedTransaction, Mapping
+from backend.api.services.enrichment_service import bulk_enrich_transactions, enrich_all_transactions
+
+
+def _levels(db, property_id):
+    rows = db.query(Transaction.nom, EnrichedTransaction.level_1, EnrichedTransaction.annee, EnrichedTransaction.mois).join(
+        EnrichedTransaction, EnrichedTransaction.transaction_id == Transaction.id
+    ).filter(Transaction.property_id == property_id).order_by(Transaction.id).all()
+    return [tuple(row) for row in rows]
+
+
+def test_bulk_enrich_counts_and_idempotence(db_session):
+    """Créées au premier passage, inchangées au second, mises à jour après modification d'un mapping."""
+    prop = Property(name="Bulk Test")
+    other = Property(name="Other Property")
+    db_session.add_all([prop, other])
+    db_session.commit()
+
+    db_session.add_all([
+        Mapping(property_id=prop.id, nom="LOYER DUPONT", level_1="Loyers", level_2="Produits"),
+        Mapping(property_id=other.id, nom="EDF", level_1="Autre", level_2="Autre"),
+        Transaction(property_id=prop.id, date=date(2024, 1, 5), quantite=800, nom="LOYER DUPONT", solde=800),
+        Transaction(property_id=prop.id, date=date(2024, 2, 5), quantite=800, nom="LOYER DUPONT", solde=1600),
+        Transaction(property_id=prop.id, date=date(2024, 2, 9), quantite=-50, nom="EDF", solde=1550),
+        Transaction(property_id=other.id, date=date(2024, 2, 9), quantite=-50, nom="EDF", solde=-50),
+    ])
+    db_session.commit()
+
+    counts = bulk_enrich_transactions(db_session, property_id=prop.id)
+    assert counts == {"created": 3, "updated": 0, "unchanged": 0}
+    assert _levels(db_session, prop.id) == [
+        ("LOYER DUPONT", "Loyers", 2024, 1),
+        ("LOYER DUPONT", "Loyers", 2024, 2),
+        ("EDF", None, 2024, 2),
+    ]
+    # L'autre propriété n'est pas touchée
+    assert db_session.query(EnrichedTransaction).filter(EnrichedTransaction.property_id == other.id).count() == 0
+
+    assert bulk_enrich_transactions(db_session, property_id=prop.id) == {"created": 0, "updated": 0, "unchanged": 3}
+
+    mapping = db_session.query(Mapping).filter(Mapping.property_id == prop.id).first()
+    mapping.level_1 = "Loyers meublés"
+    db_session.commit()
+    assert bulk_enrich_transactions(db_session, property_id=prop.id) == {"created": 0, "updated": 2, "unchanged": 1}
+    assert _levels(db_session, prop.id)[0] == ("LOYER DUPONT", "Loyers meublés", 2024, 1)
+
+    # Mode legacy (toutes les propriétés) : compteurs agrégés (nouvelles, déjà enrichies)
+    assert enrich_all_transactions(db_session) == (1, 3)
+    assert _levels(db_session, other.id) == [("EDF", "Autre", 2024, 2)]
+
+
+def test_bulk_enrich_subset_of_transactions(db_session):
+    """Seules les transactions demandées sont enrichies."""
+    prop = Property(name="Subset Test")
+    db_session.add(prop)
+    db_session.commit()
+    transactions = [
+        Transaction(property_id=prop.id, date=date(2024, 3, day), quantite=10, nom=f"T{day}", solde=10 * day)
+        for day in range(1, 5)
+    ]
+    db_session.add_all(transactions)
+    db_session.commit()
+
+    counts = bulk_enrich_transactions(db_session, property_id=prop.id, transaction_ids=[transactions[0].id, transactions[2].id])
+    assert counts == {"created": 2, "updated": 0, "unchanged": 0}
+    assert db_session.query(EnrichedTransaction).count() == 2
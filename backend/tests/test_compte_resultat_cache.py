@@ -0,0 +1,145 @@
+"""
+Tests for the persisted compte de résultat cache (compte_resultat_cache_service).
+
+⚠️ Before making changes, read: ../../docs/workflow/BEST_PRACTICES.md
+"""
+
+import json
+from datetime import date
+
+import pytest
+
+from backend.database.models import (
+    Property,
+    Transaction,
+    EnrichedTransaction,
+    Mapping,
+    CompteResultatMapping,
+    CompteResultatConfig,
+    CompteResultatCache,
+    AmortizationResult,
+    LoanPayment,
+    LoanConfig
+)
+from backend.api.services.compte_resultat_service import calculate_compte_resultat_range
+from backend.api.services.compte_resultat_cache_service import (
+    get_compte_resultat_cached,
+    get_compte_resultat_cache_stats
+)
+from backend.api.services.enrichment_service import bulk_enrich_transactions
+
+YEARS = [2021, 2022, 2023]
+
+
+def _add_transaction(db, property_id, transaction_date, quantite, level_1):
+    transaction = Transaction(property_id=property_id, date=transaction_date, quantite=quantite, nom=level_1, solde=0.0)
+    db.add(transaction)
+    db.flush()
+    db.add(EnrichedTransaction(
+        transaction_id=transaction.id, property_id=property_id, annee=transaction_date.year,
+        mois=transaction_date.month, level_1=level_1, level_2="X", level_3="Résultat"
+    ))
+    return transaction
+
+
+@pytest.fixture
+def property_id(db_session):
+    prop = Property(name="Cache Test")
+    db_session.add(prop)
+    db_session.commit()
+    db_session.add(CompteResultatConfig(property_id=prop.id, level_3_values=json.dumps(["Résultat"])))
+    db_session.add_all([
+        CompteResultatMapping(property_id=prop.id, category_name="Loyers hors charge encaissés", level_1_values='["LOYERS"]'),
+        CompteResultatMapping(property_id=prop.id, category_name="Charges", type="Charges d'exploitation", level_1_values='["CHARGES"]'),
+        LoanConfig(property_id=prop.id, name="Prêt", credit_amount=1000, interest_rate=1.0, duration_years=10),
+    ])
+    for year in YEARS:
+        _add_transaction(db_session, prop.id, date(year, 2, 1), 500.0, "LOYERS")
+        travaux = _add_transaction(db_session, prop.id, date(year, 3, 1), -200.0, "CHARGES")
+        db_session.add(AmortizationResult(transaction_id=travaux.id, property_id=prop.id, year=year, category="Travaux", amount=-20.0))
+    db_session.commit()
+    return prop.id
+
+
+def _cached_years(db, property_id):
+    return sorted(year for (year,) in db.query(CompteResultatCache.year).filter(CompteResultatCache.property_id == property_id))
+
+
+def test_cache_hits_and_precise_invalidation(db_session, property_id):
+    """Les lectures sont servies depuis le cache et seules les années modifiées sont recalculées."""
+    before = get_compte_resultat_cache_stats()
+    results, stats = get_compte_resultat_cached(db_session, YEARS, property_id)
+    assert stats == {"hits": 0, "misses": 3}
+    assert results == calculate_compte_resultat_range(db_session, YEARS, property_id)
+
+    results, stats = get_compte_resultat_cached(db_session, YEARS, property_id)
+    assert stats == {"hits": 3, "misses": 0}
+    after = get_compte_resultat_cache_stats()
+    assert after["hits"] - before["hits"] == 3
+    assert after["misses"] - before["misses"] == 3
+
+    # Nouvelle transaction classée en 2022 (flush ORM) → seule 2022 est invalidée
+    _add_transaction(db_session, property_id, date(2022, 6, 1), 100.0, "LOYERS")
+    db_session.commit()
+    assert _cached_years(db_session, property_id) == [2021, 2023]
+    results, stats = get_compte_resultat_cached(db_session, YEARS, property_id)
+    assert stats == {"hits": 2, "misses": 1}
+    assert results[2022]["produits"]["Loyers hors charge encaissés"] == 600.0
+
+    # Modification du solde uniquement → pas d'invalidation
+    transaction = db_session.query(Transaction).filter(Transaction.property_id == property_id).first()
+    transaction.solde = 42.0
+    db_session.commit()
+    assert _cached_years(db_session, property_id) == YEARS
+
+    # Changement de date : l'ancienne et la nouvelle année sont invalidées
+    db_session.refresh(transaction)
+    transaction.date = date(2023, 1, 15)
+    db_session.commit()
+    assert _cached_years(db_session, property_id) == [2022]
+
+    # Objet expiré après commit : la date est rechargée au flush, seule son année est invalidée
+    get_compte_resultat_cached(db_session, YEARS, property_id)
+    transaction.quantite = 450.0
+    db_session.commit()
+    assert _cached_years(db_session, property_id) == [2021, 2022]
+
+    # Suppression en masse des amortissements de 2021 (query.delete())
+    get_compte_resultat_cached(db_session, YEARS, property_id)
+    db_session.query(AmortizationResult).filter(AmortizationResult.year == 2021).delete()
+    db_session.commit()
+    assert _cached_years(db_session, property_id) == [2022, 2023]
+
+    # Mensualité de crédit en 2023
+    db_session.add(LoanPayment(property_id=property_id, date=date(2023, 1, 1), capital=10, interest=5, insurance=1, total=16, loan_name="Prêt"))
+    db_session.commit()
+    assert _cached_years(db_session, property_id) == [2022]
+
+    # Rollback : les entrées supprimées pendant le flush sont restaurées
+    _add_transaction(db_session, property_id, date(2022, 7, 1), 1.0, "LOYERS")
+    db_session.flush()
+    assert _cached_years(db_session, property_id) == []
+    db_session.rollback()
+    assert _cached_years(db_session, property_id) == [2022]
+
+
+def test_fingerprint_and_bulk_enrichment(db_session, property_id):
+    """Un changement de configuration rend le cache obsolète ; l'enrichissement en masse invalide ses années."""
+    get_compte_resultat_cached(db_session, YEARS, property_id)
+
+    mapping = db_session.query(CompteResultatMapping).filter(CompteResultatMapping.category_name == "Charges").one()
+    mapping.level_1_values = '["CHARGES", "AUTRES"]'
+    db_session.commit()
+    _, stats = get_compte_resultat_cached(db_session, YEARS, property_id)
+    assert stats == {"hits": 0, "misses": 3}
+
+    # Reclassification en masse (UPSERT Core) des transactions "CHARGES" de toutes les années
+    db_session.add(Mapping(property_id=property_id, nom="CHARGES", level_1="AUTRES", level_2="X", level_3="Résultat"))
+    db_session.add(Mapping(property_id=property_id, nom="LOYERS", level_1="LOYERS", level_2="X", level_3="Résultat"))
+    db_session.commit()
+    counts = bulk_enrich_transactions(db_session, property_id=property_id)
+    assert counts["updated"] == 3
+    assert _cached_years(db_session, property_id) == []
+    results, stats = get_compte_resultat_cached(db_session, YEARS, property_id)
+    assert stats["misses"] == 3
+    assert results == calculate_compte_resultat_range(db_session, YEARS, property_id)
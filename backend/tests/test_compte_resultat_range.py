@@ -0,0 +1,120 @@
+"""
+Tests for the multi-year compte de résultat (calculate_compte_resultat_range).
+
+⚠️ Before making changes, read: ../../docs/workflow/BEST_PRACTICES.md
+"""
+
+import json
+from datetime import date
+
+import pytest
+from sqlalchemy import event
+
+from backend.database.models import (
+    Property,
+    Transaction,
+    EnrichedTransaction,
+    CompteResultatMapping,
+    CompteResultatConfig,
+    AmortizationResult,
+    LoanPayment,
+    LoanConfig
+)
+from backend.api.services.compte_resultat_service import (
+    calculate_compte_resultat,
+    calculate_compte_resultat_range
+)
+
+
+def _seed(db):
+    """Propriété avec 4 années de transactions, amortissements et crédits (+ une autre propriété)."""
+    prop = Property(name="Range Test")
+    other = Property(name="Other Range Test")
+    db.add_all([prop, other])
+    db.commit()
+
+    db.add(CompteResultatConfig(property_id=prop.id, level_3_values=json.dumps(["Produits", "Charges"])))
+    db.add_all([
+        # Type déduit de la catégorie (produits)
+        CompteResultatMapping(property_id=prop.id, category_name="Loyers hors charge encaissés", level_1_values='["LOYERS"]'),
+        # Deux mappings de la même catégorie (OR des level_1)
+        CompteResultatMapping(property_id=prop.id, category_name="Assurances", type="Charges d'exploitation", level_1_values='["PNO"]'),
+        CompteResultatMapping(property_id=prop.id, category_name="Assurances", type="Charges d'exploitation", level_1_values='["GLI", "PNO"]'),
+        CompteResultatMapping(property_id=prop.id, category_name="Travaux", level_1_values='["TRAVAUX"]'),
+        CompteResultatMapping(property_id=prop.id, category_name="Charges d'amortissements", level_1_values='["LOYERS"]'),
+        CompteResultatMapping(property_id=prop.id, category_name="Invalide", level_1_values="not json"),
+    ])
+
+    rows = []
+    for year in range(2021, 2025):
+        for month in (1, 6, 12):
+            rows += [
+                (prop.id, date(year, month, 5), 650.0 + year % 7, "LOYERS", "Produits"),
+                (prop.id, date(year, month, 10), -30.5, "PNO", "Charges"),
+                (prop.id, date(year, month, 11), -12.25, "GLI", "Charges"),
+                (prop.id, date(year, month, 20), -100.0 * month, "TRAVAUX", "Charges"),
+                (prop.id, date(year, month, 21), 15.0, "TRAVAUX", "Charges"),  # remboursement
+                (prop.id, date(year, month, 22), -999.0, "TRAVAUX", "Hors config"),
+                (other.id, date(year, month, 5), 10000.0, "LOYERS", "Produits"),
+            ]
+    for property_id, transaction_date, quantite, level_1, level_3 in rows:
+        transaction = Transaction(property_id=property_id, date=transaction_date, quantite=quantite, nom=level_1, solde=0.0)
+        db.add(transaction)
+        db.flush()
+        db.add(EnrichedTransaction(
+            transaction_id=transaction.id, property_id=property_id, annee=transaction_date.year,
+            mois=transaction_date.month, level_1=level_1, level_2="X", level_3=level_3
+        ))
+        if level_1 == "TRAVAUX" and transaction_date.month == 1 and level_3 == "Charges" and quantite < 0:
+            for amortization_year in range(transaction_date.year, transaction_date.year + 3):
+                db.add(AmortizationResult(transaction_id=transaction.id, property_id=property_id, year=amortization_year, category="Travaux", amount=-33.3))
+
+    db.add_all([
+        LoanConfig(property_id=prop.id, name="Prêt principal", credit_amount=100000, interest_rate=2.0, duration_years=20),
+        LoanPayment(property_id=prop.id, date=date(2022, 1, 1), capital=4000, interest=1500.5, insurance=120.0, total=5620.5, loan_name="Prêt principal"),
+        LoanPayment(property_id=prop.id, date=date(2023, 1, 1), capital=4100, interest=1400.25, insurance=120.0, total=5620.25, loan_name="Prêt principal"),
+        LoanPayment(property_id=prop.id, date=date(2023, 1, 1), capital=100, interest=999.0, insurance=1.0, total=1100, loan_name="Prêt non configuré"),
+    ])
+    db.commit()
+    return prop.id
+
+
+def _assert_same(actual, expected):
+    assert actual.keys() == expected.keys()
+    for key, value in expected.items():
+        if isinstance(value, dict):
+            assert actual[key].keys() == value.keys(), key
+            for category, amount in value.items():
+                assert actual[key][category] == pytest.approx(amount), (key, category)
+        else:
+            assert actual[key] == pytest.approx(value), key
+
+
+def test_range_matches_per_year(engine, db_session):
+    """Chaque année calculée en lot est identique au calcul année par année."""
+    property_id = _seed(db_session)
+    years = [2020, 2021, 2022, 2023, 2024, 2025, 2026]
+
+    statements = []
+
+    @event.listens_for(engine, "before_cursor_execute")
+    def _record(conn, cursor, statement, parameters, context, executemany):
+        statements.append(statement)
+
+    results = calculate_compte_resultat_range(db_session, years, property_id)
+    # mappings + config + transactions + amortissements + crédits + mensualités
+    assert len(statements) == 6
+    assert list(results) == years
+
+    for year in years:
+        _assert_same(results[year], calculate_compte_resultat(db_session, year, property_id))
+
+    assert results[2023]["charges"]["Coût du financement (hors remboursement du capital)"] == pytest.approx(1520.25)
+    assert results[2023]["charges"]["Charges d'amortissements"] == pytest.approx(-99.9)
+    assert results[2026]["charges"] == {"Charges d'amortissements": pytest.approx(-33.3)}
+    assert results[2020]["resultat_net"] == 0.0
+
+    # Années non contiguës et mappings / config fournis
+    sparse = calculate_compte_resultat_range(db_session, [2024, 2021], property_id, mappings=[], level_3_values=[])
+    assert list(sparse) == [2024, 2021]
+    assert sparse[2021]["produits"] == {}
@@ -0,0 +1,55 @@
+"""
+Tests for the SQLite engine layer (pragmas, read-only pool).
+
+⚠️ Before making changes, read: ../../docs/workflow/BEST_PRACTICES.md
+"""
+
+import pytest
+from sqlalchemy import text
+from sqlalchemy.exc import OperationalError
+
+from backend.database import Base
+from backend.database.connection import create_sqlite_engine
+
+
+@pytest.fixture
+def engines(tmp_path):
+    """Moteurs d'écriture et de lecture sur un fichier SQLite temporaire."""
+    url = f"sqlite:///{tmp_path / 'test.db'}"
+    writer = create_sqlite_engine(url, pool_size=2)
+    Base.metadata.create_all(bind=writer)
+    reader = create_sqlite_engine(url, read_only=True, pool_size=2)
+    yield writer, reader
+    reader.dispose()
+    writer.dispose()
+
+
+def test_pragmas_applied_on_connect(engines):
+    """Les PRAGMA sont positionnés sur chaque connexion du pool."""
+    writer, reader = engines
+    with writer.connect() as conn:
+        assert conn.execute(text("PRAGMA journal_mode")).scalar() == "wal"
+        assert conn.execute(text("PRAGMA synchronous")).scalar() == 1  # NORMAL
+        assert conn.execute(text("PRAGMA foreign_keys")).scalar() == 1
+        assert conn.execute(text("PRAGMA temp_store")).scalar() == 2  # MEMORY
+        assert conn.execute(text("PRAGMA cache_size")).scalar() == -65536
+        assert conn.execute(text("PRAGMA busy_timeout")).scalar() == 5000
+        assert conn.execute(text("PRAGMA query_only")).scalar() == 0
+    with reader.connect() as conn:
+        assert conn.execute(text("PRAGMA query_only")).scalar() == 1
+        assert conn.execute(text("PRAGMA foreign_keys")).scalar() == 1
+
+
+def test_reader_not_blocked_by_writer(engines):
+    """Une lecture aboutit pendant qu'une transaction d'écriture est ouverte ; le pool de lecture refuse les écritures."""
+    writer, reader = engines
+    with writer.connect() as write_conn:
+        write_conn.execute(text("INSERT INTO properties (name) VALUES ('Pending')"))
+        # Transaction d'écriture non validée : le lecteur voit le dernier état validé
+        with reader.connect() as read_conn:
+            assert read_conn.execute(text("SELECT COUNT(*) FROM properties")).scalar() == 0
+        write_conn.commit()
+    with reader.connect() as read_conn:
+        assert read_conn.execute(text("SELECT COUNT(*) FROM properties")).scalar() == 1
+        with pytest.raises(OperationalError):
+            read_conn.execute(text("DELETE FROM properties"))
@@ -0,0 +1,183 @@
+"""
+Tests for the background job subsystem (job_service and /api/jobs).
+
+⚠️ Before making changes, read: ../../docs/workflow/BEST_PRACTICES.md
+"""
+
+import threading
+import time
+from datetime import date
+
+import pytest
+
+from backend.api.routes import enrichment
+from backend.api.services import job_service
+from backend.api.services.job_service import JobRunner, configure_job_runner
+from backend.database.models import Property, Transaction, Mapping, EnrichedTransaction, Job
+
+
+@pytest.fixture
+def database_url(tmp_path):
+    """Base SQLite sur fichier : les workers utilisent leurs propres connexions."""
+    return f"sqlite:///{tmp_path / 'jobs.db'}"
+
+
+@pytest.fixture
+def property_ids(session_factory):
+    db = session_factory()
+    properties = [Property(name="Jobs A"), Property(name="Jobs B")]
+    db.add_all(properties)
+    db.commit()
+    ids = [prop.id for prop in properties]
+    db.close()
+    return ids
+
+
+@pytest.fixture
+def runner(session_factory):
+    runner = JobRunner(session_factory, max_workers=3)
+    yield runner
+    runner.shutdown(wait=True)
+
+
+def _job(session_factory, job_id):
+    db = session_factory()
+    try:
+        return db.get(Job, job_id)
+    finally:
+        db.close()
+
+
+def test_jobs_are_serialized_per_property(monkeypatch, session_factory, property_ids, runner):
+    """Les tâches d'une propriété s'exécutent une à la fois, dans l'ordre ; les autres propriétés en parallèle."""
+    property_a, property_b = property_ids
+    events = []
+    events_lock = threading.Lock()
+
+    def slow_handler(db, property_id, params, progress):
+        with events_lock:
+            events.append(("start", property_id, params["n"], time.monotonic()))
+        progress(0.5, "à mi-chemin")
+        time.sleep(0.15)
+        with events_lock:
+            events.append(("end", property_id, params["n"], time.monotonic()))
+        return {"n": params["n"]}
+
+    monkeypatch.setitem(job_service.JOB_HANDLERS, "slow", slow_handler)
+    db = session_factory()
+    jobs_a = [runner.submit(db, "slow", property_a, {"n": n}).id for n in range(3)]
+    job_b = runner.submit(db, "slow", property_b, {"n": 99}).id
+    db.close()
+    assert runner.wait_idle(timeout=10)
+
+    spans = {}
+    for kind, property_id, n, at in events:
+        spans.setdefault((property_id, n), {})[kind] = at
+    ordered_a = [spans[(property_a, n)] for n in range(3)]
+    for previous, following in zip(ordered_a, ordered_a[1:]):
+        assert previous["end"] <= following["start"]
+    # La propriété B n'attend pas la file de A
+    assert spans[(property_b, 99)]["start"] < ordered_a[1]["start"]
+
+    for job_id in jobs_a + [job_b]:
+        job = _job(session_factory, job_id)
+        assert (job.status, job.progress, job.message) == ("succeeded", 1.0, "Terminé")
+        assert job.started_at is not None and job.finished_at is not None
+
+
+def test_failed_job_records_error(monkeypatch, session_factory, property_ids, runner):
+    """Une exception dans la tâche est enregistrée et ne bloque pas les tâches suivantes."""
+    def failing_handler(db, property_id, params, progress):
+        raise RuntimeError("boom")
+
+    monkeypatch.setitem(job_service.JOB_HANDLERS, "failing", failing_handler)
+    monkeypatch.setitem(job_service.JOB_HANDLERS, "ok", lambda db, property_id, params, progress: {"ok": True})
+    db = session_factory()
+    failed = runner.submit(db, "failing", property_ids[0]).id
+    succeeded = runner.submit(db, "ok", property_ids[0]).id
+    with pytest.raises(ValueError):
+        runner.submit(db, "inconnu", property_ids[0])
+    db.close()
+    assert runner.wait_idle(timeout=10)
+
+    assert (_job(session_factory, failed).status, _job(session_factory, failed).error) == ("failed", "boom")
+    assert _job(session_factory, succeeded).status == "succeeded"
+
+
+def test_recover_requeues_pending_and_fails_interrupted(monkeypatch, session_factory, property_ids, runner):
+    """Au démarrage : les tâches running sont en échec, les tâches pending sont exécutées."""
+    monkeypatch.setitem(job_service.JOB_HANDLERS, "ok", lambda db, property_id, params, progress: {"ok": True})
+    db = session_factory()
+    running = Job(property_id=property_ids[0], kind="ok", status="running", params="{}")
+    pending = Job(property_id=property_ids[0], kind="ok", status="pending", params="{}")
+    db.add_all([running, pending])
+    db.commit()
+    running_id, pending_id = running.id, pending.id
+    db.close()
+
+    runner.recover()
+    assert runner.wait_idle(timeout=10)
+    assert _job(session_factory, running_id).status == "failed"
+    assert _job(session_factory, pending_id).status == "succeeded"
+
+
+def test_synchronous_recompute_waits_for_running_job(monkeypatch, session_factory, property_ids, runner, client):
+    """Un re-enrichissement synchrone attend la fin de la tâche en cours de la même propriété."""
+    property_id = property_ids[0]
+    started = threading.Event()
+    events = []
+
+    def slow_handler(db, property_id, params, progress):
+        started.set()
+        time.sleep(0.2)
+        events.append(("job_end", time.monotonic()))
+        return {}
+
+    def recording_bulk_enrich(db, property_id=None, **kwargs):
+        events.append(("sync_start", time.monotonic()))
+        return {"created": 0, "updated": 0, "unchanged": 0}
+
+    monkeypatch.setitem(job_service.JOB_HANDLERS, "slow", slow_handler)
+    monkeypatch.setattr(enrichment, "bulk_enrich_transactions", recording_bulk_enrich)
+    db = session_factory()
+    runner.submit(db, "slow", property_id)
+    db.close()
+    assert started.wait(timeout=5)
+
+    response = client.post("/api/enrichment/re-enrich", params={"property_id": property_id})
+    assert response.status_code == 200
+    assert runner.wait_idle(timeout=10)
+    assert [kind for kind, _ in events] == ["job_end", "sync_start"]
+
+
+def test_re_enrich_in_background_endpoint(session_factory, property_ids, client):
+    """POST /enrichment/re-enrich?background=true retourne 202 et la tâche enrichit les transactions."""
+    property_id = property_ids[0]
+    db = session_factory()
+    db.add(Mapping(property_id=property_id, nom="LOYER", level_1="LOYERS", level_2="Produits", level_3="Résultat"))
+    db.add(Transaction(property_id=property_id, date=date(2024, 1, 5), quantite=700.0, nom="LOYER", solde=700.0))
+    db.commit()
+    db.close()
+
+    runner = configure_job_runner(session_factory, max_workers=2)
+    try:
+        response = client.post("/api/enrichment/re-enrich", params={"property_id": property_id, "background": True})
+        assert response.status_code == 202
+        job_id = response.json()["id"]
+        assert response.json()["kind"] == "re_enrich"
+        assert runner.wait_idle(timeout=10)
+
+        progress = client.get(f"/api/jobs/{job_id}/progress").json()
+        assert (progress["status"], progress["progress"]) == ("succeeded", 1.0)
+        assert client.get(f"/api/jobs/{job_id}").json()["result"] == {"created_count": 1, "updated_count": 0, "unchanged_count": 0}
+        assert client.get("/api/jobs", params={"property_id": property_id}).json()["total"] == 1
+
+        assert client.post("/api/jobs", json={"kind": "inconnu", "property_id": property_id}).status_code == 400
+        assert client.get("/api/jobs/999999").status_code == 404
+    finally:
+        runner.shutdown(wait=True)
+        job_service._runner = None
+
+    db = session_factory()
+    assert db.query(EnrichedTransaction).one().level_1 == "LOYERS"
+    db.close()
@@ -0,0 +1,116 @@
+"""
+Tests for the batched validation of POST /api/mappings/import.
+
+⚠️ Before making changes, read: ../../docs/workflow/BEST_PRACTICES.md
+"""
+
+import io
+import json
+from pathlib import Path
+
+import pandas as pd
+import pytest
+from sqlalchemy import event
+
+from backend.api.services.mapping_matcher_service import get_mapping_matcher
+from backend.database.models import Property, Mapping, AllowedMapping
+
+FILENAME = "test_mapping_import_batched.xlsx"
+ARCHIVE = Path(__file__).parent.parent / "data" / "input" / "trades" / FILENAME
+
+
+@pytest.fixture(autouse=True)
+def remove_archive():
+    yield
+    ARCHIVE.unlink(missing_ok=True)
+
+
+def _workbook(rows):
+    buffer = io.BytesIO()
+    pd.DataFrame(rows, columns=["Nom", "Niveau 1", "Niveau 2", "Niveau 3"]).to_excel(buffer, index=False, engine="openpyxl")
+    buffer.seek(0)
+    return buffer
+
+
+def _import(client, property_id, workbook):
+    mapping = [
+        {"file_column": "Nom", "db_column": "nom"},
+        {"file_column": "Niveau 1", "db_column": "level_1"},
+        {"file_column": "Niveau 2", "db_column": "level_2"},
+        {"file_column": "Niveau 3", "db_column": "level_3"},
+    ]
+    return client.post(
+        "/api/mappings/import",
+        data={"property_id": str(property_id), "mapping": json.dumps(mapping)},
+        files={"file": (FILENAME, workbook, "application/vnd.openxmlformats-officedocument.spreadsheetml.sheet")}
+    )
+
+
+def test_import_validates_rows_in_batch(engine, db_session, client):
+    """Erreurs, doublons (fichier et base) et insertions, avec une seule lecture des mappings autorisés."""
+    prop = Property(name="Import")
+    db_session.add(prop)
+    db_session.commit()
+    db_session.add_all([
+        AllowedMapping(property_id=prop.id, level_1="LOYERS", level_2="Produits Locatifs", level_3="Produits"),
+        AllowedMapping(property_id=prop.id, level_1="CHARGES", level_2="Energie", level_3=None),
+        AllowedMapping(property_id=prop.id, level_1="CHARGES", level_2="Energie", level_3="Charges Déductibles"),
+    ])
+    existing = Mapping(property_id=prop.id, nom="EXISTANT", level_1="CHARGES", level_2="Energie")
+    db_session.add(existing)
+    db_session.commit()
+    matcher = get_mapping_matcher(db_session, prop.id)
+
+    rows = [
+        [" LOYER ", "LOYERS", "Produits Locatifs", "Produits"],
+        [None, "LOYERS", "Produits Locatifs", "Produits"],
+        ["EDF", None, "Energie", None],
+        ["EDF", "CHARGES", "  ", None],
+        ["GAZ", "CHARGES", "Energie", "Bidon"],
+        ["EAU", "CHARGES", "Inconnu", "Charges Déductibles"],
+        ["LOYER", "LOYERS", "Produits Locatifs", "Produits"],
+        ["EXISTANT", "CHARGES", "Energie", None],
+        ["EXISTANT", "CHARGES", "Energie", None],
+        ["EDF", "CHARGES", "Energie", None],
+    ]
+    statements = []
+
+    def record(conn, cursor, statement, parameters, context, executemany):
+        statements.append(statement)
+
+    event.listen(engine, "before_cursor_execute", record)
+    try:
+        response = _import(client, prop.id, _workbook(rows))
+    finally:
+        event.remove(engine, "before_cursor_execute", record)
+
+    assert response.status_code == 200
+    body = response.json()
+    assert (body["imported_count"], body["duplicates_count"], body["errors_count"]) == (2, 3, 5)
+    assert [(error["line_number"], error["error_message"]) for error in body["errors"]] == [
+        (3, "Le champ 'nom' est obligatoire et ne peut pas être vide"),
+        (4, "Le champ 'level_1' est obligatoire et ne peut pas être vide"),
+        (5, "Le champ 'level_2' est obligatoire et ne peut pas être vide"),
+        (6, "erreur - mapping inconnu"),
+        (7, "erreur - mapping inconnu"),
+    ]
+    assert [(duplicate["nom"], duplicate["existing_id"]) for duplicate in body["duplicates"]] == [
+        ("LOYER", None), ("EXISTANT", existing.id), ("EXISTANT", existing.id)
+    ]
+    assert sum("FROM allowed_mappings" in statement for statement in statements) == 1
+    assert sum(statement.startswith("INSERT INTO mappings") for statement in statements) == 1
+
+    db_session.expire_all()
+    imported = {
+        mapping.nom: (mapping.level_1, mapping.level_3, mapping.is_prefix_match)
+        for mapping in db_session.query(Mapping).filter(Mapping.property_id == prop.id)
+    }
+    assert imported == {
+        "EXISTANT": ("CHARGES", None, True),
+        "LOYER": ("LOYERS", "Produits", True),
+        "EDF": ("CHARGES", None, True),
+    }
+    # Insertion Core : l'index compilé de la propriété a été invalidé
+    refreshed = get_mapping_matcher(db_session, prop.id)
+    assert refreshed is not matcher
+    assert refreshed.find_best("EDF").level_1 == "CHARGES"
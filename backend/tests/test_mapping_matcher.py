@@ -0,0 +1,178 @@
+"""
+Tests for the compiled mapping matcher (mapping_matcher_service).
+
+⚠️ Before making changes, read: ../../docs/workflow/BEST_PRACTICES.md
+"""
+
+import random
+from datetime import date, timedelta
+from types import SimpleNamespace
+
+from backend.database.models import Property, Mapping, Transaction
+from backend.api.services.enrichment_service import (
+    bulk_enrich_transactions,
+    find_best_mapping,
+    transaction_matches_mapping_name
+)
+from backend.api.services.mapping_matcher_service import (
+    MappingMatcher,
+    get_mapping_matcher
+)
+
+
+def legacy_find_best_mapping(transaction_name, mappings):
+    """Parcours linéaire historique de find_best_mapping (référence)."""
+    best_match = None
+    best_length = 0
+    matching_lengths = []
+    transaction_name = transaction_name.strip()
+    transaction_length = len(transaction_name)
+
+    for mapping in mappings:
+        mapping_name = mapping.nom.strip()
+        match_length = None
+        if transaction_name == mapping_name:
+            match_length = len(mapping_name)
+        elif 'PRLV SEPA' in transaction_name and 'PRLV SEPA' in mapping_name:
+            if transaction_name.startswith(mapping_name):
+                match_length = len(mapping_name)
+        elif 'VIR STRIPE' in transaction_name and mapping_name == 'VIR STRIPE':
+            match_length = len(mapping_name)
+        elif mapping.is_prefix_match:
+            if transaction_name.startswith(mapping_name):
+                if transaction_length > 0 and len(mapping_name) / transaction_length >= 0.70:
+                    match_length = len(mapping_name)
+        elif mapping_name in transaction_name:
+            if transaction_length > 0 and len(mapping_name) / transaction_length >= 0.70:
+                match_length = len(mapping_name)
+
+        if match_length is not None:
+            matching_lengths.append(match_length)
+            if match_length > best_length:
+                best_match = mapping
+                best_length = match_length
+
+    if not matching_lengths or matching_lengths.count(best_length) > 1:
+        return None
+    return best_match
+
+
+def _random_name(rng, alphabet="ABC "):
+    return "".join(rng.choice(alphabet) for _ in range(rng.randint(0, 9)))
+
+
+def test_matcher_equivalent_to_linear_scan():
+    """Le matcher compilé retourne exactement le même mapping que le parcours linéaire."""
+    rng = random.Random(20240501)
+    specials = ["PRLV SEPA", "PRLV SEPA A", "VIR STRIPE", "VIR STRIPE B", " AB ", "ABC"]
+
+    for _ in range(300):
+        mappings = []
+        for index in range(rng.randint(0, 25)):
+            nom = rng.choice(specials) if rng.random() < 0.15 else _random_name(rng)
+            mappings.append(SimpleNamespace(id=index, nom=nom, is_prefix_match=rng.choice([True, False, None])))
+        matcher = MappingMatcher(mappings)
+
+        for _ in range(40):
+            transaction_name = _random_name(rng)
+            if rng.random() < 0.3:
+                transaction_name = rng.choice(specials) + transaction_name
+            expected = legacy_find_best_mapping(transaction_name, mappings)
+            assert matcher.find_best(transaction_name) is expected
+            assert find_best_mapping(transaction_name, mappings) is expected
+
+
+def test_special_cases():
+    """Cas PRLV SEPA, VIR STRIPE, seuil de 70% et conflit de longueur."""
+    prlv = SimpleNamespace(nom="PRLV SEPA EDF", is_prefix_match=True)
+    stripe = SimpleNamespace(nom="VIR STRIPE", is_prefix_match=True)
+    generic = SimpleNamespace(nom="achat appart", is_prefix_match=True)
+    matcher = MappingMatcher([prlv, stripe, generic])
+
+    # PRLV SEPA : préfixe sans seuil de similarité
+    assert matcher.find_best("PRLV SEPA EDF FACTURE 123456789 REF ABCDEFGHIJ") is prlv
+    # VIR STRIPE : correspond même au milieu du nom
+    assert matcher.find_best("REMISE VIR STRIPE PAYOUT 42") is stripe
+    # Mapping trop générique (< 70%) → ignoré
+    assert matcher.find_best("achat appart (Immobilisation Facade/Toiture)") is None
+    assert matcher.find_best("  achat appart ") is generic
+
+    # Deux mappings de même longueur qui correspondent → conflit → None
+    first = SimpleNamespace(nom="LOYER A", is_prefix_match=False)
+    second = SimpleNamespace(nom="OYER AB", is_prefix_match=False)
+    assert MappingMatcher([first, second]).find_best("LOYER AB") is None
+
+
+def test_transaction_matches_mapping_name_contains_fallback():
+    """Un mapping préfixe est aussi testé en "contient" (comportement historique)."""
+    assert transaction_matches_mapping_name("X LOYER JANV", "LOYER JANV", True)
+    assert not transaction_matches_mapping_name("X LOYER JANV DUPONT", "LOYER", True)
+    assert transaction_matches_mapping_name("PRLV SEPA EDF 1234", "PRLV SEPA EDF", True)
+    assert not transaction_matches_mapping_name("PRLV SEPA GDF 1234", "PRLV SEPA EDF", True)
+
+
+def test_cache_invalidated_on_mapping_changes(db_session):
+    """L'index en cache est invalidé à la création, modification et suppression d'un mapping."""
+    prop = Property(name="Matcher Test")
+    db_session.add(prop)
+    db_session.commit()
+
+    mapping = Mapping(property_id=prop.id, nom="LOYER DUPONT", level_1="Loyers", level_2="Produits", is_prefix_match=True)
+    db_session.add(mapping)
+    db_session.commit()
+
+    matcher = get_mapping_matcher(db_session, prop.id)
+    assert get_mapping_matcher(db_session, prop.id) is matcher
+    assert matcher.find_best("LOYER DUPONT").level_1 == "Loyers"
+
+    # Modification
+    mapping.level_1 = "Loyers meublés"
+    db_session.commit()
+    updated = get_mapping_matcher(db_session, prop.id)
+    assert updated is not matcher
+    assert updated.find_best("LOYER DUPONT").level_1 == "Loyers meublés"
+
+    # Création
+    db_session.add(Mapping(property_id=prop.id, nom="EDF", level_1="Charges", level_2="Energie"))
+    db_session.commit()
+    assert get_mapping_matcher(db_session, prop.id).find_best("EDF").level_1 == "Charges"
+
+    # Suppression
+    db_session.delete(mapping)
+    db_session.commit()
+    assert get_mapping_matcher(db_session, prop.id).find_best("LOYER DUPONT") is None
+
+    # Suppression en masse
+    db_session.query(Mapping).filter(Mapping.property_id == prop.id).delete()
+    db_session.commit()
+    assert get_mapping_matcher(db_session, prop.id).size == 0
+
+
+def test_distinct_names_matched_once_per_mapping_version(db_session):
+    """Chaque nom distinct est évalué une fois par version des mappings, quel que soit le nombre de lignes."""
+    prop = Property(name="Memo Test")
+    db_session.add(prop)
+    db_session.commit()
+    db_session.add(Mapping(property_id=prop.id, nom="LOYER", level_1="Loyers", level_2="Produits"))
+    db_session.commit()
+
+    names = ["LOYER", "PRLV SEPA EDF", "CB CARREFOUR"] * 200
+    for day, nom in enumerate(names):
+        db_session.add(Transaction(property_id=prop.id, date=date(2024, 1, 1) + timedelta(days=day % 365),
+                                   quantite=1.0, nom=nom, solde=0.0))
+    db_session.commit()
+
+    assert bulk_enrich_transactions(db_session, property_id=prop.id)["created"] == 600
+    matcher = get_mapping_matcher(db_session, prop.id)
+    assert matcher.match_count == 3
+    # Appels suivants (ex : lots d'un import) : aucun nouveau matching
+    bulk_enrich_transactions(db_session, property_id=prop.id)
+    assert matcher.find_best("LOYER").level_1 == "Loyers"
+    assert matcher.match_count == 3
+
+    # Nouvelle version des mappings : nouvel index, les noms sont reclassifiés une fois
+    db_session.add(Mapping(property_id=prop.id, nom="PRLV SEPA EDF", level_1="Charges", level_2="Energie"))
+    db_session.commit()
+    counts = bulk_enrich_transactions(db_session, property_id=prop.id)
+    assert (counts["updated"], counts["unchanged"]) == (200, 400)
+    assert get_mapping_matcher(db_session, prop.id).match_count == 3
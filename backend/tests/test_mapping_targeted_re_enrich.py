@@ -0,0 +1,92 @@
+"""
+Tests for the targeted re-enrichment after a mapping create/update/delete.
+
+⚠️ Before making changes, read: ../../docs/workflow/BEST_PRACTICES.md
+"""
+
+from datetime import date
+
+import pytest
+
+from backend.api.services.enrichment_service import bulk_enrich_transactions, get_transaction_names
+from backend.database.models import Property, Transaction, EnrichedTransaction
+
+
+@pytest.fixture
+def property_ids(db_session):
+    prop = Property(name="Targeted")
+    other = Property(name="Other")
+    db_session.add_all([prop, other])
+    db_session.commit()
+    names = ["LOYER"] * 3 + ["LOYER STUDIO"] * 2 + ["PRLV SEPA EDF"] * 2 + ["CHARGES"]
+    for day, nom in enumerate(names, start=1):
+        db_session.add(Transaction(property_id=prop.id, date=date(2024, 1, day), quantite=10.0, nom=nom, solde=0.0))
+    db_session.add(Transaction(property_id=other.id, date=date(2024, 1, 1), quantite=10.0, nom="LOYER", solde=0.0))
+    db_session.commit()
+    # Toutes les transactions enrichies sans mapping (non assignées)
+    bulk_enrich_transactions(db_session)
+    return prop.id, other.id
+
+
+def _levels(db, property_id):
+    rows = db.query(Transaction.nom, EnrichedTransaction.level_1).join(
+        EnrichedTransaction, EnrichedTransaction.transaction_id == Transaction.id
+    ).filter(Transaction.property_id == property_id).all()
+    return sorted(set(rows), key=lambda row: row[0])
+
+
+def test_transaction_names(db_session, property_ids):
+    """Noms distincts avec leurs effectifs, filtrés par sous-chaîne (sensible à la casse)."""
+    property_id, _ = property_ids
+    assert get_transaction_names(db_session, property_id) == {
+        "CHARGES": 1, "LOYER": 3, "LOYER STUDIO": 2, "PRLV SEPA EDF": 2
+    }
+    assert get_transaction_names(db_session, property_id, containing=["LOYER", " SEPA "]) == {
+        "LOYER": 3, "LOYER STUDIO": 2, "PRLV SEPA EDF": 2
+    }
+    assert get_transaction_names(db_session, property_id, containing=["loyer"]) == {}
+    assert get_transaction_names(db_session, property_id, containing=[""]) == {}
+
+
+def test_mapping_crud_re_enriches_impacted_names_only(db_session, property_ids, client, monkeypatch):
+    """Création, modification et suppression ne reclassifient que les noms contenant l'ancien ou le nouveau nom."""
+    property_id, other_id = property_ids
+    calls = []
+    from backend.api.services import enrichment_service
+    bulk = enrichment_service.bulk_enrich_transactions
+
+    def spy(db, property_id=None, transaction_ids=None, names=None):
+        counts = bulk(db, property_id=property_id, transaction_ids=transaction_ids, names=names)
+        calls.append((sorted(names), dict(counts)))
+        return counts
+
+    monkeypatch.setattr(enrichment_service, "bulk_enrich_transactions", spy)
+
+    response = client.post("/api/mappings", json={
+        "property_id": property_id, "nom": "LOYER", "level_1": "LOYERS", "level_2": "Produits", "level_3": "Résultat"
+    })
+    assert response.status_code == 201
+    mapping_id = response.json()["id"]
+    # "LOYER STUDIO" contient "LOYER" mais reste trop spécifique (seuil de 70%) : inchangée
+    assert calls[-1] == (["LOYER", "LOYER STUDIO"], {"created": 0, "updated": 3, "unchanged": 2})
+    assert _levels(db_session, property_id) == [
+        ("CHARGES", None), ("LOYER", "LOYERS"), ("LOYER STUDIO", None), ("PRLV SEPA EDF", None)
+    ]
+    assert _levels(db_session, other_id) == [("LOYER", None)]
+
+    response = client.put(f"/api/mappings/{mapping_id}", params={"property_id": property_id}, json={"nom": "LOYER STUDIO"})
+    assert response.status_code == 200
+    assert calls[-1] == (["LOYER", "LOYER STUDIO"], {"created": 0, "updated": 5, "unchanged": 0})
+    assert _levels(db_session, property_id) == [
+        ("CHARGES", None), ("LOYER", None), ("LOYER STUDIO", "LOYERS"), ("PRLV SEPA EDF", None)
+    ]
+
+    # Changement de niveaux seulement : mêmes noms impactés, seules les lignes du mapping sont écrites
+    response = client.put(f"/api/mappings/{mapping_id}", params={"property_id": property_id}, json={"level_1": "LOCATION"})
+    assert response.status_code == 200
+    assert calls[-1] == (["LOYER STUDIO"], {"created": 0, "updated": 2, "unchanged": 0})
+
+    response = client.delete(f"/api/mappings/{mapping_id}", params={"property_id": property_id})
+    assert response.status_code == 204
+    assert calls[-1] == (["LOYER STUDIO"], {"created": 0, "updated": 2, "unchanged": 0})
+    assert {level_1 for _, level_1 in _levels(db_session, property_id)} == {None}
@@ -0,0 +1,119 @@
+"""
+Tests for the bundled facets endpoint (GET /api/properties/{id}/facets) and its cache.
+
+⚠️ Before making changes, read: ../../docs/workflow/BEST_PRACTICES.md
+"""
+
+from datetime import date
+
+import pytest
+from sqlalchemy import event
+
+from backend.api.services.enrichment_service import bulk_enrich_transactions
+from backend.api.services.facets_service import get_property_facets
+from backend.database.models import Property, Transaction, Mapping, AllowedMapping
+
+
+@pytest.fixture
+def property_id(db_session):
+    prop = Property(name="Facettes")
+    other = Property(name="Autre")
+    db_session.add_all([prop, other])
+    db_session.commit()
+    db_session.add_all([
+        AllowedMapping(property_id=prop.id, level_1="LOYERS", level_2="Produits", level_3="Produits", is_hardcoded=True),
+        AllowedMapping(property_id=prop.id, level_1="CHARGES", level_2="Energie", level_3=None, is_hardcoded=True),
+        Mapping(property_id=prop.id, nom="LOYER", level_1="LOYERS", level_2="Produits", level_3="Produits"),
+        Mapping(property_id=prop.id, nom="EDF", level_1="CHARGES", level_2="Energie", level_3=None),
+        Transaction(property_id=prop.id, date=date(2023, 12, 5), quantite=700.0, nom="LOYER", solde=700.0),
+        Transaction(property_id=prop.id, date=date(2024, 1, 5), quantite=700.0, nom="LOYER", solde=1400.0),
+        Transaction(property_id=prop.id, date=date(2024, 1, 20), quantite=-80.0, nom="EDF", solde=1320.0),
+        Transaction(property_id=prop.id, date=date(2024, 2, 1), quantite=-10.0, nom="FRAIS", solde=1310.0),
+        Transaction(property_id=other.id, date=date(2024, 1, 1), quantite=1.0, nom="AUTRE", solde=1.0),
+    ])
+    db_session.commit()
+    bulk_enrich_transactions(db_session)
+    return prop.id
+
+
+def _values(facets, column):
+    return [(facet["value"], facet["count"]) for facet in facets["transactions"]["facets"][column]]
+
+
+def test_facets_content_and_cache(engine, db_session, property_id):
+    """Valeurs distinctes et effectifs, calculés une fois puis servis sans requête."""
+    statements = []
+
+    def record(conn, cursor, statement, parameters, context, executemany):
+        statements.append(statement)
+
+    event.listen(engine, "before_cursor_execute", record)
+    try:
+        facets = get_property_facets(db_session, property_id).content
+        queries = len(statements)
+        assert get_property_facets(db_session, property_id).content is facets
+    finally:
+        event.remove(engine, "before_cursor_execute", record)
+
+    # Noms, faits enrichis, mappings, mappings autorisés
+    assert queries == 4
+    assert len(statements) == queries
+    assert (facets["transactions"]["total"], facets["transactions"]["enriched"], facets["transactions"]["unassigned"]) == (4, 4, 1)
+    assert _values(facets, "nom") == [("EDF", 1), ("FRAIS", 1), ("LOYER", 2)]
+    assert _values(facets, "level_1") == [("CHARGES", 1), ("LOYERS", 2)]
+    assert _values(facets, "level_3") == [("Produits", 2)]
+    assert _values(facets, "annee") == [("2023", 1), ("2024", 3)]
+    assert _values(facets, "mois") == [("1", 2), ("2", 1), ("12", 1)]
+    assert facets["mappings"] == {"total": 2, "combinations": [
+        {"level_1": "CHARGES", "level_2": "Energie", "level_3": None, "count": 1},
+        {"level_1": "LOYERS", "level_2": "Produits", "level_3": "Produits", "count": 1},
+    ]}
+    assert facets["allowed"]["level_1"] == ["CHARGES", "LOYERS"]
+    assert facets["allowed"]["combinations"][0] == {"level_1": "CHARGES", "level_2": "Energie", "level_3": None}
+
+
+def test_facets_follow_data_version(db_session, property_id):
+    """Écritures ORM, écritures Core (enrichissement en masse) et mappings autorisés changent les facettes."""
+    version = get_property_facets(db_session, property_id).version
+
+    # Mise à jour du solde seul : facettes inchangées (pas de recalcul)
+    transaction = db_session.query(Transaction).filter(Transaction.nom == "FRAIS").one()
+    transaction.solde = 0.0
+    db_session.commit()
+    cached = get_property_facets(db_session, property_id)
+    assert cached.version == version
+
+    db_session.add(Transaction(property_id=property_id, date=date(2025, 3, 1), quantite=5.0, nom="FRAIS", solde=5.0))
+    db_session.commit()
+    facets = get_property_facets(db_session, property_id)
+    assert facets.version != version
+    assert _values(facets.content, "nom") == [("EDF", 1), ("FRAIS", 2), ("LOYER", 2)]
+    assert _values(facets.content, "annee") == [("2023", 1), ("2024", 3)]
+
+    bulk_enrich_transactions(db_session, property_id=property_id)
+    assert _values(get_property_facets(db_session, property_id).content, "annee") == [("2023", 1), ("2024", 3), ("2025", 1)]
+
+    db_session.add(AllowedMapping(property_id=property_id, level_1="TAXES", level_2="Impôts", level_3=None))
+    db_session.commit()
+    assert "TAXES" in get_property_facets(db_session, property_id).content["allowed"]["level_1"]
+
+
+def test_facets_endpoint_conditional_get(client, db_session, property_id):
+    """GET /properties/{id}/facets : ETag, 304 si à jour, 200 avec un nouvel ETag après modification, 404 inconnue."""
+    response = client.get(f"/api/properties/{property_id}/facets")
+    assert response.status_code == 200
+    assert response.json()["property_id"] == property_id
+    etag = response.headers["etag"]
+
+    assert client.get(f"/api/properties/{property_id}/facets", headers={"If-None-Match": etag}).status_code == 304
+
+    response = client.post("/api/mappings", json={
+        "property_id": property_id, "nom": "FRAIS", "level_1": "CHARGES", "level_2": "Energie"
+    })
+    assert response.status_code == 201
+    changed = client.get(f"/api/properties/{property_id}/facets", headers={"If-None-Match": etag})
+    assert changed.status_code == 200
+    assert changed.headers["etag"] != etag
+    assert changed.json()["transactions"]["unassigned"] == 0
+
+    assert client.get("/api/properties/999999/facets").status_code == 404
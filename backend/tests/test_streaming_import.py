@@ -0,0 +1,114 @@
+"""
+Tests for the streaming CSV import (transaction_import_service).
+
+⚠️ Before making changes, read: ../../docs/workflow/BEST_PRACTICES.md
+"""
+
+from datetime import date
+
+from backend.database.models import Property, Transaction
+from backend.api.utils.csv_utils import sniff_csv_format, read_csv_safely
+from backend.api.services import transaction_import_service
+from backend.api.services.transaction_import_service import stream_import_transactions, TransactionDuplicateIndex
+
+
+def test_sniff_matches_read_csv_safely():
+    """Le format détecté sur l'échantillon est celui retenu par read_csv_safely."""
+    content = "Date;Montant;Libellé\n01/01/2024;-12,50;CB CARREFOUR\n02/01/2024;800;VIR LOYER\n".encode('utf-8-sig')
+    encoding, separator, has_header, names = sniff_csv_format(content, is_complete=True)
+    _, expected_encoding, expected_separator = read_csv_safely(content)
+    assert separator == expected_separator == ';'
+    assert expected_encoding == 'utf-8'
+    assert encoding == 'utf-8-sig'  # BOM retiré pendant la lecture en flux
+    assert has_header and names is None
+
+    no_header = b"01/01/2024,-12.5,CB CARREFOUR\n02/01/2024,800,VIR LOYER\n"
+    assert sniff_csv_format(no_header, is_complete=True) == ('utf-8', ',', False, ['Col1', 'Col2', 'Col3'])
+
+
+def test_stream_import_chunks(db_session, tmp_path, monkeypatch):
+    """Import par blocs : validation, doublons existants, noms générés et progression."""
+    prop = Property(name="Streaming Test")
+    db_session.add(prop)
+    db_session.commit()
+    db_session.add(Transaction(property_id=prop.id, date=date(2024, 1, 3), quantite=-20.0, nom="CB BOULANGERIE", solde=-20.0))
+    db_session.commit()
+
+    lines = ["Date;Montant;Libelle"]
+    for day in range(1, 11):
+        lines.append(f"{day:02d}/02/2024;1 000,{day:02d};VIR LOYER {day}")
+    lines += [
+        "03/01/2024;-20,00;CB BOULANGERIE",  # doublon d'une transaction existante
+        "32/01/2024;10;DATE INVALIDE",
+        "05/01/2024;abc;MONTANT INVALIDE",
+        "06/01/2024;15;",
+        "06/01/2024;16;",
+        "",
+        "07/01/2024;-8,40;CAFÉ",
+    ]
+    # Un caractère latin-1 après l'échantillon : l'encodage est corrigé à la volée
+    monkeypatch.setattr(transaction_import_service, "HEAD_SAMPLE_SIZE", 64)
+    file_path = tmp_path / "releve.csv"
+    file_path.write_bytes("\n".join(lines).encode('latin-1'))
+
+    progress = []
+    stats = stream_import_transactions(
+        db_session, str(file_path), "releve.csv", prop.id,
+        {"Date": "date", "Montant": "quantite", "Libelle": "nom"},
+        chunk_size=4,
+        progress_callback=progress.append
+    )
+    db_session.commit()
+
+    assert stats["imported_count"] == 13
+    assert stats["duplicates_count"] == 1
+    assert stats["duplicates"][0]["nom"] == "CB BOULANGERIE"
+    # 3 erreurs de validation agrégées + 1 erreur de ligne (montant invalide)
+    assert stats["errors_count"] == 4  # noms vides : 2 lignes, 1 message agrégé
+    assert [e["error_message"] for e in stats["errors"][:2]] == [
+        "Erreur de validation: 1 dates invalides détectées",
+        "Erreur de validation: 1 valeurs numériques invalides dans Montant",
+    ]
+    assert stats["period_start"] == date(2024, 1, 6)
+    assert stats["period_end"] == date(2024, 2, 10)
+    assert len(stats["inserted_ids"]) == 13
+    # Les blocs lus avant la détection de l'encodage invalide sont annulés puis relus
+    assert [p["chunk"] for p in progress][-4:] == [1, 2, 3, 4]
+    assert progress[-1]["rows_read"] == 16
+
+    imported = {t.nom: t.quantite for t in db_session.query(Transaction).filter(Transaction.id.in_(stats["inserted_ids"]))}
+    assert imported["VIR LOYER 1"] == 1000.01
+    assert imported["CAFÉ"] == -8.4
+    assert imported["nom_a_justifier_1"] == 15.0
+    assert imported["nom_a_justifier_2"] == 16.0
+
+
+def test_duplicate_index(db_session):
+    """Index des doublons : isolation par propriété, extension de plage et compteur de noms générés."""
+    prop = Property(name="Duplicates Test")
+    other = Property(name="Other Duplicates Test")
+    db_session.add_all([prop, other])
+    db_session.commit()
+    db_session.add_all([
+        Transaction(property_id=prop.id, date=date(2024, 1, 10), quantite=-20.0, nom="CB BOULANGERIE", solde=0),
+        Transaction(property_id=prop.id, date=date(2024, 3, 1), quantite=800.0, nom="VIR LOYER", solde=0),
+        Transaction(property_id=other.id, date=date(2024, 1, 11), quantite=5.0, nom="CB TABAC", solde=0),
+        Transaction(property_id=other.id, date=date(2024, 1, 12), quantite=5.0, nom="nom_a_justifier_7", solde=0),
+    ])
+    db_session.commit()
+
+    index = TransactionDuplicateIndex(db_session, prop.id)
+    index.load_range(date(2024, 1, 1), date(2024, 1, 31))
+    existing_id = index.find(date(2024, 1, 10), -20.0, "CB BOULANGERIE")
+    assert existing_id is not None
+    assert index.find_without_nom(date(2024, 1, 10), -20.0) == (existing_id, "CB BOULANGERIE")
+    # Autre propriété et hors plage chargée
+    assert index.find(date(2024, 1, 11), 5.0, "CB TABAC") is None
+    assert index.find(date(2024, 3, 1), 800.0, "VIR LOYER") is None
+    index.load_range(date(2024, 2, 1), date(2024, 3, 31))
+    assert index.find(date(2024, 3, 1), 800.0, "VIR LOYER") is not None
+
+    # Compteur initialisé une seule fois au-delà du plus grand numéro existant
+    assert [index.next_generated_name() for _ in range(3)] == [
+        "nom_a_justifier_8", "nom_a_justifier_9", "nom_a_justifier_10"
+    ]
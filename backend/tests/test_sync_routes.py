@@ -0,0 +1,64 @@
+"""
+Tests that API routes run in the threadpool instead of blocking the event loop.
+
+⚠️ Before making changes, read: ../../docs/workflow/BEST_PRACTICES.md
+"""
+
+import asyncio
+import inspect
+import threading
+
+import httpx
+import pytest
+from fastapi.routing import APIRoute
+
+from backend.api.main import app
+from backend.api.routes import transactions
+from backend.database.models import Property
+
+
+@pytest.fixture
+def database_url(tmp_path):
+    """Base SQLite sur fichier : chaque requête a sa propre connexion."""
+    return f"sqlite:///{tmp_path / 'sync.db'}"
+
+
+def test_api_routes_are_sync():
+    """Les routes /api utilisent la Session synchrone : elles doivent être déclarées avec def."""
+    async_routes = [
+        f"{sorted(route.methods)} {route.path}"
+        for route in app.routes
+        if isinstance(route, APIRoute)
+        and route.path.startswith("/api")
+        and inspect.iscoroutinefunction(route.endpoint)
+    ]
+    assert async_routes == []
+
+
+def test_concurrent_requests_overlap(monkeypatch, db_session, override_db):
+    """Deux requêtes simultanées s'exécutent en parallèle (la première ne bloque pas la boucle)."""
+    db = db_session
+    prop = Property(name="Sync")
+    db.add(prop)
+    db.commit()
+    property_id = prop.id
+
+    # Chaque requête attend l'autre : n'aboutit que si les deux handlers tournent en même temps
+    barrier = threading.Barrier(2, timeout=5)
+    validate = transactions.validate_property_id
+
+    def validate_and_wait(db, property_id, *args):
+        barrier.wait()
+        return validate(db, property_id, *args)
+
+    async def load_twice():
+        transport = httpx.ASGITransport(app=app)
+        async with httpx.AsyncClient(transport=transport, base_url="http://test") as client:
+            return await asyncio.gather(*(
+                client.get("/api/transactions/imports", params={"property_id": property_id}) for _ in range(2)
+            ))
+
+    monkeypatch.setattr(transactions, "validate_property_id", validate_and_wait)
+    responses = asyncio.run(load_twice())
+
+    assert [response.status_code for response in responses] == [200, 200]
@@ -0,0 +1,148 @@
+"""
+Tests for the incrementally maintained transaction fact table (transaction_fact_service).
+
+⚠️ Before making changes, read: ../../docs/workflow/BEST_PRACTICES.md
+"""
+
+from datetime import date
+
+import pytest
+from sqlalchemy import delete, update
+
+from backend.database.models import Property, Transaction, EnrichedTransaction, Mapping, TransactionFact
+from backend.api.services.enrichment_service import bulk_enrich_transactions
+from backend.api.services.transaction_fact_service import (
+    check_transaction_facts,
+    get_level_1_totals,
+    rebuild_transaction_facts,
+    refresh_transaction_facts,
+    sum_level_1
+)
+
+
+def _add(db, property_id, transaction_date, quantite, level_1=None, level_3="R", nom="T"):
+    transaction = Transaction(property_id=property_id, date=transaction_date, quantite=quantite, nom=nom, solde=0.0)
+    db.add(transaction)
+    db.flush()
+    if level_1 is not None:
+        db.add(EnrichedTransaction(
+            transaction_id=transaction.id, property_id=property_id, annee=transaction_date.year,
+            mois=transaction_date.month, level_1=level_1, level_2="L2", level_3=level_3
+        ))
+    return transaction
+
+
+@pytest.fixture
+def property_id(db_session):
+    prop = Property(name="Facts Test")
+    other = Property(name="Other")
+    db_session.add_all([prop, other])
+    db_session.commit()
+    _add(db_session, prop.id, date(2021, 1, 5), 100.0, "LOYERS")
+    _add(db_session, prop.id, date(2021, 1, 20), 50.0, "LOYERS")
+    _add(db_session, prop.id, date(2021, 3, 1), -30.0, "CHARGES")
+    _add(db_session, prop.id, date(2022, 6, 15), 200.0, "LOYERS", level_3="Autre")
+    _add(db_session, prop.id, date(2022, 6, 16), 999.0)  # non enrichie : absente des faits
+    _add(db_session, other.id, date(2021, 1, 5), 7.0, "LOYERS")
+    db_session.commit()
+    return prop.id
+
+
+def _facts(db, property_id):
+    return sorted(
+        (row.annee, row.mois, row.level_1, row.level_3, row.total, row.transaction_count)
+        for row in db.query(TransactionFact).filter(TransactionFact.property_id == property_id)
+    )
+
+
+def test_facts_follow_orm_writes(db_session, property_id):
+    """Créations, modifications et suppressions ORM mettent à jour la table dans la même transaction."""
+    assert _facts(db_session, property_id) == [
+        (2021, 1, "LOYERS", "R", 150.0, 2),
+        (2021, 3, "CHARGES", "R", -30.0, 1),
+        (2022, 6, "LOYERS", "Autre", 200.0, 1),
+    ]
+
+    transaction = db_session.query(Transaction).filter(Transaction.quantite == 50.0).one()
+    transaction.date = date(2023, 2, 1)
+    transaction.quantite = 60.0
+    db_session.query(EnrichedTransaction).filter(EnrichedTransaction.level_1 == "CHARGES").one().level_1 = "TRAVAUX"
+    db_session.flush()
+    assert _facts(db_session, property_id) == [
+        (2021, 1, "LOYERS", "R", 100.0, 1),
+        (2021, 3, "TRAVAUX", "R", -30.0, 1),
+        (2022, 6, "LOYERS", "Autre", 200.0, 1),
+        (2023, 2, "LOYERS", "R", 60.0, 1),
+    ]
+
+    # Mise à jour du solde uniquement : rien à recalculer
+    transaction.solde = 42.0
+    db_session.rollback()
+    assert check_transaction_facts(db_session) == []
+    assert _facts(db_session, property_id)[0] == (2021, 1, "LOYERS", "R", 150.0, 2)
+
+    # Comme DELETE /transactions/{id} : l'enrichissement puis la transaction
+    removed = db_session.query(Transaction).filter(Transaction.quantite == 200.0).one()
+    db_session.query(EnrichedTransaction).filter(EnrichedTransaction.transaction_id == removed.id).delete()
+    db_session.delete(removed)
+    db_session.commit()
+    assert [fact[:2] for fact in _facts(db_session, property_id)] == [(2021, 1), (2021, 3)]
+    assert check_transaction_facts(db_session) == []
+
+
+def test_facts_follow_bulk_statements(db_session, property_id):
+    """query.delete()/update() et les instructions 2.0 sont prises en compte."""
+    db_session.query(EnrichedTransaction).filter(EnrichedTransaction.level_1 == "CHARGES").delete()
+    assert check_transaction_facts(db_session) == []
+    db_session.query(EnrichedTransaction).filter(EnrichedTransaction.level_1 == "LOYERS").update(
+        {EnrichedTransaction.level_3: "Nouveau"}, synchronize_session=False
+    )
+    assert check_transaction_facts(db_session) == []
+    db_session.query(Transaction).filter(Transaction.property_id == property_id).update(
+        {Transaction.date: date(2030, 1, 1)}, synchronize_session=False
+    )
+    assert check_transaction_facts(db_session) == []
+
+    db_session.execute(delete(EnrichedTransaction).where(EnrichedTransaction.property_id == property_id))
+    db_session.execute(update(Transaction).where(Transaction.quantite == 7.0).values(quantite=8.0))
+    db_session.commit()
+    assert _facts(db_session, property_id) == []
+    assert check_transaction_facts(db_session) == []
+
+
+def test_bulk_enrichment_refreshes_facts(db_session, property_id):
+    """L'enrichissement en masse (écriture Core) recalcule les faits."""
+    db_session.add(Mapping(property_id=property_id, nom="T", level_1="DIVERS", level_2="L2", level_3="R"))
+    db_session.commit()
+    bulk_enrich_transactions(db_session, property_id=property_id)
+    assert check_transaction_facts(db_session) == []
+    assert {fact[2] for fact in _facts(db_session, property_id)} == {"DIVERS"}
+    assert sum(fact[5] for fact in _facts(db_session, property_id)) == 5
+
+
+def test_checker_detects_and_rebuild_fixes_drift(db_session, property_id):
+    """Le vérificateur signale les écarts ; la reconstruction les corrige."""
+    db_session.connection().execute(update(TransactionFact).where(TransactionFact.level_1 == "CHARGES").values(total=1.0))
+    db_session.connection().execute(delete(TransactionFact).where(TransactionFact.annee == 2022))
+    differences = check_transaction_facts(db_session, property_id)
+    assert [(d["level_1"], d["expected_total"], d["stored_total"]) for d in differences] == [
+        ("CHARGES", -30.0, 1.0),
+        ("LOYERS", 200.0, 0.0),
+    ]
+    assert refresh_transaction_facts(db_session, property_id, [2022]) == 1
+    assert len(check_transaction_facts(db_session, property_id)) == 1
+    rebuild_transaction_facts(db_session)
+    assert check_transaction_facts(db_session) == []
+
+
+def test_readers(db_session, property_id):
+    """Sommes par (année, level_1) et somme cumulée d'un level_1 jusqu'à une date."""
+    assert sorted(get_level_1_totals(db_session, property_id, level_3_values=["R"])) == [
+        (2021, "CHARGES", -30.0),
+        (2021, "LOYERS", 150.0),
+    ]
+    assert get_level_1_totals(db_session, property_id, start_year=2022, level_1_values=["LOYERS"]) == [(2022, "LOYERS", 200.0)]
+    assert sum_level_1(db_session, property_id, "LOYERS") == 350.0
+    assert sum_level_1(db_session, property_id, "LOYERS", date(2021, 1, 10)) == 100.0
+    assert sum_level_1(db_session, property_id, "LOYERS", date(2022, 6, 30)) == 350.0
+    assert sum_level_1(db_session, property_id, "LOYERS", date(2020, 12, 31)) is None
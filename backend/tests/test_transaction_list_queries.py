@@ -0,0 +1,132 @@
+"""
+Tests for the single-query transaction listings (transactions, export, pivot details).
+
+⚠️ Before making changes, read: ../../docs/workflow/BEST_PRACTICES.md
+"""
+
+from datetime import date
+
+import pytest
+from sqlalchemy import event
+
+from backend.database.models import Property, Transaction, EnrichedTransaction
+
+
+@pytest.fixture
+def property_id(session_factory):
+    """Propriété avec 30 transactions, dont une sur deux classée."""
+    db = session_factory()
+    prop = Property(name="Listing Test")
+    db.add(prop)
+    db.commit()
+    transactions = [
+        Transaction(property_id=prop.id, date=date(2024, 1, day), quantite=float(day), nom=f"T{day:02d}", solde=0.0)
+        for day in range(1, 31)
+    ]
+    db.add_all(transactions)
+    db.commit()
+    db.add_all([
+        EnrichedTransaction(transaction_id=t.id, property_id=prop.id, annee=2024, mois=1, level_1="CHARGES", level_2=f"L2-{t.nom}")
+        for t in transactions[::2]
+    ])
+    db.commit()
+    prop_id = prop.id
+    db.close()
+    return prop_id
+
+
+def _count_selects(engine):
+    selects = []
+
+    @event.listens_for(engine, "before_cursor_execute")
+    def _record(conn, cursor, statement, parameters, context, executemany):
+        if statement.lstrip().upper().startswith("SELECT"):
+            selects.append(statement)
+
+    return selects
+
+
+def test_transactions_list_constant_queries(engine, client, property_id):
+    """La liste paginée ne fait plus une requête par transaction."""
+    selects = _count_selects(engine)
+    response = client.get("/api/transactions", params={
+        "property_id": property_id, "limit": 25, "sort_by": "date", "sort_direction": "asc"
+    })
+    assert response.status_code == 200
+    data = response.json()
+    assert data["total"] == 30
+    assert len(data["transactions"]) == 25
+    # validation de la propriété + total + page
+    assert len(selects) == 3
+
+    first, second = data["transactions"][:2]
+    assert (first["nom"], first["level_1"], first["level_2"]) == ("T01", "CHARGES", "L2-T01")
+    assert (second["nom"], second["level_1"], second["level_2"]) == ("T02", None, None)
+
+    # Filtre et tri sur la classification : la jointure n'est pas dupliquée
+    response = client.get("/api/transactions", params={
+        "property_id": property_id, "filter_level_2": "t1", "sort_by": "level_2", "unclassified_only": False
+    })
+    assert [t["nom"] for t in response.json()["transactions"]] == ["T19", "T17", "T15", "T13", "T11"]
+    response = client.get("/api/transactions", params={"property_id": property_id, "unclassified_only": True})
+    assert response.json()["total"] == 15
+
+
+def test_export_and_pivot_details(engine, client, property_id):
+    """Export et détails du tableau croisé utilisent la même requête jointe."""
+    selects = _count_selects(engine)
+    response = client.get("/api/transactions/export", params={"property_id": property_id, "format": "csv"})
+    assert response.status_code == 200
+    assert len(selects) == 2
+    lines = response.content.decode("utf-8-sig").splitlines()
+    assert len(lines) == 31
+    assert lines[1].split(",")[5:8] == ["CHARGES", "L2-T01", ""]
+    assert lines[2].split(",")[5:8] == ["", "", ""]
+
+    selects.clear()
+    response = client.get("/api/analytics/pivot/details", params={
+        "property_id": property_id, "rows": "level_1", "row_values": '["CHARGES"]'
+    })
+    assert response.status_code == 200
+    data = response.json()
+    assert data["total"] == 15
+    assert all(t["level_1"] == "CHARGES" for t in data["transactions"])
+    assert len(selects) == 3
+
+
+def test_cursor_pagination_matches_offset(session_factory, client, property_id):
+    """Le parcours par curseur renvoie exactement l'ordre de la pagination par offset, pour chaque tri."""
+    db = session_factory()
+    # Ex-aequo sur la date, la quantité, le nom et la classification
+    db.add_all([
+        Transaction(property_id=property_id, date=date(2024, 1, 5), quantite=5.0, nom="T05", solde=0.0)
+        for _ in range(3)
+    ])
+    db.commit()
+    db.close()
+
+    for sort_by in ["date", "quantite", "nom", "solde", "level_1", "level_2", "level_3"]:
+        for direction in ["asc", "desc"]:
+            params = {"property_id": property_id, "sort_by": sort_by, "sort_direction": direction}
+            expected = [t["id"] for t in client.get("/api/transactions", params={**params, "limit": 1000}).json()["transactions"]]
+            assert len(expected) == 33
+
+            seen = []
+            cursor = ""
+            while cursor is not None:
+                data = client.get("/api/transactions", params={**params, "limit": 4, "cursor": cursor}).json()
+                assert data["total"] is None
+                seen += [t["id"] for t in data["transactions"]]
+                cursor = data["next_cursor"]
+            assert seen == expected, (sort_by, direction)
+
+    # Total sur demande, curseur incompatible avec le tri demandé
+    data = client.get("/api/transactions", params={
+        "property_id": property_id, "limit": 4, "cursor": "", "include_total": True
+    }).json()
+    assert data["total"] == 33
+    response = client.get("/api/transactions", params={
+        "property_id": property_id, "sort_by": "nom", "cursor": data["next_cursor"]
+    })
+    assert response.status_code == 400
+    assert client.get("/api/transactions", params={"property_id": property_id, "cursor": "???"}).status_code == 400
@@ -142,6 +142,7 @@ export interface TransactionListResponse {
   total: number;
   page: number;
   page_size: number;
+  next_cursor?: string | null;
 }
 
 /**
@@ -496,7 +497,7 @@ export interface MappingError {
 
 export interface DuplicateMapping {
   nom: string;
-  existing_id: number;
+  existing_id: number | null;
 }
 
 export interface MappingImportResponse {
@@ -1476,6 +1477,19 @@ export interface AmortizationTypeTransactionCountResponse {
   transaction_count: number;
 }
 
+export interface AmortizationTypeSummaryItem {
+  type_id: number;
+  type_name: string;
+  amount: number;
+  cumulated_amount: number;
+  transaction_count: number;
+}
+
+export interface AmortizationTypeSummaryResponse {
+  items: AmortizationTypeSummaryItem[];
+  total: number;
+}
+
 export const amortizationTypesAPI = {
   /**
    * Liste tous les types d'amortissement
@@ -1554,6 +1568,13 @@ export const amortizationTypesAPI = {
   getTransactionCount: async (propertyId: number, id: number): Promise<AmortizationTypeTransactionCountResponse> => {
     return fetchAPI<AmortizationTypeTransactionCountResponse>(`/api/amortization/types/${id}/transaction-count?property_id=${propertyId}`);
   },
+
+  /**
+   * Montant, montant cumulé et nombre de transactions de tous les types d'une propriété
+   */
+  getSummary: async (propertyId: number): Promise<AmortizationTypeSummaryResponse> => {
+    return fetchAPI<AmortizationTypeSummaryResponse>(`/api/amortization/types/summary?property_id=${propertyId}`);
+  },
 };
 
 // Loan Config interfaces and API
@@ -2266,6 +2287,30 @@ export interface PropertyListResponse {
   total: number;
 }
 
+export interface FacetValue {
+  value: string;
+  count: number;
+}
+
+export interface PropertyFacets {
+  property_id: number;
+  transactions: {
+    total: number;
+    enriched: number;
+    unassigned: number;
+    facets: Record<'nom' | 'level_1' | 'level_2' | 'level_3' | 'annee' | 'mois', FacetValue[]>;
+  };
+  mappings: {
+    total: number;
+    combinations: { level_1: string | null; level_2: string | null; level_3: string | null; count: number }[];
+  };
+  allowed: {
+    level_1: string[];
+    level_2: string[];
+    combinations: { level_1: string; level_2: string; level_3: string | null }[];
+  };
+}
+
 export const propertiesAPI = {
   /**
    * Récupère toutes les propriétés
@@ -2313,6 +2358,14 @@ export const propertiesAPI = {
       method: 'DELETE',
     });
   },
+
+  /**
+   * Récupère en un appel les valeurs distinctes (transactions, mappings, mappings autorisés)
+   * (réponse avec ETag : revalidée par le cache HTTP du navigateur)
+   */
+  getFacets: async (id: number): Promise<PropertyFacets> => {
+    return fetchAPI<PropertyFacets>(`/api/properties/${id}/facets`);
+  },
 };
 
 export const bilanAPI = {
@@ -2461,3 +2514,99 @@ export const bilanAPI = {
     });
   },
 };
+
+// Background jobs
+
+export type JobKind = 're_enrich' | 'amortization_recalculate' | 'allowed_mappings_reset';
+
+export type JobStatus = 'pending' | 'running' | 'succeeded' | 'failed';
+
+export interface Job {
+  id: number;
+  property_id: number;
+  kind: JobKind;
+  status: JobStatus;
+  progress: number;
+  message?: string | null;
+  result?: Record<string, any> | null;
+  error?: string | null;
+  created_at: string;
+  started_at?: string | null;
+  finished_at?: string | null;
+}
+
+export interface JobProgress {
+  id: number;
+  status: JobStatus;
+  progress: number;
+  message?: string | null;
+}
+
+export interface JobListResponse {
+  items: Job[];
+  total: number;
+}
+
+export const jobsAPI = {
+  /**
+   * Soumet une tâche de fond pour une propriété (exécutée après les tâches en cours de cette propriété)
+   */
+  submit: async (propertyId: number, kind: JobKind, params: Record<string, any> = {}): Promise<Job> => {
+    if (!propertyId) {
+      console.error('[API] jobsAPI.submit - propertyId manquant');
+      throw new Error('propertyId est obligatoire');
+    }
+    return fetchAPI<Job>('/api/jobs', {
+      method: 'POST',
+      body: JSON.stringify({ kind, property_id: propertyId, params }),
+    });
+  },
+
+  /**
+   * Récupère une tâche (résultat ou erreur une fois terminée)
+   */
+  get: async (jobId: number): Promise<Job> => {
+    return fetchAPI<Job>(`/api/jobs/${jobId}`);
+  },
+
+  /**
+   * Récupère l'avancement d'une tâche (réponse légère pour le polling)
+   */
+  getProgress: async (jobId: number): Promise<JobProgress> => {
+    return fetchAPI<JobProgress>(`/api/jobs/${jobId}/progress`);
+  },
+
+  /**
+   * Liste les tâches récentes d'une propriété
+   */
+  list: async (propertyId: number, status?: JobStatus, limit: number = 50): Promise<JobListResponse> => {
+    const params = new URLSearchParams({
+      property_id: propertyId.toString(),
+      limit: limit.toString(),
+    });
+    if (status) params.append('status', status);
+    return fetchAPI<JobListResponse>(`/api/jobs?${params}`);
+  },
+
+  /**
+   * Attend la fin d'une tâche en interrogeant son avancement, puis retourne la tâche terminée
+   */
+  waitFor: async (
+    jobId: number,
+    onProgress?: (progress: JobProgress) => void,
+    intervalMs: number = 1000
+  ): Promise<Job> => {
+    while (true) {
+      const progress = await jobsAPI.getProgress(jobId);
+      onProgress?.(progress);
+      if (progress.status === 'succeeded' || progress.status === 'failed') {
+        const job = await jobsAPI.get(jobId);
+        if (job.status === 'failed') {
+          throw new Error(job.error || `La tâche ${jobId} a échoué`);
+        }
+        return job;
+      }
+      await new Promise((resolve) => setTimeout(resolve, intervalMs));
+    }
+  },
+};
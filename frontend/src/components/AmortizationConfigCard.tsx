@@ -257,59 +257,51 @@ export default function AmortizationConfigCard({
     }
   };
 
-  // Charger le nombre de transactions pour tous les types
-  const loadTransactionCounts = async () => {
+  // Charger montants, montants cumulés et nombres de transactions de tous les types en une requête
+  const loadSummaries = async () => {
     if (!selectedLevel2Value || amortizationTypes.length === 0) {
       setTransactionCounts({});
+      setAmounts({});
+      setCumulatedAmounts({});
       return;
     }
 
+    // Marquer tous les types comme en cours de chargement
+    const loadingState: Record<number, boolean> = {};
+    amortizationTypes.forEach(type => {
+      loadingState[type.id] = true;
+    });
+    setLoadingTransactionCounts(loadingState);
+    setLoadingAmounts(loadingState);
+    setLoadingCumulatedAmounts(loadingState);
+
     try {
-      // Marquer tous les types comme en cours de chargement
-      const loadingState: Record<number, boolean> = {};
-      amortizationTypes.forEach(type => {
-        loadingState[type.id] = true;
-      });
-      setLoadingTransactionCounts(loadingState);
-      
-      // Charger les compteurs pour tous les types en parallèle
-      const countPromises = amortizationTypes.map(async (type) => {
-          try {
-          const response = await amortizationTypesAPI.getTransactionCount(activeProperty.id, type.id);
-          return { typeId: type.id, count: response.transaction_count };
-          } catch (err: any) {
-          // Ignorer silencieusement les erreurs 404 (type non trouvé - peut arriver après suppression ou réinitialisation)
-          // Vérifier le statut ou le message d'erreur
-          const errorMessage = err?.message || err?.toString() || '';
-          const is404 = err?.status === 404 || 
-                       errorMessage.includes('404') || 
-                       errorMessage.includes('non trouvé') ||
-                       errorMessage.includes('Type d\'amortissement non trouvé');
-          
-          if (is404) {
-            // Type supprimé ou non trouvé - retourner 0 sans logger
-            return { typeId: type.id, count: 0 };
-      }
-      
-          // Logger seulement les autres erreurs
-          console.error(`Erreur lors du chargement du nombre de transactions pour le type ${type.id}:`, err);
-          return { typeId: type.id, count: 0 };
-    }
-      });
+      const response = await amortizationTypesAPI.getSummary(activeProperty.id);
 
-      const results = await Promise.all(countPromises);
-      
-      // Mettre à jour les compteurs
+      // Les types absents de la réponse (supprimés entre-temps) valent 0
       const newCounts: Record<number, number> = {};
-      results.forEach(({ typeId, count }) => {
-        newCounts[typeId] = count;
+      const newAmounts: Record<number, number> = {};
+      const newCumulatedAmounts: Record<number, number> = {};
+      amortizationTypes.forEach(type => {
+        newCounts[type.id] = 0;
+        newAmounts[type.id] = 0;
+        newCumulatedAmounts[type.id] = 0;
+      });
+      response.items.forEach(item => {
+        newCounts[item.type_id] = item.transaction_count;
+        newAmounts[item.type_id] = item.amount;
+        newCumulatedAmounts[item.type_id] = item.cumulated_amount;
       });
       setTransactionCounts(newCounts);
+      setAmounts(newAmounts);
+      setCumulatedAmounts(newCumulatedAmounts);
     } catch (err: any) {
-      console.error('Erreur lors du chargement des nombres de transactions:', err);
+      console.error('Erreur lors du chargement du résumé des types:', err);
     } finally {
       // Marquer tous les types comme terminés
       setLoadingTransactionCounts({});
+      setLoadingAmounts({});
+      setLoadingCumulatedAmounts({});
     }
   };
 
@@ -320,111 +312,6 @@ export default function AmortizationConfigCard({
     // eslint-disable-next-line react-hooks/exhaustive-deps
   }, [selectedLevel2Value, activeProperty?.id]); // Recharger aussi quand activeProperty change
 
-  // Charger le montant d'immobilisation pour tous les types
-  const loadAmounts = async () => {
-    if (!selectedLevel2Value || amortizationTypes.length === 0) {
-      setAmounts({});
-      return;
-      }
-
-      try {
-      // Marquer tous les types comme en cours de chargement
-      const loadingState: Record<number, boolean> = {};
-      amortizationTypes.forEach(type => {
-        loadingState[type.id] = true;
-      });
-      setLoadingAmounts(loadingState);
-
-      // Charger les montants pour tous les types en parallèle
-      const amountPromises = amortizationTypes.map(async (type) => {
-    try {
-          const response = await amortizationTypesAPI.getAmount(activeProperty.id, type.id);
-          return { typeId: type.id, amount: response.amount };
-    } catch (err: any) {
-          // Ignorer silencieusement les erreurs 404 (type non trouvé - peut arriver après suppression ou réinitialisation)
-          const errorMessage = err?.message || err?.toString() || '';
-          const is404 = errorMessage.includes('404') || 
-                       errorMessage.includes('non trouvé') ||
-                       errorMessage.includes('Type d\'amortissement non trouvé') ||
-                       err?.status === 404;
-          
-          if (is404) {
-            return { typeId: type.id, amount: 0 };
-          }
-          console.error(`Erreur lors du chargement du montant pour le type ${type.id}:`, err);
-          return { typeId: type.id, amount: 0 };
-    }
-      });
-
-      const results = await Promise.all(amountPromises);
-      
-      // Mettre à jour les montants
-      const newAmounts: Record<number, number> = {};
-      results.forEach(({ typeId, amount }) => {
-        newAmounts[typeId] = amount;
-      });
-      setAmounts(newAmounts);
-    } catch (err: any) {
-      console.error('Erreur lors du chargement des montants:', err);
-    } finally {
-      // Marquer tous les types comme terminés
-      setLoadingAmounts({});
-    }
-  };
-
-  // Charger le montant cumulé d'amortissement pour tous les types
-  const loadCumulatedAmounts = async () => {
-    if (!selectedLevel2Value || amortizationTypes.length === 0) {
-      setCumulatedAmounts({});
-        return;
-      }
-      
-    try {
-      // Marquer tous les types comme en cours de chargement
-      const loadingState: Record<number, boolean> = {};
-      amortizationTypes.forEach(type => {
-        loadingState[type.id] = true;
-      });
-      setLoadingCumulatedAmounts(loadingState);
-      
-      // Charger les montants cumulés pour tous les types en parallèle
-      const cumulatedPromises = amortizationTypes.map(async (type) => {
-        try {
-          const response = await amortizationTypesAPI.getCumulated(activeProperty.id, type.id);
-          return { typeId: type.id, cumulatedAmount: response.cumulated_amount };
-    } catch (err: any) {
-          // Ignorer silencieusement les erreurs 404 (type non trouvé - peut arriver après suppression ou réinitialisation)
-          const errorMessage = err?.message || err?.toString() || '';
-          const is404 = errorMessage.includes('404') || 
-                       errorMessage.includes('non trouvé') ||
-                       errorMessage.includes('Type d\'amortissement non trouvé') ||
-                       err?.status === 404;
-          
-          if (is404) {
-            return { typeId: type.id, cumulatedAmount: 0 };
-          }
-          console.error(`Erreur lors du chargement du montant cumulé pour le type ${type.id}:`, err);
-          return { typeId: type.id, cumulatedAmount: 0 };
-        }
-      });
-
-      const results = await Promise.all(cumulatedPromises);
-      
-      // Mettre à jour les montants cumulés
-      const newCumulatedAmounts: Record<number, number> = {};
-      results.forEach(({ typeId, cumulatedAmount }) => {
-        newCumulatedAmounts[typeId] = cumulatedAmount;
-      });
-      setCumulatedAmounts(newCumulatedAmounts);
-      console.log('[AmortizationConfigCard] Montants cumulés chargés:', newCumulatedAmounts);
-    } catch (err: any) {
-      console.error('Erreur lors du chargement des montants cumulés:', err);
-    } finally {
-      // Marquer tous les types comme terminés
-      setLoadingCumulatedAmounts({});
-    }
-  };
-
   // Fonction pour rafraîchir toutes les données (montants, cumulés, compteurs)
   const refreshAll = async () => {
     if (!selectedLevel2Value || amortizationTypes.length === 0) {
@@ -432,12 +319,8 @@ export default function AmortizationConfigCard({
     }
     
     try {
-      // Recharger toutes les données en parallèle
-      await Promise.all([
-        loadAmounts(),
-        loadCumulatedAmounts(),
-        loadTransactionCounts(),
-      ]);
+      // Recharger toutes les données en une requête
+      await loadSummaries();
       
       // Notifier le parent pour rafraîchir le tableau
       if (onConfigUpdated) {
@@ -480,9 +363,7 @@ export default function AmortizationConfigCard({
       
       // Recharger les types et les montants
       await loadAmortizationTypes();
-      await loadTransactionCounts();
-      await loadAmounts();
-      await loadCumulatedAmounts();
+      await loadSummaries();
       
       // Notifier le parent si nécessaire
       if (onConfigUpdated) {
@@ -549,9 +430,7 @@ export default function AmortizationConfigCard({
       // Ensuite recharger les montants (qui utiliseront la nouvelle liste de types)
       // Petit délai pour s'assurer que les types sont bien mis à jour
       setTimeout(() => {
-        loadTransactionCounts();
-        loadAmounts();
-        loadCumulatedAmounts();
+        loadSummaries();
       }, 100);
 
       // Notifier le parent si nécessaire
@@ -588,9 +467,7 @@ export default function AmortizationConfigCard({
     if (amortizationTypes.length > 0 && selectedLevel2Value && !loadingTypes) {
       // Petit délai pour s'assurer que les types sont bien en base après création
       const timeoutId = setTimeout(() => {
-        loadTransactionCounts();
-        loadAmounts(); // Charger aussi les montants
-        loadCumulatedAmounts(); // Charger aussi les montants cumulés
+        loadSummaries();
       }, 100);
       
       return () => clearTimeout(timeoutId);
@@ -745,8 +622,8 @@ export default function AmortizationConfigCard({
       // Appel à l'API de recalcul
       await amortizationAPI.recalculate(activeProperty.id);
       
-      // Recharger les montants cumulés après le recalcul
-      await loadCumulatedAmounts();
+      // Recharger les montants cumulés (calculés depuis les résultats) après le recalcul
+      await loadSummaries();
       
       // Rafraîchir le tableau d'amortissements
       if (onConfigUpdated) {
@@ -785,11 +662,8 @@ export default function AmortizationConfigCard({
       // Recharger les types pour avoir la valeur à jour
       await loadAmortizationTypes();
       
-      // Recharger les compteurs de transactions après modification des Level 1
-      await loadTransactionCounts();
-      
-      // Recharger les montants après modification des Level 1
-      await loadAmounts();
+      // Recharger les compteurs de transactions et les montants après modification des Level 1
+      await loadSummaries();
       
       // Déclencher le recalcul automatique des amortissements
       await triggerAutoRecalculate();
@@ -911,7 +785,7 @@ export default function AmortizationConfigCard({
       await loadAmortizationTypes();
       
       // Recharger les montants pour recalculer l'annuité automatiquement
-      await loadAmounts();
+      await loadSummaries();
       
       setEditingDurationId(null);
       setEditingDurationValue('');
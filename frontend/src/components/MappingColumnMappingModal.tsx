@@ -128,7 +128,7 @@ export default function MappingColumnMappingModal({
             addLogEntry(
               newLogId,
               'Étape 3: Doublon détecté',
-              `Doublon ${index + 1}/${totalDuplicates}: "${dup.nom}" (ID existant: ${dup.existing_id})`,
+              `Doublon ${index + 1}/${totalDuplicates}: "${dup.nom}" (${dup.existing_id !== null ? `ID existant: ${dup.existing_id}` : 'déjà présent dans le fichier'})`,
               'warning'
             );
           });
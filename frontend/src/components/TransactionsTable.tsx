@@ -7,7 +7,7 @@
 'use client';
 
 import { useState, useEffect, useMemo, useCallback } from 'react';
-import { transactionsAPI, Transaction, TransactionUpdate, enrichmentAPI, mappingsAPI } from '@/api/client';
+import { transactionsAPI, Transaction, TransactionUpdate, enrichmentAPI, mappingsAPI, propertiesAPI, PropertyFacets } from '@/api/client';
 import { useProperty } from '@/contexts/PropertyContext';
 
 interface TransactionsTableProps {
@@ -261,47 +261,30 @@ export default function TransactionsTable({ onDelete, unclassifiedOnly = false,
   // Pour quantite et solde, on n'applique le filtre que manuellement (pas de debounce automatique)
   // Le filtre sera appliqué via onBlur ou onKeyDown (Enter)
 
-  // Step 5.5.3: Charger les level_1 autorisés au montage
+  // Step 5.5.3: Charger les level_1 autorisés et les valeurs uniques des filtres au montage (un seul appel)
   useEffect(() => {
-    const loadAllowedLevel1 = async () => {
+    const loadFacets = async () => {
       if (!activeProperty || !activeProperty.id || activeProperty.id <= 0) {
-        console.warn('[TransactionsTable] loadAllowedLevel1 - PROPERTY INVALIDE. Skipping API calls.');
+        console.warn('[TransactionsTable] loadFacets - PROPERTY INVALIDE. Skipping API calls.');
         return;
       }
       try {
-        const response = await mappingsAPI.getAllowedLevel1(activeProperty.id);
-        setAllowedLevel1List(response.level_1 || []);
+        const facets = await propertiesAPI.getFacets(activeProperty.id);
+        const values = (column: keyof PropertyFacets['transactions']['facets']) =>
+          facets.transactions.facets[column].map(facet => facet.value);
+        setAllowedLevel1List(facets.allowed.level_1);
+        setUniqueNoms(values('nom'));
+        setUniqueLevel1s(values('level_1'));
+        setUniqueLevel2s(values('level_2'));
+        setUniqueLevel3s(values('level_3'));
       } catch (err) {
-        console.error('Error loading allowed level_1:', err);
+        console.error('Error loading facets:', err);
       }
     };
-    loadAllowedLevel1();
+    loadFacets();
   }, [activeProperty?.id]);
   // Cela évite de filtrer pendant la saisie et de tout cacher si aucune transaction ne correspond
 
-  // Charger les valeurs uniques pour les filtres
-  useEffect(() => {
-    if (!activeProperty || !activeProperty.id || activeProperty.id <= 0) return;
-    
-    const loadUniqueValues = async () => {
-      try {
-        const [noms, level1s, level2s, level3s] = await Promise.all([
-        transactionsAPI.getUniqueValues(activeProperty.id, 'nom'),
-        transactionsAPI.getUniqueValues(activeProperty.id, 'level_1'),
-        transactionsAPI.getUniqueValues(activeProperty.id, 'level_2'),
-        transactionsAPI.getUniqueValues(activeProperty.id, 'level_3'),
-        ]);
-        setUniqueNoms(noms.values);
-        setUniqueLevel1s(level1s.values);
-        setUniqueLevel2s(level2s.values);
-        setUniqueLevel3s(level3s.values);
-      } catch (err) {
-        console.error('Error loading unique values:', err);
-      }
-    };
-    loadUniqueValues();
-  }, [activeProperty?.id]);
-
   const handleSort = useCallback((column: SortColumn) => {
     if (sortColumn === column) {
       setSortDirection(sortDirection === 'asc' ? 'desc' : 'asc');
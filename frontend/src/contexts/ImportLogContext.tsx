@@ -30,7 +30,7 @@ export interface ImportLogEntry {
       date?: string;
       quantite?: number;
       nom: string;
-      existing_id: number;
+      existing_id: number | null;
     }>;
   };
   error?: string;